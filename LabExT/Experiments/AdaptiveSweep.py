@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import logging
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from LabExT.Experiments.SweepGrid import SweepGrid
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Measurements.MeasAPI.Measparam import MeasParamInt
+
+if TYPE_CHECKING:
+    from LabExT.Experiments.ToDo import DictionaryWrapper
+    from LabExT.Wafer.Device import Device
+    from pandas import DataFrame
+else:
+    DictionaryWrapper = None
+    Device = None
+    DataFrame = None
+
+# refine where the figure of merit changes fastest
+GOAL_GRADIENT = "gradient"
+# refine around the smallest / largest figure of merit
+GOAL_MINIMUM = "minimum"
+GOAL_MAXIMUM = "maximum"
+GOALS = [GOAL_GRADIENT, GOAL_MINIMUM, GOAL_MAXIMUM]
+
+# reductions of a values vector to the scalar figure of merit
+REDUCTIONS = {
+    "min": np.nanmin,
+    "max": np.nanmax,
+    "mean": np.nanmean,
+}
+
+
+@dataclass
+class AdaptiveSweepSettings:
+    """
+    Settings of an adaptive sweep.
+
+    Attributes:
+        metric: key of the measurement's values vector the figure of merit is computed from
+        reduction: how the vector is reduced to a scalar, one of `REDUCTIONS`
+        goal: where new points are added, one of `GOALS`
+        tolerance: intervals of the refined parameter narrower than twice this value are not split anymore
+        budget: maximum number of points of the refined parameter, per combination of the other swept parameters
+        points_per_round: maximum number of points added after each round of measurements
+    """
+    metric: str = "referenced transmission [dB]"
+    reduction: str = "min"
+    goal: str = GOAL_GRADIENT
+    tolerance: float = 0.0
+    budget: int = 50
+    points_per_round: int = 4
+
+    def __post_init__(self):
+        if self.reduction not in REDUCTIONS:
+            raise ValueError(f"Unknown reduction {self.reduction!r}, must be one of {list(REDUCTIONS)}.")
+        if self.goal not in GOALS:
+            raise ValueError(f"Unknown goal {self.goal!r}, must be one of {GOALS}.")
+        if self.tolerance < 0:
+            raise ValueError("The tolerance must not be negative.")
+        if self.budget < 2 or self.points_per_round < 1:
+            raise ValueError("The budget must be at least 2 and at least one point must be added per round.")
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, settings: Mapping) -> "AdaptiveSweepSettings":
+        return cls(**{k: v for k, v in settings.items() if k in cls.__dataclass_fields__})
+
+
+def evaluate_metric(values: Mapping, settings: AdaptiveSweepSettings) -> float:
+    """Returns the figure of merit of a measurement's values dictionary, NaN if it cannot be computed."""
+    if values is None or settings.metric not in values:
+        return np.nan
+    try:
+        vector = np.asarray(values[settings.metric], dtype=float)
+    except (TypeError, ValueError):
+        return np.nan
+    if vector.size == 0 or not np.any(np.isfinite(vector)):
+        return np.nan
+    return float(REDUCTIONS[settings.reduction](vector))
+
+
+def propose_points(x: List[float], y: List[float], settings: AdaptiveSweepSettings, integer: bool = False) \
+        -> List[float]:
+    """Proposes the next points of a one-dimensional adaptive sweep.
+
+    New points are placed in the middle of the intervals between the measured points. In gradient mode, the intervals
+    with the largest change of the figure of merit relative to their width are split. The change is measured as the
+    length of the interval in the plane of the normalized parameter and figure of merit, such that wide flat intervals
+    are eventually split too. In minimum and maximum mode, the two intervals next to the best point are split.
+
+    Args:
+        x: the measured values of the refined parameter
+        y: the figures of merit at `x`, NaN for measurements without a figure of merit
+        settings: the settings of the adaptive sweep
+        integer: set to True if the parameter only takes integer values
+
+    Returns:
+        The new values of the refined parameter, an empty list once the budget or the tolerance is reached.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    remaining = min(settings.budget - len(x), settings.points_per_round)
+    if remaining <= 0 or len(x) < 2:
+        return []
+
+    order = np.argsort(x)
+    x, y = x[order], y[order]
+    x_range = x[-1] - x[0]
+    if x_range <= 0:
+        return []
+
+    widths = np.diff(x)
+    min_width = 2 * settings.tolerance
+    if integer:
+        min_width = max(min_width, 2)
+    splittable = (widths >= min_width) & (widths > 0)
+
+    finite = np.isfinite(y)
+    if settings.goal == GOAL_GRADIENT:
+        y_range = np.ptp(y[finite]) if np.any(finite) else 0.0
+        y_range = y_range if y_range > 0 else 1.0
+        dy = np.nan_to_num(np.abs(np.diff(y)) / y_range, nan=0.0)
+        loss = np.hypot(widths / x_range, dy)
+        candidates = [i for i in np.argsort(-loss, kind="stable") if splittable[i]]
+    else:
+        if not np.any(finite):
+            return []
+        best = int(np.nanargmin(y) if settings.goal == GOAL_MINIMUM else np.nanargmax(y))
+        # split the wider neighbouring interval first
+        neighbours = sorted([i for i in (best - 1, best) if 0 <= i < len(widths)], key=lambda i: -widths[i])
+        candidates = [i for i in neighbours if splittable[i]]
+
+    measured = set(x.tolist())
+    points = []
+    for i in candidates[:remaining]:
+        midpoint = (x[i] + x[i + 1]) / 2
+        if integer:
+            midpoint = float(round(midpoint))
+        if midpoint in measured:
+            continue
+        measured.add(midpoint)
+        points.append(int(midpoint) if integer else float(midpoint))
+    return points
+
+
+class AdaptiveSweep:
+    """
+    Adds points to a parameter sweep while it is measured.
+
+    The sweep starts with a coarse grid. One parameter is refined, each combination of the values of the other swept
+    parameters forms an independent line along it. Once all measurements of a line finished, new points are proposed
+    with `propose_points` from the figures of merit of its measurements, and queued as new ToDos of the same sweep. The
+    new ToDos share the sweep's parameter table, to which their rows are appended, and its summary.
+
+    A line does not wait for measurements which failed or whose ToDos were removed from the queue, it is refined from
+    the measurements which finished.
+    """
+
+    def __init__(self,
+                 grid: SweepGrid,
+                 parameter: str,
+                 settings: AdaptiveSweepSettings,
+                 device: Device,
+                 sweep_parameters: DataFrame,
+                 dictionary_wrapper: DictionaryWrapper):
+        """
+        Args:
+            grid: the coarse grid the sweep starts with
+            parameter: name of the refined parameter, must be one of the grid's swept parameters
+            settings: the settings of the adaptive sweep
+            device: the device the sweep is measured on
+            sweep_parameters: the parameter table shared by the ToDos of the sweep
+            dictionary_wrapper: the wrapper of the sweep summary shared by the ToDos of the sweep
+        """
+        if parameter not in grid.columns:
+            raise ValueError(f"The refined parameter {parameter!r} is not swept.")
+        self.logger = logging.getLogger()
+        self.grid = grid
+        self.parameter = parameter
+        self.settings = settings
+        self.device = device
+        self.sweep_parameters = sweep_parameters
+        self.dictionary_wrapper = dictionary_wrapper
+        self._integer = grid.parameter_type(parameter) == MeasParamInt
+
+        # the line and the value of the refined parameter by measurement id
+        self._points: Dict[str, Tuple[tuple, Any]] = {}
+        # the unfinished measurement ids, and the measured values and figures of merit by line
+        self._pending: Dict[tuple, set] = {}
+        # ids of the failed measurements, whose results are still used if they are measured again
+        self._failed = set()
+        self._measured: Dict[tuple, Tuple[List[float], List[float]]] = {}
+        self._add_grid(grid)
+
+    def _line_key(self, grid: SweepGrid, index: int) -> tuple:
+        return tuple(grid.parameter_value(index, name) for name in grid.columns if name != self.parameter)
+
+    def _add_grid(self, grid: SweepGrid) -> None:
+        for index, meas_id in enumerate(grid.ids):
+            line = self._line_key(grid, index)
+            self._points[meas_id] = (line, grid.parameter_value(index, self.parameter))
+            self._pending.setdefault(line, set()).add(meas_id)
+            self._measured.setdefault(line, ([], []))
+
+    def todos(self, grid: SweepGrid = None) -> List[ToDo]:
+        """Returns one ToDo per point of the given grid, by default the coarse grid."""
+        grid = self.grid if grid is None else grid
+        return [ToDo(self.device, None, part_of_sweep=True, sweep_parameters=self.sweep_parameters,
+                     dictionary_wrapper=self.dictionary_wrapper, sweep_grid=grid, sweep_index=index,
+                     adaptive_sweep=self)
+                for index in range(len(grid))]
+
+    def report(self, todo: ToDo, values: Mapping) -> List[ToDo]:
+        """Records the figure of merit of a finished measurement.
+
+        Args:
+            todo: the finished ToDo
+            values: the values dictionary of its measurement
+
+        Returns:
+            The ToDos of the new points, if this measurement was the last unfinished one of its line.
+        """
+        meas_id = todo.measurement_id.hex
+        if meas_id not in self._points:
+            return []
+        line, x = self._points[meas_id]
+        pending = self._pending[line]
+        if meas_id in self._failed:
+            # measured again after the line stopped waiting for it
+            self._failed.discard(meas_id)
+        elif meas_id in pending:
+            pending.discard(meas_id)
+        else:
+            return []
+
+        metric = evaluate_metric(values, self.settings)
+        if np.isnan(metric):
+            self.logger.warning(f"Adaptive sweep: no figure of merit {self.settings.metric!r} in the values of "
+                                f"{todo.get_measurement_name_with_id()}.")
+        xs, ys = self._measured[line]
+        xs.append(x)
+        ys.append(metric)
+        if pending:
+            return []
+        return self._refine(line)
+
+    def report_failure(self, todo: ToDo) -> List[ToDo]:
+        """Stops waiting for a measurement which failed. If it is measured again, its figure of merit is still used.
+
+        Returns:
+            The ToDos of the new points, if this measurement was the last unfinished one of its line.
+        """
+        if not self._stop_waiting(todo, "failed"):
+            return []
+        self._failed.add(todo.measurement_id.hex)
+        line, _ = self._points[todo.measurement_id.hex]
+        return [] if self._pending[line] else self._refine(line)
+
+    def discard(self, todo: ToDo) -> None:
+        """Stops waiting for a measurement whose ToDo was removed from the queue.
+
+        No points are added if it was the last unfinished measurement of its line, the line is not refined further.
+        """
+        self._failed.discard(todo.measurement_id.hex)
+        if self._stop_waiting(todo, "was removed from the queue"):
+            line, _ = self._points[todo.measurement_id.hex]
+            if not self._pending[line]:
+                self.logger.info(f"Adaptive sweep of {self.parameter} stopped after {len(self._measured[line][0]):d} "
+                                 f"points.")
+
+    def _stop_waiting(self, todo: ToDo, reason: str) -> bool:
+        meas_id = todo.measurement_id.hex
+        if meas_id not in self._points:
+            return False
+        line, _ = self._points[meas_id]
+        pending = self._pending[line]
+        if meas_id not in pending:
+            return False
+        pending.discard(meas_id)
+        self.logger.warning(f"Adaptive sweep: {todo.get_measurement_name_with_id()} {reason}, {len(pending):d} "
+                            f"measurements of its line are unfinished.")
+        return True
+
+    def _refine(self, line: tuple) -> List[ToDo]:
+        xs, ys = self._measured[line]
+        new_points = propose_points(xs, ys, self.settings, integer=self._integer)
+        if not new_points:
+            self.logger.info(f"Adaptive sweep of {self.parameter} finished after {len(xs):d} points.")
+            return []
+        self.logger.info(f"Adaptive sweep: adding {len(new_points):d} points of {self.parameter}.")
+        return self._extend(line, new_points)
+
+    def _extend(self, line: tuple, new_points: List[Any]) -> List[ToDo]:
+        other_names = iter(line)
+        sweep_values = {name: new_points if name == self.parameter else [next(other_names)]
+                        for name in self.grid.columns}
+        grid = self.grid.derive(sweep_values)
+        self._add_grid(grid)
+
+        # append the new rows to the shared parameter table in place, such that all ToDos of the sweep see them
+        new_rows = grid.sweep_parameters().reindex(columns=self.sweep_parameters.columns)
+        start = len(self.sweep_parameters)
+        for offset, row in enumerate(new_rows.itertuples(index=False)):
+            self.sweep_parameters.loc[start + offset] = list(row)
+        if self.dictionary_wrapper.available:
+            self.dictionary_wrapper.get.add_rows(new_rows)
+        return self.todos(grid)
+
+
+def refined_parameter(sweep_ranges: Mapping[str, Tuple[Any, str]]) -> Optional[Tuple[str, AdaptiveSweepSettings]]:
+    """Returns the name and settings of the adaptively refined parameter of the ranges of a sweep, if any.
+
+    The settings of an adaptive range are stored in the `attrs` of its series, see `RangeEntry.results`.
+    """
+    adaptive = [(name, series) for name, (series, category) in sweep_ranges.items() if category == "adaptive"]
+    if not adaptive:
+        return None
+    if len(adaptive) > 1:
+        raise ValueError("Only one parameter of a sweep can be refined adaptively.")
+    name, series = adaptive[0]
+    return name, AdaptiveSweepSettings.from_dict(series.attrs.get("adaptive", {}))
@@ -6,7 +6,30 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 import json
+import logging
+import os
+import threading
+import time
 from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from LabExT.Experiments.ResultCompression import COMPRESSION_NONE, CountingWriter, load_result_file, \
+    open_result_file
+from LabExT.Measurements.MeasAPI.ValuesBuffer import ValuesBuffer
+
+# ending of the side log of a `JournaledAutosaveDict`, appended to the path of its file
+JOURNAL_ENDING = ".jsonl"
+
+
+def _json_default(obj):
+    """Converts numpy arrays and scalars and value buffers, e.g. values vectors stored without `.tolist()`, to plain
+    Python objects."""
+    if isinstance(obj, (np.generic, np.ndarray, ValuesBuffer)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 
 class AutosaveDict(OrderedDict):
@@ -25,6 +48,10 @@ class AutosaveDict(OrderedDict):
         file_path : str
             The file path to the file we want to save.
         """
+        self.bytes_written = 0
+        self.file_size = 0
+        self.json_size = 0
+        self.save_time = 0.0
         super().__init__(*args, **kwargs)
         self.freq = freq
         self.file_path = file_path
@@ -39,6 +66,10 @@ class AutosaveDict(OrderedDict):
         self.modified()
         return super().__getitem__(*args, **kwargs)
 
+    def __reduce__(self):
+        # copies are plain dictionaries, saving belongs to the original only
+        return OrderedDict, (), None, None, iter(self.items())
+
     def modified(self):
         """
         Should be called whenever the object is modified. This increases the number of times the file has been modified
@@ -50,13 +81,280 @@ class AutosaveDict(OrderedDict):
                 self.modify_count = 0
                 self.save()
 
-    def save(self, indented: bool = True) -> None:
+    def save(self, indented: bool = True, compression: str = COMPRESSION_NONE, level: int = 0) -> None:
         """
         Saves itself to a file.
+
+        Parameters
+        ----------
+        indented : bool
+            Set to False to save the JSON without indentation.
+        compression : str
+            Compression of the file, see `LabExT.Experiments.ResultCompression`. The JSON is compressed while it is
+            written.
+        level : int
+            Compression level, 0 for the default level of the compression.
         """
-        if indented:
+        start = time.perf_counter()
+        if compression == COMPRESSION_NONE:
             with open(self.file_path, "w+") as f:
-                json.dump(self, f, indent="\t")
+                json.dump(self, f, indent="\t" if indented else None, default=_json_default)
+                self.file_size = self.json_size = f.tell()
         else:
-            with open(self.file_path, "w+") as f:
-                json.dump(self, f)
+            with open_result_file(self.file_path, "w", compression=compression, level=level) as f:
+                counter = CountingWriter(f)
+                json.dump(self, counter, indent="\t" if indented else None, default=_json_default)
+            self.json_size = counter.n_chars
+            self.file_size = os.path.getsize(self.file_path)
+        self.save_time = time.perf_counter() - start
+        self.bytes_written += self.file_size
+
+    @property
+    def compression_ratio(self) -> float:
+        """
+        Size of the JSON relative to the size of the last saved file, 1 if the file is not compressed.
+        """
+        return self.json_size / self.file_size if self.file_size else 0.0
+
+    @property
+    def write_amplification(self) -> float:
+        """
+        Number of bytes written to disk in total, relative to the size of the last saved file.
+        """
+        return self.bytes_written / self.file_size if self.file_size else 0.0
+
+
+class _Written:
+    """Records which part of a value of a `JournaledAutosaveDict` is already in its journal."""
+
+    __slots__ = ["ident", "length", "text", "children"]
+
+    def __init__(self, ident: int):
+        # id of the written list or dictionary
+        self.ident = ident
+        # number of written list items
+        self.length = 0
+        # JSON of a written value which is neither a list nor a dictionary
+        self.text: Optional[str] = None
+        self.children: Dict[Any, "_Written"] = {}
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+class _Records:
+    """Journal lines of one flush, limited to a number of bytes."""
+
+    def __init__(self, budget: int = None):
+        """
+        Args:
+            budget: bytes of the lines at most, or None to only update what is recorded as written
+        """
+        self.budget = budget
+        self.lines: List[str] = []
+        self.nbytes = 0
+
+    def append(self, record: dict) -> None:
+        if self.budget is None:
+            return
+        line = json.dumps(record, default=_json_default) + "\n"
+        # a single record is always written, even if it exceeds the budget
+        if self.lines and self.nbytes + len(line) > self.budget:
+            raise _BudgetExhausted()
+        self.lines.append(line)
+        self.nbytes += len(line)
+
+
+class JournaledAutosaveDict(AutosaveDict):
+    """
+    Autosave dictionary which appends changes to a side log instead of rewriting its file.
+
+    A background thread compares the content with what is already written every `flush_interval` seconds and appends
+    the differences to the journal file next to the dictionary's file: new and changed values are written as a whole,
+    lists which grew only get their new items appended. Reading and writing items never writes to disk. Calling `save`
+    compacts the journal, i.e. writes the whole dictionary to its file once and deletes the journal.
+
+    Items changed within a list, e.g. `data["values"]["x"][0] = 1`, are not noticed until the dictionary is saved. The
+    content of an interrupted dictionary can be read with `load_autosave_journal`.
+    """
+
+    def __init__(self, file_path="tmp.json", flush_interval: float = 1.0, max_flush_bytes: int = 4 * 1024 * 1024,
+                 auto_save=True, *args, **kwargs):
+        """
+        Args:
+            file_path: the file path to the file the dictionary is saved to. The journal is stored next to it, with
+                `.jsonl` appended.
+            flush_interval: seconds between two appends to the journal
+            max_flush_bytes: bytes appended to the journal at most per flush, if more changed, the rest is appended
+                with the next flushes
+            auto_save: set to False to only save on calls to `save`
+        """
+        self.flush_interval = flush_interval
+        self.max_flush_bytes = max_flush_bytes
+        self.logger = logging.getLogger()
+        self.journal_bytes = 0
+        self.n_flushes = 0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._auto_save = False
+        self._written = _Written(id(self))
+        super().__init__(freq=0, file_path=file_path, auto_save=auto_save, *args, **kwargs)
+
+    @property
+    def journal_path(self) -> str:
+        return self.file_path + JOURNAL_ENDING
+
+    @property
+    def auto_save(self) -> bool:
+        return self._auto_save
+
+    @auto_save.setter
+    def auto_save(self, auto_save: bool) -> None:
+        """Starts or stops the background thread flushing the journal."""
+        self._auto_save = auto_save
+        if auto_save and self._flusher is None:
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._run, name="AutosaveJournal", daemon=True)
+            self._flusher.start()
+        elif not auto_save and self._flusher is not None:
+            self._stop.set()
+            if self._flusher is not threading.current_thread():
+                self._flusher.join()
+            self._flusher = None
+
+    def __getitem__(self, *args, **kwargs):
+        # reads never cause a write
+        return OrderedDict.__getitem__(self, *args, **kwargs)
+
+    def __setitem__(self, *args, **kwargs):
+        # changes are picked up by the background thread
+        return OrderedDict.__setitem__(self, *args, **kwargs)
+
+    def modified(self):
+        pass
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as exc:
+                self.logger.warning(f"Could not append to the autosave journal {self.journal_path}: {exc!r}")
+
+    def flush(self, max_bytes: int = None) -> int:
+        """Appends the changes since the last flush to the journal and returns the number of bytes appended.
+
+        Args:
+            max_bytes: bytes appended at most, by default `max_flush_bytes`
+        """
+        records = _Records(self.max_flush_bytes if max_bytes is None else max_bytes)
+        with self._lock:
+            try:
+                self._diff_dict((), self, self._written, records)
+            except _BudgetExhausted:
+                pass
+            except (RuntimeError, KeyError):
+                # the measurement changed a dictionary while it was compared, the rest is appended with the next flush
+                pass
+            if not records.lines:
+                return 0
+            text = "".join(records.lines)
+            with open(self.journal_path, "a") as fp:
+                fp.write(text)
+            self.journal_bytes += len(text)
+            self.bytes_written += len(text)
+            self.n_flushes += 1
+            return len(text)
+
+    def _diff_dict(self, path: tuple, value: Mapping, written: _Written, records: _Records) -> None:
+        keys = list(value.keys())
+        for removed in written.children.keys() - set(keys):
+            records.append({"op": "del", "path": list(path + (removed,))})
+            del written.children[removed]
+        for key in keys:
+            self._diff_value(path + (key,), value[key], written, records)
+
+    def _diff_value(self, path: tuple, value: Any, parent: _Written, records: _Records) -> None:
+        key = path[-1]
+        written = parent.children.get(key)
+        if isinstance(value, Mapping):
+            if written is None or written.ident != id(value) or written.text is not None:
+                records.append({"op": "set", "path": list(path), "value": {}})
+                written = parent.children[key] = _Written(id(value))
+            self._diff_dict(path, value, written, records)
+        elif isinstance(value, (list, ValuesBuffer)):
+            # value buffers only grow, like lists only their new values are appended
+            length = len(value)
+            if written is not None and written.ident == id(value) and written.text is None \
+                    and written.length <= length:
+                if written.length < length:
+                    records.append({"op": "extend", "path": list(path), "items": value[written.length:length]})
+                    written.length = length
+            else:
+                records.append({"op": "set", "path": list(path), "value": value[:length]})
+                written = parent.children[key] = _Written(id(value))
+                written.length = length
+        elif isinstance(value, np.ndarray):
+            # arrays are written as a whole once, like lists they are expected to be replaced rather than changed
+            if written is None or written.ident != id(value) or written.length != value.size:
+                records.append({"op": "set", "path": list(path), "value": value})
+                written = parent.children[key] = _Written(id(value))
+                written.length = value.size
+        else:
+            text = json.dumps(value, default=_json_default)
+            if written is None or written.text != text:
+                records.append({"op": "set", "path": list(path), "value": value})
+                written = parent.children[key] = _Written(id(value))
+                written.text = text
+
+    def save(self, indented: bool = True, compression: str = COMPRESSION_NONE, level: int = 0) -> None:
+        """Writes the whole dictionary to its file and deletes the journal."""
+        with self._lock:
+            super().save(indented=indented, compression=compression, level=level)
+            # the file holds everything, so the journal starts over from its content
+            self._written = _Written(id(self))
+            self._diff_dict((), self, self._written, _Records())
+            try:
+                os.remove(self.journal_path)
+            except FileNotFoundError:
+                pass
+            self.logger.debug(
+                f"Compacted autosave journal of {self.file_path}: {self.journal_bytes:d} bytes appended in "
+                f"{self.n_flushes:d} flushes, {self.bytes_written:d} bytes written in total for a file of "
+                f"{self.file_size:d} bytes (write amplification {self.write_amplification:.2f})."
+            )
+
+
+def load_autosave_journal(file_path: str) -> OrderedDict:
+    """Returns the content of an autosave dictionary, including the changes in its journal which were not yet saved.
+
+    A corrupt line of the journal, e.g. if LabExT crashed while writing it, and all lines after it are ignored.
+
+    Args:
+        file_path: the path of the dictionary's file, which does not need to exist
+    """
+    data = OrderedDict()
+    if os.path.isfile(file_path):
+        data = load_result_file(file_path, object_pairs_hook=OrderedDict)
+    journal_path = file_path + JOURNAL_ENDING
+    if not os.path.isfile(journal_path):
+        return data
+
+    with open(journal_path, "r") as fp:
+        for line in fp:
+            try:
+                record = json.loads(line, object_pairs_hook=OrderedDict)
+            except json.JSONDecodeError:
+                break
+            *parents, key = record["path"]
+            container = data
+            for parent in parents:
+                container = container[parent]
+            if record["op"] == "set":
+                container[key] = record["value"]
+            elif record["op"] == "extend":
+                container[key].extend(record["items"])
+            elif record["op"] == "del":
+                container.pop(key, None)
+    return data
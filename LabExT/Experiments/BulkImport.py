@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from LabExT.Experiments.ResultCompression import load_result_file
+
+if TYPE_CHECKING:
+    from LabExT.Experiments.StandardExperiment import StandardExperiment
+else:
+    StandardExperiment = None
+
+# marks the end of the parsed batches in the queue
+_DONE = None
+
+
+def parse_result_file(file_path: str) -> Tuple[str, Optional[dict], Optional[str]]:
+    """Reads a data file and returns its path, its content or None and an error message or None."""
+    try:
+        meas_dict = load_result_file(file_path)
+        if not isinstance(meas_dict, dict):
+            return file_path, None, "not a LabExT measurement data file"
+        return file_path, meas_dict, None
+    except Exception as exc:
+        return file_path, None, repr(exc)
+
+
+@dataclass
+class ImportResult:
+    """Outcome of a bulk import."""
+
+    n_files: int = 0
+    loaded: List[str] = field(default_factory=list)
+    # error message by file path of the files which could not be imported
+    failed: Dict[str, str] = field(default_factory=dict)
+    duration: float = 0.0
+
+
+class BulkImporter:
+    """
+    Imports many measurement data files into an experiment without blocking the calling thread.
+
+    The files are parsed in worker processes, fed by a background thread. The parsed datasets are collected in batches
+    and added to the experiment by `load_parsed`, which is meant to be called periodically from the GUI thread, e.g.
+    with `Tk.after`. Every call adds at most one batch, such that the GUI stays responsive and the measurement tables
+    are refreshed once per batch and not once per file. Errors are collected in `result` instead of being raised.
+    """
+
+    def __init__(self,
+                 experiment: StandardExperiment,
+                 file_paths: Sequence[str],
+                 max_workers: int = None,
+                 batch_size: int = 100):
+        """
+        Args:
+            experiment: the experiment receiving the imported measurements
+            file_paths: the data files to import
+            max_workers: number of worker processes, 1 to parse the files in the background thread, by default the
+                number of CPUs
+            batch_size: number of parsed files added by one call of `load_parsed` at most
+        """
+        self.experiment = experiment
+        self.file_paths = list(file_paths)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.logger = logging.getLogger()
+
+        self.result = ImportResult(n_files=len(self.file_paths))
+        self.n_parsed = 0
+        self.finished = False
+
+        self._batches = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = None
+        self._start_time = None
+
+    @property
+    def n_processed(self) -> int:
+        """Number of files which were imported or failed."""
+        return len(self.result.loaded) + len(self.result.failed)
+
+    def start(self) -> None:
+        """Starts parsing the files in the background."""
+        if self._thread is not None:
+            raise RuntimeError("The import was already started.")
+        self._start_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._parse_files, name="BulkImportParser", daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stops parsing further files. Files parsed already are still imported by the next call to `load_parsed`."""
+        self._cancel.set()
+
+    def _parse_files(self) -> None:
+        pool = None
+        try:
+            if self.max_workers > 1 and len(self.file_paths) > 1:
+                # the workers are started fresh instead of forking the GUI process with its threads and connections
+                pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                           mp_context=multiprocessing.get_context("spawn"))
+                chunk_size = max(1, min(16, len(self.file_paths) // (4 * self.max_workers)))
+                outcomes = pool.map(parse_result_file, self.file_paths, chunksize=chunk_size)
+            else:
+                outcomes = map(parse_result_file, self.file_paths)
+
+            batch = []
+            for outcome in outcomes:
+                if self._cancel.is_set():
+                    break
+                batch.append(outcome)
+                self.n_parsed += 1
+                if len(batch) >= self.batch_size:
+                    self._batches.put(batch)
+                    batch = []
+            if batch:
+                self._batches.put(batch)
+        except Exception as exc:
+            self.logger.exception(f"Bulk import stopped due to: {exc!r}")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            self._batches.put(_DONE)
+
+    def load_parsed(self, timeout: float = 0.0, force_gui_update: bool = True) -> bool:
+        """Adds the next batch of parsed datasets to the experiment, with a single GUI refresh.
+
+        Args:
+            timeout: time in seconds to wait for the next parsed batch if none is ready
+            force_gui_update: set to False to not update the GUI tables after loading
+        Returns:
+            True once all files were processed
+        """
+        if self.finished:
+            return True
+
+        try:
+            outcomes = self._batches.get(timeout=timeout) if timeout > 0 else self._batches.get_nowait()
+        except queue.Empty:
+            return False
+        if outcomes is _DONE:
+            self.finished = True
+            outcomes = []
+
+        datasets = []
+        for file_path, meas_dict, error in outcomes:
+            if error is None:
+                datasets.append((meas_dict, file_path))
+            else:
+                self.result.failed[file_path] = error
+        if datasets:
+            errors = self.experiment.load_measurement_datasets(datasets, force_gui_update=force_gui_update)
+            failed = {file_path: repr(exc) for file_path, exc in errors}
+            self.result.failed.update(failed)
+            self.result.loaded.extend(file_path for _, file_path in datasets if file_path not in failed)
+
+        if self.finished:
+            self.result.duration = time.perf_counter() - self._start_time
+            self.logger.info("Imported %d of %d data files in %.1f s, %d could not be imported.",
+                             len(self.result.loaded), self.result.n_files, self.result.duration,
+                             len(self.result.failed))
+        return self.finished
+
+    def run(self, force_gui_update: bool = True) -> ImportResult:
+        """Imports all files and blocks until the import finished."""
+        self.start()
+        while not self.load_parsed(timeout=0.1, force_gui_update=force_gui_update):
+            pass
+        return self.result
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from LabExT.Experiments.BulkImport import parse_result_file
+from LabExT.Experiments.ResultCompression import is_result_file
+from LabExT.Experiments.StandardExperiment import DuplicateMeasurementError
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+if TYPE_CHECKING:
+    from LabExT.Experiments.StandardExperiment import StandardExperiment
+else:
+    StandardExperiment = None
+
+# modification time in ns and size of a file
+_FileSignature = Tuple[int, int]
+
+
+def inotify_available() -> bool:
+    """Returns True if the optional watchdog package is installed, which is notified by the OS about new files."""
+    return Observer is not None
+
+
+def _signature(file_path: str) -> Optional[_FileSignature]:
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Passes the paths of created, modified and renamed files on to the watcher thread."""
+
+    def __init__(self, changed: queue.Queue):
+        super().__init__()
+        self._changed = changed
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._changed.put(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._changed.put(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._changed.put(event.dest_path)
+
+
+class DirectoryWatcher:
+    """
+    Imports the data files which appear in watched directories, e.g. written by other LabExT instances.
+
+    Only files created after a directory is added are imported. Partially written `.json.part` files are ignored and
+    a new file is only read once its size and modification time stopped changing for `settle_time` seconds. If the
+    watchdog package is installed, the OS reports new files (inotify on Linux). Otherwise, the modification times of
+    the watched directories are polled and only the directories which changed are listed again.
+
+    New files are parsed in a background thread. The parsed datasets are added to the experiment by `load_new`, which
+    is meant to be called periodically from the GUI thread. Files containing a measurement which is already loaded,
+    according to `calc_measurement_key`, are skipped.
+    """
+
+    def __init__(self,
+                 experiment: StandardExperiment,
+                 directories: Iterable[str] = (),
+                 recursive: bool = True,
+                 poll_interval: float = 1.0,
+                 settle_time: float = 1.0,
+                 use_inotify: bool = True):
+        """
+        Args:
+            experiment: the experiment receiving the imported measurements
+            directories: the directories to watch
+            recursive: set to False to ignore sub-directories
+            poll_interval: time in seconds between two checks for new files
+            settle_time: time in seconds a file must not have changed before it is read
+            use_inotify: set to False to poll the directories even if the watchdog package is installed
+        """
+        self.experiment = experiment
+        self.recursive = recursive
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.uses_inotify = use_inotify and inotify_available()
+        self.logger = logging.getLogger()
+
+        self.directories: List[str] = []
+        self.loaded: List[str] = []
+        # error message by file path of the new files which could not be imported
+        self.failed: Dict[str, str] = {}
+        self.n_duplicates = 0
+
+        # files present when their directory was added or read since, with their signature at that time
+        self._known: Dict[str, _FileSignature] = {}
+        # new files waiting until they stopped changing, with their signature at the last check
+        self._candidates: Dict[str, Optional[_FileSignature]] = {}
+        # modification times in ns of all watched directories, only used when polling
+        self._directory_mtimes: Dict[str, int] = {}
+        self._changed = queue.Queue()
+        self._parsed = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._observer = None
+
+        for directory in directories:
+            self.add_directory(directory)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_directory(self, directory: str) -> None:
+        """Starts watching a directory. Files already in it are not imported."""
+        directory = os.path.abspath(directory)
+        if directory in self.directories:
+            return
+        with self._lock:
+            self.directories.append(directory)
+            for root, _, files in os.walk(directory):
+                self._directory_mtimes[root] = os.stat(root).st_mtime_ns
+                for file_name in files:
+                    file_path = os.path.join(root, file_name)
+                    if is_result_file(file_path):
+                        self._known[file_path] = _signature(file_path)
+                if not self.recursive:
+                    break
+        if self._observer is not None:
+            self._observer.schedule(_ChangeHandler(self._changed), directory, recursive=self.recursive)
+        self.logger.info(f"Watching {directory} for new data files.")
+
+    def start(self) -> None:
+        """Starts watching the directories in the background."""
+        if self.running:
+            return
+        self._stop.clear()
+        if self.uses_inotify:
+            self._observer = Observer()
+            for directory in self.directories:
+                self._observer.schedule(_ChangeHandler(self._changed), directory, recursive=self.recursive)
+            self._observer.start()
+        self._thread = threading.Thread(target=self._run, name="DirectoryWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops watching the directories. Files parsed already are still imported by the next call to `load_new`."""
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                with self._lock:
+                    if self.uses_inotify:
+                        self._collect_changed_files()
+                    else:
+                        self._poll_directories()
+                    ready = self._settled_candidates()
+                for file_path in ready:
+                    self._parsed.put(parse_result_file(file_path))
+            except Exception as exc:
+                self.logger.exception(f"Watching directories failed: {exc!r}")
+
+    def _add_candidate(self, file_path: str) -> None:
+        if is_result_file(file_path) and file_path not in self._candidates \
+                and self._known.get(file_path) != _signature(file_path):
+            self._candidates[file_path] = None
+
+    def _collect_changed_files(self) -> None:
+        while True:
+            try:
+                self._add_candidate(os.path.abspath(self._changed.get_nowait()))
+            except queue.Empty:
+                return
+
+    def _poll_directories(self) -> None:
+        """Lists the directories whose modification time changed, which happens when files are created or renamed."""
+        for directory, known_mtime in list(self._directory_mtimes.items()):
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                del self._directory_mtimes[directory]
+                continue
+            if mtime == known_mtime:
+                continue
+            self._directory_mtimes[directory] = mtime
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir():
+                    if self.recursive and entry.path not in self._directory_mtimes:
+                        self._add_new_directory(entry.path)
+                else:
+                    self._add_candidate(entry.path)
+
+    def _add_new_directory(self, directory: str) -> None:
+        for root, _, files in os.walk(directory):
+            self._directory_mtimes[root] = os.stat(root).st_mtime_ns
+            for file_name in files:
+                self._add_candidate(os.path.join(root, file_name))
+
+    def _settled_candidates(self) -> List[str]:
+        """Returns the new files which did not change since the last check and for at least the settle time."""
+        ready = []
+        now_ns = time.time_ns()
+        for file_path, last_signature in list(self._candidates.items()):
+            signature = _signature(file_path)
+            if signature is None:
+                del self._candidates[file_path]
+            elif signature == last_signature and now_ns - signature[0] >= self.settle_time * 1e9:
+                del self._candidates[file_path]
+                self._known[file_path] = signature
+                ready.append(file_path)
+            else:
+                self._candidates[file_path] = signature
+        return ready
+
+    def load_new(self, force_gui_update: bool = True) -> int:
+        """Adds the datasets parsed since the last call to the experiment, with a single GUI refresh.
+
+        Args:
+            force_gui_update: set to False to not update the GUI tables after loading
+        Returns:
+            the number of imported measurements
+        """
+        datasets = []
+        while True:
+            try:
+                file_path, meas_dict, error = self._parsed.get_nowait()
+            except queue.Empty:
+                break
+            if error is None:
+                datasets.append((meas_dict, file_path))
+            else:
+                self._add_failure(file_path, error)
+        if not datasets:
+            return 0
+
+        errors = dict(self.experiment.load_measurement_datasets(datasets, force_gui_update=force_gui_update))
+        for file_path, exc in errors.items():
+            if isinstance(exc, DuplicateMeasurementError):
+                self.n_duplicates += 1
+            else:
+                self._add_failure(file_path, repr(exc))
+        loaded = [file_path for _, file_path in datasets if file_path not in errors]
+        self.loaded.extend(loaded)
+        if loaded:
+            self.logger.info(f"Imported {len(loaded):d} new data files from watched directories.")
+        return len(loaded)
+
+    def _add_failure(self, file_path: str, error: str) -> None:
+        self.failed[file_path] = error
+        self.logger.warning(f"Could not import new file {file_path} due to: {error}")
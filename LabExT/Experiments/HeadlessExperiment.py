@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import logging
+import re
+import sys
+import time
+from copy import deepcopy
+from os.path import abspath, basename, isfile, join, dirname, splitext
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Dict, List, TextIO
+
+from LabExT.Experiments.ResultCompression import strip_compression_ending
+from LabExT.Experiments.StandardExperiment import StandardExperiment
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Instruments.InstrumentAPI.InstrumentAPI import InstrumentAPI
+from LabExT.Movement.MoverNew import MoverNew
+from LabExT.Movement.Stages.DummyStage import DummyStage
+from LabExT.Movement.Transformations import CoordinatePairing, StageCoordinate
+from LabExT.Movement.config import DevicePort, Orientation
+from LabExT.Utils import get_configuration_file_path
+from LabExT.View.MeasurementControlSettings import MeasurementControlSettings
+from LabExT.Wafer.Chip import Chip
+from LabExT.Wafer.ChipSources.IBMMaskDescription import IBMMaskDescription
+from LabExT.Wafer.ChipSources.PhoenixPhotonics import PhoenixPhotonics
+from LabExT.Wafer.Device import Device
+
+if TYPE_CHECKING:
+    from LabExT.Measurements.MeasAPI.Measurement import Measurement
+else:
+    Measurement = None
+
+
+DEFAULT_INSTRUMENTS_CONFIG = join(dirname(dirname(__file__)), "Instruments", "instruments.config.default")
+
+# keys allowed on the top level of a queue description and for each ToDo in it
+QUEUE_KEYS = {"output", "chip name", "inter_measurement_wait_time", "settings", "todos"}
+TODO_KEYS = {"measurement", "devices", "parameters", "instruments", "repeat"}
+
+# measurement control settings used for headless runs unless the queue description says otherwise
+HEADLESS_DEFAULT_SETTINGS = {
+    # finished measurements are stored on disk anyway, do not keep all of them in memory for long queues
+    "finished_meas_limited": True,
+    # the queue file already describes the queue, the journal is only used to resume queues in the GUI
+    "journal_queue": False,
+}
+
+
+class QueueDescriptionError(ValueError):
+    """Raised if a chip file, an instruments configuration or a queue description is invalid."""
+
+
+class HeadlessMeasurementControlSettings(MeasurementControlSettings):
+    """Measurement control settings as stored by the GUI, overridden by the settings of a queue description."""
+
+    def __init__(self, overrides: dict = None):
+        self._overrides = dict(HEADLESS_DEFAULT_SETTINGS)
+        self._overrides.update(overrides or {})
+        super().__init__()
+        unknown = set(self._overrides) - set(self._to_dict())
+        if unknown:
+            raise QueueDescriptionError(f"Unknown measurement control settings: {sorted(unknown)}")
+
+    def _read_savefile(self) -> dict:
+        settings = super()._read_savefile()
+        settings.update(self._overrides)
+        return settings
+
+
+class HeadlessExperimentManager:
+    """
+    Minimal replacement of the ExperimentManager for executing experiments without GUI.
+
+    It provides the attributes accessed by experiments and measurements: the instrument API, the addon settings and
+    the (absent) live viewer, peak searcher and main window.
+
+    Attributes:
+        chip: the chip the devices in the queue are located on
+        mover: if given, the stages are moved to each device before measuring it
+        instruments_config: the content of the instruments.config the instruments are selected from
+        exp: the headless experiment executing the queue
+    """
+
+    def __init__(
+        self,
+        chip: Chip,
+        instruments_config: dict,
+        mover: MoverNew = None,
+        output_path: str = None,
+        settings: dict = None,
+        keep_going: bool = False,
+        stream: TextIO = None,
+    ):
+        self.logger = logging.getLogger()
+
+        self.chip = chip
+        self.mover = mover
+        self.instruments_config = instruments_config
+
+        self.main_window = None
+        self.live_viewer_model = None
+        self.peak_searcher = None
+
+        self.addon_settings = self.load_addon_settings()
+
+        self.instrument_api = InstrumentAPI(self)
+        self.instrument_api.load_all_instruments()
+
+        self.exp = HeadlessExperiment(
+            self, chip, mover, output_path=output_path, settings=settings, keep_going=keep_going, stream=stream
+        )
+        self.exp.import_measurement_classes()
+
+    @staticmethod
+    def load_addon_settings() -> dict:
+        """Reads the addon settings of the GUI, but never creates the settings file."""
+        addon_settings_file = get_configuration_file_path("addon_paths.json")
+        if isfile(addon_settings_file):
+            with open(addon_settings_file, "r") as fp:
+                return json.load(fp)
+        return {"addon_search_directories": []}
+
+
+class HeadlessExperiment(StandardExperiment):
+    """
+    StandardExperiment without any Tk dependency.
+
+    Parameters are plain values instead of Tk variables, GUI updates are skipped and the progress is reported on a
+    text stream instead. An error during a measurement stops the execution after the current ToDo, or, if
+    `keep_going` is set, the failed ToDo is dropped from the queue and the execution continues.
+    """
+
+    def __init__(
+        self,
+        experiment_manager: HeadlessExperimentManager,
+        chip: Chip,
+        mover: MoverNew = None,
+        output_path: str = None,
+        settings: dict = None,
+        keep_going: bool = False,
+        stream: TextIO = None,
+    ):
+        self._output_path = output_path
+        super().__init__(experiment_manager, None, chip, mover)
+
+        self._meas_control_settings = HeadlessMeasurementControlSettings(settings)
+        self.exctrl_auto_move_stages = mover is not None
+
+        self.keep_going = keep_going
+        self.failed_todos: List[ToDo] = []
+        self.n_finished_todos = 0
+        self.n_total_todos = 0
+
+        self._stream = stream if stream is not None else sys.stdout
+
+    def __setup__(self):
+        """Initialise all experiment specific parameters as plain values."""
+        self.chip_parameters["Chip name"] = SimpleNamespace(value=self._chip.name if self._chip else "UnknownChip")
+        self.chip_parameters["Chip path"] = SimpleNamespace(value=self._chip.path if self._chip else "")
+        self.save_parameters["Raw output path"] = SimpleNamespace(value=self._output_path or self._default_save_path)
+
+    def run(self):
+        self.n_total_todos = len(self.to_do_list)
+        self.n_finished_todos = 0
+        self.failed_todos.clear()
+
+        start = time.monotonic()
+        super().run()
+        duration = time.monotonic() - start
+
+        self._report(
+            f"Executed {self.n_finished_todos:d} of {self.n_total_todos:d} ToDos in {duration:.1f}s, "
+            f"{len(self.failed_todos):d} failed, {len(self.to_do_list):d} remaining in the queue."
+        )
+
+    def read_execution_control_variables(self):
+        """The execution control variables are set directly, there is no GUI to read them from."""
+        pass
+
+    def on_measurement_error(self, exc: Exception):
+        self.logger.exception("Error occurred during measurement: " + repr(exc))
+        self.failed_todos.append(self.to_do_list[0])
+        if self.keep_going:
+            # the failed ToDo is never executed again
+            self.to_do_list.pop(0)
+        else:
+            self.exctrl_pause_after_device = True
+
+    def show_meas_finished_infobox(self):
+        self._report("Measurements finished!")
+
+    def update(self, plot_new_meas=False):
+        """There are no tables to update without GUI."""
+        pass
+
+    def _finalize_todo(self, current_todo: ToDo, measurement: Measurement, data, final_path: str, *args, **kwargs):
+        super()._finalize_todo(current_todo, measurement, data, final_path, *args, **kwargs)
+
+        uncompressed_path = strip_compression_ending(final_path)
+        if uncompressed_path.endswith("_error.json"):
+            status = "error"
+        elif uncompressed_path.endswith("_abort.json"):
+            status = "aborted"
+        else:
+            status = "finished"
+
+        self.n_finished_todos += 1
+        self._report(
+            f"[{self.n_finished_todos:d}/{self.n_total_todos:d}] {measurement.get_name_with_id()} "
+            f"on device {current_todo.device.id}: {status} -> {final_path}"
+        )
+
+    def _report(self, line: str):
+        print(line, file=self._stream, flush=True)
+
+
+def load_chip_file(file_path: str, chip_name: str = None) -> Chip:
+    """
+    Loads a chip from a file.
+
+    Supported formats are the chip files written by LabExT (json with name and devices), IBM mask description json
+    files and PhoeniX mask description csv files.
+
+    Args:
+        file_path: path to the chip file
+        chip_name: name of the chip, by default the name stored in the file or the file name
+    Returns:
+        the loaded chip, which is not stored as last imported chip of the GUI
+    """
+    file_path = abspath(file_path)
+    logger = logging.getLogger()
+
+    if file_path.lower().endswith(".csv"):
+        devices = PhoenixPhotonics._decode_phoenics_photonics_csv_file(file_path=file_path)
+        stored_name = None
+    else:
+        try:
+            with open(file_path, "r") as fp:
+                raw_data = json.load(fp)
+        except json.JSONDecodeError as e:
+            raise QueueDescriptionError(f"Chip file {file_path} could not be decoded: {e}") from e
+        if isinstance(raw_data, dict) and "devices" in raw_data:
+            devices = [Device(**dev_desc) for dev_desc in raw_data["devices"]]
+            stored_name = raw_data.get("name")
+        elif isinstance(raw_data, list):
+            devices = IBMMaskDescription._decode_ibm_mask_description(raw_data, logger)
+            stored_name = None
+        else:
+            raise QueueDescriptionError(f"Chip file {file_path} is neither a LabExT chip file nor an IBM mask "
+                                        f"description.")
+
+    name = chip_name or stored_name or splitext(basename(file_path))[0]
+    return Chip(name=name, devices=devices, path=file_path, _serialize_to_disk=False)
+
+
+def load_instruments_config(file_path: str = None) -> dict:
+    """
+    Loads an instruments.config file.
+
+    Args:
+        file_path: path to the file, by default the instruments.config of the user's LabExT settings or, if it does
+            not exist, the default configuration with the simulated instruments.
+    """
+    if file_path is None:
+        file_path = get_configuration_file_path("instruments.config")
+        if not isfile(file_path):
+            file_path = DEFAULT_INSTRUMENTS_CONFIG
+    with open(file_path, "r") as fp:
+        try:
+            instruments_config = json.load(fp)
+        except json.JSONDecodeError as e:
+            raise QueueDescriptionError(f"Instruments config {file_path} could not be decoded: {e}") from e
+    if "Instruments" not in instruments_config:
+        raise QueueDescriptionError(f'Instruments config {file_path} has no "Instruments" key.')
+    return instruments_config
+
+
+def load_queue_file(file_path: str) -> dict:
+    """
+    Loads a queue description from a JSON or YAML file.
+
+    A queue description is a dictionary of this form:
+
+        output: directory to save the measurement files to (optional)
+        chip name: overrides the name of the chip in the file names (optional)
+        inter_measurement_wait_time: seconds to wait between two ToDos (optional)
+        settings: measurement control settings, e.g. pipelined_execution (optional)
+        todos:
+          - measurement: InsertionLossSweep
+            devices: [id1, id2] or "all"
+            parameters: {wavelength start: 1540.0}  (optional, defaults of the measurement otherwise)
+            instruments: {Laser: {class: LaserSimulator, channel: 1}, Power Meter: 0}  (optional, see
+                `select_instrument`)
+            repeat: 2  (optional, number of ToDos per device)
+    """
+    with open(file_path, "r") as fp:
+        if splitext(file_path)[1].lower() in (".yml", ".yaml"):
+            import yaml
+            try:
+                queue = yaml.safe_load(fp)
+            except yaml.YAMLError as e:
+                raise QueueDescriptionError(f"Queue file {file_path} could not be decoded: {e}") from e
+        else:
+            try:
+                queue = json.load(fp)
+            except json.JSONDecodeError as e:
+                raise QueueDescriptionError(f"Queue file {file_path} could not be decoded: {e}") from e
+
+    if not isinstance(queue, dict) or not isinstance(queue.get("todos"), list):
+        raise QueueDescriptionError(f'Queue file {file_path} must contain a dictionary with a "todos" list.')
+    unknown = set(queue) - QUEUE_KEYS
+    if unknown:
+        raise QueueDescriptionError(f"Unknown keys in queue file {file_path}: {sorted(unknown)}")
+    return queue
+
+
+def select_instrument(instruments_config: dict, role: str, selection=None) -> dict:
+    """
+    Selects an instrument for a role from the instruments config, like the instrument selection of the GUI.
+
+    Args:
+        instruments_config: content of an instruments.config file
+        role: instrument type as requested by the measurement, e.g. "Laser" or "SMU 2"
+        selection: None for the first instrument of this type, an index into the list of instruments of this type or
+            a dictionary of keys the instrument description must match, e.g. {"class": "LaserSimulator"}. The key
+            "channel" selects the channel, by default the first available channel is used.
+    Returns:
+        the instrument description dictionary including the selected channel
+    """
+    # "SMU 2" selects from the "SMU" instruments
+    available = instruments_config["Instruments"].get(re.sub(r" [0-9]+$", "", role))
+    if not available:
+        raise QueueDescriptionError(f'No instrument of type "{role}" found in the instruments config.')
+
+    channel = None
+    if selection is None:
+        descriptor = available[0]
+    elif isinstance(selection, int):
+        if not 0 <= selection < len(available):
+            raise QueueDescriptionError(f'There is no instrument with index {selection} of type "{role}".')
+        descriptor = available[selection]
+    elif isinstance(selection, dict):
+        wanted = {k: v for k, v in selection.items() if k != "channel"}
+        channel = selection.get("channel")
+        matching = [d for d in available if all(d.get(k) == v for k, v in wanted.items())]
+        if not matching:
+            raise QueueDescriptionError(f'No instrument of type "{role}" matches {wanted}.')
+        descriptor = matching[0]
+    else:
+        raise QueueDescriptionError(f'Invalid instrument selection for "{role}": {selection!r}')
+
+    descriptor = deepcopy(descriptor)
+    if channel is None:
+        channel = descriptor.get("channel")
+    if channel is None and descriptor.get("channels"):
+        channel = descriptor["channels"][0]
+    descriptor["channel"] = channel
+    return descriptor
+
+
+def create_todos(experiment: HeadlessExperiment, queue: dict, instruments_config: dict) -> List[ToDo]:
+    """
+    Creates the ToDos of a queue description and appends them to the experiment's queue.
+
+    Returns:
+        the created ToDos
+    """
+    chip_devices: Dict[str, Device] = experiment._chip.devices if experiment._chip else {}
+    todos = []
+    for idx, todo_desc in enumerate(queue["todos"]):
+        unknown = set(todo_desc) - TODO_KEYS
+        if unknown:
+            raise QueueDescriptionError(f"Unknown keys in ToDo #{idx:d}: {sorted(unknown)}")
+
+        meas_name = todo_desc.get("measurement")
+        if meas_name not in experiment.measurements_classes:
+            raise QueueDescriptionError(f'Unknown measurement "{meas_name}" in ToDo #{idx:d}.')
+
+        device_ids = todo_desc.get("devices", "all")
+        if device_ids == "all":
+            devices = list(chip_devices.values())
+        else:
+            missing = [str(d) for d in device_ids if str(d) not in chip_devices]
+            if missing:
+                raise QueueDescriptionError(f"Devices {missing} of ToDo #{idx:d} are not on the chip.")
+            devices = [chip_devices[str(d)] for d in device_ids]
+
+        meas_class = experiment.measurements_classes[meas_name]
+        selected_instruments = {
+            role: select_instrument(instruments_config, role, todo_desc.get("instruments", {}).get(role))
+            for role in meas_class.get_wanted_instrument()
+        }
+
+        for device in devices:
+            for _ in range(int(todo_desc.get("repeat", 1))):
+                measurement = experiment.create_measurement_object(meas_name)
+                # reading the parameters loads the defaults, which are otherwise never set if nothing is overridden
+                parameters = measurement.parameters
+                for param_name, value in todo_desc.get("parameters", {}).items():
+                    if param_name not in parameters:
+                        raise QueueDescriptionError(
+                            f'Measurement "{meas_name}" has no parameter "{param_name}" (ToDo #{idx:d}).')
+                    parameters[param_name].value = value
+                measurement.selected_instruments.update(deepcopy(selected_instruments))
+                measurement.init_instruments()
+                todos.append(ToDo(device, measurement))
+
+    experiment.to_do_list.extend(todos)
+    return todos
+
+
+def create_dummy_stage_mover(chip: Chip) -> MoverNew:
+    """
+    Creates a mover with two DummyStages, the left one for the device inputs and the right one for the outputs.
+
+    The stages are calibrated with a single point offset on the first device of the chip, such that chip and stage
+    coordinates coincide.
+    """
+    if not chip.devices:
+        raise QueueDescriptionError("Cannot calibrate dummy stages on a chip without devices.")
+    reference = next(iter(chip.devices.values()))
+
+    mover = MoverNew(None, chip=chip)
+    for idx, (orientation, port, chip_coordinate) in enumerate([
+        (Orientation.LEFT, DevicePort.INPUT, reference.input_coordinate),
+        (Orientation.RIGHT, DevicePort.OUTPUT, reference.output_coordinate),
+    ]):
+        stage = DummyStage(f"dummy:{idx:d}")
+        # start at the reference device, as if the stages were just calibrated there
+        stage.move_absolute(*chip_coordinate.to_list())
+        calibration = mover.add_stage_calibration(stage, orientation, port)
+        calibration.update_single_point_offset(CoordinatePairing(
+            calibration, StageCoordinate.from_list(chip_coordinate.to_list()), reference, chip_coordinate))
+
+    if not mover.can_move_absolutely:
+        raise RuntimeError("Dummy stages could not be calibrated.")
+    return mover
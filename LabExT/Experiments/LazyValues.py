@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Hashable, Iterator, Tuple
+
+import numpy as np
+
+from LabExT.Measurements.MeasAPI.ValuesBuffer import ValuesBuffer
+
+# numpy dtype kinds which are stored on disk: booleans, integers, floats and complex numbers
+_NUMERIC_KINDS = "biufc"
+
+
+class ValuesCache:
+    """
+    Least recently used cache of arrays, limited by the total number of bytes of the cached arrays.
+
+    An array larger than the limit is returned to the caller but not cached. All methods are thread-safe.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._arrays: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Total number of bytes of the cached arrays."""
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._arrays)
+
+    def get(self, key: Hashable):
+        """Returns the cached array or None, and marks it as most recently used."""
+        with self._lock:
+            array = self._arrays.get(key)
+            if array is not None:
+                self._arrays.move_to_end(key)
+            return array
+
+    def put(self, key: Hashable, array: np.ndarray) -> None:
+        """Caches an array and evicts the least recently used arrays until the cache fits its limit."""
+        with self._lock:
+            old = self._arrays.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            if array.nbytes > self.max_bytes:
+                return
+            self._arrays[key] = array
+            self._nbytes += array.nbytes
+            self._shrink()
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            old = self._arrays.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+
+    def resize(self, max_bytes: int) -> None:
+        """Changes the limit of the cache, evicting arrays if necessary."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._shrink()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._arrays.clear()
+            self._nbytes = 0
+
+    def _shrink(self) -> None:
+        while self._nbytes > self.max_bytes:
+            _, evicted = self._arrays.popitem(last=False)
+            self._nbytes -= evicted.nbytes
+
+
+class LazyValues(Mapping):
+    """
+    Read-only replacement of the "values" dictionary of a finished measurement, whose vectors are stored on disk.
+
+    Only the names, data types and positions of the vectors in the values file are kept in memory. A vector is read
+    through a memory-mapped array when it is accessed and kept in the LRU cache of its `ValuesStore`. Vectors which are
+    not numeric are kept in memory as they are.
+    """
+
+    def __init__(self, store: "ValuesStore", file_path: str, layout: Dict[str, Tuple[int, str, tuple]],
+                 resident: dict, keys: list):
+        self._store = store
+        self.file_path = file_path
+        # offset in bytes, dtype string and shape by vector name
+        self._layout = layout
+        self._resident = resident
+        self._keys = keys
+
+    def __getitem__(self, key):
+        if key in self._resident:
+            return self._resident[key]
+        offset, dtype, shape = self._layout[key]
+        return self._store.read(self.file_path, key, offset, dtype, shape)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._layout or key in self._resident
+
+    def __repr__(self):
+        return f"LazyValues({self.file_path!r}, keys={self._keys!r})"
+
+
+def materialize_values(values: Mapping) -> "OrderedDict[str, list]":
+    """Returns the vectors of a values dictionary as lists, e.g. to store a measurement dictionary as JSON."""
+    return OrderedDict((k, v.tolist() if isinstance(v, (np.ndarray, ValuesBuffer)) else v) for k, v in values.items())
+
+
+class ValuesStore:
+    """
+    Stores the values vectors of finished measurements in files of a temporary directory.
+
+    Every dataset gets one file containing its numeric vectors as raw arrays, one after the other. The files are
+    deleted when a dataset is released and the whole directory when the store is closed.
+    """
+
+    def __init__(self, cache_size_mb: float = 256, directory: str = None):
+        """
+        Args:
+            cache_size_mb: maximum size of the vectors kept in memory after reading them from disk, in MB
+            directory: the directory the values files are stored in, a new temporary directory if not given
+        """
+        self.cache = ValuesCache(int(cache_size_mb * 1024 * 1024))
+        self._owns_directory = directory is None
+        self.directory = tempfile.mkdtemp(prefix="labext_values_") if directory is None else directory
+        self._lock = threading.Lock()
+        self._file_counter = 0
+
+    def set_cache_size(self, cache_size_mb: float) -> None:
+        self.cache.resize(int(cache_size_mb * 1024 * 1024))
+
+    def offload(self, values: Mapping) -> LazyValues:
+        """Writes the numeric vectors of a values dictionary to disk and returns the lazy dictionary replacing it."""
+        if isinstance(values, LazyValues):
+            return values
+
+        with self._lock:
+            file_path = os.path.join(self.directory, f"{self._file_counter:08d}.bin")
+            self._file_counter += 1
+
+        layout = {}
+        resident = {}
+        offset = 0
+        with open(file_path, "wb") as fp:
+            for key, vector in values.items():
+                try:
+                    array = np.asarray(vector)
+                except ValueError:
+                    # ragged nested lists
+                    array = None
+                if array is None or array.dtype.kind not in _NUMERIC_KINDS or array.ndim == 0 or array.size == 0:
+                    resident[key] = vector
+                    continue
+                array = np.ascontiguousarray(array)
+                fp.write(array.tobytes())
+                layout[key] = (offset, array.dtype.str, array.shape)
+                offset += array.nbytes
+
+        return LazyValues(self, file_path, layout, resident, list(values.keys()))
+
+    def read(self, file_path: str, key: str, offset: int, dtype: str, shape: tuple) -> np.ndarray:
+        """Returns a vector stored in a values file, from the cache if possible."""
+        cache_key = (file_path, key)
+        array = self.cache.get(cache_key)
+        if array is not None:
+            return array
+        mapped = np.memmap(file_path, dtype=np.dtype(dtype), mode="r", offset=offset, shape=shape)
+        # copy the vector out of the mapping, such that the file is not kept open and can be deleted on release
+        array = np.array(mapped)
+        del mapped
+        array.flags.writeable = False
+        self.cache.put(cache_key, array)
+        return array
+
+    def release(self, values: Mapping) -> None:
+        """Deletes the values file of a lazy values dictionary. Does nothing for other dictionaries."""
+        if not isinstance(values, LazyValues) or values._store is not self:
+            return
+        for key in values._layout:
+            self.cache.discard((values.file_path, key))
+        try:
+            os.remove(values.file_path)
+        except FileNotFoundError:
+            pass
+
+    def close(self) -> None:
+        """Deletes all values files."""
+        self.cache.clear()
+        if self._owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import datetime
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from LabExT.Experiments.ResultCompression import is_result_file, load_result_file
+from LabExT.Experiments.ValuesSidecar import resolve_values_sidecar
+
+# file name of the catalog in the LabExT settings directory
+CATALOG_FILE_NAME = "measurement_catalog.sqlite"
+
+# numpy dtype kinds of the values vectors for which metrics are stored: booleans, integers and floats
+_NUMERIC_KINDS = "biuf"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS measurements (
+    file_path TEXT PRIMARY KEY,
+    chip TEXT,
+    device_id TEXT,
+    device_type TEXT,
+    measurement_name TEXT,
+    measurement_id TEXT,
+    timestamp_start TEXT,
+    timestamp_end TEXT,
+    finished INTEGER,
+    error TEXT,
+    parameters TEXT,
+    metrics TEXT,
+    file_mtime REAL,
+    file_size INTEGER
+);
+CREATE INDEX IF NOT EXISTS measurements_device ON measurements (chip, device_id);
+CREATE INDEX IF NOT EXISTS measurements_name ON measurements (measurement_name, timestamp_start);
+CREATE INDEX IF NOT EXISTS measurements_start ON measurements (timestamp_start);
+"""
+
+_COLUMNS = ("file_path", "chip", "device_id", "device_type", "measurement_name", "measurement_id", "timestamp_start",
+            "timestamp_end", "finished", "error", "parameters", "metrics", "file_mtime", "file_size")
+
+
+@dataclass
+class CatalogEntry:
+    """One measurement data file in the catalog."""
+
+    file_path: str
+    chip: Optional[str] = None
+    device_id: Optional[str] = None
+    device_type: Optional[str] = None
+    measurement_name: Optional[str] = None
+    measurement_id: Optional[str] = None
+    # ISO formatted timestamps
+    timestamp_start: Optional[str] = None
+    timestamp_end: Optional[str] = None
+    finished: bool = False
+    # description of the error of a failed measurement, None if it did not fail
+    error: Optional[str] = None
+    # values of the measurement settings by name
+    parameters: Dict[str, object] = field(default_factory=dict)
+    # minimum, maximum, mean and number of points by name of every numeric values vector
+    metrics: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    file_mtime: float = 0.0
+    file_size: int = 0
+
+    def as_row(self) -> tuple:
+        return (self.file_path, self.chip, self.device_id, self.device_type, self.measurement_name,
+                self.measurement_id, self.timestamp_start, self.timestamp_end, int(self.finished), self.error,
+                json.dumps(self.parameters, default=str), json.dumps(self.metrics), self.file_mtime, self.file_size)
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "CatalogEntry":
+        entry = cls(*row)
+        entry.finished = bool(entry.finished)
+        entry.parameters = json.loads(entry.parameters or "{}")
+        entry.metrics = json.loads(entry.metrics or "{}")
+        return entry
+
+
+def _iso_timestamp(timestamp) -> Optional[str]:
+    """Converts the ISO and the "%Y-%m-%d_%H%M%S" timestamps of data files to ISO timestamps without microseconds."""
+    if not timestamp:
+        return None
+    for parse in (datetime.datetime.fromisoformat, lambda t: datetime.datetime.strptime(t, "%Y-%m-%d_%H%M%S")):
+        try:
+            return parse(str(timestamp)).replace(microsecond=0).isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def _values_metrics(values: Mapping) -> Dict[str, Dict[str, float]]:
+    metrics = {}
+    for name, vector in values.items():
+        try:
+            array = np.asarray(vector)
+        except ValueError:
+            continue
+        if array.dtype.kind not in _NUMERIC_KINDS or array.ndim != 1 or array.size == 0:
+            continue
+        finite = array[np.isfinite(array)] if array.dtype.kind == "f" else array
+        if finite.size == 0:
+            metrics[name] = {"points": int(array.size)}
+            continue
+        metrics[name] = {
+            "min": float(np.min(finite)),
+            "max": float(np.max(finite)),
+            "mean": float(np.mean(finite)),
+            "points": int(array.size),
+        }
+    return metrics
+
+
+def catalog_entry(meas_dict: Mapping, file_path: str) -> CatalogEntry:
+    """Returns the catalog entry of a measurement dictionary saved to the given file.
+
+    Args:
+        meas_dict: the measurement dictionary, as saved or as loaded from the file
+        file_path: the path of the measurement's data file, which must exist
+    """
+    stat = os.stat(file_path)
+    device = meas_dict.get("device") or {}
+    chip = meas_dict.get("chip") or {}
+    error = meas_dict.get("error") or {}
+    settings = meas_dict.get("measurement settings") or {}
+    return CatalogEntry(
+        file_path=os.path.abspath(file_path),
+        chip=chip.get("name"),
+        device_id=None if device.get("id") is None else str(device["id"]),
+        device_type=device.get("type"),
+        measurement_name=meas_dict.get("measurement name", meas_dict.get("name")),
+        measurement_id=meas_dict.get("measurement id long"),
+        timestamp_start=_iso_timestamp(meas_dict.get("timestamp iso start", meas_dict.get("timestamp start"))),
+        timestamp_end=_iso_timestamp(meas_dict.get("timestamp end", meas_dict.get("timestamp"))),
+        finished=bool(meas_dict.get("finished", False)),
+        error=(error.get("desc") or error.get("type") or "unknown error") if error else None,
+        parameters={k: v.get("value") if isinstance(v, Mapping) else v for k, v in settings.items()},
+        metrics=_values_metrics(meas_dict.get("values") or {}),
+        file_mtime=stat.st_mtime,
+        file_size=stat.st_size,
+    )
+
+
+def _read_catalog_entry(file_path: str) -> Tuple[str, Optional[CatalogEntry], Optional[str]]:
+    """Reads the catalog entry of a data file, in a worker process of the bulk indexer."""
+    try:
+        meas_dict = load_result_file(file_path)
+        if not isinstance(meas_dict, dict) or "device" not in meas_dict:
+            return file_path, None, "not a LabExT measurement data file"
+        resolve_values_sidecar(meas_dict, file_path)
+        return file_path, catalog_entry(meas_dict, file_path), None
+    except Exception as exc:
+        return file_path, None, repr(exc)
+
+
+@dataclass
+class IndexResult:
+    """Outcome of indexing a directory."""
+
+    indexed: int = 0
+    unchanged: int = 0
+    # error message by file path of the files which could not be indexed
+    failed: Dict[str, str] = field(default_factory=dict)
+    duration: float = 0.0
+
+
+class MeasurementCatalog:
+    """
+    SQLite index of measurement data files, to find measurements without opening their files.
+
+    Every entry holds the chip, the device, the measurement name, the timestamps, the measurement settings, the error
+    state and a few metrics of the numeric values of a data file. Entries are added when LabExT saves a measurement or
+    by indexing existing directories with `index_directory`. All methods are thread-safe.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: path of the SQLite database file, created if it does not exist
+        """
+        self.db_path = db_path
+        self.logger = logging.getLogger()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM measurements").fetchone()[0]
+
+    def add(self, meas_dict: Mapping, file_path: str) -> CatalogEntry:
+        """Adds or updates the entry of a measurement saved to the given file and returns it."""
+        entry = catalog_entry(meas_dict, file_path)
+        self.add_entries([entry])
+        return entry
+
+    def add_entries(self, entries: Iterable[CatalogEntry]) -> None:
+        """Adds or updates several entries in a single transaction."""
+        placeholders = ", ".join("?" * len(_COLUMNS))
+        with self._lock, self._connection:
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO measurements ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                [e.as_row() for e in entries]
+            )
+
+    def remove(self, file_paths: Iterable[str]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany("DELETE FROM measurements WHERE file_path = ?",
+                                         [(os.path.abspath(p),) for p in file_paths])
+
+    def prune(self) -> int:
+        """Removes the entries whose files do not exist anymore and returns their number."""
+        with self._lock:
+            paths = [row[0] for row in self._connection.execute("SELECT file_path FROM measurements")]
+        missing = [p for p in paths if not os.path.isfile(p)]
+        self.remove(missing)
+        return len(missing)
+
+    def query(self,
+              chip: str = None,
+              device_id=None,
+              device_type: str = None,
+              measurement_name: str = None,
+              since: datetime.datetime = None,
+              until: datetime.datetime = None,
+              include_errors: bool = True,
+              limit: int = None) -> List[CatalogEntry]:
+        """Returns the entries matching all given criteria, the most recent measurements first.
+
+        Args:
+            chip: name of the chip
+            device_id: id of the device
+            device_type: type of the device
+            measurement_name: name of the measurement, e.g. "InsertionLossSweep"
+            since: only measurements started at or after this time
+            until: only measurements started before this time
+            include_errors: set to False to omit measurements which failed
+            limit: maximum number of returned entries
+        """
+        conditions = []
+        arguments = []
+        for column, value in (("chip", chip), ("device_id", device_id), ("device_type", device_type),
+                              ("measurement_name", measurement_name)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                arguments.append(str(value))
+        if since is not None:
+            conditions.append("timestamp_start >= ?")
+            arguments.append(since.replace(microsecond=0).isoformat())
+        if until is not None:
+            conditions.append("timestamp_start < ?")
+            arguments.append(until.replace(microsecond=0).isoformat())
+        if not include_errors:
+            conditions.append("error IS NULL")
+
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM measurements"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY timestamp_start DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit):d}"
+        with self._lock:
+            rows = self._connection.execute(sql, arguments).fetchall()
+        return [CatalogEntry.from_row(row) for row in rows]
+
+    def distinct(self, column: str) -> List[str]:
+        """Returns the distinct values of a text column, e.g. all chip names, sorted."""
+        if column not in ("chip", "device_id", "device_type", "measurement_name"):
+            raise ValueError(f"Cannot list the values of column {column!r}.")
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT DISTINCT {column} FROM measurements WHERE {column} IS NOT NULL ORDER BY {column}"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _indexed_files(self) -> Dict[str, Tuple[float, int]]:
+        with self._lock:
+            rows = self._connection.execute("SELECT file_path, file_mtime, file_size FROM measurements").fetchall()
+        return {path: (mtime, size) for path, mtime, size in rows}
+
+    def index_directory(self,
+                        directory: str,
+                        recursive: bool = True,
+                        max_workers: int = None,
+                        batch_size: int = 200,
+                        progress: Callable[[int, int], None] = None) -> IndexResult:
+        """Adds all data files in a directory to the catalog, reading them in parallel worker processes.
+
+        Files which did not change since they were indexed are skipped.
+
+        Args:
+            directory: the directory to search for data files (.json, .json.gz and .json.zst)
+            recursive: set to False to ignore sub-directories
+            max_workers: number of worker processes, 1 to read the files in the calling thread, by default the number
+                of CPUs
+            batch_size: number of entries written to the database per transaction
+            progress: called with the number of processed files and the number of files to process
+        """
+        start = time.perf_counter()
+        result = IndexResult()
+
+        file_paths = []
+        for root, dirs, files in os.walk(directory):
+            file_paths.extend(os.path.abspath(os.path.join(root, f)) for f in files if is_result_file(f))
+            if not recursive:
+                break
+        indexed = self._indexed_files()
+        to_read = []
+        for path in sorted(file_paths):
+            stat = os.stat(path)
+            if indexed.get(path) == (stat.st_mtime, stat.st_size):
+                result.unchanged += 1
+            else:
+                to_read.append(path)
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        pool = None
+        if max_workers > 1 and len(to_read) > 1:
+            # the workers are started fresh instead of forking the GUI process with its threads and connections
+            pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            if pool is None:
+                outcomes = map(_read_catalog_entry, to_read)
+            else:
+                chunk_size = max(1, min(64, len(to_read) // (4 * max_workers)))
+                outcomes = pool.map(_read_catalog_entry, to_read, chunksize=chunk_size)
+            batch = []
+            for n_done, (path, entry, error) in enumerate(outcomes, start=1):
+                if entry is None:
+                    result.failed[path] = error
+                else:
+                    batch.append(entry)
+                if len(batch) >= batch_size:
+                    self.add_entries(batch)
+                    result.indexed += len(batch)
+                    batch = []
+                if progress is not None:
+                    progress(n_done, len(to_read))
+            self.add_entries(batch)
+            result.indexed += len(batch)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        result.duration = time.perf_counter() - start
+        self.logger.info("Indexed %d data files in %s in %.1f s, %d unchanged, %d could not be read.",
+                         result.indexed, directory, result.duration, result.unchanged, len(result.failed))
+        return result
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from LabExT.Wafer.Device import Device
+else:
+    Device = None
+
+
+class MeasurementPipeline:
+    """Overlaps writing the data file of a finished ToDo with the stage movement to the next device.
+
+    Used by `StandardExperiment.run()` in pipelined execution mode. Two single-threaded workers are kept:
+
+    * the saving worker takes the final instrument snapshot of a finished ToDo and writes its data file to disk.
+    * the movement worker moves the stages to the next device.
+
+    Everything else, i.e. the sweep summary, the queue journal and the GUI updates, stays in the experiment thread.
+    The experiment waits for the data file to be written before the ToDo leaves the queue, such that a failed save
+    keeps the ToDo in the queue as in sequential execution.
+    """
+
+    def __init__(self) -> None:
+        self.logger = logging.getLogger()
+
+        self._saving_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ToDo Saving")
+        self._movement_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ToDo Stage Movement")
+
+        self._pending_movement: Optional[Tuple[Device, Future]] = None
+
+    def submit_save(self, func: Callable, *args, **kwargs) -> Future:
+        """Writes a data file in the background by calling `func(*args, **kwargs)` on the saving worker.
+
+        The caller must not access the data until the returned future is done. Errors are raised by its `result()`.
+        """
+        return self._saving_executor.submit(func, *args, **kwargs)
+
+    def start_movement(self, device: Device, func: Callable, *args, **kwargs) -> None:
+        """Starts moving the stages to the given device in the background."""
+        if self._pending_movement is not None:
+            self.finish_movement(None)
+        self._pending_movement = (device, self._movement_executor.submit(func, *args, **kwargs))
+
+    def finish_movement(self, device: Optional[Device]) -> bool:
+        """Waits for a movement started with `start_movement` to finish.
+
+        Any exception raised during the movement is re-raised here.
+
+        Returns:
+            True if the stages were moved to `device` in the background, False otherwise. In the latter case, the
+            caller needs to move the stages itself.
+        """
+        if self._pending_movement is None:
+            return False
+        moved_device, future = self._pending_movement
+        self._pending_movement = None
+        future.result()
+        return moved_device is device
+
+    def drain(self) -> None:
+        """Blocks until a pending stage movement is done. Its errors are logged, not raised."""
+        if self._pending_movement is not None:
+            _, future = self._pending_movement
+            self._pending_movement = None
+            if future.exception() is not None:
+                self.logger.error(f"Moving the stages to the next device failed: {future.exception()!r}")
+
+    def shutdown(self) -> None:
+        """Waits for all jobs to finish and stops the workers."""
+        try:
+            self.drain()
+        finally:
+            self._saving_executor.shutdown(wait=True)
+            self._movement_executor.shutdown(wait=True)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import csv
+import datetime
+import json
+import threading
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+PHASE_STAGE_MOVEMENT = "stage movement"
+PHASE_SEARCH_FOR_PEAK = "search for peak"
+PHASE_MEASUREMENT = "measurement"
+PHASE_INSTRUMENT_SNAPSHOT = "instrument snapshot"
+PHASE_SAVING = "saving"
+PHASE_SWEEP_SUMMARY = "sweep summary"
+PHASE_GUI_REFRESH = "gui refresh"
+PHASE_INTER_MEASUREMENT_WAIT = "inter-measurement wait"
+
+# all phases of the execution of a ToDo, in the order they are executed
+PHASES = (
+    PHASE_INSTRUMENT_SNAPSHOT,
+    PHASE_STAGE_MOVEMENT,
+    PHASE_SEARCH_FOR_PEAK,
+    PHASE_MEASUREMENT,
+    PHASE_SWEEP_SUMMARY,
+    PHASE_SAVING,
+    PHASE_GUI_REFRESH,
+    PHASE_INTER_MEASUREMENT_WAIT,
+)
+
+
+class PhaseTimer:
+    """
+    Records how long the phases of the execution of a single ToDo take.
+
+    A phase may be entered several times, e.g. the instruments are read before and after the measurement, in which
+    case the durations are summed up. Since the data of a ToDo might be saved in a background thread in pipelined
+    execution mode, all methods are thread-safe.
+    """
+
+    def __init__(self, device_id: str = None, measurement_name: str = None):
+        self.device_id = device_id
+        self.measurement_name = measurement_name
+        self.timestamp_start = datetime.datetime.now()
+
+        self._lock = threading.Lock()
+        self._t0 = perf_counter()
+        self._t_end = self._t0
+        # (start relative to the start of the ToDo, accumulated duration) by phase name
+        self._phases: Dict[str, Tuple[float, float]] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Context manager timing the enclosed code as the given phase."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, perf_counter())
+
+    def add(self, name: str, start: float, stop: float) -> None:
+        """Adds a phase given by two `time.perf_counter()` values."""
+        with self._lock:
+            first_start, duration = self._phases.get(name, (start - self._t0, 0.0))
+            self._phases[name] = (first_start, duration + stop - start)
+            self._t_end = max(self._t_end, stop)
+
+    @property
+    def start_time(self) -> float:
+        """The `time.perf_counter()` value at the start of the ToDo."""
+        return self._t0
+
+    @property
+    def durations(self) -> Dict[str, float]:
+        """Accumulated duration in seconds by phase name."""
+        with self._lock:
+            return {name: duration for name, (_, duration) in self._phases.items()}
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds from the start of the ToDo until the end of its last recorded phase."""
+        with self._lock:
+            return self._t_end - self._t0
+
+    def as_dict(self) -> dict:
+        """Returns the recorded phases for storing them in a measurement dataset."""
+        with self._lock:
+            phases = {name: {"start": round(start, 6), "duration": round(duration, 6)}
+                      for name, (start, duration) in self._phases.items()}
+            elapsed = self._t_end - self._t0
+        return {
+            "timestamp iso start": self.timestamp_start.isoformat(),
+            "elapsed": round(elapsed, 6),
+            "phases": phases,
+        }
+
+
+class ThroughputStatistics:
+    """
+    Aggregates the phase timers of executed ToDos to throughput and per-phase duration statistics.
+
+    The number of ToDos, the execution time and the count and total duration of each phase are updated whenever a
+    ToDo is added, such that the summary is cheap to compute, e.g. once per second for the throughput panel. The
+    timers of the most recent `max_todos` ToDos are kept for the percentiles and the per-ToDo rows of the exports.
+    """
+
+    def __init__(self, max_todos: int = 100000):
+        self._lock = threading.Lock()
+        self._timers: deque = deque(maxlen=max_todos)
+        self._n_todos = 0
+        self._device_ids = set()
+        self._execution_time = 0.0
+        # [count, total duration] by phase name
+        self._phases: Dict[str, List] = {}
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def add(self, timer: PhaseTimer) -> None:
+        """Adds the timer of a ToDo once its execution is done, i.e. all of its phases are recorded."""
+        durations = timer.durations
+        elapsed = timer.elapsed
+        with self._lock:
+            self._timers.append(timer)
+            self._n_todos += 1
+            self._device_ids.add(timer.device_id)
+            self._execution_time += elapsed
+            for name, duration in durations.items():
+                phase = self._phases.setdefault(name, [0, 0.0])
+                phase[0] += 1
+                phase[1] += duration
+
+    def reset(self) -> None:
+        """Forgets all ToDos."""
+        with self._lock:
+            self._timers.clear()
+            self._n_todos = 0
+            self._device_ids.clear()
+            self._execution_time = 0.0
+            self._phases.clear()
+
+    @property
+    def timers(self) -> List[PhaseTimer]:
+        with self._lock:
+            return list(self._timers)
+
+    def summary(self) -> dict:
+        """
+        Returns the throughput and the per-phase statistics of all ToDos added since the last reset.
+
+        The execution time is the sum of the elapsed times of the ToDos, such that the time in between runs of the
+        queue does not lower the throughput.
+
+        Returns:
+            a dictionary with the number of ToDos and distinct devices, the execution time in seconds, ToDos and
+            devices per hour and, by phase, the number of ToDos which executed the phase and the total and mean
+            duration in seconds.
+        """
+        with self._lock:
+            n_todos = self._n_todos
+            n_devices = len(self._device_ids)
+            execution_time = self._execution_time
+            phases = {name: (count, total) for name, (count, total) in self._phases.items()}
+
+        summary = {
+            "todos": n_todos,
+            "devices": n_devices,
+            "execution time": execution_time,
+            "todos per hour": 3600.0 * n_todos / execution_time if execution_time > 0 else 0.0,
+            "devices per hour": 3600.0 * n_devices / execution_time if execution_time > 0 else 0.0,
+            "phases": {},
+        }
+        for name in self._phase_names([phases]):
+            count, total = phases[name]
+            summary["phases"][name] = {"count": count, "total": total, "mean": total / count}
+        return summary
+
+    @staticmethod
+    def _add_percentiles(summary: dict, all_durations: List[Dict[str, float]]) -> None:
+        """Adds the median (p50) and the 95th percentile (p95) duration of each phase of the kept timers."""
+        for name, phase in summary["phases"].items():
+            durations = [d[name] for d in all_durations if name in d]
+            # the phase might only be recorded by ToDos which are not kept anymore
+            p50, p95 = np.percentile(durations, [50, 95]).tolist() if durations else (None, None)
+            phase["p50"] = p50
+            phase["p95"] = p95
+
+    def export_json(self, file_path: str) -> None:
+        """Writes the summary, including the percentiles of the phase durations, and the phases of every kept ToDo to
+        a JSON file."""
+        timers = self.timers
+        summary = self.summary()
+        self._add_percentiles(summary, [t.durations for t in timers])
+        content = {
+            "summary": summary,
+            "todos": [dict(t.as_dict(), **{"device id": t.device_id, "measurement name": t.measurement_name})
+                      for t in timers],
+        }
+        with open(file_path, "w") as fp:
+            json.dump(content, fp, indent=2)
+
+    def export_csv(self, file_path: str) -> None:
+        """Writes one row per ToDo with the duration of each phase in seconds to a CSV file."""
+        timers = self.timers
+        all_durations = [t.durations for t in timers]
+        phase_names = self._phase_names(all_durations)
+        with open(file_path, "w", newline="") as fp:
+            writer = csv.writer(fp)
+            writer.writerow(["timestamp iso start", "device id", "measurement name", "elapsed [s]"]
+                            + [f"{name} [s]" for name in phase_names])
+            for timer, durations in zip(timers, all_durations):
+                writer.writerow([timer.timestamp_start.isoformat(), timer.device_id, timer.measurement_name,
+                                 f"{timer.elapsed:.6f}"]
+                                + [self._format_duration(durations.get(name)) for name in phase_names])
+
+    @staticmethod
+    def _phase_names(all_durations: Iterable[Iterable[str]]) -> List[str]:
+        """Names of all recorded phases, the known phases first in execution order."""
+        recorded = set().union(*all_durations)
+        return [p for p in PHASES if p in recorded] + sorted(recorded.difference(PHASES))
+
+    @staticmethod
+    def _format_duration(duration: Optional[float]) -> str:
+        return "" if duration is None else f"{duration:.6f}"
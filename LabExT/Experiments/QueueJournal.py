@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from LabExT.Experiments.AutosaveDict import JOURNAL_ENDING
+from LabExT.Experiments.ToDo import ToDo, DictionaryWrapper
+from LabExT.Utils import get_configuration_file_path
+from LabExT.Wafer.Device import Device
+
+if TYPE_CHECKING:
+    from LabExT.Experiments.StandardExperiment import StandardExperiment
+else:
+    StandardExperiment = None
+
+
+def _json_default(obj):
+    """Converts numpy scalars and arrays, which are common in measurement parameters, to plain Python objects."""
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    return str(obj)
+
+
+def todo_key(todo: ToDo) -> str:
+    """Key of a ToDo in the journal, i.e. the id of its measurement."""
+    return todo.measurement_id_hex
+
+
+def sweep_key(todo: ToDo) -> Optional[str]:
+    """Key of the parameter sweep a ToDo belongs to, i.e. the id of the sweep's first measurement."""
+    if not todo.part_of_sweep:
+        return None
+    return str(todo.sweep_parameters["metadata", "id"].iloc[0])
+
+
+@dataclass
+class JournalState:
+    """
+    Queue state recovered from a journal.
+
+    Attributes:
+        definitions: ToDo definitions (device, measurement, parameters, instruments) by ToDo key, except for the ToDos
+            of sweeps, which are defined by the rows of their sweep
+        sweeps: sweep parameter tables, output sub-folders and the definition shared by their ToDos by sweep key
+        sweep_rows: sweep key and row index in its parameter table by ToDo key
+        queue: ToDo keys in the order of the last recorded queue
+        finished: file paths of successfully finished ToDos by ToDo key
+        started: partial data files (`.json.part`) of ToDos which were started but never finished, by ToDo key
+    """
+
+    definitions: Dict[str, dict] = field(default_factory=dict)
+    sweeps: Dict[str, dict] = field(default_factory=dict)
+    sweep_rows: Dict[str, Tuple[str, int]] = field(default_factory=dict)
+    queue: List[str] = field(default_factory=list)
+    finished: Dict[str, str] = field(default_factory=dict)
+    started: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def pending(self) -> List[str]:
+        """Keys of the ToDos which still need to be executed, in queue order."""
+        return [k for k in self.queue if k not in self.finished]
+
+    def definition(self, key: str) -> Optional[dict]:
+        """Returns the definition of a ToDo, or None if it is not defined in the journal.
+
+        The definition of a ToDo of a sweep is the one shared by all ToDos of the sweep, with the swept parameters
+        set to the values of its row.
+        """
+        if key in self.definitions:
+            return self.definitions[key]
+        if key not in self.sweep_rows:
+            return None
+        sweep, row = self.sweep_rows[key]
+        sweep_record = self.sweeps[sweep]
+        definition = dict(sweep_record["todo"], key=key, sweep=sweep)
+        definition["parameters"] = dict(definition["parameters"])
+        for (group, name), value in zip(sweep_record["columns"], sweep_record["data"][row]):
+            if group == "measurement settings":
+                definition["parameters"][name] = value
+        return definition
+
+
+class QueueJournal:
+    """
+    Append-only write-ahead journal of the ToDo queue.
+
+    The journal is a JSON-lines file. Every ToDo is defined once with its device, measurement, parameters and
+    instrument selection, followed by records whenever the queue changes and whenever a ToDo is started or finished.
+    Every write is flushed and fsync'd before returning, such that after a crash the queue can be restored from the
+    journal exactly as it was, without the already finished ToDos.
+
+    Writing the journal is cheap, also for queues of 100k ToDos: the ToDos of a sweep are defined by the rows of the
+    sweep's parameter table, which is written once and extended when an adaptive sweep adds points. A change of the
+    queue only writes the keys of the removed ToDos and the keys and positions of the inserted ones, starting and
+    finishing a ToDo appends one short line each. The whole queue is only written at the first recording of a session,
+    by `record_queue` if the queue changed since it was last written in full, and when the journal is compacted once it
+    holds more finished than pending ToDos. It is deleted when the queue is empty.
+    """
+
+    FILENAME = "queue_journal.jsonl"
+
+    # the journal is compacted only if it contains at least this many finished ToDos
+    COMPACTION_MIN_FINISHED = 10000
+
+    def __init__(self, file_path: str = None):
+        self.logger = logging.getLogger()
+        self.file_path = file_path if file_path is not None else get_configuration_file_path(self.FILENAME)
+
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._defined: Set[str] = set()
+        # number of rows and columns of the recorded parameter table by sweep key, adaptive sweeps grow while running
+        self._sweeps: Dict[str, Tuple[int, int]] = {}
+        # keys of the ToDos in the journaled queue, the order is kept by the journal only
+        self._pending: Dict[str, None] = {}
+        # keys of the last queue written in full, None if the queue changed since
+        self._recorded_queue: Optional[List[str]] = None
+        # True while the journaled queue contains a ToDo twice, e.g. in between the two assignments of a swap
+        self._duplicates = False
+        self._n_finished = 0
+
+    #
+    #   writing
+    #
+
+    def record_queue(self, to_do_list: List[ToDo]) -> None:
+        """Records the current queue. ToDos which are not yet known to the journal are defined."""
+        with self._lock:
+            if not self._initialized or self._compaction_due(len(to_do_list)):
+                self._rewrite(to_do_list)
+                return
+
+            records = self._definition_records(to_do_list)
+            keys = [todo_key(t) for t in to_do_list]
+            if keys != self._recorded_queue:
+                records.append(self._queue_record(keys))
+            self._append(records)
+
+    def record_change(self, to_do_list: List[ToDo], added: List[ToDo], removed: List[ToDo] = ()) -> None:
+        """
+        Records a change of the queue, e.g. ToDos added, deleted or reordered in the GUI.
+
+        Only the keys of the removed ToDos and the keys and positions of the added ToDos are written. Finished ToDos
+        removed from the queue are already recorded by `record_finished`, nothing is written for them.
+
+        Args:
+            to_do_list: the queue after the change
+            added: the ToDos added to the queue, reordered ToDos are added and removed
+            removed: the ToDos removed from the queue
+        """
+        with self._lock:
+            if not self._initialized or self._compaction_due(len(to_do_list)):
+                self._rewrite(to_do_list)
+                return
+
+            records = self._definition_records(added)
+            removed_keys = [k for k in (todo_key(t) for t in removed) if k in self._pending]
+            for key in removed_keys:
+                del self._pending[key]
+            added_keys = [todo_key(t) for t in added]
+            positions = _positions(to_do_list, added) if added else []
+
+            if self._duplicates or len(positions) != len(added) or any(k in self._pending for k in added_keys):
+                # a ToDo is queued twice, the journaled queue cannot be updated by keys anymore
+                records.append(self._queue_record([todo_key(t) for t in to_do_list]))
+            elif removed_keys or added_keys:
+                change = {"op": "change", "removed": removed_keys}
+                if added_keys:
+                    change["inserted"] = [[index, todo_key(to_do_list[index])] for index in positions]
+                    self._pending.update(dict.fromkeys(added_keys))
+                records.append(change)
+                self._recorded_queue = None
+            self._append(records)
+
+    def record_started(self, todo: ToDo, part_file_path: str) -> None:
+        """Records that a ToDo started to write its data to the given partial file."""
+        record = {"op": "start", "key": todo_key(todo), "file": part_file_path}
+        if todo.part_of_sweep:
+            record["sweep"] = sweep_key(todo)
+            record["subfolder"] = todo.dictionary_wrapper.subfolder_name
+        with self._lock:
+            self._append([record])
+
+    def record_finished(self, todo: ToDo, file_path: str, success: bool) -> None:
+        """
+        Records that a ToDo wrote its final data file.
+
+        Only successful ToDos are removed from the queue, failed and aborted ToDos stay in the queue, as they do in
+        StandardExperiment.
+        """
+        key = todo_key(todo)
+        with self._lock:
+            self._append([{"op": "finished" if success else "failed", "key": key, "file": file_path}])
+            if success:
+                self._n_finished += 1
+                self._pending.pop(key, None)
+                self._recorded_queue = None
+
+    def clear(self) -> None:
+        """Deletes the journal, e.g. once all ToDos are finished."""
+        with self._lock:
+            if os.path.isfile(self.file_path):
+                os.remove(self.file_path)
+            self._initialized = True
+            self._defined.clear()
+            self._sweeps.clear()
+            self._pending = {}
+            self._recorded_queue = []
+            self._duplicates = False
+            self._n_finished = 0
+
+    def rewrite(self, to_do_list: List[ToDo]) -> None:
+        """Replaces the journal by one containing only the given queue."""
+        with self._lock:
+            self._rewrite(to_do_list)
+
+    def _compaction_due(self, queue_length: int) -> bool:
+        return self._n_finished > max(self.COMPACTION_MIN_FINISHED, queue_length)
+
+    def _rewrite(self, to_do_list: List[ToDo]) -> None:
+        self._defined.clear()
+        self._sweeps.clear()
+        self._n_finished = 0
+
+        records = self._definition_records(to_do_list)
+        records.append(self._queue_record([todo_key(t) for t in to_do_list]))
+
+        # write to a temporary file first, so there is always a complete journal on disk
+        tmp_path = self.file_path + ".tmp"
+        self._write(tmp_path, records, mode="w")
+        os.replace(tmp_path, self.file_path)
+        self._initialized = True
+
+    def _queue_record(self, keys: List[str]) -> dict:
+        """Returns the record of the whole queue and takes it as the journaled queue."""
+        self._pending = dict.fromkeys(keys)
+        self._duplicates = len(self._pending) != len(keys)
+        self._recorded_queue = keys
+        return {"op": "queue", "keys": keys}
+
+    def _definition_records(self, todos: List[ToDo]) -> List[dict]:
+        """Returns the records defining those of the given ToDos which are not yet defined in the journal.
+
+        A ToDo of a sweep is defined by its row in the parameter table of the sweep, only the table and the definition
+        shared by all ToDos of the sweep are written.
+        """
+        records = []
+        # the dictionaries of the devices by object id, as many ToDos share the same device
+        device_dicts = {}
+        # the sweep keys by id of the parameter table, which is shared by all ToDos of a sweep
+        sweep_keys = {}
+        for todo in todos:
+            if todo.part_of_sweep:
+                params = todo.sweep_parameters
+                skey = sweep_keys.get(id(params))
+                if skey is None:
+                    skey = sweep_keys[id(params)] = sweep_key(todo)
+                    records.extend(self._sweep_records(skey, todo, device_dicts))
+                continue
+
+            key = todo_key(todo)
+            if key in self._defined:
+                continue
+            self._defined.add(key)
+            definition = self._shared_definition(todo, device_dicts)
+            definition.update(op="todo", key=key)
+            records.append(definition)
+        return records
+
+    def _sweep_records(self, skey: str, todo: ToDo, device_dicts: Dict[int, dict]) -> List[dict]:
+        """Returns the records of the rows of the sweep's parameter table which are not yet recorded."""
+        params = todo.sweep_parameters
+        n_recorded, n_columns = self._sweeps.get(skey, (0, len(params.columns)))
+        if n_recorded >= len(params):
+            return []
+        self._sweeps[skey] = (len(params), n_columns)
+
+        # columns added while running, e.g. the file paths of finished measurements, are not recorded
+        record = {
+            "op": "sweep",
+            "key": skey,
+            "start": n_recorded,
+            "data": params.iloc[n_recorded:, :n_columns].values.tolist(),
+            "subfolder": todo.dictionary_wrapper.subfolder_name,
+        }
+        if n_recorded == 0:
+            record["columns"] = [list(c) for c in params.columns]
+            record["todo"] = self._shared_definition(todo, device_dicts)
+        return [record]
+
+    @staticmethod
+    def _shared_definition(todo: ToDo, device_dicts: Dict[int, dict]) -> dict:
+        device_dict = device_dicts.get(id(todo.device))
+        if device_dict is None:
+            device_dict = device_dicts[id(todo.device)] = todo.device.as_dict()
+        return {
+            "device": device_dict,
+            "measurement": todo.measurement_class.__name__,
+            "parameters": todo.get_parameter_values(),
+            "instruments": todo.selected_instruments,
+        }
+
+    def _append(self, records: List[dict]) -> None:
+        if not records:
+            return
+        self._write(self.file_path, records, mode="a")
+
+    @staticmethod
+    def _write(file_path: str, records: List[dict], mode: str) -> None:
+        with open(file_path, mode) as fp:
+            fp.write("".join(json.dumps(r, default=_json_default) + "\n" for r in records))
+            fp.flush()
+            os.fsync(fp.fileno())
+
+    #
+    #   reading
+    #
+
+    def load(self) -> JournalState:
+        """Replays the journal. Returns an empty state if there is no journal."""
+        state = JournalState()
+        if not os.path.isfile(self.file_path):
+            return state
+
+        # removed keys are only dropped from the queue before ToDos are inserted and at the end
+        removed = set()
+        with open(self.file_path, "r") as fp:
+            for line_no, line in enumerate(fp):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line might be incomplete if LabExT crashed while writing it
+                    self.logger.warning(f"Skipping corrupt line {line_no + 1:d} of queue journal {self.file_path}.")
+                    continue
+                op = record.get("op")
+                if op == "todo":
+                    state.definitions[record["key"]] = record
+                elif op == "sweep":
+                    _load_sweep_rows(state, record)
+                elif op == "queue":
+                    state.queue = list(dict.fromkeys(record["keys"]))
+                    removed.clear()
+                elif op == "change":
+                    removed.update(record["removed"])
+                    if record.get("inserted"):
+                        queue = [k for k in state.queue if k not in removed and k not in state.finished]
+                        state.queue = _insert(queue, record["inserted"])
+                        removed.clear()
+                elif op == "start":
+                    state.started[record["key"]] = record["file"]
+                    if record.get("subfolder") and record.get("sweep") in state.sweeps:
+                        state.sweeps[record["sweep"]]["subfolder"] = record["subfolder"]
+                elif op in ("finished", "failed"):
+                    state.started.pop(record["key"], None)
+                    if op == "finished":
+                        state.finished[record["key"]] = record["file"]
+        if removed:
+            state.queue = [k for k in state.queue if k not in removed]
+        return state
+
+    @staticmethod
+    def remove_partial_files(state: JournalState) -> List[str]:
+        """Deletes the partial data files of ToDos which were interrupted. Returns the deleted paths."""
+        removed = []
+        for part_file in state.started.values():
+            for path in (part_file, part_file + JOURNAL_ENDING):
+                if os.path.isfile(path):
+                    os.remove(path)
+                    removed.append(path)
+        return removed
+
+
+def _positions(to_do_list: List[ToDo], added: List[ToDo]) -> List[int]:
+    """Returns the positions of the added ToDos in the queue, in ascending order.
+
+    ToDos are usually added at the end or the beginning of the queue, which is checked first. Otherwise, the queue is
+    searched until all added ToDos are found.
+    """
+    n_added = len(added)
+    if n_added <= len(to_do_list):
+        for start in (len(to_do_list) - n_added, 0):
+            if all(t is a for t, a in zip(to_do_list[start:start + n_added], added)):
+                return list(range(start, start + n_added))
+
+    added_ids = {id(t) for t in added}
+    positions = []
+    for index, todo in enumerate(to_do_list):
+        if id(todo) in added_ids:
+            positions.append(index)
+            if len(positions) == len(added_ids):
+                break
+    return positions
+
+
+def _insert(queue: List[str], inserted: List[list]) -> List[str]:
+    """Inserts keys into the queue, at positions given in ascending order and referring to the resulting queue."""
+    result = []
+    remaining = iter(queue)
+    for index, key in inserted:
+        result.extend(itertools.islice(remaining, index - len(result)))
+        result.append(key)
+    result.extend(remaining)
+    return result
+
+
+def _load_sweep_rows(state: JournalState, record: dict) -> None:
+    """Adds the rows of a sweep record to the sweep's parameter table."""
+    skey = record["key"]
+    previous = state.sweeps.get(skey)
+    if previous is None or "columns" in record:
+        state.sweeps[skey] = previous = record
+    else:
+        del previous["data"][record.get("start", 0):]
+        previous["data"].extend(record["data"])
+        if record.get("subfolder"):
+            previous["subfolder"] = record["subfolder"]
+
+    id_column = [tuple(c) for c in previous["columns"]].index(("metadata", "id"))
+    for row in range(record.get("start", 0), len(previous["data"])):
+        state.sweep_rows[str(previous["data"][row][id_column])] = (skey, row)
+
+
+def _restore_sweep(sweep_record: dict, state: JournalState) -> Tuple[pd.DataFrame, DictionaryWrapper]:
+    params = pd.DataFrame(sweep_record["data"],
+                          columns=pd.MultiIndex.from_tuples([tuple(c) for c in sweep_record["columns"]]))
+    # mark the measurements finished before the crash, such that they end up in the sweep summary file
+    for idx, meas_id in params["metadata", "id"].items():
+        if meas_id in state.finished:
+            params.loc[idx, ("metadata", "finished")] = True
+            params.loc[idx, ("metadata", "file_path")] = state.finished[meas_id]
+    wrapper = DictionaryWrapper()
+    # the remaining measurements of the sweep are stored into the same folder
+    wrapper.subfolder_name = sweep_record.get("subfolder", "")
+    return params, wrapper
+
+
+def restore_todos(experiment: StandardExperiment, state: JournalState) -> Tuple[List[ToDo], List[str]]:
+    """
+    Recreates the pending ToDos of a journal.
+
+    The measurements keep their ids, such that they can be matched with the journal and their sweep parameter tables.
+
+    Args:
+        experiment: the experiment to create the measurement objects with
+        state: the journal state returned by `QueueJournal.load`
+    Returns:
+        the restored ToDos in queue order and the keys of the ToDos which could not be restored, e.g. because their
+        measurement is not available anymore or their instruments could not be initialized
+    """
+    logger = logging.getLogger()
+    todos = []
+    failed = []
+    sweeps = {}
+    for key in state.pending:
+        definition = state.definition(key)
+        if definition is None or definition["measurement"] not in experiment.measurements_classes:
+            failed.append(key)
+            continue
+        try:
+            measurement = experiment.create_measurement_object(definition["measurement"])
+            measurement._id = uuid.UUID(hex=key)
+            for name, value in definition["parameters"].items():
+                if name in measurement.parameters:
+                    measurement.parameters[name].value = value
+            measurement.selected_instruments.update(definition["instruments"])
+            measurement.init_instruments()
+        except Exception as exc:
+            logger.warning(f"Could not restore ToDo {key}: {exc!r}")
+            failed.append(key)
+            continue
+
+        sweep = definition.get("sweep")
+        if sweep is None:
+            todos.append(ToDo(Device(**definition["device"]), measurement))
+            continue
+        if sweep not in sweeps:
+            sweeps[sweep] = _restore_sweep(state.sweeps[sweep], state)
+        sweep_parameters, wrapper = sweeps[sweep]
+        todos.append(ToDo(Device(**definition["device"]), measurement, part_of_sweep=True,
+                          sweep_parameters=sweep_parameters, dictionary_wrapper=wrapper))
+    return todos, failed
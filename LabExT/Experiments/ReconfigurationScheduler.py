@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+
+from LabExT.Experiments.RouteOptimizer import device_key, sweep_group_key
+
+if TYPE_CHECKING:
+    from LabExT.Experiments.ToDo import ToDo
+else:
+    ToDo = None
+
+
+@dataclass
+class BatchingResult:
+    """
+    Result of batching the ToDo queue by instrument settings.
+
+    The costs are weighted with the cost model of the measurements and only used to compare orders, the counts of
+    setting changes are the numbers of instrument setting groups which change between consecutive ToDos.
+
+    Attributes:
+        order: indices into the original ToDo list, in the batched execution order
+        original_cost: weighted cost of the instrument reconfigurations in the original queue order
+        batched_cost: weighted cost of the instrument reconfigurations in the batched queue order
+        original_setting_changes: number of setting group changes in the original queue order
+        batched_setting_changes: number of setting group changes in the batched queue order
+    """
+
+    order: List[int] = field(default_factory=list)
+    original_cost: int = 0
+    batched_cost: int = 0
+    original_setting_changes: int = 0
+    batched_setting_changes: int = 0
+
+    @property
+    def reordered(self) -> bool:
+        """True if the batched order differs from the original one."""
+        return self.order != list(range(len(self.order)))
+
+    def apply(self, to_do_list: List[ToDo]) -> None:
+        """Reorders the given ToDo list in place. Must be the same list the result was calculated for."""
+        if len(to_do_list) != len(self.order):
+            raise ValueError("The ToDo queue changed since it was batched.")
+        to_do_list[:] = [to_do_list[idx] for idx in self.order]
+
+
+def _parameter_value(todo: ToDo, name: str) -> Any:
+    return todo.get_parameter_value(name)
+
+
+def _same_instrument_setup(first: ToDo, second: ToDo) -> bool:
+    """True if both ToDos run the same measurement class on the same instruments."""
+    return (first.measurement_class is second.measurement_class
+            and first.selected_instruments == second.selected_instruments)
+
+
+def _changed_setting_costs(previous: Optional[ToDo], todo: ToDo) -> List[int]:
+    """Costs of the setting groups which need to be configured for `todo` after `previous` was executed."""
+    costs = todo.get_instrument_setting_costs()
+    if previous is None or not _same_instrument_setup(previous, todo):
+        return list(costs.values())
+    return [cost for names, cost in costs.items()
+            if any(_parameter_value(previous, n) != _parameter_value(todo, n) for n in names)]
+
+
+def reconfiguration_cost(previous: Optional[ToDo], todo: ToDo) -> int:
+    """
+    Weighted cost to reconfigure the instruments for `todo` after `previous` was executed.
+
+    If the previous ToDo ran a different measurement or used different instruments, the full setup cost is incurred.
+    Otherwise, only the costs of the setting groups with changed parameters are summed up, according to the cost
+    model returned by `Measurement.get_instrument_setting_costs()`.
+    """
+    return sum(_changed_setting_costs(previous, todo))
+
+
+def queue_reconfiguration_cost(to_do_list: List[ToDo]) -> int:
+    """Weighted cost of all instrument reconfigurations when executing the queue in order."""
+    return sum(reconfiguration_cost(previous, todo) for previous, todo in zip([None] + to_do_list, to_do_list))
+
+
+def queue_setting_changes(to_do_list: List[ToDo]) -> int:
+    """Number of instrument setting groups which are configured when executing the queue in order."""
+    return sum(len(_changed_setting_costs(previous, todo))
+               for previous, todo in zip([None] + to_do_list, to_do_list))
+
+
+def _sortable(value: Any) -> Tuple:
+    """Makes parameter values of arbitrary types comparable to each other."""
+    if isinstance(value, bool) or value is None:
+        return 0, str(value)
+    if isinstance(value, (int, float)):
+        return 1, value
+    return 2, str(value)
+
+
+def settings_key(todo: ToDo) -> Tuple:
+    """
+    Sorting key of a ToDo by its instrument settings.
+
+    The parameter values are ordered by decreasing cost of their setting group, such that sorting by this key changes
+    the expensive settings as rarely as possible.
+    """
+    costs = todo.get_instrument_setting_costs()
+    groups = sorted(costs.items(), key=lambda group: -group[1])
+    return tuple(_sortable(_parameter_value(todo, n)) for names, _ in groups for n in names)
+
+
+def _instrument_setup_key(todo: ToDo) -> str:
+    return todo.measurement_class.__name__ + json.dumps(todo.selected_instruments, sort_keys=True, default=str)
+
+
+def _batch_device_run(to_do_list: List[ToDo], indices: List[int]) -> List[int]:
+    """Reorders the ToDos at the given indices, which are adjacent in the queue and on the same device."""
+    # sweeps stay contiguous, any other ToDo is a unit on its own
+    groups = {}
+    for idx in indices:
+        groups.setdefault(sweep_group_key(to_do_list[idx]), []).append(idx)
+    units = list(groups.values())
+
+    def has_cost_model(unit):
+        return bool(to_do_list[unit[0]].get_instrument_setting_costs())
+
+    # group units by measurement and instruments in order of first appearance, then sort them by their settings
+    setup_order = {}
+    for unit in units:
+        setup_order.setdefault(_instrument_setup_key(to_do_list[unit[0]]), len(setup_order))
+    movable = [sorted(unit, key=lambda i: settings_key(to_do_list[i])) for unit in units if has_cost_model(unit)]
+    movable.sort(key=lambda u: (setup_order[_instrument_setup_key(to_do_list[u[0]])], settings_key(to_do_list[u[0]])))
+
+    # units without cost model keep their position
+    order = []
+    movable_iter = iter(movable)
+    for unit in units:
+        order.extend(next(movable_iter) if has_cost_model(unit) else unit)
+    return order
+
+
+def batch_todos_by_instrument_settings(to_do_list: List[ToDo]) -> BatchingResult:
+    """
+    Calculates a ToDo order which reduces the number of instrument reconfigurations.
+
+    Only ToDos on the same device, which are adjacent in the queue, are reordered, such that the stage travel is not
+    increased and a route optimized with `optimize_todo_route` stays intact. Within such a run, ToDos using the same
+    measurement and instruments are grouped together and sorted by their settings, where the settings with the most
+    expensive reconfiguration change least often. ToDos of the same parameter sweep stay contiguous, the sweep points
+    are reordered among each other. ToDos of measurements without a cost model keep their position. The first ToDo
+    always stays first.
+
+    The list itself is not modified, use `BatchingResult.apply` for this.
+
+    Args:
+        to_do_list: the ToDo queue
+    Returns:
+        a BatchingResult with the new order and the reconfiguration cost
+    """
+    result = BatchingResult(original_cost=queue_reconfiguration_cost(to_do_list),
+                            original_setting_changes=queue_setting_changes(to_do_list))
+    if not to_do_list:
+        return result
+
+    result.order.append(0)
+    run = []
+    for idx in range(1, len(to_do_list)):
+        if run and device_key(to_do_list[run[-1]].device) != device_key(to_do_list[idx].device):
+            result.order.extend(_batch_device_run(to_do_list, run))
+            run = []
+        run.append(idx)
+    result.order.extend(_batch_device_run(to_do_list, run))
+
+    batched = [to_do_list[i] for i in result.order]
+    result.batched_cost = queue_reconfiguration_cost(batched)
+    result.batched_setting_changes = queue_setting_changes(batched)
+
+    # never make things worse
+    if result.batched_cost > result.original_cost:
+        result.order = list(range(len(to_do_list)))
+        result.batched_cost = result.original_cost
+        result.batched_setting_changes = result.original_setting_changes
+
+    return result
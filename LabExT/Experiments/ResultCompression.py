@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import gzip
+import io
+import json
+from typing import IO
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# compression of the saved measurement data files
+COMPRESSION_NONE = "none"
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+
+# file name endings appended to the ".json" ending of compressed data files
+COMPRESSION_ENDINGS = {
+    COMPRESSION_GZIP: ".gz",
+    COMPRESSION_ZSTD: ".zst",
+}
+
+# compression levels used if none is given
+DEFAULT_COMPRESSION_LEVELS = {
+    COMPRESSION_GZIP: 6,
+    COMPRESSION_ZSTD: 3,
+}
+
+# file type filter for file dialogs selecting measurement data files
+RESULT_FILE_TYPES = (("LabExT data", "*.json *.json.gz *.json.zst"), ("all files", "*.*"))
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def zstd_available() -> bool:
+    """Returns True if the optional zstandard package is installed."""
+    return zstandard is not None
+
+
+def available_compressions() -> list:
+    """Returns the compressions which can be used to save data files."""
+    compressions = [COMPRESSION_NONE, COMPRESSION_GZIP]
+    if zstd_available():
+        compressions.append(COMPRESSION_ZSTD)
+    return compressions
+
+
+def compression_ending(compression: str) -> str:
+    """Returns the file name ending appended to the ".json" ending of files saved with the given compression."""
+    return COMPRESSION_ENDINGS.get(compression, "")
+
+
+def compression_from_path(file_path: str) -> str:
+    """Returns the compression of a data file to be written, according to the ending of its name."""
+    for compression, ending in COMPRESSION_ENDINGS.items():
+        if file_path.endswith(ending):
+            return compression
+    return COMPRESSION_NONE
+
+
+def strip_compression_ending(file_path: str) -> str:
+    """Returns the path of a data file without the ending of its compression, e.g. "meas.json" for "meas.json.gz"."""
+    ending = compression_ending(compression_from_path(file_path))
+    return file_path[:-len(ending)] if ending else file_path
+
+
+def is_result_file(file_path: str) -> bool:
+    """Returns True if the path has the name of a, possibly compressed, measurement data file."""
+    return strip_compression_ending(file_path).lower().endswith(".json")
+
+
+def _detect_compression(file_path: str) -> str:
+    with open(file_path, "rb") as fp:
+        magic = fp.read(4)
+    if magic.startswith(_GZIP_MAGIC):
+        return COMPRESSION_GZIP
+    if magic.startswith(_ZSTD_MAGIC):
+        return COMPRESSION_ZSTD
+    return COMPRESSION_NONE
+
+
+def open_result_file(file_path: str, mode: str = "r", compression: str = None, level: int = 0) -> IO[str]:
+    """Opens a measurement data file as text stream, which compresses or decompresses it on the fly.
+
+    Args:
+        file_path: path of the file
+        mode: "r" to read or "w" to write the file
+        compression: the compression to write the file with, by default according to the ending of its name. Files
+            are always read with the compression found in them.
+        level: the compression level, or 0 for the default level of the compression
+
+    Raises:
+        RuntimeError: if the file is compressed with zstd, but the zstandard package is not installed
+    """
+    if mode not in ("r", "w"):
+        raise ValueError(f"Data files can only be opened to read or write, not with mode {mode!r}.")
+    if mode == "r":
+        compression = _detect_compression(file_path)
+    elif compression is None:
+        compression = compression_from_path(file_path)
+    level = level or DEFAULT_COMPRESSION_LEVELS.get(compression, 0)
+
+    if compression == COMPRESSION_GZIP:
+        if mode == "r":
+            return gzip.open(file_path, "rt", encoding="utf-8")
+        return gzip.open(file_path, "wt", compresslevel=level, encoding="utf-8")
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise RuntimeError(f"The zstandard package is required to read or write the file {file_path}.")
+        if mode == "r":
+            return zstandard.open(file_path, "rt", encoding="utf-8")
+        return zstandard.open(file_path, "wt", cctx=zstandard.ZstdCompressor(level=level), encoding="utf-8")
+    return open(file_path, mode)
+
+
+def load_result_file(file_path: str, **kwargs):
+    """Reads a, possibly compressed, measurement data file. Keyword arguments are passed to `json.load`."""
+    with open_result_file(file_path, "r") as fp:
+        return json.load(fp, **kwargs)
+
+
+class CountingWriter(io.TextIOBase):
+    """Text stream counting the characters written to another text stream, e.g. before they are compressed."""
+
+    def __init__(self, stream: IO[str]):
+        super().__init__()
+        self.stream = stream
+        self.n_chars = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self.n_chars += len(text)
+        return self.stream.write(text)
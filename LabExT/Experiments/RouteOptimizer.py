@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Hashable, List
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from LabExT.Experiments.ToDo import ToDo
+    from LabExT.Wafer.Device import Device
+else:
+    ToDo = None
+    Device = None
+
+
+@dataclass
+class RouteOptimizationResult:
+    """
+    Result of a route optimization of the ToDo queue.
+
+    Attributes:
+        order: indices into the original ToDo list, in the optimized execution order
+        original_travel: estimated stage travel in um of the original queue order
+        optimized_travel: estimated stage travel in um of the optimized queue order
+        n_devices: number of distinct devices in the queue
+        n_unplaced_todos: number of ToDos on devices without chip coordinates, these are kept at the end of the queue
+    """
+
+    order: List[int] = field(default_factory=list)
+    original_travel: float = 0.0
+    optimized_travel: float = 0.0
+    n_devices: int = 0
+    n_unplaced_todos: int = 0
+
+    @property
+    def travel_saved(self) -> float:
+        """Estimated stage travel in um saved by the optimized order."""
+        return self.original_travel - self.optimized_travel
+
+    @property
+    def travel_saved_percent(self) -> float:
+        """Estimated stage travel saved in percent of the original travel."""
+        if self.original_travel <= 0:
+            return 0.0
+        return 100.0 * self.travel_saved / self.original_travel
+
+    def apply(self, to_do_list: List[ToDo]) -> None:
+        """Reorders the given ToDo list in place. Must be the same list the result was calculated for."""
+        if len(to_do_list) != len(self.order):
+            raise ValueError("The ToDo queue changed since the route was optimized.")
+        to_do_list[:] = [to_do_list[idx] for idx in self.order]
+
+
+def device_has_coordinates(device: Device) -> bool:
+    """Returns True if the device has input or output coordinates, e.g. because it was loaded from a chip file."""
+    return bool(device.in_position) or bool(device.out_position)
+
+
+def device_position(device: Device) -> np.ndarray:
+    """
+    Returns the chip positions a move to this device drives the stages to.
+
+    Returns:
+        array [x_in, y_in, x_out, y_out] in chip coordinates
+    """
+    in_xy = device.input_coordinate.to_numpy()[:2]
+    out_xy = device.output_coordinate.to_numpy()[:2]
+    return np.concatenate((in_xy, out_xy)).astype(float)
+
+
+def travel_distances(from_positions: np.ndarray, to_positions: np.ndarray) -> np.ndarray:
+    """
+    Estimated stage travel between device positions as returned by `device_position`.
+
+    The travel of a move is the sum of the xy-distances both the input and the output stage need to move. Both arrays
+    are broadcast against each other.
+    """
+    delta = to_positions - from_positions
+    return np.hypot(delta[..., 0], delta[..., 1]) + np.hypot(delta[..., 2], delta[..., 3])
+
+
+def route_length(positions: np.ndarray) -> float:
+    """Returns the estimated stage travel to visit all positions in the given order."""
+    if len(positions) < 2:
+        return 0.0
+    return float(np.sum(travel_distances(positions[:-1], positions[1:])))
+
+
+def nearest_neighbour_route(distances: np.ndarray, start: int = 0) -> List[int]:
+    """
+    Greedy route through all nodes, starting at `start` and always visiting the closest unvisited node next.
+
+    Args:
+        distances: square matrix of travel distances between the nodes
+        start: index of the first node of the route
+    Returns:
+        list of node indices in visiting order
+    """
+    n_nodes = distances.shape[0]
+    unvisited = np.ones(n_nodes, dtype=bool)
+    route = [start]
+    unvisited[start] = False
+    for _ in range(n_nodes - 1):
+        candidate_distances = np.where(unvisited, distances[route[-1]], np.inf)
+        next_node = int(np.argmin(candidate_distances))
+        route.append(next_node)
+        unvisited[next_node] = False
+    return route
+
+
+def two_opt(route: List[int], distances: np.ndarray, max_passes: int = 50) -> List[int]:
+    """
+    Improves an open route by reversing sub-sequences as long as this reduces the route length.
+
+    The first node of the route is kept fixed. The distance matrix has to be symmetric.
+
+    Args:
+        route: initial route as list of node indices
+        distances: square, symmetric matrix of travel distances between the nodes
+        max_passes: maximum number of improvement passes over the whole route
+    Returns:
+        the improved route
+    """
+    route = np.array(route)
+    n_nodes = len(route)
+    if n_nodes < 3:
+        return route.tolist()
+
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n_nodes - 1):
+            # reverse route[i:j+1] for all j > i at once: edges (i-1, i) and (j, j+1) are replaced by
+            # (i-1, j) and (i, j+1), the last node has no outgoing edge
+            j = np.arange(i + 1, n_nodes)
+            a, b = route[i - 1], route[i]
+            c = route[j]
+            d = route[np.minimum(j + 1, n_nodes - 1)]
+            has_successor = j < n_nodes - 1
+            delta = distances[a, c] - distances[a, b] + np.where(has_successor, distances[b, d] - distances[c, d], 0.0)
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                best_j = int(j[best])
+                route[i:best_j + 1] = route[i:best_j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return route.tolist()
+
+
+def device_key(device: Device) -> Hashable:
+    """Devices are not hashable since they hold lists, identify them by their id and position instead."""
+    return device.id, tuple(device.in_position), tuple(device.out_position)
+
+
+def sweep_group_key(todo: ToDo) -> Hashable:
+    """All ToDos of the same sweep share the same key, any other ToDo gets its own."""
+    if todo.part_of_sweep and todo.dictionary_wrapper is not None:
+        return id(todo.dictionary_wrapper)
+    return id(todo)
+
+
+def optimize_todo_route(to_do_list: List[ToDo], max_passes: int = 50) -> RouteOptimizationResult:
+    """
+    Calculates a ToDo order which reduces the stage travel between the devices.
+
+    The ToDos are grouped by device and the devices are ordered with a nearest neighbour heuristic, followed by a 2-opt
+    improvement. All ToDos of a device are executed back-to-back, where ToDos of the same parameter sweep are kept
+    contiguous and in their original order. Apart from that, the relative order of the ToDos on one device is
+    preserved. ToDos on devices without chip coordinates (e.g. ad-hoc devices) cannot be placed and are moved to the
+    end of the queue in their original order. The first ToDo always stays first, so the ToDo a running experiment
+    currently executes is not affected.
+
+    The list itself is not modified, use `RouteOptimizationResult.apply` for this.
+
+    Args:
+        to_do_list: the ToDo queue
+        max_passes: maximum number of 2-opt passes
+    Returns:
+        a RouteOptimizationResult with the new order and the estimated stage travel
+    """
+    # group ToDos by device (in order of first appearance), within a device by sweep
+    device_groups = {}
+    devices = []
+    unplaced = []
+    device_key_of_group = {}
+    for idx, todo in enumerate(to_do_list):
+        if not device_has_coordinates(todo.device):
+            unplaced.append(idx)
+            continue
+        group_key = sweep_group_key(todo)
+        # a sweep stays with the device of its first ToDo, even if it should span multiple devices
+        dev_key = device_key_of_group.setdefault(group_key, device_key(todo.device))
+        if dev_key not in device_groups:
+            device_groups[dev_key] = {}
+            devices.append(todo.device)
+        device_groups[dev_key].setdefault(group_key, []).append(idx)
+
+    unplaced_set = set(unplaced)
+    result = RouteOptimizationResult(
+        n_devices=len(devices) + len({device_key(to_do_list[i].device) for i in unplaced}),
+        n_unplaced_todos=len(unplaced),
+    )
+
+    if devices:
+        positions = np.array([device_position(d) for d in devices])
+        distances = travel_distances(positions[:, np.newaxis, :], positions[np.newaxis, :, :])
+        device_order = two_opt(nearest_neighbour_route(distances), distances, max_passes=max_passes)
+    else:
+        device_order = []
+
+    for device_idx in device_order:
+        for todo_indices in device_groups[device_key(devices[device_idx])].values():
+            result.order.extend(todo_indices)
+    if unplaced and unplaced[0] == 0:
+        result.order.insert(0, unplaced.pop(0))
+    result.order.extend(unplaced)
+
+    placed_original = [todo.device for i, todo in enumerate(to_do_list) if i not in unplaced_set]
+    placed_optimized = [to_do_list[i].device for i in result.order if i not in unplaced_set]
+    result.original_travel = _todo_route_length(placed_original)
+    result.optimized_travel = _todo_route_length(placed_optimized)
+
+    # never make things worse, e.g. for queues which are already optimal
+    if result.optimized_travel > result.original_travel:
+        result.order = list(range(len(to_do_list)))
+        result.optimized_travel = result.original_travel
+
+    return result
+
+
+def _todo_route_length(devices: List[Device]) -> float:
+    """Stage travel for executing ToDos on the given devices in order, consecutive ToDos on one device need no move."""
+    if not devices:
+        return 0.0
+    return route_length(np.array([device_position(d) for d in devices]))
@@ -6,9 +6,13 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 import datetime
+import heapq
+import itertools
 import logging
 import socket
+import sqlite3
 import sys
+import threading
 import time
 import traceback
 import uuid
@@ -18,16 +22,39 @@ from os import rename, makedirs
 from os.path import dirname, join
 from pathlib import Path
 from tkinter import Tk, messagebox
-from typing import TYPE_CHECKING, Type, List, Tuple, Union
-
-from LabExT.Experiments.AutosaveDict import AutosaveDict
+from typing import TYPE_CHECKING, Dict, Iterable, Type, List, Tuple, Union
+
+from LabExT.Experiments.AutosaveDict import AutosaveDict, JournaledAutosaveDict
+from LabExT.Experiments.LazyValues import ValuesStore
+from LabExT.Experiments.MeasurementCatalog import CATALOG_FILE_NAME, MeasurementCatalog
+from LabExT.Experiments.MeasurementPipeline import MeasurementPipeline
+from LabExT.Experiments.MeasurementTiming import (
+    PHASE_GUI_REFRESH,
+    PHASE_INSTRUMENT_SNAPSHOT,
+    PHASE_INTER_MEASUREMENT_WAIT,
+    PHASE_MEASUREMENT,
+    PHASE_SAVING,
+    PHASE_SEARCH_FOR_PEAK,
+    PHASE_STAGE_MOVEMENT,
+    PHASE_SWEEP_SUMMARY,
+    PhaseTimer,
+    ThroughputStatistics,
+)
+from LabExT.Experiments.QueueJournal import QueueJournal
+from LabExT.Experiments.ReconfigurationScheduler import batch_todos_by_instrument_settings
+from LabExT.Experiments.ResultCompression import COMPRESSION_GZIP, COMPRESSION_NONE, available_compressions, \
+    compression_ending, compression_from_path
+from LabExT.Experiments.SweepSummary import SweepSummary
+from LabExT.Experiments.ValuesSidecar import SIDECAR_REFERENCES_KEY, resolve_values_sidecar, store_values_sidecar
+from LabExT.Exporter.LiveExport import LIVE_EXPORT_HDF5, LiveExportSink, available_live_export_formats
 from LabExT.Measurements.MeasAPI.Measurement import Measurement
 from LabExT.Movement.MoverNew import MoverNew
 from LabExT.PluginLoader import PluginLoader
-from LabExT.Utils import make_filename_compliant, get_labext_version
+from LabExT.Utils import make_filename_compliant, get_labext_version, get_configuration_file_path
 from LabExT.View.Controls.ParameterTable import ConfigParameter
-from LabExT.View.MeasurementControlSettings import MeasurementControlSettings
-from LabExT.ViewModel.Utilities.ObservableList import ObservableList
+from LabExT.View.MeasurementControlSettings import MeasurementControlSettings, SNAPSHOT_ALWAYS, \
+    SNAPSHOT_EVERY_N_DEVICES
+from LabExT.ViewModel.Utilities.ObservableList import ObservableList, ObservableQueue
 
 from LabExT.Experiments.TypeHints import MeasurementDict
 from LabExT.Wafer.Chip import Chip
@@ -52,6 +79,10 @@ def calc_measurement_key(measurement: MeasurementDict):
     return hash_str
 
 
+class DuplicateMeasurementError(ValueError):
+    """Raised when a measurement is loaded which is already among the finished measurements."""
+
+
 class StandardExperiment:
     """StandardExperiment implements the routine of performing single or multiple measurements and gathers their
     output data dictionary."""
@@ -97,7 +128,7 @@ class StandardExperiment:
 
         # datastructure to store all FUTURE measurements
         # list to contain all future ToDos, do not redefine!
-        self.to_do_list: List[ToDo] = []
+        self.to_do_list: ObservableQueue[ToDo] = ObservableQueue()
         # store last executed to do (Tuple(Device, Measurement))
         self.last_executed_todos: List[Tuple[Device, Measurement]] = []
         # get the FQDN of the running computer to save into datasets
@@ -113,8 +144,40 @@ class StandardExperiment:
 
         # data structures for FINISHED measurements
         self.measurements: ObservableList[MeasurementDict] = ObservableList()
-        self.measurements_hashes = []
+        # finished measurements by their key, see calc_measurement_key()
+        self.measurements_hashes: Dict[str, MeasurementDict] = {}
+        # min-heap of (timestamp_known, insertion number, key) to find the oldest measurement when the number of
+        # finished measurements is limited. Removed measurements are only dropped from the heap when they show up
+        # at its top or when the heap is compacted.
+        self._measurements_heap: List[Tuple[str, int, str]] = []
+        self._measurements_counter = itertools.count()
+        self._measurements_lock = threading.RLock()
         self._meas_control_settings = MeasurementControlSettings()
+        # stores the values of finished measurements on disk if enabled, created on first use
+        self.values_store: ValuesStore = None
+        # index of all saved data files if enabled, created on first use
+        self.measurement_catalog: MeasurementCatalog = None
+
+        # write-ahead journal of the ToDo queue, used to resume the queue after a crash
+        self.queue_journal = QueueJournal()
+        # set to the queue journal while running, if journaling is enabled
+        self._journal: QueueJournal = None
+        # every change of the queue is journaled, if journaling is enabled
+        self.to_do_list.items_changed.append(self._on_to_do_list_changed)
+        self.to_do_list.on_clear.append(self._on_to_do_list_changed)
+
+        # per-phase timing of all executed ToDos, shown in the throughput panel
+        self.throughput_statistics = ThroughputStatistics()
+
+        # devices measured since all instrument parameters were read, None to read them before the next ToDo
+        self._devices_since_snapshot_refresh = None
+        self._last_snapshot_device_id = None
+        # compression of the data files saved by the current run
+        self._result_compression = COMPRESSION_NONE
+        # exports the finished measurements of the current run, if live export is enabled
+        self._live_export: LiveExportSink = None
+        # summaries of the sweeps which got measurements in the current run but are not complete yet
+        self._open_sweep_summaries: List[SweepSummary] = []
 
         self.__setup__()
 
@@ -151,7 +214,7 @@ class StandardExperiment:
         """
         instr_addrs_in_todo_queue = set()
         for todo in self.to_do_list:
-            for v in todo.measurement.selected_instruments.values():
+            for v in todo.selected_instruments.values():
                 instr_addrs_in_todo_queue.add(v["visa"])
         instr_active_in_lv = set()
         if self._experiment_manager.live_viewer_model is not None:
@@ -177,11 +240,23 @@ class StandardExperiment:
     def show_meas_finished_infobox():
         messagebox.showinfo("Measurements finished!", "Measurements finished!")
 
+    def read_execution_control_variables(self):
+        """Updates the execution control variables (`exctrl_*`) from the main window."""
+        self._experiment_manager.main_window.model.exctrl_vars_changed()
+
+    def on_measurement_error(self, exc: Exception):
+        """Called from within the exception handler if a measurement raised an error. Pauses the execution after the
+        current ToDo and informs the user."""
+        self._experiment_manager.main_window.model.var_mm_pause.set(True)
+        msg = "Error occurred during measurement: " + repr(exc)
+        messagebox.showinfo("Measurement Error", msg)
+        self.logger.exception(msg)
+
     def run(self):
         self.logger.info("Running experiment.")
 
         # update local exctrl variables from GUI, just for safety
-        self._experiment_manager.main_window.model.exctrl_vars_changed()
+        self.read_execution_control_variables()
         # update measurement control settings if it was adjusted during the session
         self._meas_control_settings.update()
 
@@ -194,6 +269,101 @@ class StandardExperiment:
             )
             return
 
+        if self._meas_control_settings.batch_by_instrument_settings:
+            self.batch_to_do_list_by_instrument_settings()
+
+        self._journal = self.queue_journal if self._meas_control_settings.journal_queue else None
+        if self._journal is not None:
+            self._journal.record_queue(self.to_do_list)
+
+        self._devices_since_snapshot_refresh = None
+
+        self._result_compression = self._meas_control_settings.result_compression
+        if self._result_compression not in available_compressions():
+            self.logger.warning("Cannot compress data files with %s, the zstandard package is not installed. "
+                                "Compressing them with gzip instead.", self._result_compression)
+            self._result_compression = COMPRESSION_GZIP
+
+        pipeline = None
+        if self._meas_control_settings.pipelined_execution:
+            self.logger.info("Pipelined execution enabled: the stages move to the next device while the final "
+                             "instrument snapshot is taken and the data is saved.")
+            pipeline = MeasurementPipeline()
+
+        self._live_export = self._create_live_export()
+
+        try:
+            self._execute_to_do_list(pipeline)
+        finally:
+            try:
+                if pipeline is not None:
+                    pipeline.shutdown()
+            finally:
+                if self._live_export is not None:
+                    self._live_export.close()
+                    self._live_export = None
+                self._write_open_sweep_summaries()
+
+    def _create_live_export(self) -> Union[LiveExportSink, None]:
+        """Starts the live export of the finished measurements, if it is enabled in the measurement settings."""
+        if not self._meas_control_settings.live_export:
+            return None
+        target_format = self._meas_control_settings.live_export_format
+        if target_format not in available_live_export_formats():
+            self.logger.warning("Cannot export measurements live to %s, the pyarrow package is not installed. "
+                                "Exporting them to an HDF5 archive instead.", target_format)
+            target_format = LIVE_EXPORT_HDF5
+        live_export = LiveExportSink(target_format,
+                                     self._meas_control_settings.live_export_directory or self.param_output_path,
+                                     measurement_classes=self.measurements_classes)
+        live_export.start()
+        return live_export
+
+    def update_queue_journal(self):
+        """Records the current ToDo queue in the queue journal, or deletes the journal if the queue is empty."""
+        self._meas_control_settings.update()
+        if not self._meas_control_settings.journal_queue:
+            return
+        if self.to_do_list:
+            self.queue_journal.record_queue(self.to_do_list)
+        else:
+            self.queue_journal.clear()
+
+    def _on_to_do_list_changed(self, added: List[ToDo] = (), removed: List[ToDo] = ()):
+        """Journals a change of the ToDo queue, if journaling is enabled.
+
+        Adaptive sweeps stop waiting for the measurements of removed ToDos.
+        """
+        readded = {id(todo) for todo in added}
+        for todo in removed:
+            if todo.adaptive_sweep is not None and id(todo) not in readded:
+                todo.adaptive_sweep.discard(todo)
+
+        if not self._meas_control_settings.journal_queue:
+            return
+        if self.to_do_list:
+            self.queue_journal.record_change(self.to_do_list, list(added), list(removed))
+        else:
+            self.queue_journal.clear()
+
+    def batch_to_do_list_by_instrument_settings(self):
+        """Reorders the ToDo queue to save instrument reconfigurations and logs the number of setting changes."""
+        result = batch_todos_by_instrument_settings(self.to_do_list)
+        result.apply(self.to_do_list)
+        self.logger.info(
+            "Batched ToDos by instrument settings: instrument settings change %d times instead of %d times.",
+            result.batched_setting_changes, result.original_setting_changes
+        )
+        if result.reordered:
+            self.update()
+
+    def _execute_to_do_list(self, pipeline: MeasurementPipeline = None):
+        """Executes the ToDos in the queue until it is empty or the user pauses the execution.
+
+        Args:
+            pipeline: if given, the data file of a finished ToDo is written by the pipeline's saving worker while the
+                stages move to the next device.
+        """
         # we iterate over every measurement of every device in the To Do Queue
         while 0 < len(self.to_do_list):
             current_todo = self.to_do_list[0]
@@ -202,6 +372,8 @@ class StandardExperiment:
 
             self.logger.debug("Popped device:%s with measurement:%s", device, measurement.get_name_with_id())
 
+            timer = PhaseTimer(device_id=device.id, measurement_name=measurement.name)
+
             now = datetime.datetime.now()
             ts = str("{date:%Y-%m-%d_%H%M%S}".format(date=now))
             ts_iso = str(datetime.datetime.isoformat(now))
@@ -225,7 +397,12 @@ class StandardExperiment:
             save_file_ending = ".json.part"
 
             # create and populate output data save dictionary
-            data = AutosaveDict(freq=50, file_path=save_file_path + save_file_ending)
+            if self._meas_control_settings.journaled_autosave:
+                data = JournaledAutosaveDict(file_path=save_file_path + save_file_ending)
+            else:
+                data = AutosaveDict(freq=50, file_path=save_file_path + save_file_ending)
+            if self._journal is not None:
+                self._journal.record_started(current_todo, data.file_path)
 
             self._write_metadata(data)
 
@@ -238,7 +415,10 @@ class StandardExperiment:
             data["measurement name"] = measurement.name
             data["measurement name and id"] = measurement.get_name_with_id()
             data["measurement id long"] = measurement.id.hex
-            data["instruments"] = measurement._get_data_from_all_instruments()
+            with timer.phase(PHASE_INSTRUMENT_SNAPSHOT):
+                data["instruments"] = measurement._get_data_from_all_instruments(
+                    refresh=self._refresh_instrument_snapshot(device)
+                )
             data["measurement settings"] = {}
             data["values"] = OrderedDict()
             data["error"] = {}
@@ -247,33 +427,28 @@ class StandardExperiment:
             data["sweep_information"]["part_of_sweep"] = current_todo.part_of_sweep
             data["sweep_information"]["sweep_association"] = list()
             if current_todo.part_of_sweep:
-                sweep_params = current_todo.sweep_parameters
-                for _, row in sweep_params.iterrows():
-                    # iterate through the rows (i.e. Measurements) belonging to this sweep and store
-                    # to metadata
-                    temp_dict = dict()
-                    temp_dict["metadata"] = {
-                        name: value
-                        for name, value in zip(row["metadata"].index, row["metadata"])
-                        if name not in ["finished"]
-                    }
-                    temp_dict["measurement settings"] = {
-                        name: value
-                        for name, value in zip(row["measurement settings"].index, row["measurement settings"])
-                    }
-                    data["sweep_information"]["sweep_association"].append(temp_dict)
+                # only the row of this measurement is stored, the sweep summary lists all of them
+                sweep_summary = self._get_sweep_summary(current_todo, save_file_path)
+                data["sweep_information"]["sweep_summary_file"] = sweep_summary.json_path
+                data["sweep_information"]["sweep_association"].append(
+                    sweep_summary.association_entry(sweep_summary.row_index(measurement.id.hex))
+                )
 
             data["finished"] = False
 
             # only move if automatic movement is enabled
             if self.exctrl_auto_move_stages:
-                self._mover.move_to_device(self._chip, device)
+                with timer.phase(PHASE_STAGE_MOVEMENT):
+                    # the pipeline might have started moving to this device already
+                    if pipeline is None or not pipeline.finish_movement(device):
+                        self._mover.move_to_device(self._chip, device)
                 self.logger.info("Automatically moved to device:" + str(device))
 
             # execute automatic search for peak
             if self.exctrl_enable_sfp:
-                self._peak_searcher.update_params_from_savefile()
-                data["search for peak"] = self._peak_searcher.search_for_peak()
+                with timer.phase(PHASE_SEARCH_FOR_PEAK):
+                    self._peak_searcher.update_params_from_savefile()
+                    data["search for peak"] = self._peak_searcher.search_for_peak()
                 self.logger.info("Search for peak done.")
             else:
                 data["search for peak"] = None
@@ -282,8 +457,10 @@ class StandardExperiment:
             self.logger.info("Executing measurement %s on device %s.", measurement.get_name_with_id(), device)
 
             measurement_executed = False
+            new_todos = []
             try:
-                measurement.measure(device, data)
+                with timer.phase(PHASE_MEASUREMENT):
+                    measurement.measure(device, data)
                 save_file_ending = ".json"
                 measurement_executed = True
             except Exception as exc:
@@ -293,11 +470,10 @@ class StandardExperiment:
                 data["error"]["type"] = str(etype)
                 data["error"]["desc"] = repr(evalue)
                 data["error"]["traceback"] = traceback.format_exc()
+                # before the error handler, which might remove the ToDo from the queue
+                new_todos = self._report_adaptive_sweep_failure(current_todo, timer)
                 # error during measurement, go into pause mode
-                self._experiment_manager.main_window.model.var_mm_pause.set(True)
-                msg = "Error occurred during measurement: " + repr(exc)
-                messagebox.showinfo("Measurement Error", msg)
-                self.logger.exception(msg)
+                self.on_measurement_error(exc)
                 save_file_ending = "_error.json"
             except SystemExit:
                 # log error to file
@@ -307,89 +483,252 @@ class StandardExperiment:
                 data["error"]["desc"] = "Measurement aborted by user."
                 data["error"]["traceback"] = traceback.format_exc()
                 save_file_ending = "_abort.json"
+                new_todos = self._report_adaptive_sweep_failure(current_todo, timer)
 
             finally:
-                # save instrument parameters again
-                data["instruments"] = measurement._get_data_from_all_instruments()
-
-                # get measurement end timestamp
-                ts = str("{date:%Y-%m-%d_%H%M%S}".format(date=datetime.datetime.now()))
-                data["timestamp end"] = ts
-                data["timestamp"] = ts
-                data["finished"] = True
-
-                # save current measurement's data on disk
-                data.save(indented=self._meas_control_settings.json_indented)
-                data.auto_save = False
-                final_path = save_file_path + save_file_ending
-                rename(data.file_path, final_path)
-
-                self.logger.info(
-                    "Saved data of current measurement: %s to %s", measurement.get_name_with_id(), final_path
-                )
+                final_path = save_file_path + save_file_ending + compression_ending(self._result_compression)
 
+                sweep_summary = None
                 if current_todo.part_of_sweep:
-                    sweep_params = current_todo.sweep_parameters
-                    # update sweep information
-                    meas_mask = sweep_params["metadata", "id"] == measurement.id.hex
-                    meas_index = sweep_params[meas_mask].index.to_list()[0]
-
-                    sweep_params.loc[meas_index, ("metadata", "finished")] = True
-                    sweep_params.loc[meas_index, ("metadata", "file_path")] = final_path
-
-                    # make sure all measurements of this sweep share the same summary dictionary
-                    if not current_todo.dictionary_wrapper.available:
-                        current_todo.dictionary_wrapper.wrap(
-                            self._write_metadata(file_path=save_file_path + "_sweep_summary.json")
-                        )
-
-                    # this is the dictionary storing the association list of measurements and
-                    # parameters in the summary file
-                    sweep_list = list()
-
-                    # go through all measurements and store parameters and metadata for each
-                    for _, row in sweep_params.iterrows():
-                        temp_dict = OrderedDict()
-                        temp_dict["metadata"] = {
-                            name: value
-                            for name, value in zip(row["metadata"].index, row["metadata"])
-                            if name not in ["finished"]
-                        }
-                        temp_dict["measurement settings"] = {
-                            name: value
-                            for name, value in zip(row["measurement settings"].index, row["measurement settings"])
-                        }
-                        sweep_list.append(temp_dict)
-
-                    # store summary data in shared dictionary and write to disk
-                    current_todo.dictionary_wrapper.get["sweep_association_list"] = sweep_list
-                    current_todo.dictionary_wrapper.get.save()
+                    with timer.phase(PHASE_SWEEP_SUMMARY):
+                        sweep_summary = self._update_sweep_parameters(current_todo, measurement, final_path)
+
+                if measurement_executed and current_todo.adaptive_sweep is not None:
+                    # add the points of an adaptive sweep before its summary is completed
+                    with timer.phase(PHASE_SWEEP_SUMMARY):
+                        new_todos = current_todo.adaptive_sweep.report(current_todo, data.get("values"))
+
+                if pipeline is None:
+                    self._complete_todo_data(measurement, data, timer)
+                    self._save_todo_data(measurement, data, final_path, timer)
+                else:
+                    saving = pipeline.submit_save(self._complete_and_save_todo_data, measurement, data, final_path,
+                                                  timer)
+                    # move to the next device while the final instrument snapshot is taken and the data is saved
+                    if measurement_executed and self.exctrl_auto_move_stages and not self.exctrl_pause_after_device:
+                        next_todos = new_todos + self.to_do_list[1:2]
+                        if next_todos:
+                            next_device = next_todos[0].device
+                            pipeline.start_movement(next_device, self._mover.move_to_device, self._chip, next_device)
+                    # the ToDo stays in the queue if its data could not be saved
+                    try:
+                        saving.result()
+                    except BaseException:
+                        # the stages must not be moving anymore once the error is handled
+                        pipeline.drain()
+                        raise
+                self._finalize_todo(current_todo, measurement, data, final_path, sweep_summary,
+                                    measurement_executed=measurement_executed, timer=timer)
 
                 # save executed device-measurement pair for later recall by "Redo last measurement" button
                 self.last_executed_todos.append((device, self.duplicate_measurement(measurement)))
 
             # shift to do to executed measurements when successful
             if measurement_executed:
-                self.load_measurement_dataset(data, final_path, force_gui_update=False)
+                with timer.phase(PHASE_GUI_REFRESH):
+                    self.load_measurement_dataset(data, final_path, force_gui_update=False)
                 self.to_do_list.pop(0)
+                if new_todos:
+                    # measure the points added by an adaptive sweep next
+                    self.to_do_list[0:0] = new_todos
+            elif new_todos:
+                # queue the points added by an adaptive sweep after the failed ToDo, if it was not removed
+                index = 1 if self.to_do_list and self.to_do_list[0] is current_todo else 0
+                self.to_do_list[index:index] = new_todos
 
-            # tell GUI to update
-            self.update(plot_new_meas=True)
+            try:
+                # tell GUI to update
+                with timer.phase(PHASE_GUI_REFRESH):
+                    self.update(plot_new_meas=True)
+
+                # if manual mode activated, break here
+                if self.exctrl_pause_after_device:
+                    break
+
+                # if we finished all the devices in the to_do_list
+                # then we finished measuring everything
+                if not self.to_do_list:
+                    if self._journal is not None:
+                        self._journal.clear()
+                    self.show_meas_finished_infobox()
+                    self.logger.info("Experiment and hereby all measurements finished.")
+                    return
+
+                if self.exctrl_inter_measurement_wait_time > 0.0:
+                    self.logger.info(f"Waiting {self.exctrl_inter_measurement_wait_time:.0f}s before continuing...")
+                    with timer.phase(PHASE_INTER_MEASUREMENT_WAIT):
+                        time.sleep(self.exctrl_inter_measurement_wait_time)
+            finally:
+                # all phases of the ToDo are recorded, also the saving of its data in pipelined execution mode
+                self.throughput_statistics.add(timer)
 
-            # if manual mode activated, break here
-            if self.exctrl_pause_after_device:
-                break
+    def _refresh_instrument_snapshot(self, device: Device) -> bool:
+        """Decides whether all instrument parameters are read before measuring the given device.
 
-            # if we finished all the devices in the to_do_list
-            # then we finished measuring everything
-            if not self.to_do_list:
-                self.show_meas_finished_infobox()
-                self.logger.info("Experiment and hereby all measurements finished.")
-                return
+        Depending on the instrument snapshot policy, the parameters are read before every ToDo or only every N devices.
+        In the latter case, consecutive ToDos on the same device count as one device.
+        """
+        if self._meas_control_settings.instrument_snapshot_policy != SNAPSHOT_EVERY_N_DEVICES:
+            return True
+        if self._devices_since_snapshot_refresh is not None and device.id == self._last_snapshot_device_id:
+            return False
+        self._last_snapshot_device_id = device.id
+
+        if self._devices_since_snapshot_refresh is None or \
+                self._devices_since_snapshot_refresh + 1 >= self._meas_control_settings.instrument_snapshot_interval:
+            self._devices_since_snapshot_refresh = 0
+            return True
+        self._devices_since_snapshot_refresh += 1
+        return False
 
-            if self.exctrl_inter_measurement_wait_time > 0.0:
-                self.logger.info(f"Waiting {self.exctrl_inter_measurement_wait_time:.0f}s before continuing...")
-                time.sleep(self.exctrl_inter_measurement_wait_time)
+    @staticmethod
+    def _report_adaptive_sweep_failure(current_todo: ToDo, timer: PhaseTimer) -> List[ToDo]:
+        """Tells the adaptive sweep of a failed ToDo not to wait for it.
+
+        Returns:
+            the ToDos of the points the adaptive sweep added
+        """
+        if current_todo.adaptive_sweep is None:
+            return []
+        with timer.phase(PHASE_SWEEP_SUMMARY):
+            return current_todo.adaptive_sweep.report_failure(current_todo)
+
+    def _get_sweep_summary(self, current_todo: ToDo, save_file_path: str) -> SweepSummary:
+        """Returns the summary shared by the ToDos of a sweep, created next to the data file of its first ToDo."""
+        if not current_todo.dictionary_wrapper.available:
+            current_todo.dictionary_wrapper.wrap(
+                SweepSummary(save_file_path, metadata=self._write_metadata(OrderedDict()),
+                             sweep_parameters=current_todo.sweep_parameters)
+            )
+        return current_todo.dictionary_wrapper.get
+
+    def _update_sweep_parameters(self, current_todo: ToDo, measurement: Measurement, final_path: str) \
+            -> SweepSummary:
+        """Marks the measurement of a ToDo as finished within its sweep.
+
+        Returns:
+            The summary of the sweep, to which the measurement is added once its data is saved.
+        """
+        sweep_params = current_todo.sweep_parameters
+        sweep_summary: SweepSummary = current_todo.dictionary_wrapper.get
+        meas_index = sweep_params.index[sweep_summary.row_index(measurement.id.hex)]
+
+        sweep_params.loc[meas_index, ("metadata", "finished")] = True
+        sweep_params.loc[meas_index, ("metadata", "file_path")] = final_path
+
+        return sweep_summary
+
+    def _complete_todo_data(self, measurement: Measurement, data: AutosaveDict, timer: PhaseTimer) -> None:
+        """Takes the final instrument snapshot of a finished ToDo and adds its end timestamps and timing to the data.
+
+        The phases recorded so far are stored in the data under the key "timing".
+        """
+        # save instrument parameters again
+        with timer.phase(PHASE_INSTRUMENT_SNAPSHOT):
+            data["instruments"] = measurement._get_data_from_all_instruments(
+                refresh=self._meas_control_settings.instrument_snapshot_policy == SNAPSHOT_ALWAYS
+            )
+
+        # get measurement end timestamp
+        ts = str("{date:%Y-%m-%d_%H%M%S}".format(date=datetime.datetime.now()))
+        data["timestamp end"] = ts
+        data["timestamp"] = ts
+        data["finished"] = True
+        data["timing"] = timer.as_dict()
+
+    def _complete_and_save_todo_data(self, measurement: Measurement, data: AutosaveDict, final_path: str,
+                                     timer: PhaseTimer) -> None:
+        """Completes the data of a finished ToDo and writes it to its final path.
+
+        Runs on the saving worker of the pipeline in pipelined execution mode, while the stages move to the next
+        device. The experiment thread does not access the instruments until it is done.
+        """
+        self._complete_todo_data(measurement, data, timer)
+        self._save_todo_data(measurement, data, final_path, timer)
+
+    def _save_todo_data(self, measurement: Measurement, data: AutosaveDict, final_path: str, timer: PhaseTimer) \
+            -> None:
+        """Writes the data of a finished ToDo to its final path.
+
+        In pipelined execution mode, this runs on the saving worker of the pipeline. It must only access `data`.
+        """
+        with timer.phase(PHASE_SAVING):
+            if self._meas_control_settings.binary_values:
+                # the data file only references the .npy files holding the numeric values
+                store_values_sidecar(data, final_path)
+            compression = compression_from_path(final_path)
+            data.save(indented=self._meas_control_settings.json_indented, compression=compression,
+                      level=self._meas_control_settings.compression_level)
+            data.auto_save = False
+            rename(data.file_path, final_path)
+            resolve_values_sidecar(data, final_path)
+
+        self.logger.info("Saved data of current measurement: %s to %s", measurement.get_name_with_id(), final_path)
+        if compression != COMPRESSION_NONE:
+            self.logger.info("Compressed %d bytes of JSON with %s to %d bytes (compression ratio %.2f) in %.3f s.",
+                             data.json_size, compression, data.file_size, data.compression_ratio, data.save_time)
+        self.logger.info("Autosaving wrote %d bytes for a data file of %d bytes (write amplification %.2f).",
+                         data.bytes_written, data.file_size, data.write_amplification)
+
+    def _finalize_todo(
+        self,
+        current_todo: ToDo,
+        measurement: Measurement,
+        data: AutosaveDict,
+        final_path: str,
+        sweep_summary: SweepSummary = None,
+        measurement_executed: bool = False,
+        timer: PhaseTimer = None,
+    ) -> None:
+        """Records a finished ToDo whose data is saved in the sweep summary, the catalog, the live export and the
+        queue journal.
+
+        Args:
+            current_todo: the ToDo which finished
+            measurement: the ToDo's measurement
+            data: the data dictionary filled by the measurement
+            final_path: the file path the data is stored to
+            sweep_summary: if the ToDo is part of a sweep, the summary of the sweep
+            measurement_executed: True if the measurement finished without error
+            timer: the timer of the ToDo's phases
+        """
+        if timer is None:
+            timer = PhaseTimer()
+
+        if sweep_summary is not None:
+            # append the measurement to the summary, the full summary file is written once the sweep is complete or
+            # the run stops
+            with timer.phase(PHASE_SWEEP_SUMMARY):
+                sweep_summary.record_finished(measurement.id.hex, final_path)
+                if sweep_summary.complete:
+                    sweep_summary.write_json(indented=self._meas_control_settings.json_indented)
+                    if sweep_summary in self._open_sweep_summaries:
+                        self._open_sweep_summaries.remove(sweep_summary)
+                elif sweep_summary not in self._open_sweep_summaries:
+                    self._open_sweep_summaries.append(sweep_summary)
+
+        if self._meas_control_settings.measurement_catalog:
+            try:
+                self.get_measurement_catalog().add(data, final_path)
+            except sqlite3.Error as exc:
+                self.logger.warning(f"Could not add {final_path} to the measurement catalog: {exc!r}")
+
+        if self._live_export is not None and measurement_executed:
+            # blocks while the live export falls behind
+            with timer.phase(PHASE_SAVING):
+                self._live_export.submit(data, final_path)
+
+        if self._journal is not None:
+            self._journal.record_finished(current_todo, final_path, success=measurement_executed)
+
+    def _write_open_sweep_summaries(self) -> None:
+        """Writes the summary files of the sweeps interrupted by the end of the current run."""
+        for sweep_summary in self._open_sweep_summaries:
+            try:
+                sweep_summary.write_json(indented=self._meas_control_settings.json_indented)
+            except OSError as exc:
+                self.logger.warning(f"Could not write the sweep summary {sweep_summary.json_path}: {exc!r}")
+        self._open_sweep_summaries = []
 
     def _write_metadata(self, target: dict = None, file_path: str = "tmp.json") -> dict:
         """Writes the metadata of a measurement to the given dictionary.
@@ -428,6 +767,9 @@ class StandardExperiment:
         Use this to add a dictionary of a measurement recorded dataset to the measurements. This function
         takes over error checking of loaded datasets.
         """
+        # values stored in .npy files are memory-mapped
+        resolve_values_sidecar(meas_dict, file_path)
+
         # trigger key error if chip is not present
         _ = meas_dict["chip"]
         # trigger key error if device is not present
@@ -469,33 +811,96 @@ class StandardExperiment:
         if not len(meas_dict["values"]) > 0:
             raise ValueError("Measurement record needs to contain at least one values dict.")
 
-        # check for duplicates
         meas_hash = calc_measurement_key(meas_dict)
-        if meas_hash in self.measurements_hashes:
-            raise ValueError("Duplicate measurement found!")
-
-        # add file path to dictionary
-        meas_dict["file_path_known"] = file_path
-
-        # remove measurements if necessary
-        if self._meas_control_settings.finished_meas_limited:
-            while len(self.measurements_hashes) >= self._meas_control_settings.max_finished_meas:
-                ts_known_sorted = sorted([m["timestamp_known"] for m in self.measurements])
-                for meas in self.measurements:
-                    if meas["timestamp_known"] == ts_known_sorted[0]:
-                        self.measurements.remove(meas)
-                        self.measurements_hashes.remove(calc_measurement_key(meas))
-                        break
-
-        # all good, append to measurements
-        self.measurements_hashes.extend([meas_hash])
-        # don't trigger gui update if not explicitly requested by kwarg
-        self.measurements.extend([meas_dict])
+        with self._measurements_lock:
+            # check for duplicates
+            if meas_hash in self.measurements_hashes:
+                raise DuplicateMeasurementError("Duplicate measurement found!")
+
+            # add file path to dictionary
+            meas_dict["file_path_known"] = file_path
+
+            if self._meas_control_settings.lazy_values and SIDECAR_REFERENCES_KEY not in meas_dict:
+                meas_dict["values"] = self._get_values_store().offload(meas_dict["values"])
+
+            # remove measurements if necessary
+            if self._meas_control_settings.finished_meas_limited:
+                evicted = []
+                while len(self.measurements_hashes) >= max(self._meas_control_settings.max_finished_meas, 1):
+                    evicted.append(self._pop_oldest_measurement())
+                self.measurements.remove_items(evicted)
+
+            # all good, append to measurements
+            self.measurements_hashes[meas_hash] = meas_dict
+            heapq.heappush(self._measurements_heap,
+                           (meas_dict["timestamp_known"], next(self._measurements_counter), meas_hash))
+            # don't trigger gui update if not explicitly requested by kwarg
+            self.measurements.extend([meas_dict])
 
         # tell GUI to update
         if force_gui_update:
             self.update()
 
+    def load_measurement_datasets(self, datasets: Iterable[Tuple[dict, str]], force_gui_update=True) \
+            -> List[Tuple[str, Exception]]:
+        """Adds many measurement datasets at once, see `load_measurement_dataset`.
+
+        The observers of the measurements list are notified only once and the GUI is updated only once at the end.
+
+        Args:
+            datasets: tuples of the measurement dictionary and the file path it was loaded from
+            force_gui_update: set to False to not update the GUI tables after loading
+        Returns:
+            the file paths and errors of the datasets which could not be loaded
+        """
+        errors = []
+        with self.measurements.batch_changes():
+            for meas_dict, file_path in datasets:
+                try:
+                    self.load_measurement_dataset(meas_dict, file_path, force_gui_update=False)
+                except Exception as exc:
+                    errors.append((file_path, exc))
+        if force_gui_update:
+            self.update()
+        return errors
+
+    def _pop_oldest_measurement(self) -> MeasurementDict:
+        """Removes the finished measurement with the oldest timestamp from the index and returns it.
+
+        Of several measurements with the same timestamp, the one loaded first is returned.
+        """
+        while True:
+            _, _, meas_hash = heapq.heappop(self._measurements_heap)
+            meas_dict = self.measurements_hashes.pop(meas_hash, None)
+            if meas_dict is not None:
+                self._release_values(meas_dict)
+                return meas_dict
+
+    def _get_values_store(self) -> ValuesStore:
+        """Returns the store of the values of finished measurements, with the cache size of the current settings."""
+        if self.values_store is None:
+            self.values_store = ValuesStore(cache_size_mb=self._meas_control_settings.values_cache_mb)
+        else:
+            self.values_store.set_cache_size(self._meas_control_settings.values_cache_mb)
+        return self.values_store
+
+    def get_measurement_catalog(self) -> MeasurementCatalog:
+        """Returns the catalog of saved data files, stored in the LabExT settings directory."""
+        with self._measurements_lock:
+            if self.measurement_catalog is None:
+                self.measurement_catalog = MeasurementCatalog(get_configuration_file_path(CATALOG_FILE_NAME))
+            return self.measurement_catalog
+
+    def _release_values(self, meas_dict: MeasurementDict) -> None:
+        """Deletes the on-disk values of a removed measurement."""
+        if self.values_store is not None:
+            self.values_store.release(meas_dict["values"])
+
+    def close_values_store(self) -> None:
+        """Deletes the on-disk values of all finished measurements. Call only when the application closes."""
+        if self.values_store is not None:
+            self.values_store.close()
+
     def import_measurement_classes(self):
         """
         Load all measurement files in Measurement folder and update
@@ -517,22 +922,37 @@ class StandardExperiment:
         self.logger.debug("Available measurements loaded. Found: %s", self.measurement_list)
 
     def remove_measurement_dataset(self, meas_dict):
-        mh = calc_measurement_key(meas_dict)
-        self.measurements_hashes.remove(mh)
-        self.measurements.remove(meas_dict)
-
-    def create_measurement_object(self, class_name) -> Measurement:
+        self.remove_measurement_datasets([meas_dict])
+
+    def remove_measurement_datasets(self, meas_dicts: Iterable[MeasurementDict]):
+        """Removes the given finished measurements, notifying the observers of the measurements list only once."""
+        with self._measurements_lock:
+            meas_dicts = list(meas_dicts)
+            for meas_dict in meas_dicts:
+                del self.measurements_hashes[calc_measurement_key(meas_dict)]
+                self._release_values(meas_dict)
+            self.measurements.remove_items(meas_dicts)
+
+            # drop the removed measurements from the heap once they make up most of it
+            if len(self._measurements_heap) > 2 * len(self.measurements_hashes) + 16:
+                self._measurements_heap = [e for e in self._measurements_heap if e[2] in self.measurements_hashes]
+                heapq.heapify(self._measurements_heap)
+
+    def create_measurement_object(self, class_name, select=True) -> Measurement:
         """Import, load and initialise measurement.
 
         Parameters
         ----------
         class_name : str
             Name of the measurement to be initialised.
+        select : bool
+            (optional, default True) set to False to not add the measurement to the selected measurements.
         """
         self.logger.debug("Loading measurement: %s", class_name)
         meas_class = self.measurements_classes[class_name]
         measurement = meas_class(experiment=self, experiment_manager=self._experiment_manager)
-        self.selected_measurements.append(measurement)
+        if select:
+            self.selected_measurements.append(measurement)
         return measurement
 
     def duplicate_measurement(self, orig_meas):
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import copy
+import os
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping
+
+import numpy as np
+import pandas as pd
+
+from LabExT.Measurements.MeasAPI.Measparam import MeasParamInt
+
+if TYPE_CHECKING:
+    from LabExT.Experiments.StandardExperiment import StandardExperiment
+    from LabExT.Measurements.MeasAPI.Measurement import Measurement
+else:
+    StandardExperiment = None
+    Measurement = None
+
+
+def _random_uuid4_hex(n: int) -> List[str]:
+    """Returns `n` random version 4 UUIDs as hex strings, like `uuid.uuid4().hex` but generated in bulk."""
+    raw = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    hex_str = raw.tobytes().hex()
+    return [hex_str[32 * idx:32 * (idx + 1)] for idx in range(n)]
+
+
+class SweepGrid:
+    """
+    Parameter grid of a sweep, from which the measurements of its ToDos are created when they are executed.
+
+    The grid keeps one column per swept parameter holding the value of every sweep point, the ids of the measurements
+    and a snapshot of the template measurement. A `ToDo` created with a grid and an index only creates its measurement
+    object on first access, see `ToDo.measurement`. Until then, the ToDo answers questions about its measurement, like
+    its name or parameter values, from the grid.
+    """
+
+    def __init__(self, experiment: StandardExperiment, template: Measurement, sweep_values: Mapping[str, Any]):
+        """
+        Args:
+            experiment: the experiment used to create the measurement objects
+            template: the measurement providing the parameters which are not swept, its selected instruments and its
+                initialized instrument drivers
+            sweep_values: the values of each swept parameter. The grid is the cross product of all values, where the
+                first parameter changes slowest.
+        """
+        self._experiment = experiment
+        self.measurement_class = type(template)
+        self.measurement_name = str(template.name)
+        self.selected_instruments = template.selected_instruments.copy()
+        self._instruments = template.instruments.copy()
+        self._parameters = {name: param.copy() for name, param in template.parameters.items()}
+        self._instrument_setting_costs = template.get_instrument_setting_costs()
+
+        self._set_points(sweep_values)
+
+    def _set_points(self, sweep_values: Mapping[str, Any]) -> None:
+        value_arrays = []
+        for values in sweep_values.values():
+            array = np.asarray(values)
+            if array.ndim != 1:
+                array = np.asarray(list(values), dtype=object)
+            value_arrays.append(array)
+        sizes = [len(a) for a in value_arrays]
+        n_points = int(np.prod(sizes)) if sizes else 0
+
+        # cross product: each column repeats its values for all combinations of the following parameters
+        self.columns: Dict[str, np.ndarray] = {}
+        for idx, (name, array) in enumerate(zip(sweep_values.keys(), value_arrays)):
+            inner = int(np.prod(sizes[idx + 1:]))
+            outer = int(np.prod(sizes[:idx]))
+            self.columns[name] = np.tile(np.repeat(array, inner), outer)
+
+        self.ids: List[str] = _random_uuid4_hex(n_points)
+
+    def derive(self, sweep_values: Mapping[str, Any]) -> "SweepGrid":
+        """Returns a grid over other values of the same parameters. It shares the snapshot of the template
+        measurement."""
+        grid = copy.copy(self)
+        grid._set_points(sweep_values)
+        return grid
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def sweep_parameters(self) -> pd.DataFrame:
+        """Returns the parameter table of the sweep, as shared by its ToDos."""
+        table = {("measurement settings", name): column for name, column in self.columns.items()}
+        table[("metadata", "id")] = self.ids
+        table[("metadata", "name")] = self.measurement_name
+        table[("metadata", "finished")] = False
+        return pd.DataFrame(table, columns=pd.MultiIndex.from_tuples(list(table.keys())))
+
+    def measurement_id(self, index: int) -> uuid.UUID:
+        return uuid.UUID(hex=self.ids[index])
+
+    def name_with_id(self, index: int) -> str:
+        """Same as `Measurement.get_name_with_id()` of the measurement at the given index."""
+        return self.measurement_name + " (shortened id = " + self.ids[index][-5:] + ")"
+
+    def get_instrument_setting_costs(self) -> Dict[tuple, int]:
+        return self._instrument_setting_costs
+
+    def parameter_type(self, name: str) -> type:
+        """Returns the class of a parameter of the template measurement, e.g. `MeasParamInt`."""
+        return type(self._parameters[name])
+
+    def _value(self, name: str, index: int) -> Any:
+        value = self.columns[name][index]
+        if isinstance(value, np.generic):
+            value = value.item()
+        if type(self._parameters[name]) == MeasParamInt:
+            value = int(value)
+        return value
+
+    def parameter_value(self, index: int, name: str) -> Any:
+        """Returns the value of a parameter of the measurement at the given index, or None if there is no such
+        parameter."""
+        if name in self.columns:
+            return self._value(name, index)
+        param = self._parameters.get(name)
+        return None if param is None else param.value
+
+    def parameter_values(self, index: int) -> Dict[str, Any]:
+        """Returns the values of all parameters of the measurement at the given index."""
+        values = {name: param.value for name, param in self._parameters.items()}
+        values.update({name: self._value(name, index) for name in self.columns})
+        return values
+
+    def create_measurement(self, index: int) -> Measurement:
+        """Creates the measurement object of the sweep point at the given index."""
+        measurement = self._experiment.create_measurement_object(self.measurement_class.__name__, select=False)
+        measurement._id = self.measurement_id(index)
+        measurement.instruments = self._instruments.copy()
+        measurement.selected_instruments = self.selected_instruments.copy()
+        measurement.parameters = {name: param.copy() for name, param in self._parameters.items()}
+        for name in self.columns:
+            measurement.parameters[name].value = self._value(name, index)
+        return measurement
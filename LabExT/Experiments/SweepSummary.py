@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from os.path import basename, dirname, isfile, join
+from typing import Dict, List
+
+import pandas as pd
+from pandas import DataFrame
+
+SIDECAR_ENDING = "_sweep_summary.jsonl"
+JSON_ENDING = "_sweep_summary.json"
+
+
+class SweepSummary:
+    """
+    Append-only summary of the measurements of a parameter sweep.
+
+    The summary is stored in a JSON lines sidecar file. The first line holds the metadata of the sweep and its full
+    parameter table, every finished measurement appends one line with its row and data file path. Rows added to the
+    parameter table while the sweep runs are appended as one line each time. Finishing a measurement therefore costs
+    the same regardless of the size of the sweep.
+
+    The `_sweep_summary.json` file with the association list of all measurements is written once the last measurement
+    of the sweep finished, and can be reconstructed from the sidecar at any time with `reconstruct_sweep_summary`.
+    """
+
+    def __init__(self, file_path_prefix: str, metadata: dict = None, sweep_parameters: DataFrame = None):
+        """
+        Args:
+            file_path_prefix: path of the summary files without the endings `_sweep_summary.jsonl` and
+                `_sweep_summary.json`
+            metadata: metadata of the sweep, see `StandardExperiment._write_metadata`
+            sweep_parameters: the parameter table shared by the ToDos of the sweep. If given, the sidecar file is
+                created.
+        """
+        self.sidecar_path = file_path_prefix + SIDECAR_ENDING
+        self.json_path = file_path_prefix + JSON_ENDING
+        self.metadata = OrderedDict() if metadata is None else OrderedDict(metadata)
+
+        self._lock = threading.Lock()
+        self._columns: List[tuple] = []
+        self._rows: List[list] = []
+        self._row_by_id: Dict[str, int] = {}
+        # data file path by row index of the finished measurements
+        self._finished: Dict[int, str] = {}
+
+        if sweep_parameters is not None:
+            self._set_table([tuple(c) for c in sweep_parameters.columns], sweep_parameters.values.tolist())
+            with open(self.sidecar_path, "w") as fp:
+                fp.write(json.dumps({"op": "header", "metadata": self.metadata,
+                                     "columns": [list(c) for c in self._columns], "data": self._rows}) + "\n")
+
+    def _set_table(self, columns: List[tuple], rows: List[list]) -> None:
+        self._columns = columns
+        self._rows = []
+        self._row_by_id = {}
+        self._extend_table(rows)
+
+    def _extend_table(self, rows: List[list]) -> None:
+        id_column = self._columns.index(("metadata", "id"))
+        finished_column = self._columns.index(("metadata", "finished")) \
+            if ("metadata", "finished") in self._columns else None
+        path_column = self._columns.index(("metadata", "file_path")) \
+            if ("metadata", "file_path") in self._columns else None
+        for row in rows:
+            idx = len(self._rows)
+            self._rows.append(row)
+            self._row_by_id[row[id_column]] = idx
+            if finished_column is not None and row[finished_column] is True:
+                self._finished[idx] = row[path_column] if path_column is not None else None
+
+    @classmethod
+    def load(cls, sidecar_path: str) -> "SweepSummary":
+        """Reads a summary from its sidecar file. An incomplete last line, e.g. after a crash, is ignored."""
+        if not sidecar_path.endswith(SIDECAR_ENDING):
+            raise ValueError(f"Not a sweep summary sidecar file: {sidecar_path}")
+        summary = cls(sidecar_path[:-len(SIDECAR_ENDING)])
+        with open(sidecar_path, "r") as fp:
+            for line in fp:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("op") == "header":
+                    summary.metadata = OrderedDict(record["metadata"])
+                    summary._set_table([tuple(c) for c in record["columns"]], record["data"])
+                elif record.get("op") == "rows":
+                    summary._extend_table(record["data"])
+                elif record.get("op") == "finished":
+                    summary._finished[record["row"]] = record["file_path"]
+        return summary
+
+    def row_index(self, measurement_id: str) -> int:
+        """Returns the row of a measurement in the parameter table."""
+        return self._row_by_id[measurement_id]
+
+    @property
+    def complete(self) -> bool:
+        """True once all measurements of the sweep finished."""
+        return len(self._finished) == len(self._rows)
+
+    def association_entry(self, row_index: int) -> OrderedDict:
+        """Returns the metadata and measurement settings of a row, as stored in the sweep association list."""
+        entry = OrderedDict()
+        entry["metadata"] = {}
+        entry["measurement settings"] = {}
+        for (group, name), value in zip(self._columns, self._rows[row_index]):
+            if group == "metadata" and name not in ["finished", "file_path"]:
+                entry["metadata"][name] = value
+            elif group == "measurement settings":
+                entry["measurement settings"][name] = value
+        if row_index in self._finished:
+            entry["metadata"]["file_path"] = self._finished[row_index]
+        return entry
+
+    def add_rows(self, sweep_parameters: DataFrame) -> None:
+        """Appends rows to the parameter table, e.g. the points added by an adaptive sweep. Columns which are not part
+        of the summary's table are ignored, missing columns are left empty."""
+        rows = sweep_parameters.reindex(columns=pd.MultiIndex.from_tuples(self._columns)).values.tolist()
+        with self._lock:
+            self._extend_table(rows)
+            with open(self.sidecar_path, "a") as fp:
+                fp.write(json.dumps({"op": "rows", "data": rows}) + "\n")
+
+    def record_finished(self, measurement_id: str, file_path: str) -> None:
+        """Appends a finished measurement to the sidecar file."""
+        with self._lock:
+            row = self.row_index(measurement_id)
+            self._finished[row] = file_path
+            with open(self.sidecar_path, "a") as fp:
+                fp.write(json.dumps({"op": "finished", "row": row, "id": measurement_id, "file_path": file_path})
+                         + "\n")
+
+    def to_dict(self) -> OrderedDict:
+        """Returns the content of the `_sweep_summary.json` file."""
+        summary = OrderedDict(self.metadata)
+        summary["sweep_association_list"] = [self.association_entry(idx) for idx in range(len(self._rows))]
+        return summary
+
+    def write_json(self, indented: bool = True) -> str:
+        """Writes the `_sweep_summary.json` file and returns its path."""
+        with self._lock:
+            content = self.to_dict()
+        with open(self.json_path, "w+") as fp:
+            json.dump(content, fp, indent="\t" if indented else None)
+        return self.json_path
+
+
+def reconstruct_sweep_summary(sidecar_path: str, indented: bool = True) -> str:
+    """Writes the `_sweep_summary.json` file of a sweep summary sidecar file and returns its path."""
+    return SweepSummary.load(sidecar_path).write_json(indented=indented)
+
+
+def load_sweep_association(meas_dict: dict, file_path: str = None) -> list:
+    """
+    Returns the association list of all measurements of the sweep a measurement belongs to.
+
+    Data files written before the sweep summary was introduced store the full list under
+    'sweep_information' / 'sweep_association'. Newer data files only store their own row there and refer to the sweep
+    summary file, the list is then read from the summary file or, if the sweep was interrupted before it was written,
+    from the sidecar file.
+
+    Args:
+        meas_dict: the measurement dictionary loaded from a data file
+        file_path: path of the data file, used to find the summary files if the sweep's folder was moved
+
+    Returns:
+        The entries of all measurements of the sweep, an empty list if the measurement is not part of a sweep.
+    """
+    sweep_information = meas_dict.get("sweep_information") or {}
+    association = list(sweep_information.get("sweep_association") or [])
+    summary_path = sweep_information.get("sweep_summary_file")
+    if summary_path is None:
+        return association
+
+    candidates = [summary_path]
+    if file_path is not None:
+        candidates.append(join(dirname(file_path), basename(summary_path)))
+    for json_path in candidates:
+        if isfile(json_path):
+            with open(json_path, "r") as fp:
+                return json.load(fp)["sweep_association_list"]
+        sidecar_path = json_path[:-len(JSON_ENDING)] + SIDECAR_ENDING
+        if isfile(sidecar_path):
+            return SweepSummary.load(sidecar_path).to_dict()["sweep_association_list"]
+    return association
@@ -6,6 +6,8 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 import time
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, Type
 
 from pandas import DataFrame
 
@@ -13,27 +15,44 @@ from LabExT.Measurements.MeasAPI.Measurement import Measurement
 from LabExT.Wafer.Device import Device
 from LabExT.Utils import make_filename_compliant
 
+if TYPE_CHECKING:
+    from LabExT.Experiments.AdaptiveSweep import AdaptiveSweep
+    from LabExT.Experiments.SweepGrid import SweepGrid
+else:
+    AdaptiveSweep = None
+    SweepGrid = None
+
 class ToDo:
     def __init__(self,
                  device: Device,
                  measurement: Measurement,
                  part_of_sweep: bool = False,
                  sweep_parameters: DataFrame = None,
-                 dictionary_wrapper: "DictionaryWrapper" = None):
+                 dictionary_wrapper: "DictionaryWrapper" = None,
+                 sweep_grid: SweepGrid = None,
+                 sweep_index: int = None,
+                 adaptive_sweep: AdaptiveSweep = None):
         """Create a new ToDo
         
         Args:
             device: A reference to the device this measurement should be run on
-            measurement: The measurement that should be run
+            measurement: The measurement that should be run, may be `None` if `sweep_grid` is given
             part_of_sweep: This should only be `True` if this ToDo is part of a sweep
             sweep_parameters: If the `ToDo` is part of a sweep this argument mustn't be `None`
             dictionary_wrapper: If the `ToDo` is part of a sweep this argument mustn't be `None`
+            sweep_grid: The grid of the sweep, from which the measurement is created on first access
+            sweep_index: The index of this `ToDo`'s point in `sweep_grid`
+            adaptive_sweep: If the `ToDo` is part of an adaptive sweep, the sweep adding points after it finished
         """
         assert (part_of_sweep and sweep_parameters is not None) or not part_of_sweep
         assert (part_of_sweep and dictionary_wrapper is not None) or not part_of_sweep
+        assert measurement is not None or (sweep_grid is not None and sweep_index is not None)
 
         self.device = device
-        self.measurement = measurement
+        self._measurement = measurement
+        self.sweep_grid = sweep_grid
+        self.sweep_index = sweep_index
+        self.adaptive_sweep = adaptive_sweep
         self._timestamp = int(time.time() * 1e6)
         self.part_of_sweep = part_of_sweep
         self.sweep_parameters = sweep_parameters
@@ -41,6 +60,66 @@ class ToDo:
         self.dictionary_wrapper = dictionary_wrapper
         """This reference is shared between all `ToDo`s which are part of the same sweep."""
 
+    @property
+    def measurement(self) -> Measurement:
+        """The measurement to run. For a `ToDo` of a sweep grid, it is created on first access."""
+        if self._measurement is None:
+            self._measurement = self.sweep_grid.create_measurement(self.sweep_index)
+        return self._measurement
+
+    @measurement.setter
+    def measurement(self, measurement: Measurement) -> None:
+        self._measurement = measurement
+
+    @property
+    def _lazy(self) -> bool:
+        """True as long as the measurement was not yet created from the sweep grid."""
+        return self._measurement is None
+
+    # The following accessors do not create the measurement of a sweep grid ToDo.
+
+    @property
+    def measurement_id(self) -> uuid.UUID:
+        return self.sweep_grid.measurement_id(self.sweep_index) if self._lazy else self.measurement.id
+
+    @property
+    def measurement_id_hex(self) -> str:
+        """Same as `measurement_id.hex`, without creating a `uuid.UUID` for a sweep grid `ToDo`."""
+        return self.sweep_grid.ids[self.sweep_index] if self._lazy else self.measurement.id.hex
+
+    @property
+    def measurement_class(self) -> Type[Measurement]:
+        return self.sweep_grid.measurement_class if self._lazy else type(self.measurement)
+
+    @property
+    def selected_instruments(self) -> Dict[str, Dict]:
+        return self.sweep_grid.selected_instruments if self._lazy else self.measurement.selected_instruments
+
+    def get_measurement_name_with_id(self) -> str:
+        """Same as `Measurement.get_name_with_id()`."""
+        if self._lazy:
+            return self.sweep_grid.name_with_id(self.sweep_index)
+        return self.measurement.get_name_with_id()
+
+    def get_instrument_setting_costs(self) -> Dict[tuple, int]:
+        """Same as `Measurement.get_instrument_setting_costs()`."""
+        if self._lazy:
+            return self.sweep_grid.get_instrument_setting_costs()
+        return self.measurement.get_instrument_setting_costs()
+
+    def get_parameter_value(self, name: str) -> Any:
+        """Returns the value of a parameter of the measurement, or None if there is no such parameter."""
+        if self._lazy:
+            return self.sweep_grid.parameter_value(self.sweep_index, name)
+        param = self.measurement.parameters.get(name)
+        return None if param is None else param.value
+
+    def get_parameter_values(self) -> Dict[str, Any]:
+        """Returns the values of all parameters of the measurement."""
+        if self._lazy:
+            return self.sweep_grid.parameter_values(self.sweep_index)
+        return {name: param.value for name, param in self.measurement.parameters.items()}
+
     def __getitem__(self, item):
         """ make To-Do class compatible with old code which used (device,measurement) tuples as ToDos """
         if item == 0:
@@ -51,7 +130,7 @@ class ToDo:
             raise KeyError(item)
 
     def __str__(self):
-        return "<ToDo: " + str(self.measurement.get_name_with_id()) + " on " + str(self.device) + ">"
+        return "<ToDo: " + str(self.get_measurement_name_with_id()) + " on " + str(self.device) + ">"
 
     def __repr__(self):
         return self.__str__()
@@ -59,7 +138,7 @@ class ToDo:
     def get_hash(self):
         """calculate the unique but hardly one-way functional 'hash' of a to-do"""
         hash = str(self.device)
-        hash += str(self.measurement.get_name_with_id())
+        hash += str(self.get_measurement_name_with_id())
         hash += str(self._timestamp)
         return hash
 
@@ -70,7 +149,7 @@ class DictionaryWrapper:
     same data, but the data can be changed as a whole after initialization.
 
     This is needed for measurements belonging to a sweep. They all need to 
-    share the dictionary with the summary information of the sweep, however,
+    share the summary of the sweep (see `SweepSummary`), however,
     this is only created once the first measurement is run. To be able to 
     update the references the other measurements use, they are given a reference
     to this wrapper class instead, which holds a reference to the final dictionary
@@ -97,7 +176,7 @@ class DictionaryWrapper:
 
     @property
     def get(self) -> dict:
-        """Returns a reference to the wrapped dictionary or `None` if `self.available == False`."""
+        """Returns a reference to the wrapped object or `None` if `self.available == False`."""
         return self._dictionary
 
     def wrap(self, dictionary: dict) -> None:
@@ -23,9 +23,10 @@ class SoftwareDict(TypedDict("SpacesInKeys", {"git rev": str}), total=False):
     computer: str
 
 
-class SweepInformation(TypedDict):
+class SweepInformation(TypedDict, total=False):
     part_of_sweep: bool
-    sweep_association: Optional[dict]
+    sweep_association: Optional[list]
+    sweep_summary_file: str
 
 
 class MeasurementDict(
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import os
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import MutableMapping
+
+import numpy as np
+
+from LabExT.Experiments.ResultCompression import strip_compression_ending
+
+# key of a measurement dictionary marking that its numeric values vectors are stored in .npy files
+VALUES_STORAGE_KEY = "values storage"
+NPY_STORAGE = "npy"
+# software added key holding the references to the .npy files of a loaded measurement
+SIDECAR_REFERENCES_KEY = "values_sidecar_known"
+
+# numpy dtype kinds which are stored in .npy files: booleans, integers, floats and complex numbers
+_NUMERIC_KINDS = "biufc"
+
+
+def sidecar_directory(json_file_path: str) -> str:
+    """Returns the directory holding the .npy files of a, possibly compressed, measurement data file."""
+    return os.path.splitext(strip_compression_ending(json_file_path))[0] + "_values"
+
+
+def _is_reference(vector) -> bool:
+    return isinstance(vector, Mapping) and NPY_STORAGE in vector
+
+
+def write_values_sidecar(json_file_path: str, values: Mapping) -> "OrderedDict[str, object]":
+    """Writes the numeric vectors of a values dictionary to .npy files next to a measurement data file.
+
+    Every vector is stored in its own file in the directory `<data file name>_values`, such that it can be
+    memory-mapped on load. Vectors which are not numeric, e.g. lists of strings, stay as they are.
+
+    Args:
+        json_file_path: the path of the measurement's JSON data file
+        values: the values dictionary of the measurement
+
+    Returns:
+        The values dictionary to store in the JSON file, where the stored vectors are replaced by references
+        `{"npy": <path relative to the data file>, "dtype": ..., "shape": ...}`.
+    """
+    directory = sidecar_directory(json_file_path)
+    references = OrderedDict()
+    for idx, (key, vector) in enumerate(values.items()):
+        if _is_reference(vector):
+            references[key] = vector
+            continue
+        try:
+            array = np.asarray(vector)
+        except ValueError:
+            # ragged nested lists
+            array = None
+        if array is None or array.dtype.kind not in _NUMERIC_KINDS or array.ndim == 0:
+            references[key] = vector
+            continue
+        os.makedirs(directory, exist_ok=True)
+        file_name = f"{idx:04d}.npy"
+        np.save(os.path.join(directory, file_name), array, allow_pickle=False)
+        references[key] = OrderedDict([
+            (NPY_STORAGE, os.path.basename(directory) + "/" + file_name),
+            ("dtype", array.dtype.str),
+            ("shape", list(array.shape)),
+        ])
+    return references
+
+
+def load_values_sidecar(json_file_path: str, references: Mapping) -> "OrderedDict[str, object]":
+    """Returns a values dictionary whose vectors stored in .npy files are memory-mapped, read-only arrays.
+
+    Args:
+        json_file_path: the path of the measurement's JSON data file, the references are relative to its directory
+        references: the values dictionary as stored in the JSON file, see `write_values_sidecar`
+    """
+    base_directory = os.path.dirname(os.path.abspath(json_file_path))
+    values = OrderedDict()
+    for key, vector in references.items():
+        if _is_reference(vector):
+            vector = np.load(os.path.join(base_directory, vector[NPY_STORAGE]), mmap_mode="r", allow_pickle=False)
+        values[key] = vector
+    return values
+
+
+def store_values_sidecar(meas_dict: MutableMapping, json_file_path: str) -> None:
+    """Moves the numeric values of a measurement dictionary to .npy files, before the dictionary is saved as JSON."""
+    meas_dict["values"] = write_values_sidecar(json_file_path, meas_dict["values"])
+    meas_dict[VALUES_STORAGE_KEY] = NPY_STORAGE
+
+
+def resolve_values_sidecar(meas_dict: MutableMapping, json_file_path: str) -> MutableMapping:
+    """Replaces the references to .npy files in the values of a loaded measurement dictionary by the stored vectors.
+
+    Does nothing for measurements which store all values in their JSON file. The references are kept under
+    `values_sidecar_known`, such that the dictionary can be saved again without inlining its values.
+
+    Returns:
+        the given measurement dictionary
+    """
+    if meas_dict.get(VALUES_STORAGE_KEY) != NPY_STORAGE:
+        return meas_dict
+    references = meas_dict["values"]
+    if any(_is_reference(v) for v in references.values()):
+        meas_dict[SIDECAR_REFERENCES_KEY] = OrderedDict(references)
+        meas_dict["values"] = load_values_sidecar(json_file_path, references)
+    return meas_dict
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from LabExT.Measurements.MeasAPI.ValuesBuffer import ValuesBuffer
+
+# writes one measurement to the given file path
+WriteFunction = Callable[[dict, str], None]
+
+
+def export_payload(measurement: Mapping) -> dict:
+    """Returns a copy of a measurement dictionary which can be sent to a worker process.
+
+    Values stored on disk or in buffers are read into numpy arrays, the remaining entries are copied shallowly.
+    """
+    payload = dict(measurement)
+    payload["values"] = OrderedDict(
+        (k, np.array(v) if isinstance(v, (np.ndarray, ValuesBuffer)) else v)
+        for k, v in measurement["values"].items()
+    )
+    return payload
+
+
+def _write_file(write_file: WriteFunction, measurement: dict, file_path: str) -> int:
+    """Writes one file, in a worker process, and returns its size in bytes. Incomplete files are removed."""
+    try:
+        write_file(measurement, file_path)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return os.path.getsize(file_path)
+
+
+@dataclass
+class ExportResult:
+    """Outcome of an export."""
+
+    n_files: int = 0
+    written: List[str] = field(default_factory=list)
+    # error message by target file path of the files which could not be written
+    failed: Dict[str, str] = field(default_factory=dict)
+    n_bytes: int = 0
+    duration: float = 0.0
+    cancelled: bool = False
+
+    @property
+    def throughput(self) -> float:
+        """Size of the written files in MB per second."""
+        return self.n_bytes / 1e6 / self.duration if self.duration > 0 else 0.0
+
+
+class ExportRunner:
+    """
+    Writes measurements to files in parallel worker processes.
+
+    Only a few measurements more than there are workers are copied and sent to the workers at the same time, such
+    that the memory used stays bounded for any number of measurements. The progress can be read from another thread
+    while `run` executes, e.g. by a GUI progress window, and `cancel` stops the export after the files being written.
+    """
+
+    def __init__(self, write_file: WriteFunction, max_workers: int = None, max_pending: int = None):
+        """
+        Args:
+            write_file: writes one measurement to a file. It is called in the worker processes, so it must be a
+                function or static method defined in an importable module.
+            max_workers: number of worker processes, 1 to write the files in the calling thread, by default the number
+                of CPUs
+            max_pending: maximum number of measurements sent to the workers at the same time, by default twice the
+                number of workers
+        """
+        self.write_file = write_file
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.max_workers
+        self.logger = logging.getLogger()
+
+        self.result = ExportResult()
+        self._cancel = threading.Event()
+
+    @property
+    def n_done(self) -> int:
+        """Number of files which were written or failed."""
+        return len(self.result.written) + len(self.result.failed)
+
+    def cancel(self) -> None:
+        """Stops the export. Files being written are completed, the remaining ones are not written."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def _add_written(self, file_path: str, n_bytes: int) -> None:
+        self.result.n_bytes += n_bytes
+        self.result.written.append(file_path)
+
+    def _add_failed(self, file_path: str, exc: Exception) -> None:
+        self.logger.error(f"Could not export {file_path}: {exc!r}")
+        self.result.failed[file_path] = repr(exc)
+
+    def run(self, jobs: Sequence[Tuple[Mapping, str]]) -> ExportResult:
+        """Writes all measurements and blocks until they are written.
+
+        Args:
+            jobs: the measurements and the paths of the files to write them to
+        """
+        self.result = ExportResult(n_files=len(jobs))
+        start = time.perf_counter()
+
+        if self.max_workers == 1 or len(jobs) < 2:
+            for measurement, file_path in jobs:
+                if self.cancelled:
+                    break
+                try:
+                    self._add_written(file_path, _write_file(self.write_file, export_payload(measurement), file_path))
+                except Exception as exc:
+                    self._add_failed(file_path, exc)
+        else:
+            # the workers are started fresh instead of forking the GUI process with its threads and connections
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(jobs)),
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                pending = {}
+                jobs_iter = iter(jobs)
+                while True:
+                    while len(pending) < self.max_pending and not self.cancelled:
+                        try:
+                            measurement, file_path = next(jobs_iter)
+                        except StopIteration:
+                            break
+                        future = pool.submit(_write_file, self.write_file, export_payload(measurement), file_path)
+                        pending[future] = file_path
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        file_path = pending.pop(future)
+                        try:
+                            self._add_written(file_path, future.result())
+                        except Exception as exc:
+                            self._add_failed(file_path, exc)
+
+        self.result.cancelled = self.cancelled
+        self.result.duration = time.perf_counter() - start
+        self.logger.info("Exported %d of %d files, %.1f MB in %.1f s (%.1f MB/s)%s.",
+                         len(self.result.written), self.result.n_files, self.result.n_bytes / 1e6,
+                         self.result.duration, self.result.throughput, ", cancelled" if self.cancelled else "")
+        return self.result
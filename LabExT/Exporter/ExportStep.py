@@ -6,11 +6,16 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 from typing import TYPE_CHECKING
-from tkinter import TOP, X, END, StringVar, Entry, Button, filedialog
-from tkinter.ttk import Treeview, Label
+from tkinter import TOP, X, END, StringVar, Entry, Button, Toplevel, filedialog
+from tkinter.ttk import Treeview, Label, Progressbar
 import json
+import threading
 from copy import deepcopy
+from os.path import join, exists
+from pathlib import Path
 
+from LabExT.Experiments.ResultCompression import strip_compression_ending
+from LabExT.Exporter.ExportRunner import ExportResult, ExportRunner
 from LabExT.Utils import run_with_wait_window
 from LabExT.View.Controls.Wizard import Step
 from LabExT.Measurements.MeasAPI.Measparam import MeasParamString
@@ -37,16 +42,29 @@ class ExportFormatStep(Step):
     The build_overview method is used to show a confirmation of a successful export.
 
     By default, the build method promps the user for a directory and makes the result available in self.export_path.get().
+
+    Formats writing one file per measurement can instead set FILE_ENDING and implement the static write_file method.
+    Their _export method then calls export_files, which writes the files in parallel worker processes while a
+    progress window with a cancel button is shown.
     """
     
     FORMAT_TITLE = "Example Export Format Step (change me)"
 
+    # file name ending of the exported files, set it to export the files with write_file in parallel
+    FILE_ENDING = None
+
+    # interval in milliseconds in which the progress window is updated
+    PROGRESS_INTERVAL = 100
+
     def __init__(self, wizard: ExportWizard) -> None:
         super().__init__(wizard=wizard, builder=self.build, title=self.FORMAT_TITLE)
 
         self._root = wizard.master
         self.on_next = self._on_next
 
+        # runner of the current parallel export, see export_files
+        self.export_runner: ExportRunner = None
+
     def build(self, frame: CustomFrame):
         """ Default implementation of the build method -- a single file path selection. """
         frame.title = self.FORMAT_TITLE
@@ -81,17 +99,89 @@ class ExportFormatStep(Step):
 
 
     def _on_next(self):        
-        run_with_wait_window(
-            self.wizard.master,
-            "Exporting ...",
-            lambda: self._export(deepcopy(self.wizard.selected_data))
-        )
-        
+        if self.FILE_ENDING is None:
+            run_with_wait_window(
+                self.wizard.master,
+                "Exporting ...",
+                lambda: self._export(deepcopy(self.wizard.selected_data))
+            )
+        else:
+            # export_files copies the measurements one by one while they are written
+            self.export_runner = None
+            self._run_with_progress_window(lambda: self._export(self.wizard.selected_data))
+
         return True
-  
+
+    def _run_with_progress_window(self, function):
+        """ Runs the export function in a second thread and shows the progress of its export runner. """
+        window = Toplevel(self.wizard.master)
+        window.title("Exporting ...")
+        window.attributes('-topmost', 'true')
+        progress_text = StringVar(window, value="Exporting ...")
+        Label(window, textvariable=progress_text).grid(row=0, column=0, padx=5, pady=5)
+        progress_bar = Progressbar(window, mode='determinate', length=300)
+        progress_bar.grid(row=1, column=0, padx=5, pady=5)
+        Button(window, text="Cancel", command=self.cancel_export).grid(row=2, column=0, padx=5, pady=5)
+
+        thread = threading.Thread(target=function, name="export: " + self.FORMAT_TITLE)
+
+        def show_progress():
+            runner = self.export_runner
+            if runner is not None and runner.result.n_files > 0:
+                progress_bar["value"] = 100 * runner.n_done / runner.result.n_files
+                progress_text.set(f"Exported {runner.n_done:d} of {runner.result.n_files:d} files, "
+                                  f"{runner.result.n_bytes / 1e6:.1f} MB")
+            if thread.is_alive():
+                window.after(self.PROGRESS_INTERVAL, show_progress)
+            else:
+                window.destroy()
+
+        thread.start()
+        show_progress()
+        self.wizard.master.wait_window(window)
+
+    def cancel_export(self):
+        """ Stops the running parallel export after the files being written. """
+        if self.export_runner is not None:
+            self.export_runner.cancel()
+
     def _export(self, data):
         raise NotImplementedError("Must be overridden by subclass.")
 
+    @staticmethod
+    def write_file(measurement: dict, file_path: str) -> None:
+        """
+        Writes one measurement to a file, used by export_files if FILE_ENDING is set.
+
+        This runs in a worker process: it must not access the wizard, and its class must be defined in an
+        importable module.
+        """
+        raise NotImplementedError("Must be overridden by subclass.")
+
+    def export_file_path(self, measurement: dict) -> str:
+        """ Returns the path of the file a measurement is exported to: its data file name with FILE_ENDING. """
+        orig_file_name = Path(strip_compression_ending(measurement['file_path_known'])).stem
+        return join(self.export_path.get(), orig_file_name) + self.FILE_ENDING
+
+    def export_files(self, data, max_workers: int = None) -> ExportResult:
+        """
+        Writes every measurement to its own file with write_file, in parallel worker processes.
+
+        Existing target files are not overwritten.
+        """
+        jobs = []
+        file_names = set()
+        for measurement in data:
+            oup_name = self.export_file_path(measurement)
+            if exists(oup_name) or oup_name in file_names:
+                self.wizard.logger.warning("Not exporting {:s} due to existing target file.".format(oup_name))
+                continue
+            file_names.add(oup_name)
+            jobs.append((measurement, oup_name))
+
+        self.export_runner = ExportRunner(self.write_file, max_workers=max_workers)
+        return self.export_runner.run(jobs)
+
     def export_success(self):
         self.next_step_enabled = True
         self.wizard.__reload__()
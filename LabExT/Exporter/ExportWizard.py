@@ -11,6 +11,7 @@ from LabExT.View.Controls.DeviceTable import DeviceTable
 
 from LabExT.View.Controls.Wizard import Wizard, Step
 from tkinter import Tk, Toplevel, Button
+from LabExT.View.MeasurementCatalogWindow import MeasurementCatalogWindow
 from LabExT.View.MeasurementTable import MeasurementTable
 
 if TYPE_CHECKING:
@@ -121,6 +122,12 @@ class ExportFormatSelection(Step):
             command=self._meas_table.click_on_all)
         self._select_all_button.grid(row=2, column=0, padx=5, pady=5, sticky='w')
 
+        self._catalog_button = Button(
+            frame,
+            text='Add Measurements from Catalog...',
+            command=self._open_catalog)
+        self._catalog_button.grid(row=2, column=0, padx=5, pady=5, sticky='e')
+
         # enable scaling
         frame.rowconfigure(0, weight=1)
         frame.columnconfigure(0, weight=1)
@@ -131,6 +138,11 @@ class ExportFormatSelection(Step):
         frame.add_widget(Label(frame, text="Choose which export format to use:"))
         frame.add_widget(OptionMenu(frame, self.source_options_sel_var, *source_options))
 
+    def _open_catalog(self):
+        """Opens the measurement catalog, the imported measurements are added to the table."""
+        MeasurementCatalogWindow(self.wizard, self.wizard.experiment_manager,
+                                 on_import=lambda _: self.wizard.__reload__())
+
     def _on_table_click(self, item_iid, new_state):
         self._meas_table.select_item(item_iid, new_state)
         self.wizard.parent.event_generate("<<ExportMeasurementSelect>>", when="tail")
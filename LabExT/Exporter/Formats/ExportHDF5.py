@@ -6,8 +6,6 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 import h5py
-from os.path import join, exists
-from pathlib import Path
 
 from LabExT.Exporter.ExportStep import ExportFormatStep
 
@@ -18,39 +16,30 @@ def write_metadata(group, metadata, path):
         else:
             group.attrs[path + k] = str(v)
 
+def write_hdf5(measurement, file_path):
+    """ Writes the values of a measurement as datasets and all other keys as attributes to an HDF5 file. """
+    with h5py.File(file_path, "w") as file:
+        group = file.create_group("values")
+        for k, v in measurement["values"].items():
+            group.create_dataset(k, data=v, dtype='f')
+
+        metadata = measurement.copy()
+        metadata.pop("values")
+
+        write_metadata(file, metadata, '')
+
 class ExportHDF5(ExportFormatStep):
     FORMAT_TITLE = "Hierarchical Data Format (.h5)"
+    FILE_ENDING = ".h5"
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+    write_file = staticmethod(write_hdf5)
+
     def _export(self, data):
         """ Implementation of export in hdf5 format. """
-        print("Exporting data to HDF5 format ...")
-
-        directory_path = self.export_path.get()
-
-        file_names = []
-        for measurement in data:
-            # get output directory and check for overwritin
-            orig_file_name = Path(measurement['file_path_known']).stem
-            oup_name = join(directory_path, orig_file_name) + ".h5"
-        
-            if exists(oup_name):
-                self.wizard.logger.warning("Not exporting {:s} due to existing target file.".format(oup_name))
-                continue
-            
-            with h5py.File(oup_name, "w") as file:
-                group = file.create_group("values")
-                for k, v in measurement["values"].items():
-                    group.create_dataset(k, data=v, dtype='f')
-                
-                metadata = measurement.copy()
-                metadata.pop("values")
-
-                write_metadata(file, metadata, '')
-                
-            file_names.append(oup_name)
-
-        self.wizard.logger.info('Exported %s files as .h5: %s', len(file_names), file_names)
-        self.export_success()
\ No newline at end of file
+        result = self.export_files(data)
+
+        self.wizard.logger.info('Exported %s files as .h5: %s', len(result.written), result.written)
+        self.export_success()
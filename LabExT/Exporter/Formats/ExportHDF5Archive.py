@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+from os.path import join
+from tkinter import StringVar, Entry, Button, OptionMenu, filedialog
+from tkinter.ttk import Label
+
+from LabExT.Exporter.ExportStep import ExportFormatStep
+from LabExT.Exporter.HDF5Archive import ARCHIVE_COMPRESSIONS, append_measurements, read_index
+
+
+class ExportHDF5Archive(ExportFormatStep):
+    """ Appends all measurements to a single HDF5 archive, see LabExT.Exporter.HDF5Archive for its layout. """
+
+    FORMAT_TITLE = "HDF5 Archive, all measurements in one file (.h5)"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.archive_path = None
+        self.compression = None
+
+    def build(self, frame):
+        frame.title = self.FORMAT_TITLE
+
+        if self.archive_path is None:
+            default_path = join(self.wizard.experiment_manager.exp._default_save_path, "measurements_archive.h5")
+            self.archive_path = StringVar(self._root, value=default_path)
+            self.compression = StringVar(self._root, value=ARCHIVE_COMPRESSIONS[0])
+
+        Label(frame, text="archive file:").grid(row=2, column=0, padx=5, sticky='w')
+        Entry(frame, width=50, textvariable=self.archive_path).grid(row=2, column=1, padx=5, sticky='we')
+        Button(frame, text='Browse', command=self._browse).grid(row=2, column=3, padx=5, sticky='e')
+        Label(frame, text="Measurements are appended if the file exists already.").grid(
+            row=3, column=1, padx=5, sticky='w')
+
+        Label(frame, text="compression:").grid(row=4, column=0, padx=5, sticky='w')
+        OptionMenu(frame, self.compression, *ARCHIVE_COMPRESSIONS).grid(row=4, column=1, padx=5, sticky='w')
+
+    def _browse(self):
+        file_path = filedialog.asksaveasfilename(title="Select HDF5 archive", defaultextension=".h5",
+                                                 filetypes=(("HDF5 files", "*.h5"), ("all files", "*.*")),
+                                                 confirmoverwrite=False)
+        if file_path:
+            self.archive_path.set(file_path)
+
+    def _export(self, data):
+        """ Implementation of export to an HDF5 archive. """
+        archive_path = self.archive_path.get()
+        added = append_measurements(archive_path, data, compression=self.compression.get())
+
+        self.wizard.logger.info('Appended %s measurements to %s, which now contains %s measurements.',
+                                len(added), archive_path, len(read_index(archive_path)))
+        self.export_success()
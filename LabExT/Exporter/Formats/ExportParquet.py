@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import datetime
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from numbers import Real
+from os.path import join
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from LabExT.Exporter.ExportStep import ExportFormatStep
+from LabExT.Measurements.MeasAPI.Measparam import MeasParam, MeasParamBool, MeasParamFloat, MeasParamInt
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# name of the dataset directory created in the export directory
+PARQUET_DATASET_NAME = "measurements.parquet"
+
+# the dataset is split into directories by these columns
+PARTITION_COLUMNS = ("chip", "measurement_name")
+
+# number of measurements assembled into one table at most, to bound the memory used
+PARQUET_BATCH_SIZE = 500
+
+# prefix of the columns holding the measurement settings
+PARAMETER_PREFIX = "parameter: "
+
+# prefix of the values columns whose key would be taken for another column
+VALUES_PREFIX = "values: "
+
+# type of the columns which are the same for every measurement, before the settings and values columns
+FIXED_COLUMN_TYPES = OrderedDict([
+    ("dataset_id", "string"),
+    ("chip", "string"),
+    ("measurement_name", "string"),
+    ("device_id", "string"),
+    ("device_type", "string"),
+    ("timestamp_start", "timestamp"),
+    ("timestamp_end", "timestamp"),
+    ("sample_index", "int64"),
+])
+
+# column type of the settings by the class of their parameter, all other settings are stored as text
+PARAMETER_COLUMN_TYPES = ((MeasParamBool, "bool"), (MeasParamInt, "int64"), (MeasParamFloat, "float64"))
+
+
+def _timestamp(value) -> np.datetime64:
+    """Converts the ISO and the "%Y-%m-%d_%H%M%S" timestamps of data files, NaT if there is none."""
+    for parse in (datetime.datetime.fromisoformat, lambda t: datetime.datetime.strptime(t, "%Y-%m-%d_%H%M%S")):
+        try:
+            return np.datetime64(parse(str(value)), "us")
+        except ValueError:
+            continue
+    return np.datetime64("NaT", "us")
+
+
+def _setting_value(value, column_type: str):
+    """Converts a setting to the type of its column, None if it is missing or does not fit the type."""
+    if value is None:
+        return None
+    if column_type == "string":
+        return str(value)
+    if column_type == "bool":
+        return bool(value) if isinstance(value, (bool, np.bool_)) else None
+    if isinstance(value, (bool, np.bool_)) or not isinstance(value, Real):
+        return None
+    if column_type == "int64":
+        return int(value) if float(value).is_integer() else None
+    return float(value)
+
+
+def _constant_column(per_dataset: list, lengths: np.ndarray, column_type: str = "string") -> np.ndarray:
+    """Repeats one value per measurement for all its samples, missing float64 values are NaN, all others None."""
+    converted = [_setting_value(v, column_type) for v in per_dataset]
+    if column_type == "float64":
+        array = np.array([np.nan if v is None else v for v in converted], dtype=np.float64)
+    else:
+        array = np.array(converted, dtype=object)
+    return np.repeat(array, lengths)
+
+
+def _values_column(vectors: List[np.ndarray], lengths: np.ndarray, column_type: str) -> np.ndarray:
+    """Concatenates the vectors of one values key, each padded to the number of samples of its measurement."""
+    numeric = column_type == "float64"
+    if numeric:
+        column = np.full(int(lengths.sum()), np.nan)
+    else:
+        column = np.full(int(lengths.sum()), None, dtype=object)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    for vector, offset in zip(vectors, offsets):
+        if vector is not None:
+            column[offset:offset + len(vector)] = vector if numeric else vector.astype(str)
+    return column
+
+
+def _measurement_name(measurement: Mapping) -> Optional[str]:
+    return measurement.get("measurement name", measurement.get("name"))
+
+
+def _settings(measurement: Mapping) -> Dict[str, object]:
+    """Returns the values of the measurement settings by name."""
+    settings = measurement.get("measurement settings") or {}
+    return OrderedDict((str(k), v.get("value") if isinstance(v, Mapping) else v) for k, v in settings.items())
+
+
+def _values(measurement: Mapping) -> Dict[str, np.ndarray]:
+    return OrderedDict((str(k), np.asarray(v).ravel()) for k, v in measurement["values"].items())
+
+
+def _values_column_name(key: str) -> str:
+    if key in FIXED_COLUMN_TYPES or key.startswith((PARAMETER_PREFIX, VALUES_PREFIX)):
+        return VALUES_PREFIX + key
+    return key
+
+
+def parameter_definitions(measurement_classes: Mapping[str, type]) -> Dict[str, Dict[str, MeasParam]]:
+    """Returns the default parameters of the given measurement classes by measurement name.
+
+    Classes whose default parameters cannot be created are left out, their settings are then exported as text.
+    """
+    definitions = {}
+    for name, measurement_class in measurement_classes.items():
+        try:
+            definitions[name] = measurement_class.get_default_parameter()
+        except Exception as exc:
+            logging.getLogger().warning(f"Cannot get the parameters of measurement {name}: {exc!r}")
+    return definitions
+
+
+def column_types(measurements: Sequence[Mapping],
+                 definitions: Mapping[str, Mapping[str, MeasParam]] = None) -> Dict[str, str]:
+    """
+    Returns the type of every column of the tidy table of the measurements, see long_format_columns.
+
+    The type of a settings column follows from the parameter class defining the setting in `definitions`, see
+    PARAMETER_COLUMN_TYPES, such that it does not depend on the exported values. Settings which are not defined, or
+    defined with different types by different measurements, are text. Values columns are float64 if all vectors are
+    numeric, text otherwise.
+
+    Args:
+        measurements: the measurement dictionaries
+        definitions: the parameters of the measurements by measurement name, see parameter_definitions
+    """
+    definitions = definitions or {}
+    types = OrderedDict(FIXED_COLUMN_TYPES)
+
+    setting_types = OrderedDict()
+    for measurement in measurements:
+        parameters = definitions.get(_measurement_name(measurement)) or {}
+        for name in _settings(measurement):
+            parameter_type = next((t for cls, t in PARAMETER_COLUMN_TYPES if isinstance(parameters.get(name), cls)),
+                                  "string")
+            if setting_types.setdefault(name, parameter_type) != parameter_type:
+                setting_types[name] = "string"
+    for name, column_type in setting_types.items():
+        types[PARAMETER_PREFIX + name] = column_type
+
+    values_types = OrderedDict()
+    for measurement in measurements:
+        for name, vector in _values(measurement).items():
+            numeric = vector.dtype.kind in "biuf"
+            values_types[name] = "float64" if numeric and values_types.get(name, "float64") == "float64" else "string"
+    for name, column_type in values_types.items():
+        types[_values_column_name(name)] = column_type
+    return types
+
+
+def parquet_schema(types: Mapping[str, str]) -> "pyarrow.Schema":
+    """Returns the pyarrow schema of the columns with the given types, see column_types."""
+    pyarrow_types = {"string": pyarrow.string(), "timestamp": pyarrow.timestamp("us"), "bool": pyarrow.bool_(),
+                     "int64": pyarrow.int64(), "float64": pyarrow.float64()}
+    return pyarrow.schema([(name, pyarrow_types[column_type]) for name, column_type in types.items()])
+
+
+def long_format_columns(measurements: Sequence[Mapping], types: Mapping[str, str] = None) -> Dict[str, np.ndarray]:
+    """
+    Returns the columns of a tidy table with one row per sample of the given measurements.
+
+    Every row holds the measurement id, chip, measurement name, device id and type, start and end timestamp, the
+    index of the sample, the measurement settings (prefixed with PARAMETER_PREFIX) and one column per values key.
+    Shorter vectors and missing keys are filled with NaN in float64 columns and None otherwise.
+
+    Args:
+        measurements: the measurement dictionaries
+        types: the type of every column, see column_types. Columns of measurements not given here are filled with
+            missing values, such that batches of measurements share the same columns.
+    """
+    if types is None:
+        types = column_types(measurements)
+    values = [_values(m) for m in measurements]
+    lengths = np.array([max((len(v) for v in vectors.values()), default=0) for vectors in values], dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    def text_column(get_value):
+        return _constant_column([get_value(m) for m in measurements], lengths)
+
+    columns = OrderedDict()
+    columns["dataset_id"] = text_column(lambda m: m.get("measurement id long"))
+    columns["chip"] = text_column(lambda m: (m.get("chip") or {}).get("name"))
+    columns["measurement_name"] = text_column(_measurement_name)
+    columns["device_id"] = text_column(lambda m: (m.get("device") or {}).get("id"))
+    columns["device_type"] = text_column(lambda m: (m.get("device") or {}).get("type"))
+    columns["timestamp_start"] = np.repeat(np.array(
+        [_timestamp(m.get("timestamp iso start", m.get("timestamp start"))) for m in measurements],
+        dtype="datetime64[us]"), lengths)
+    columns["timestamp_end"] = np.repeat(np.array(
+        [_timestamp(m.get("timestamp end", m.get("timestamp"))) for m in measurements],
+        dtype="datetime64[us]"), lengths)
+    columns["sample_index"] = np.arange(int(lengths.sum()), dtype=np.int64) - np.repeat(starts, lengths)
+
+    settings = [_settings(m) for m in measurements]
+    for column_name, column_type in types.items():
+        if column_name in FIXED_COLUMN_TYPES:
+            continue
+        if column_name.startswith(PARAMETER_PREFIX):
+            name = column_name[len(PARAMETER_PREFIX):]
+            columns[column_name] = _constant_column([s.get(name) for s in settings], lengths, column_type)
+        else:
+            name = column_name[len(VALUES_PREFIX):] if column_name.startswith(VALUES_PREFIX) else column_name
+            columns[column_name] = _values_column([vectors.get(name) for vectors in values], lengths, column_type)
+    return columns
+
+
+def write_parquet_dataset(measurements: Sequence[Mapping],
+                          root_path: str,
+                          definitions: Mapping[str, Mapping[str, MeasParam]] = None) -> int:
+    """
+    Appends the measurements as tidy table to a Parquet dataset, partitioned by chip and measurement name.
+
+    All files of a partition are written with one explicit schema, see column_types. With the parameter definitions,
+    the types of the settings columns do not depend on the values, such that files written by separate calls match.
+
+    Args:
+        measurements: the measurement dictionaries
+        root_path: the directory of the dataset
+        definitions: the parameters of the measurements by measurement name, see parameter_definitions
+
+    Returns:
+        the number of written rows
+    """
+    if pyarrow is None:
+        raise RuntimeError("The pyarrow package is required to export Parquet files.")
+
+    partitions = OrderedDict()
+    for measurement in measurements:
+        chip_name = (measurement.get("chip") or {}).get("name")
+        key = (chip_name, _measurement_name(measurement))
+        partitions.setdefault(key, []).append(measurement)
+
+    n_rows = 0
+    prefix = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    for part_index, part in enumerate(partitions.values()):
+        types = column_types(part, definitions)
+        schema = parquet_schema(types)
+        for start in range(0, len(part), PARQUET_BATCH_SIZE):
+            table = pyarrow.table(long_format_columns(part[start:start + PARQUET_BATCH_SIZE], types), schema=schema)
+            pyarrow.parquet.write_to_dataset(
+                table, root_path, partition_cols=list(PARTITION_COLUMNS),
+                basename_template=f"{prefix}_{part_index:d}_{start:d}_{{i}}.parquet")
+            n_rows += table.num_rows
+    return n_rows
+
+
+class ExportParquet(ExportFormatStep):
+    FORMAT_TITLE = "Apache Parquet, one row per sample (.parquet)"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def _export(self, data):
+        """ Implementation of export as Parquet dataset. """
+        if pyarrow is None:
+            self.wizard.logger.error("Cannot export Parquet files: the pyarrow package is not installed.")
+            self.wizard.set_error("Install the pyarrow package to export Parquet files.")
+            return
+
+        root_path = join(self.export_path.get(), PARQUET_DATASET_NAME)
+        start = time.perf_counter()
+        definitions = parameter_definitions(self.wizard.experiment_manager.exp.measurements_classes)
+        n_rows = write_parquet_dataset(data, root_path, definitions)
+
+        self.wizard.logger.info('Exported %s measurements with %s samples to %s in %.1f s.',
+                                len(data), n_rows, root_path, time.perf_counter() - start)
+        self.export_success()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+
+Layout of an HDF5 archive holding many measurements:
+
+    /                       attributes "format" and "version"
+    /index                  table with one row per measurement, see INDEX_FIELDS
+    /measurements/<id>      group of one measurement, <id> is its "measurement id long"
+        values/<name>       one chunked and compressed dataset per values vector
+        attributes          the scalar metadata, e.g. "measurement name", as typed attributes
+        <key>/              a sub-group with typed attributes for every nested dictionary, e.g. "device"
+"""
+
+import json
+import logging
+import time
+from collections.abc import Mapping
+from typing import Iterable, List
+
+import h5py
+import numpy as np
+import pandas as pd
+
+ARCHIVE_FORMAT = "LabExT HDF5 archive"
+ARCHIVE_VERSION = 1
+
+# compressions of the values datasets
+ARCHIVE_COMPRESSIONS = ("gzip", "lzf", "none")
+
+# number of values stored in one chunk of a values dataset at most
+VALUES_CHUNK_SIZE = 16384
+
+# columns of the index table
+INDEX_FIELDS = ("group", "measurement_name", "chip", "device_id", "device_type", "timestamp", "finished", "error",
+                "parameters")
+
+_STRING = h5py.string_dtype()
+_INDEX_DTYPE = np.dtype([(name, np.bool_ if name == "finished" else _STRING) for name in INDEX_FIELDS])
+
+
+def _attribute_value(value):
+    """Converts a metadata value to a type HDF5 can store natively, or to JSON."""
+    if value is None:
+        return h5py.Empty("f")
+    if isinstance(value, (bool, int, float, str, np.generic)):
+        return value
+    if isinstance(value, (list, tuple, np.ndarray)):
+        array = np.asarray(value)
+        if array.dtype.kind in "biuf" and array.ndim == 1:
+            return array
+    return json.dumps(value, default=str)
+
+
+def write_metadata(group: h5py.Group, metadata: Mapping) -> None:
+    """Stores the entries of a dictionary as typed attributes of a group and nested dictionaries as sub-groups."""
+    for key, value in metadata.items():
+        key = str(key).replace("/", "|")
+        if isinstance(value, Mapping):
+            write_metadata(group.require_group(key), value)
+        else:
+            group.attrs[key] = _attribute_value(value)
+
+
+def write_values(group: h5py.Group, values: Mapping, compression: str = "gzip", level: int = 4) -> None:
+    """Stores every values vector as a dataset, numbers as chunked and compressed float64, anything else as text."""
+    options = {}
+    if compression == "gzip":
+        options = dict(compression="gzip", compression_opts=level, shuffle=True)
+    elif compression == "lzf":
+        options = dict(compression="lzf", shuffle=True)
+
+    for name, vector in values.items():
+        name = str(name).replace("/", "|")
+        array = np.asarray(vector)
+        if array.dtype.kind not in "biuf":
+            group.create_dataset(name, data=array.astype(str).astype(object), dtype=_STRING)
+        elif array.ndim == 0 or array.size == 0:
+            group.create_dataset(name, data=array, dtype=np.float64)
+        else:
+            chunks = (min(array.shape[0], VALUES_CHUNK_SIZE),) + array.shape[1:]
+            group.create_dataset(name, data=array, dtype=np.float64, chunks=chunks, **options)
+
+
+def _index_row(group_name: str, measurement: Mapping) -> tuple:
+    device = measurement.get("device") or {}
+    error = measurement.get("error") or {}
+    settings = measurement.get("measurement settings") or {}
+    parameters = {k: v.get("value") if isinstance(v, Mapping) else v for k, v in settings.items()}
+    return (
+        group_name,
+        str(measurement.get("measurement name", measurement.get("name", ""))),
+        str((measurement.get("chip") or {}).get("name", "")),
+        str(device.get("id", "")),
+        str(device.get("type", "")),
+        str(measurement.get("timestamp iso start", measurement.get("timestamp", ""))),
+        bool(measurement.get("finished", not error)),
+        str(error.get("desc") or error.get("type") or "") if error else "",
+        json.dumps(parameters, default=str),
+    )
+
+
+def _group_name(measurement: Mapping) -> str:
+    name = measurement.get("measurement id long") or measurement.get("measurement name and id") or \
+        measurement.get("timestamp") or "measurement"
+    return str(name).replace("/", "|")
+
+
+def append_measurements(file_path: str,
+                        measurements: Iterable[Mapping],
+                        compression: str = "gzip",
+                        level: int = 4) -> List[str]:
+    """Appends measurements to an archive, which is created if it does not exist.
+
+    Measurements which are already in the index of the archive, according to their "measurement id long", are skipped.
+    Only the new groups and rows are written, the existing content is not rewritten. Each group is written together
+    with its index row: if writing a measurement fails, its group and row are removed again and the error is raised,
+    the measurements appended before it stay in the archive. A group without index row, e.g. left behind by a crash,
+    is replaced.
+
+    Args:
+        file_path: path of the archive
+        measurements: the measurement dictionaries
+        compression: compression of the values datasets, one of ARCHIVE_COMPRESSIONS
+        level: the gzip compression level, 0 to 9
+    Returns:
+        the names of the groups added to /measurements
+    """
+    if compression not in ARCHIVE_COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r}, use one of {', '.join(ARCHIVE_COMPRESSIONS)}.")
+
+    start = time.perf_counter()
+    added = []
+    with h5py.File(file_path, "a") as archive:
+        if "index" not in archive:
+            archive.attrs["format"] = ARCHIVE_FORMAT
+            archive.attrs["version"] = ARCHIVE_VERSION
+            archive.create_dataset("index", shape=(0,), maxshape=(None,), dtype=_INDEX_DTYPE, chunks=(256,))
+        elif archive.attrs.get("format") != ARCHIVE_FORMAT:
+            raise ValueError(f"{file_path} is not a LabExT HDF5 archive.")
+        groups = archive.require_group("measurements")
+        index = archive["index"]
+        indexed = {name.decode("utf-8") if isinstance(name, bytes) else name for name in index["group"]} \
+            if index.shape[0] else set()
+
+        for measurement in measurements:
+            group_name = _group_name(measurement)
+            if group_name in indexed:
+                continue
+            if group_name in groups:
+                del groups[group_name]
+
+            n_rows = index.shape[0]
+            try:
+                group = groups.create_group(group_name)
+                write_values(group.create_group("values"), measurement["values"], compression=compression, level=level)
+                write_metadata(group, {k: v for k, v in measurement.items() if k != "values"})
+                index.resize((n_rows + 1,))
+                index[n_rows] = np.array(_index_row(group_name, measurement), dtype=_INDEX_DTYPE)
+            except BaseException:
+                # do not leave a half-written measurement behind
+                if group_name in groups:
+                    del groups[group_name]
+                index.resize((n_rows,))
+                raise
+            indexed.add(group_name)
+            added.append(group_name)
+
+    logging.getLogger().info("Appended %d measurements to %s in %.1f s.", len(added), file_path,
+                             time.perf_counter() - start)
+    return added
+
+
+def read_index(file_path: str) -> pd.DataFrame:
+    """Returns the index table of an archive, to select measurements without opening their groups."""
+    with h5py.File(file_path, "r") as archive:
+        table = archive["index"][()]
+    index = pd.DataFrame({name: table[name] for name in INDEX_FIELDS})
+    for name in INDEX_FIELDS:
+        if name != "finished":
+            index[name] = index[name].str.decode("utf-8")
+    index["parameters"] = index["parameters"].map(json.loads)
+    return index
+
+
+def read_values(file_path: str, group_name: str) -> dict:
+    """Returns the values vectors of one measurement in an archive."""
+    with h5py.File(file_path, "r") as archive:
+        values = archive["measurements"][group_name]["values"]
+        return {name: values[name].asstr()[()] if h5py.check_string_dtype(values[name].dtype) else values[name][()]
+                for name in values}
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import importlib.util
+import logging
+import os
+import queue
+import threading
+import time
+from collections.abc import Mapping
+from os.path import exists, join
+from pathlib import Path
+from typing import Dict, List
+
+from LabExT.Experiments.ResultCompression import strip_compression_ending
+from LabExT.Exporter.ExportRunner import export_payload
+from LabExT.Exporter.HDF5Archive import append_measurements
+
+LIVE_EXPORT_HDF5 = "hdf5"
+LIVE_EXPORT_PARQUET = "parquet"
+LIVE_EXPORT_CSV = "csv"
+
+# name of the HDF5 archive written to the live export directory
+LIVE_ARCHIVE_NAME = "live_export.h5"
+
+# name of the Parquet dataset written to the live export directory
+LIVE_DATASET_NAME = "measurements.parquet"
+
+# number of measurements waiting to be exported at most, further measurements block until there is space
+LIVE_EXPORT_QUEUE_SIZE = 16
+
+
+def available_live_export_formats() -> list:
+    """Returns the formats measurements can be exported to while the queue is running."""
+    formats = [LIVE_EXPORT_HDF5, LIVE_EXPORT_CSV]
+    # checked without importing pyarrow, which is only imported once a measurement is exported
+    if importlib.util.find_spec("pyarrow") is not None:
+        formats.append(LIVE_EXPORT_PARQUET)
+    return formats
+
+
+class LiveExportSink:
+    """
+    Exports every finished measurement while the ToDo queue is running, such that analysis can start before it ends.
+
+    `submit` copies the measurement and puts it into a bounded queue. A background thread appends the waiting
+    measurements one by one to the HDF5 archive `live_export.h5`, the Parquet dataset `measurements.parquet` or one
+    CSV file per measurement in the export directory. The archive and the dataset are closed after every measurement,
+    so they can be read while the export runs. If the export falls behind, `submit` blocks until there is space in the
+    queue, which bounds the memory used. The time spent waiting is recorded in `blocked_time`.
+
+    A measurement which cannot be exported is logged and recorded in `failed`, it never stops the export of the other
+    measurements or the queue.
+
+    The CSV and Parquet writers are imported by the background thread, such that importing this module neither
+    imports the export wizard's GUI nor pyarrow.
+    """
+
+    def __init__(self,
+                 target_format: str,
+                 directory: str,
+                 max_queue: int = LIVE_EXPORT_QUEUE_SIZE,
+                 compression: str = "gzip",
+                 measurement_classes: Mapping[str, type] = None):
+        """
+        Args:
+            target_format: one of LIVE_EXPORT_HDF5, LIVE_EXPORT_PARQUET and LIVE_EXPORT_CSV
+            directory: the directory the export is written to, created if it does not exist
+            max_queue: number of measurements waiting to be exported at most
+            compression: compression of the values in the HDF5 archive, see HDF5Archive.ARCHIVE_COMPRESSIONS
+            measurement_classes: the measurement classes by name, their parameters give the column types of the
+                settings in the Parquet dataset
+        """
+        if target_format not in (LIVE_EXPORT_HDF5, LIVE_EXPORT_PARQUET, LIVE_EXPORT_CSV):
+            raise ValueError(f"Unknown live export format {target_format!r}.")
+        if target_format not in available_live_export_formats():
+            raise RuntimeError(f"Cannot export to {target_format}, the pyarrow package is not installed.")
+
+        self.target_format = target_format
+        self.directory = directory
+        self.compression = compression
+        self.measurement_classes = measurement_classes or {}
+        self.logger = logging.getLogger()
+
+        self.n_submitted = 0
+        self.written: List[str] = []
+        # error message by data file path of the measurements which could not be exported
+        self.failed: Dict[str, str] = {}
+        # time in seconds submit waited for space in the queue
+        self.blocked_time = 0.0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(max_queue, 1))
+        self._thread = None
+        self._parameter_definitions = None
+
+    @property
+    def target_path(self) -> str:
+        """The archive, dataset or directory the measurements are written to."""
+        if self.target_format == LIVE_EXPORT_HDF5:
+            return join(self.directory, LIVE_ARCHIVE_NAME)
+        if self.target_format == LIVE_EXPORT_PARQUET:
+            return join(self.directory, LIVE_DATASET_NAME)
+        return self.directory
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def n_pending(self) -> int:
+        """Number of submitted measurements which are not yet written."""
+        return self.n_submitted - len(self.written) - len(self.failed)
+
+    def start(self) -> None:
+        """Starts the background thread writing the export."""
+        if self.running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="Live Export", daemon=True)
+        self._thread.start()
+        self.logger.info("Exporting finished measurements live to %s.", self.target_path)
+
+    def submit(self, measurement: Mapping, file_path: str) -> None:
+        """Queues a finished measurement for export, blocks while the queue is full.
+
+        Args:
+            measurement: the measurement dictionary, it is copied before this call returns
+            file_path: the path of the measurement's data file, names the exported CSV file
+        """
+        if not self.running:
+            raise RuntimeError("The live export is not running.")
+        payload = export_payload(measurement)
+        payload.setdefault("file_path_known", file_path)
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            start = time.perf_counter()
+            self._queue.put(payload)
+            self.blocked_time += time.perf_counter() - start
+        self.n_submitted += 1
+
+    def close(self) -> None:
+        """Writes all waiting measurements and stops the background thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self.logger.info("Live export wrote %d of %d measurements to %s, the measurements waited %.1f s for the "
+                         "export.", len(self.written), self.n_submitted, self.target_path, self.blocked_time)
+
+    def _run(self) -> None:
+        while True:
+            measurement = self._queue.get()
+            if measurement is None:
+                return
+            self._write(measurement)
+
+    def _write(self, measurement: dict) -> None:
+        file_path = measurement["file_path_known"]
+        if self.target_format == LIVE_EXPORT_CSV:
+            self._write_csv(measurement)
+            return
+        try:
+            if self.target_format == LIVE_EXPORT_HDF5:
+                append_measurements(self.target_path, [measurement], compression=self.compression)
+            else:
+                from LabExT.Exporter.Formats.ExportParquet import parameter_definitions, write_parquet_dataset
+                if self._parameter_definitions is None:
+                    self._parameter_definitions = parameter_definitions(self.measurement_classes)
+                write_parquet_dataset([measurement], self.target_path, self._parameter_definitions)
+        except Exception as exc:
+            self._add_failed(file_path, exc)
+        else:
+            self.written.append(file_path)
+
+    def _write_csv(self, measurement: dict) -> None:
+        from LabExT.Exporter.Formats.ExportCSV import write_csv
+
+        file_path = measurement["file_path_known"]
+        csv_path = join(self.directory, Path(strip_compression_ending(file_path)).stem + ".csv")
+        if exists(csv_path):
+            self._add_failed(file_path, FileExistsError(f"{csv_path} exists already."))
+            return
+        try:
+            write_csv(measurement, csv_path)
+        except Exception as exc:
+            if exists(csv_path):
+                os.remove(csv_path)
+            self._add_failed(file_path, exc)
+        else:
+            self.written.append(file_path)
+
+    def _add_failed(self, file_path: str, exc: Exception) -> None:
+        self.logger.error(f"Could not export {file_path} live: {exc!r}")
+        self.failed[file_path] = repr(exc)
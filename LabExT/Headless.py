@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+
+Headless execution of a ToDo queue, started with `python -m LabExT run`.
+"""
+
+import logging
+import sys
+from argparse import ArgumentParser
+from os.path import abspath, dirname, join
+from typing import List
+
+from LabExT.Experiments.HeadlessExperiment import HeadlessExperimentManager, QueueDescriptionError, \
+    create_dummy_stage_mover, create_todos, load_chip_file, load_instruments_config, load_queue_file
+from LabExT.Logs.CustomLogFormatter import CustomLogFormatter
+
+# exit codes
+EXIT_SUCCESS = 0
+EXIT_MEASUREMENT_ERROR = 1
+EXIT_CONFIGURATION_ERROR = 2
+EXIT_INTERRUPTED = 130
+
+
+def create_argument_parser() -> ArgumentParser:
+    argparser = ArgumentParser(
+        prog="python -m LabExT run",
+        description="""Executes a queue of measurements without GUI. The measurement files are written in the same
+                       format as by the LabExT GUI, the progress is printed to stdout."""
+    )
+    argparser.add_argument("queue",
+                           help="JSON or YAML file describing the ToDos to execute.")
+    argparser.add_argument("-c", "--chip", required=True,
+                           help="Chip file: a chip file written by LabExT, an IBM mask description (json) or a "
+                                "PhoeniX mask description (csv).")
+    argparser.add_argument("-i", "--instruments", default=None,
+                           help="instruments.config to select the instruments from. By default the instruments.config "
+                                "of the LabExT settings directory is used or, if not present, the default "
+                                "configuration with simulated instruments.")
+    argparser.add_argument("-o", "--output", default=None,
+                           help='Directory for the measurement files. Overrides "output" of the queue file.')
+    argparser.add_argument("--dummy-stages", action="store_true", default=False,
+                           help="Moves two simulated stages (DummyStage) to each device before measuring it.")
+    argparser.add_argument("-k", "--keep-going", action="store_true", default=False,
+                           help="Continues with the next ToDo if a measurement fails, instead of stopping.")
+    argparser.add_argument("--timing", default=None,
+                           help="Writes the time spent in each phase of every ToDo to this file, as CSV or, if the "
+                                "file name ends with .json, as JSON together with the throughput summary.")
+    argparser.add_argument("-v", "--verbose", action="store_true", default=False,
+                           help="Prints info log messages to stderr.")
+    argparser.add_argument("-V", "--Verbose", action="store_true", default=False, dest="Verbose",
+                           help="Prints all log messages, including SCPI communication, to stderr.")
+    return argparser
+
+
+def run_queue(
+    queue_path: str,
+    chip_path: str,
+    instruments_path: str = None,
+    output_path: str = None,
+    dummy_stages: bool = False,
+    keep_going: bool = False,
+    timing_path: str = None,
+    stream=None,
+) -> int:
+    """
+    Loads chip, instruments config and queue description and executes all ToDos of the queue.
+
+    Returns:
+        the exit code: 0 if all ToDos were executed successfully, 1 if a measurement failed, 2 if any of the given
+        files is invalid
+    """
+    logger = logging.getLogger()
+    try:
+        queue = load_queue_file(queue_path)
+        chip = load_chip_file(chip_path, chip_name=queue.get("chip name"))
+        instruments_config = load_instruments_config(instruments_path)
+
+        if output_path is None and queue.get("output") is not None:
+            # relative output paths in the queue file are relative to the queue file
+            output_path = join(dirname(abspath(queue_path)), queue["output"])
+
+        mover = create_dummy_stage_mover(chip) if dummy_stages else None
+
+        experiment_manager = HeadlessExperimentManager(
+            chip,
+            instruments_config,
+            mover=mover,
+            output_path=output_path,
+            settings=queue.get("settings"),
+            keep_going=keep_going,
+            stream=stream,
+        )
+        experiment = experiment_manager.exp
+        experiment.exctrl_inter_measurement_wait_time = float(queue.get("inter_measurement_wait_time", 0.0))
+        create_todos(experiment, queue, instruments_config)
+    except (QueueDescriptionError, OSError) as e:
+        logger.error("Invalid headless run configuration: %s", e)
+        return EXIT_CONFIGURATION_ERROR
+
+    try:
+        experiment.run()
+    finally:
+        experiment.close_values_store()
+
+    if timing_path is not None:
+        if timing_path.lower().endswith(".json"):
+            experiment.throughput_statistics.export_json(timing_path)
+        else:
+            experiment.throughput_statistics.export_csv(timing_path)
+
+    if experiment.failed_todos or experiment.to_do_list:
+        return EXIT_MEASUREMENT_ERROR
+    return EXIT_SUCCESS
+
+
+def main(argv: List[str] = None) -> int:
+    """Entry point of `python -m LabExT run`, returns the exit code."""
+    args = create_argument_parser().parse_args(argv)
+
+    logger = logging.getLogger()
+    logger.setLevel("DEBUG")
+
+    # progress is reported on stdout, all logging goes to stderr
+    sh = logging.StreamHandler(sys.stderr)
+    sh.setLevel(logging.DEBUG if args.Verbose else logging.INFO if args.verbose else logging.WARNING)
+    sh.setFormatter(CustomLogFormatter())
+    logger.addHandler(sh)
+
+    logger.info("LabExT headless run started with arguments " + str(argv))
+
+    try:
+        return run_queue(
+            args.queue,
+            args.chip,
+            instruments_path=args.instruments,
+            output_path=args.output,
+            dummy_stages=args.dummy_stages,
+            keep_going=args.keep_going,
+            timing_path=args.timing,
+        )
+    except KeyboardInterrupt:
+        logger.error("Headless run interrupted.")
+        return EXIT_INTERRUPTED
+    finally:
+        logger.removeHandler(sh)
@@ -6,6 +6,7 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 import threading
+from contextlib import contextmanager
 
 from LabExT.Instruments.InstrumentAPI import Instrument
 
@@ -62,7 +63,7 @@ class DummyInstrument(Instrument):
         """
         self.logger.debug("DummyInstrument exiting context.")
 
-    def get_instrument_parameter(self):
+    def get_instrument_parameter(self, refresh=True):
         return {'idn': self.idn()}
 
     @Instrument._open.getter  # weird way to override the parent's class property getter
@@ -102,6 +103,10 @@ class DummyInstrument(Instrument):
     def check_instrument_errors(self):
         return None
 
+    @contextmanager
+    def batch(self):
+        yield self
+
     def command(self, *args, **kwargs):
         return None
 
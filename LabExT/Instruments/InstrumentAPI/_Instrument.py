@@ -6,6 +6,8 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 import logging
+import threading
+from contextlib import contextmanager
 from functools import wraps
 
 import pyvisa
@@ -33,6 +35,8 @@ def assert_instrument_connected(func):
     @wraps(func)
     def wrapper(instr, *args, **kwargs):
         if instr._open:
+            # commands queued in a batch of this thread are sent before any other I/O
+            instr._flush_batch()
             try:
                 return func(instr, *args, **kwargs)
             except Exception as exc:
@@ -52,6 +56,84 @@ def assert_instrument_connected(func):
     return wrapper
 
 
+#
+# Decorator for setters of networked instrument properties.
+#
+
+def parameter_setter(func):
+    """
+    Use this decorator on the setters of properties listed in `networked_instrument_properties`. The set value is
+    written through to the parameter cache, and the commands sent by the setter do not invalidate the cache.
+
+    Decorate the function before turning it into a setter, i.e. put `@parameter_setter` below `@<name>.setter`.
+    """
+
+    @wraps(func)
+    def wrapper(instr, value):
+        # store the value before calling the setter, such that the setter can invalidate it again
+        instr._parameter_cache.set(func.__name__, value)
+        state = instr._parameter_setter_state
+        state.depth = getattr(state, 'depth', 0) + 1
+        try:
+            return func(instr, value)
+        except BaseException:
+            # we do not know the state of the instrument anymore
+            instr._parameter_cache.invalidate()
+            raise
+        finally:
+            state.depth -= 1
+
+    return wrapper
+
+
+class _ParameterCache:
+    """Values of the networked instrument properties and of the IDN string of one instrument.
+
+    Shared by all driver instances of the instrument. Every change increments the generation, values read from the
+    instrument are only stored if the generation did not change while they were read. All methods are thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._generation = 0
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._values
+
+    def get(self, name, default=None):
+        with self._lock:
+            return self._values.get(name, default)
+
+    def snapshot(self):
+        """Returns a copy of the cached values and the current generation."""
+        with self._lock:
+            return dict(self._values), self._generation
+
+    def store(self, values, generation):
+        """Stores values read from the instrument, unless the cache changed since `snapshot()` returned generation."""
+        with self._lock:
+            if generation == self._generation:
+                self._values.update(values)
+
+    def set(self, name, value):
+        """Stores a value given to a setter."""
+        with self._lock:
+            self._values[name] = value
+            self._generation += 1
+
+    def invalidate(self, names=()):
+        """Removes the given values, or all values if none are given."""
+        with self._lock:
+            if names:
+                for name in names:
+                    self._values.pop(name, None)
+            else:
+                self._values.clear()
+            self._generation += 1
+
+
 #
 # Exception used in case instruments report errors.
 #
@@ -61,6 +143,22 @@ class InstrumentException(Exception):
     pass
 
 
+class InstrumentBatchException(InstrumentException):
+    """ Exception thrown when Instrument signals an error at the end of a `batch`, or in a `batch` whose block raised
+    an InstrumentException, e.g. a failed request.
+
+    Attributes:
+        commands (list of str): all commands and requests sent in the batch
+        suspects (list of str): the commands most likely causing the errors. These are the commands whose header is
+            named in the error message, or the only command of the batch. Empty if the errors cannot be assigned.
+    """
+
+    def __init__(self, msg, commands, suspects):
+        super().__init__(msg)
+        self.commands = commands
+        self.suspects = suspects
+
+
 #
 # Instrument Superclass
 #
@@ -88,6 +186,13 @@ class Instrument(object):
             the driver. Set during driver initialization in InstrumentAPI.
         networked_instrument_properties (list): Add to this list all object properties which should get freshly fetched
             and added to self.instrument_parameters on each get_instrument_parameter() call.
+
+    The values of the networked instrument properties are kept in a cache, which is shared by all driver instances of
+    the same instrument (driver class, VISA address and channel). `get_instrument_parameter(refresh=False)` takes the
+    values from the cache instead of reading them from the instrument. Every write to the instrument empties the cache,
+    except for the writes of setters decorated with `parameter_setter`, which store the set value in the cache instead.
+    If the getter of such a property does not return what was given to its setter, call `invalidate_parameter_cache()`
+    in the setter.
     """
 
     # error numbers to ignore for this instrument when
@@ -95,6 +200,15 @@ class Instrument(object):
     error_query_string = 'SYST:ERR?'
     ignored_SCPI_error_numbers = [0]
 
+    # maximum length of a message of commands concatenated in a batch, keep it below the instrument's input buffer size
+    batch_max_message_length = 512
+    # set to False if the instrument cannot parse several commands separated by ';' in one message
+    batch_supported = True
+
+    # caches of the networked instrument properties by (driver class, VISA address, channel)
+    _parameter_caches = {}
+    _parameter_caches_lock = threading.Lock()
+
     def __init__(self,
                  visa_address,
                  channel=None,
@@ -116,6 +230,21 @@ class Instrument(object):
         #: int: channel number for multi-channel instruments (e.g. laser mainframe, most DSOs, etc.) otherwise None
         self.channel = channel
 
+        # cached values of the networked instrument properties and of the IDN string, see get_instrument_parameter()
+        with Instrument._parameter_caches_lock:
+            self._parameter_cache = Instrument._parameter_caches.setdefault(
+                (self.__class__.__name__, str(visa_address), str(channel)), _ParameterCache())
+        # nesting depth of the parameter setters running in each thread, see parameter_setter()
+        self._parameter_setter_state = threading.local()
+
+        # state of the current batch, see batch(): nesting depth, owning thread, queued and already sent commands
+        self._batch_depth = 0
+        self._batch_owner = None
+        self._batch_pending = []
+        self._batch_sent = []
+        # True if a command queued in the batch was not sent by a parameter setter
+        self._batch_invalidates_cache = False
+
         #: dict: set during driver initialization, verbatim copy of the instruments.config entry used for this instance
         self.instrument_config_descriptor = None
 
@@ -141,16 +270,31 @@ class Instrument(object):
 
         self.logger.debug('Instrument class initialised with visa_address: %s', visa_address)
 
-    def get_instrument_parameter(self):
+    def get_instrument_parameter(self, refresh=True):
         """Return the currently set instrument parameters.
 
         Reads all properties directly from instrument if connection to instrument can be opened. This method is called
         before and after a measurement execution in LabExT to save the instrument state as meta data.
 
         Include all property names you want to read in the `self.networked_instrument_properties` list.
+
+        Arguments:
+            refresh (bool): if False, the values of the parameter cache are returned and only the properties missing in
+                the cache are read from the instrument. If True (default), all properties are read from the instrument.
         """
         ret_dict = self.instrument_parameters.copy()
 
+        if refresh:
+            self.invalidate_parameter_cache()
+        cache, generation = self._parameter_cache.snapshot()
+        missing = [prop for prop in self.networked_instrument_properties if prop not in cache]
+        if not missing and 'idn' in cache:
+            # everything is cached, no need to talk to the instrument at all
+            ret_dict['idn'] = cache['idn']
+            for prop in self.networked_instrument_properties:
+                ret_dict[prop] = cache[prop]
+            return ret_dict
+
         need_closing = False
         if not self._open:
             try:
@@ -164,10 +308,17 @@ class Instrument(object):
                 self.logger.warning(msg)
 
         if self._open:  # skip getting properties if instrument was not successfully opened above
-            ret_dict['idn'] = self.idn()
+            read_values = {}
+            if 'idn' not in cache:
+                read_values['idn'] = self.idn()
+            ret_dict['idn'] = cache.get('idn', read_values.get('idn'))
             for prop in self.networked_instrument_properties:
+                if prop in cache:
+                    ret_dict[prop] = cache[prop]
+                    continue
                 try:
                     val = getattr(self, prop)  # network access here
+                    read_values[prop] = val
                 except AttributeError as e:
                     val = "Attribute not found! class: " + str(self.__class__) + " " + str(e)
                     self.logger.error(val)
@@ -175,12 +326,26 @@ class Instrument(object):
                     val = "ERROR getting up-to-date parameter " + prop + ": " + repr(e)
                     self.logger.warning(val)
                 ret_dict[prop] = val
+            # values set or invalidated meanwhile are not overwritten
+            self._parameter_cache.store(read_values, generation)
 
         if need_closing:
             self.close()
 
         return ret_dict
 
+    def invalidate_parameter_cache(self, *prop_names):
+        """Removes the given networked properties from the parameter cache, or all cached values if none are given.
+
+        The removed properties are read from the instrument on the next call to `get_instrument_parameter()`.
+        """
+        self._parameter_cache.invalidate(prop_names)
+
+    @property
+    def _in_parameter_setter(self):
+        """ True if the calling thread runs a setter decorated with parameter_setter. """
+        return getattr(self._parameter_setter_state, 'depth', 0) > 0
+
     #
     # connection status functions
     #
@@ -262,6 +427,7 @@ class Instrument(object):
         """Reset the laboratory instrument.
         """
         self._inst.write('*RST')
+        self.invalidate_parameter_cache()
 
     @assert_instrument_connected
     def ready_check_sync(self):
@@ -305,6 +471,156 @@ class Instrument(object):
         else:
             return False
 
+    #
+    # batched commands
+    #
+
+    @property
+    def _batching(self):
+        """ True if the calling thread is inside a batch of this instrument. """
+        return self._batch_depth > 0 and self._batch_owner == threading.get_ident()
+
+    @contextmanager
+    def batch(self):
+        """Context manager sending the commands within in as few messages as possible.
+
+        Inside the `with instr.batch():` block, `command()` (and hence `command_channel()` and all property setters
+        using them) only queues the command. The queued commands are concatenated with ';' into messages of at most
+        `batch_max_message_length` characters and sent, followed by a single `*OPC?`, before any query and when the
+        block is left. The error queue is read once at the end of the block, instead of after every command and
+        request. Errors are assigned to the commands named in the error messages where possible and raised as
+        `InstrumentBatchException`.
+
+        Batches can be nested, the outermost one sends the commands. Commands of other threads are not batched. If
+        the block raises an exception, the queued commands are discarded and the error queue is read. If the block
+        raised an InstrumentException and the error queue reports errors, an InstrumentBatchException with both
+        messages is raised instead.
+
+        Set `batch_supported` to False for instruments which cannot parse several commands in one message, the
+        commands are then sent one by one as usual.
+        """
+        if not self.batch_supported or (self._batch_depth > 0 and not self._batching):
+            yield self
+            return
+        if self._batch_depth > 0:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+            return
+        if not self._open:
+            raise RuntimeError("Instrument connection is not open. Cannot do any I/O with instrument.")
+
+        self._batch_depth = 1
+        self._batch_owner = threading.get_ident()
+        try:
+            yield self
+            self._flush_batch()
+        except BaseException as exc:
+            batch_exc = self._abort_batch(exc)
+            if batch_exc is None:
+                raise
+            raise batch_exc from exc
+        finally:
+            commands = self._batch_sent
+            self._batch_depth = 0
+            self._batch_owner = None
+            self._batch_pending = []
+            self._batch_sent = []
+            self._batch_invalidates_cache = False
+
+        if commands:
+            try:
+                self.check_instrument_errors()
+            except InstrumentException as exc:
+                # the setters might have cached values the instrument did not accept
+                self.invalidate_parameter_cache()
+                raise self._batch_exception(exc, commands) from exc
+
+    def _join_batch_commands(self, commands):
+        """Concatenates commands to messages not longer than batch_max_message_length, leaving space for *OPC?.
+
+        Every command but the first one of a message starts with ':', such that the instrument parses it from the root
+        of the command tree and not relative to the previous command. Common commands (e.g. '*CLS') stay as they are.
+        """
+        max_length = self.batch_max_message_length - len(';*OPC?')
+        messages = []
+        message = ''
+        for command in commands:
+            command = command.strip()
+            if not message:
+                message = command
+                continue
+            joined = message + ';' + (command if command.startswith((':', '*')) else ':' + command)
+            if len(joined) > max_length:
+                messages.append(message)
+                message = command
+            else:
+                message = joined
+        if message:
+            messages.append(message)
+        return messages
+
+    def _flush_batch(self):
+        """Sends the commands queued in the batch of the calling thread.
+
+        Waits until the instrument executed them.
+        """
+        if not self._batch_pending or not self._batching:
+            return
+        messages = self._join_batch_commands(self._batch_pending)
+        self._batch_sent.extend(self._batch_pending)
+        self._batch_pending = []
+        if self._batch_invalidates_cache:
+            self._batch_invalidates_cache = False
+            self.invalidate_parameter_cache()
+        for message in messages[:-1]:
+            self._inst.write(message)
+        self._inst.query(messages[-1] + ';*OPC?')
+
+    def _abort_batch(self, exc):
+        """Discards the queued commands of a failed batch and empties the error queue.
+
+        Arguments:
+            exc (BaseException): the exception raised in the block of the batch
+
+        Returns:
+            The InstrumentBatchException to raise instead of `exc` if `exc` is an InstrumentException and the error
+            queue reports errors, its message contains both. None otherwise, the errors are then only logged.
+        """
+        if self._batch_pending:
+            self.logger.warning("Discarding %d batched commands to %s: %s", len(self._batch_pending), self._address,
+                                self._batch_pending)
+            self._batch_pending = []
+        self.invalidate_parameter_cache()
+        if not self._batch_sent:
+            return None
+        try:
+            self.check_instrument_errors()
+        except InstrumentException as error_exc:
+            if isinstance(exc, InstrumentException):
+                return self._batch_exception(InstrumentException(f"{exc} {error_exc}"), self._batch_sent)
+            self.logger.warning("Error after the batched commands %s to %s: %r", self._batch_sent, self._address,
+                                error_exc)
+        except Exception as error_exc:
+            self.logger.warning("Could not read the error queue of %s after the batched commands %s: %r",
+                                self._address, self._batch_sent, error_exc)
+        return None
+
+    @staticmethod
+    def _batch_exception(exc, commands):
+        """Assigns the errors reported after a batch to the commands whose header is named in the error message."""
+        error_text = str(exc).lower()
+        suspects = [c for c in commands if c.strip().split(None, 1)[0].lstrip(':').lower() in error_text]
+        if not suspects and len(commands) == 1:
+            suspects = list(commands)
+        if suspects:
+            msg = f"{exc} Caused by the batched command(s) {suspects}."
+        else:
+            msg = f"{exc} Reported after the batched commands {commands}."
+        return InstrumentBatchException(msg, commands, suspects)
+
     @assert_instrument_connected
     def check_instrument_errors(self):
         """Checks the internal error queue of the instrument.
@@ -343,6 +659,12 @@ class Instrument(object):
         Arguments:
             command_str (str): the command string to send to the instrument.
         """
+        if self._batching:
+            # sent with the other commands of the batch, see batch()
+            self._batch_pending.append(command_str)
+            self._batch_invalidates_cache |= not self._in_parameter_setter
+            return
+
         self.write(command_str)  # send the command
         self.ready_check_sync()  # wait until instrument signalled completion
 
@@ -376,7 +698,11 @@ class Instrument(object):
             str: the answer from the instrument
         """
         ans = self.query(request_str)
-        self.check_instrument_errors()
+        if self._batching:
+            # the error queue is read once at the end of the batch
+            self._batch_sent.append(request_str)
+        else:
+            self.check_instrument_errors()
         return ans
 
     def request_channel(self, subsystem_str, request_str):
@@ -440,6 +766,9 @@ class Instrument(object):
         Arguments:
              write_str (str): string to be written
         """
+        if not self._in_parameter_setter:
+            # the command might change any parameter
+            self.invalidate_parameter_cache()
         self._inst.write(write_str)
 
     def write_channel(self, subsystem_str, write_str):
@@ -503,3 +832,26 @@ class Instrument(object):
                                              converter=converter,
                                              separator=separator,
                                              container=container)
+
+    @assert_instrument_connected
+    def query_binary_values(self, query_str, datatype='f', is_big_endian=False, container=list):
+        """Send a query to the instrument and read the answer as binary block into a Python container type.
+
+        Send the query_str to the instrument and read an IEEE 488.2 definite length block (e.g. '#41024<data>') from
+        the answer. Large data sets are transferred several times faster this way than as ASCII text and need no
+        parsing.
+        This is essentially a wrapper for [self._inst.query_binary_values(query_str)](https://pyvisa.readthedocs.io/en/latest/api/resources.html#pyvisa.resources.MessageBasedResource.query_binary_values)
+
+        Arguments:
+            query_str (str): the string to query the instrument with
+            datatype (str): struct format of a single value, e.g. "f" (float32, default) or "d" (float64)
+            is_big_endian (bool): byte order of the values, see the instrument's manual. Default is little endian.
+            container (type): container type to use for the output data, e.g. list or np.array
+
+        Returns:
+            container: The container with the values
+        """
+        return self._inst.query_binary_values(query_str,
+                                              datatype=datatype,
+                                              is_big_endian=is_big_endian,
+                                              container=container)
@@ -1,2 +1,2 @@
-from ._Instrument import Instrument, InstrumentException
+from ._Instrument import Instrument, InstrumentBatchException, InstrumentException, parameter_setter
 from .InstrumentAPI import InstrumentAPI
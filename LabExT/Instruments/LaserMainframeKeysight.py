@@ -10,7 +10,7 @@ from math import ceil, floor, log10
 
 import numpy as np
 
-from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentException
+from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentException, parameter_setter
 
 
 class LaserMainframeKeysight(Instrument):
@@ -167,32 +167,36 @@ class LaserMainframeKeysight(Instrument):
         """
         self.send_hardware_trigger = send_hardware_trigger
 
-        self.command_channel("trig", ":inp sws")  # tell sweep to wait on software trigger
-        if send_hardware_trigger:
-            self.command("trig:conf loop")  # instruct mainframe to loop triggers internally to PMs
-            self.command_channel("trig", ":outp stf")  # give trigger on WL step finished
-        else:
-            self.command("trig:conf def")
-            self.command_channel("trig", ":outp dis")  # give trigger on WL step finished
-
-        # setup sweep commands
-        self.command_channel('sour', ':wav:swe:mode cont')
-        self.command_channel('sour', ':wav:swe:star ' + str(start_nm) + 'nm')
-        self.command_channel('sour', ':wav:swe:stop ' + str(stop_nm) + 'nm')
-        self.command_channel('sour', ':wav:swe:step ' + str(step_pm) + 'pm')
-        self.command_channel('sour', ':wav:swe:spe ' + str(sweep_speed_nm_per_s) + 'nm/s')
-        if send_hardware_trigger:
-            self.command_channel('sour', ':wav:swe:llog 1')
-        else:
-            self.command_channel('sour', ':wav:swe:llog 0')
-
-        # check if sweep parameters are consistent
-        r = self.request_channel('sour', ':wav:swe:chec?')
-        if r[0:4] != '0,OK':
-            raise InstrumentException('Sweep parameters incorrectly set! Error message: ' + str(r))
-
-        # check if chosen laser power can be hold over whole sweeping range
-        pmax_W = float(self.request_channel("sour", ":wav:swe:pmax? " + str(start_nm) + "nm," + str(stop_nm) + "nm"))
+        # 4 round trips instead of about 30: the setup commands in one message with a single *OPC?, the two sweep
+        # check queries below and one error check at the end of the batch
+        with self.batch():
+            self.command_channel("trig", ":inp sws")  # tell sweep to wait on software trigger
+            if send_hardware_trigger:
+                self.command("trig:conf loop")  # instruct mainframe to loop triggers internally to PMs
+                self.command_channel("trig", ":outp stf")  # give trigger on WL step finished
+            else:
+                self.command("trig:conf def")
+                self.command_channel("trig", ":outp dis")  # give trigger on WL step finished
+
+            # setup sweep commands
+            self.command_channel('sour', ':wav:swe:mode cont')
+            self.command_channel('sour', ':wav:swe:star ' + str(start_nm) + 'nm')
+            self.command_channel('sour', ':wav:swe:stop ' + str(stop_nm) + 'nm')
+            self.command_channel('sour', ':wav:swe:step ' + str(step_pm) + 'pm')
+            self.command_channel('sour', ':wav:swe:spe ' + str(sweep_speed_nm_per_s) + 'nm/s')
+            if send_hardware_trigger:
+                self.command_channel('sour', ':wav:swe:llog 1')
+            else:
+                self.command_channel('sour', ':wav:swe:llog 0')
+
+            # check if sweep parameters are consistent
+            r = self.request_channel('sour', ':wav:swe:chec?')
+            if r[0:4] != '0,OK':
+                raise InstrumentException('Sweep parameters incorrectly set! Error message: ' + str(r))
+
+            # check if chosen laser power can be hold over whole sweeping range
+            pmax_W = float(self.request_channel("sour",
+                                                ":wav:swe:pmax? " + str(start_nm) + "nm," + str(stop_nm) + "nm"))
         pmax_dBm = 10 * log10(pmax_W * 1.e3)
         if "dBm" in self.unit:
             instr_p_dBm = self.power
@@ -283,6 +287,7 @@ class LaserMainframeKeysight(Instrument):
         return float(self.request_channel('sour', ':wav?').strip()) * 1e9  # instr has units of [m]
 
     @wavelength.setter
+    @parameter_setter
     def wavelength(self, wavelength_nm):
         """
         Set the wavelength of the laser.
@@ -300,6 +305,7 @@ class LaserMainframeKeysight(Instrument):
         return float(self.request_channel('sour', ':pow?').strip())
 
     @power.setter
+    @parameter_setter
     def power(self, power_dBm):
         """
         Set the laser output power.
@@ -317,6 +323,7 @@ class LaserMainframeKeysight(Instrument):
         return ['dBm', 'Watt'][r]
 
     @unit.setter
+    @parameter_setter
     def unit(self, pu):
         """
         Set the physical unit of laser power. Choose between 'dBm' and 'Watt'
@@ -329,6 +336,8 @@ class LaserMainframeKeysight(Instrument):
             self.command_channel('SOUR', ':POW:UNIT 1')
         else:
             raise InstrumentException('Unknown unit: {}, use dBm or Watt')
+        # the set unit string is not normalized and the power is now read in the other unit
+        self.invalidate_parameter_cache('unit', 'power')
 
     @property
     def enable(self):
@@ -9,7 +9,7 @@ import time
 
 import numpy as np
 
-from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentException
+from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentException, parameter_setter
 
 
 class OpticalSpectrumAnalyzerAQ6370C(Instrument):
@@ -43,6 +43,12 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
     * **stop**: stops sweeping
     * **get_data**: downloads the wavelength and power data of the last measurement
 
+    #### Trace transfer
+
+    By default, `get_data` transfers the traces as binary REAL,64 blocks into numpy arrays, which is several times
+    faster than ASCII text for long traces. Set `"binary_transfer": false` in the instruments.config entry to transfer
+    them as text. With `"reconstruct_wavelengths": true`, the wavelength axis is not downloaded but computed from the
+    start and stop wavelength and the number of power samples.
     """
 
     ignored_SCPI_error_numbers = [0, 2]
@@ -57,6 +63,11 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
 
         self._net_timeout_ms = kwargs.get("net_timeout_ms", 30000)
 
+        # transfer the traces as binary REAL,64 blocks instead of ASCII text
+        self.binary_transfer = kwargs.get("binary_transfer", True)
+        # compute the wavelength axis from the start and stop wavelength instead of downloading it
+        self.reconstruct_wavelengths = kwargs.get("reconstruct_wavelengths", False)
+
         self.networked_instrument_properties.extend([
             'startwavelength',
             'stopwavelength',
@@ -138,6 +149,7 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
         return r
 
     @_active_trace.setter
+    @parameter_setter
     def _active_trace(self, act_trace):
         """
         Sets the active trace, displays it and enables recording to it.
@@ -157,24 +169,39 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
         # set active trace, must be last command given
         self.command(':TRAC:ACT ' + str(act_trace))
 
-    def get_data(self):
+    def get_data(self, wavelength_range=None):
         """
         Get the spectrum data of the measurement. Units depend on the setting on the instrument.
-        :return: 2D list with [X-axis Data, Y-Axis Data]
+        :param wavelength_range: (start, stop) wavelength of the active trace in nm, if known. The wavelength axis is
+            then computed with np.linspace over the power samples instead of being downloaded.
+        :return: 2D list with [X-axis Data, Y-Axis Data] as numpy arrays
         """
-        # Make sure the correct data format is used
-        # set data format to ascii
-        self.command('FORMAT:DATA ASCII')
-        act_trace = self._active_trace
+        # the format command, the trace query and the downloads are checked for errors once
+        with self.batch():
+            # Make sure the correct data format is used
+            self.command('FORMAT:DATA REAL,64' if self.binary_transfer else 'FORMAT:DATA ASCII')
+            act_trace = self._active_trace
+            if wavelength_range is None and self.reconstruct_wavelengths:
+                wavelength_range = (self.startwavelength, self.stopwavelength)
+
+            power_samples = self._read_trace(':TRAC:DATA:Y? {trace}'.format(trace=act_trace))
+            if wavelength_range is None:
+                # data is returned in unit [m], we want it in [nm]
+                wavelength_samples = self._read_trace(':TRAC:DATA:X? {trace}'.format(trace=act_trace)) * 1e9
+            else:
+                wavelength_samples = np.linspace(wavelength_range[0], wavelength_range[1], len(power_samples))
 
-        wavelength_samples = self.query_ascii_values(':TRAC:DATA:X? {trace}'.format(
-            trace=act_trace),
-            container=np.ndarray) * 1e9 # data is returned in unit [m], we want it in [nm]
-        power_samples = self.query_ascii_values(':TRAC:DATA:Y? {trace}'.format(
-            trace=act_trace),
-            container=list)
+        return [wavelength_samples, power_samples]
 
-        return [wavelength_samples.tolist(), power_samples]
+    def _read_trace(self, query_str):
+        """
+        Downloads trace data in the format set by get_data.
+        :return: numpy array of the values
+        """
+        if self.binary_transfer:
+            # the OSA sends float64 values in little endian byte order, copied since numpy returns a read-only view
+            return self.query_binary_values(query_str, datatype='d', is_big_endian=False, container=np.ndarray).copy()
+        return self.query_ascii_values(query_str, container=np.ndarray)
 
     #
     # wavelength properties
@@ -189,12 +216,14 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
         return float(self.request(':SENS:WAV:STAR?')) * 1e9
 
     @startwavelength.setter
+    @parameter_setter
     def startwavelength(self, start_wavelength_nm):
         """
         Set the start wavelength of the scan window
         :param start_wavelength_nm: start wavelength in nm
         """
         self.command(':SENS:WAV:STAR {start:0.3f}nm'.format(start=start_wavelength_nm))
+        self.invalidate_parameter_cache('centerwavelength')
 
     @property
     def stopwavelength(self):
@@ -205,12 +234,14 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
         return float(self.request(':SENS:WAV:STOP?')) * 1e9
 
     @stopwavelength.setter
+    @parameter_setter
     def stopwavelength(self, stop_wavelength_nm):
         """
         Set the stop wavelength of the scan window
         :param stop_wavelength_nm: stop wavelength in nm
         """
         self.command(':SENS:WAV:STOP {stop:0.3f}nm'.format(stop=stop_wavelength_nm))
+        self.invalidate_parameter_cache('centerwavelength')
 
     @property
     def centerwavelength(self):
@@ -221,6 +252,7 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
         return float(self.request(':SENS:WAV:CENT?')) * 1e9
 
     @centerwavelength.setter
+    @parameter_setter
     def centerwavelength(self, centerwavelength_nm):
         """
         Sets center wavelength
@@ -230,6 +262,7 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
             raise ValueError('Center wavelength is out of range. Must be between 600 nm and 1700 nm.')
 
         self.command(':SENS:WAV:CENT {center:0.3f}nm'.format(center=centerwavelength_nm))
+        self.invalidate_parameter_cache('startwavelength', 'stopwavelength')
 
     @property
     def span(self):
@@ -246,6 +279,7 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
         :param span_nm: span in nm
         """
         self.command(':SENS:WAV:SPAN {span:0.3f}nm'.format(span=span_nm))
+        self.invalidate_parameter_cache('startwavelength', 'stopwavelength')
 
     #
     # resolution and sensitivity
@@ -260,6 +294,7 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
         return float(self.request(':SENS:BAND:RES?')) * 1e9
 
     @sweepresolution.setter
+    @parameter_setter
     def sweepresolution(self, resolution_nm):
         """
         Sets resolution
@@ -278,6 +313,7 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
         return self._sweep_modes[int(self.request(':INIT:SMODE?')) - 1]
 
     @_sweep_mode.setter
+    @parameter_setter
     def _sweep_mode(self, _sweep_mode):
         """
         Set sweep mode
@@ -304,6 +340,7 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
         return int(self.query(":SENSe:SWEep:POINTS?"))
 
     @n_points.setter
+    @parameter_setter
     def n_points(self, n_points):
         """
         Set the number of points for the measurement
@@ -7,7 +7,7 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 
 import numpy as np
 
-from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentException
+from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentException, parameter_setter
 
 
 class PowerMeterGenericKeysight(Instrument):
@@ -172,6 +172,7 @@ class PowerMeterGenericKeysight(Instrument):
         return float(self.request_channel(':SENS', ':POW:WAV?').strip()) * 1e9
 
     @wavelength.setter
+    @parameter_setter
     def wavelength(self, wl_nm):
         """
         Set the wavelength calibration setting.
@@ -192,6 +193,7 @@ class PowerMeterGenericKeysight(Instrument):
         return ['dBm', 'Watt'][r]
 
     @unit.setter
+    @parameter_setter
     def unit(self, pu):
         """
         Set the physical unit of measured power. Choose between 'dBm' and 'Watt'
@@ -204,6 +206,8 @@ class PowerMeterGenericKeysight(Instrument):
             self.command_channel(':SENS', ':POW:UNIT 1')
         else:
             raise InstrumentException('Unknown unit: {}, use dBm or Watt')
+        # the set unit string is not normalized
+        self.invalidate_parameter_cache('unit')
 
     @property
     def range(self):
@@ -215,6 +219,7 @@ class PowerMeterGenericKeysight(Instrument):
         return float(self.request_channel(':SENS', ':POW:RANG?').strip())
 
     @range.setter
+    @parameter_setter
     def range(self, range_dBm):
         """
         Set the range (i.e. sensitivity) setting.
@@ -226,6 +231,8 @@ class PowerMeterGenericKeysight(Instrument):
         else:
             self.command_channel(':SENS', ':POW:RANG:AUTO 0')
             self.command_channel(':SENS', ':POW:RANG {:f}'.format(range_dBm))
+        # the range setting also switches autoranging on or off
+        self.invalidate_parameter_cache('range', 'autoranging')
 
     @property
     def autoranging(self):
@@ -243,6 +250,7 @@ class PowerMeterGenericKeysight(Instrument):
             raise InstrumentException('Power meter returned something not understandable: ' + str(resp))
 
     @autoranging.setter
+    @parameter_setter
     def autoranging(self, autorange):
         """
         Enable or disable automatic range finding for power meters.
@@ -251,6 +259,7 @@ class PowerMeterGenericKeysight(Instrument):
             self.command_channel(':SENS', ':POW:RANG:AUTO 1')
         else:
             self.command_channel(':SENS', ':POW:RANG:AUTO 0')
+        self.invalidate_parameter_cache('range')
 
     @property
     def averagetime(self):
@@ -263,6 +272,7 @@ class PowerMeterGenericKeysight(Instrument):
         return self._last_set_atime_s
 
     @averagetime.setter
+    @parameter_setter
     def averagetime(self, atime_s):
         """
         Set the averaging time setting.
@@ -5,7 +5,7 @@ LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
 This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
 """
 
-from LabExT.Instruments.InstrumentAPI import InstrumentException
+from LabExT.Instruments.InstrumentAPI import InstrumentException, parameter_setter
 from LabExT.Instruments.PowerMeterGenericKeysight import PowerMeterGenericKeysight
 
 
@@ -65,6 +65,7 @@ class PowerMeterN7744A(PowerMeterGenericKeysight):
             raise InstrumentException('Power meter returned something not understandable: ' + str(resp))
 
     @autogain.setter
+    @parameter_setter
     def autogain(self, new_state):
         """
         Set automatic gain setting.
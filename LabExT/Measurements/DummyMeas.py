@@ -94,9 +94,9 @@ class DummyMeas(Measurement):
 
         sleep(tot_time)
 
-        # convert numpy float32/float64 to python float
-        data['values']['point indices'] = [x.item() for x in xvec]
-        data['values']['point values'] = [y.item() for y in yvec]
+        # store the vectors without converting every value to a Python number
+        data['values']['point indices'] = ValuesBuffer(xvec, dtype=xvec.dtype)
+        data['values']['point values'] = ValuesBuffer(yvec)
 
         # sanity check if data contains all necessary keys
         self._check_data(data)
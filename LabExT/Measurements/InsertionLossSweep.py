@@ -9,6 +9,8 @@ import time
 
 import numpy as np
 
+from LabExT.Experiments.ResultCompression import load_result_file
+from LabExT.Experiments.ValuesSidecar import resolve_values_sidecar
 from LabExT.Measurements.MeasAPI import *
 
 
@@ -91,6 +93,17 @@ class InsertionLossSweep(Measurement):
             'users comment': MeasParamString(value=''),
         }
 
+    @staticmethod
+    def get_instrument_setting_costs():
+        # estimated SCPI round trips, only used to weigh the setting groups against each other
+        return {
+            # center wavelengths, sweep_wl_setup, number of points query, PM averaging time and logging setup
+            ('wavelength start', 'wavelength stop', 'wavelength step', 'sweep speed'): 46,
+            # laser unit and power
+            ('laser power',): 6,
+            ('powermeter range',): 3,
+        }
+
     @staticmethod
     def get_wanted_instrument():
         return ['Laser', 'Power Meter']
@@ -199,9 +212,9 @@ class InsertionLossSweep(Measurement):
         # Reset PM for manual Measurements
         self.instr_pm.range = 'auto'
 
-        # convert numpy float32/float64 to python float
-        data['values']['transmission [dBm]'] = power_data.tolist()
-        data['values']['wavelength [nm]'] = lambda_data.tolist()
+        # numpy arrays are stored as they are, either converted to lists when saved as JSON or as binary .npy files
+        data['values']['transmission [dBm]'] = np.asarray(power_data)
+        data['values']['wavelength [nm]'] = np.asarray(lambda_data)
 
         # close connection
         self.instr_laser.close()
@@ -227,8 +240,8 @@ class InsertionLossSweep(Measurement):
         # load reference file
         ref_fp = parameters['file path to reference meas.'].value.strip()
         try:
-            with open(ref_fp, 'r') as fp:
-                ref_raw_data = json.load(fp=fp)
+            ref_raw_data = load_result_file(ref_fp)
+            resolve_values_sidecar(ref_raw_data, ref_fp)
         except FileNotFoundError:
             raise FileNotFoundError(f'Reference file "{ref_fp:s}" not found.')
         except json.decoder.JSONDecodeError:
@@ -261,7 +274,7 @@ class InsertionLossSweep(Measurement):
 
         # apply referencing
         ref_data_diff = rec_tm - self.ref_data['tm']
-        data['values']['referenced transmission [dB]'] = ref_data_diff.tolist()
+        data['values']['referenced transmission [dB]'] = ref_data_diff
 
         # ref data is used, clear to ensure a clean load on subsequent use
         self.ref_data = None
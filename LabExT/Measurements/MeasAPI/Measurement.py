@@ -190,16 +190,24 @@ class Measurement:
         else:
             raise ValueError("No instrument with type " + str(instrument_type) + " in dict of initialized instruments.")
 
-    def _get_data_from_all_instruments(self) -> Dict[str, Dict]:
+    def _get_data_from_all_instruments(self, refresh: bool = True) -> Dict[str, Dict]:
         """Gets the settings of all instruments used in the measurement.
 
         Called from a standard experiment routine from LabExT to save all involved instrument's meta data and settings.
+
+        Arguments:
+            refresh: if False, the instruments return the cached values of their parameters where available instead
+                of reading all of them from the instrument.
         """
         inst_data = {}
 
         for cat, i in self.instruments.items():
             self.logger.debug("getting params from: " + str(cat) + " actual class: " + str(i.__class__.__name__))
-            inst_data[cat[0]] = i.get_instrument_parameter()
+            # drivers overriding get_instrument_parameter() might not know the refresh argument
+            if refresh:
+                inst_data[cat[0]] = i.get_instrument_parameter()
+            else:
+                inst_data[cat[0]] = i.get_instrument_parameter(refresh=False)
 
         return inst_data
 
@@ -232,6 +240,24 @@ class Measurement:
         """
         return dict()
 
+    @staticmethod
+    def get_instrument_setting_costs() -> Dict[Tuple[str, ...], int]:
+        """The cost model used to batch ToDos with identical instrument settings.
+
+        Maps groups of parameter names to the relative cost of configuring the instruments for these parameters,
+        e.g. `{('laser power',): 3, ('wavelength start', 'wavelength stop'): 30}`. An estimate of the SCPI round
+        trips the `algorithm` spends on them is a good choice, the costs are only compared to each other.
+        If any parameter of a group changes between two ToDos, the instruments need to be reconfigured and the
+        cost of the group is incurred once. Parameters not listed do not influence the instrument configuration.
+
+        The default implementation returns an empty `dict`, in which case ToDos of this measurement are never
+        reordered to save instrument reconfigurations.
+
+        Returns:
+            dict[tuple[str, ...], int]: groups of parameter names mapped to the cost of changing them
+        """
+        return dict()
+
     @staticmethod
     def get_wanted_instrument() -> List[str]:
         """The list of all instrument types (strings) required in this measurement.
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+from typing import Callable, Iterable, Iterator, List
+
+import numpy as np
+
+
+class ValuesBuffer:
+    """
+    Growable, NumPy-backed vector for the `data['values']` dictionary of a measurement.
+
+    Values are stored in a preallocated array whose capacity doubles when it is full, such that appending a single
+    value takes amortized constant time and no Python float object is kept per value. `view()` and
+    `np.asarray(buffer)` return a read-only array of the filled part without copying it.
+
+    A buffer is filled by one thread, e.g. the measurement algorithm, while other threads, e.g. the autosave or the
+    plotting thread, may read it: the values of a view never change, appended values only show up in later views.
+
+    Attributes:
+        data_changed: callbacks called with the buffer after every `append`, `extend` and `clear`, e.g. to update a
+            live plot
+    """
+
+    #: capacity of a new buffer if no values are given
+    MIN_CAPACITY = 1024
+
+    def __init__(self, values: Iterable = None, dtype=float, capacity: int = None):
+        """
+        Args:
+            values: the initial values, any array-like
+            dtype: data type of the stored values, all values are converted to it
+            capacity: number of values the buffer can hold before it grows for the first time
+        """
+        initial = np.empty(0, dtype=dtype) if values is None else np.asarray(values, dtype=dtype).ravel()
+        capacity = max(capacity or self.MIN_CAPACITY, len(initial))
+        self._data = np.empty(capacity, dtype=initial.dtype)
+        self._data[:len(initial)] = initial
+        self._length = len(initial)
+        self.data_changed: List[Callable[["ValuesBuffer"], None]] = []
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._data.dtype
+
+    @property
+    def capacity(self) -> int:
+        """Number of values the buffer holds before it has to grow."""
+        return len(self._data)
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes of the stored values."""
+        return self._length * self._data.itemsize
+
+    def view(self) -> np.ndarray:
+        """Returns the stored values as a read-only array, without copying them."""
+        # read the length before the array: a grown array holds at least as many values as the old one
+        length = self._length
+        view = self._data[:length]
+        view.flags.writeable = False
+        return view
+
+    def append(self, value) -> None:
+        """Appends a single value."""
+        length = self._length
+        if length == len(self._data):
+            self._grow(length + 1)
+        self._data[length] = value
+        self._length = length + 1
+        self._notify()
+
+    def extend(self, values: Iterable) -> None:
+        """Appends a chunk of values, e.g. a list or an array read from an instrument, with a single copy."""
+        if not hasattr(values, "__len__"):
+            values = np.fromiter(values, dtype=self._data.dtype)
+        chunk = np.asarray(values, dtype=self._data.dtype).ravel()
+        length = self._length
+        if length + len(chunk) > len(self._data):
+            self._grow(length + len(chunk))
+        self._data[length:length + len(chunk)] = chunk
+        self._length = length + len(chunk)
+        self._notify()
+
+    def clear(self) -> None:
+        """Removes all values. Views returned before keep their values."""
+        self._data = np.empty(self.MIN_CAPACITY, dtype=self._data.dtype)
+        self._length = 0
+        self._notify()
+
+    def tolist(self) -> list:
+        """Returns the stored values as a list of Python numbers, e.g. to serialize them as JSON."""
+        return self.view().tolist()
+
+    def _grow(self, min_capacity: int) -> None:
+        capacity = max(2 * len(self._data), min_capacity, self.MIN_CAPACITY)
+        grown = np.empty(capacity, dtype=self._data.dtype)
+        grown[:self._length] = self._data[:self._length]
+        self._data = grown
+
+    def _notify(self) -> None:
+        for callback in self.data_changed:
+            callback(self)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, item):
+        return self.view()[item]
+
+    def __iter__(self) -> Iterator:
+        return iter(self.view())
+
+    def __array__(self, dtype=None, copy=None):
+        view = self.view()
+        if dtype is not None and np.dtype(dtype) != view.dtype:
+            return view.astype(dtype)
+        return view.copy() if copy else view
+
+    def __eq__(self, other):
+        if isinstance(other, ValuesBuffer):
+            other = other.view()
+        try:
+            return bool(np.array_equal(self.view(), np.asarray(other)))
+        except (TypeError, ValueError):
+            return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # copies and pickles hold the values only, without spare capacity and callbacks
+        return self.__class__, (self.view().copy(), self.dtype)
+
+    def __repr__(self):
+        return f"ValuesBuffer({self.view()!r})"
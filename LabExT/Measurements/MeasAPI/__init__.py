@@ -12,3 +12,4 @@ from .Measparam import MeasParamInt
 from .Measparam import MeasParamList
 from .Measparam import MeasParamString
 from .Measurement import Measurement
+from .ValuesBuffer import ValuesBuffer
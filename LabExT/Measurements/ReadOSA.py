@@ -7,6 +7,8 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 
 from time import sleep
 
+import numpy as np
+
 from LabExT.Measurements.MeasAPI import *
 
 
@@ -56,6 +58,16 @@ class ReadOSA(Measurement):
             'sweep resolution': MeasParamFloat(value=0.08, unit='nm')
         }
 
+    @staticmethod
+    def get_instrument_setting_costs():
+        # estimated SCPI round trips, only used to weigh the setting groups against each other
+        return {
+            ('OSA span',): 3,
+            ('OSA center wavelength',): 3,
+            ('sweep resolution',): 3,
+            ('no of points',): 3,
+        }
+
     @staticmethod
     def get_wanted_instrument():
         return ['OSA']
@@ -91,9 +103,9 @@ class ReadOSA(Measurement):
         x_data_nm, y_data_dbm = self.instr_osa.get_data()
         self.logger.info('OSA data received')
 
-        # copy the read data over to the json
-        data['values']['wavelength [nm]'] = x_data_nm
-        data['values']['transmission [dBm]'] = y_data_dbm
+        # copy the read data over to the json, the arrays are only converted to lists when the file is saved
+        data['values']['wavelength [nm]'] = np.asarray(x_data_nm, dtype=float)
+        data['values']['transmission [dBm]'] = np.asarray(y_data_dbm, dtype=float)
 
         # close instrument connection
         self.instr_osa.close()
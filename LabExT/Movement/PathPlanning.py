@@ -462,7 +462,9 @@ class PotentialField:
             for ox, oy in zip(self.cx[stage_mask], self.cy[stage_mask]):
                 o_dist = np.hypot(self.cx - ox, self.cy - oy)
                 field_mask = o_dist < safety_multiplier * self.FIBER_RADIUS
-                rep_field = self.repulsive_gain * (1.0 / o_dist) ** 2
+                # the obstacle's own grid point gets an infinite potential
+                with np.errstate(divide="ignore"):
+                    rep_field = self.repulsive_gain * (1.0 / o_dist) ** 2
 
                 self.potential_field[field_mask] += rep_field[field_mask]
 
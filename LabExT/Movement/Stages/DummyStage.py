@@ -11,6 +11,8 @@ from LabExT.Movement.Stage import Stage
 class DummyStage(Stage):
     """
     Simple Stage implementation for testing purposes.
+
+    Movements are executed instantly, the stage only keeps track of its position.
     """
 
     #
@@ -38,6 +40,7 @@ class DummyStage(Stage):
         self._speed_xy = None
         self._speed_z = None
         self._acceleration_xy = None
+        self._position = [0, 0, 0]
 
     def __str__(self) -> str:
         return "Dummy Stage at {}".format(self.address_string)
@@ -84,7 +87,7 @@ class DummyStage(Stage):
         return all(s == 'STOP' for s in self.get_status())
 
     def get_position(self) -> list:
-        return [0, 0, 0]
+        return list(self._position)
 
     def move_relative(
             self,
@@ -92,7 +95,7 @@ class DummyStage(Stage):
             y: float = 0,
             z: float = 0,
             wait_for_stopping: bool = True) -> None:
-        pass
+        self._position = [p + d for p, d in zip(self._position, [x, y, z])]
 
     def move_absolute(
             self,
@@ -100,4 +103,4 @@ class DummyStage(Stage):
             y: float = None,
             z: float = None,
             wait_for_stopping: bool = True) -> None:
-        pass
+        self._position = [p if t is None else t for p, t in zip(self._position, [x, y, z])]
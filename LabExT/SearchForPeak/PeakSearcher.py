@@ -341,11 +341,11 @@ class PeakSearcher(Measurement):
                     dimension_name = self._dimension_names[dimidx]
 
                     # create new plotting dataset for measurement
-                    meas_plot = PlotData(ObservableList(), ObservableList(),
+                    meas_plot = PlotData(ValuesBuffer(), ValuesBuffer(),
                                         'scatter', color=color_strings[dimidx])
-                    fit_plot = PlotData(ObservableList(), ObservableList(),
+                    fit_plot = PlotData(ValuesBuffer(), ValuesBuffer(),
                                         color=color_strings[dimidx], label=dimension_name)
-                    opt_pos_plot = PlotData(ObservableList(), ObservableList(),
+                    opt_pos_plot = PlotData(ValuesBuffer(), ValuesBuffer(),
                                             marker='x', markersize=10, color=color_strings[dimidx])
                     if dimidx < len(start_coordinates) / 2:
                         self.plots_left.append(meas_plot)
@@ -437,9 +437,7 @@ class PeakSearcher(Measurement):
                             loss = self.instr_powermeter.power
 
                             # save data
-                            # do not trigger plot update just yet
-                            meas_plot.x.extend([d_current])
-                            meas_plot.y.append(loss)
+                            meas_plot.append(d_current, loss)
 
                             IL_meas[measidx] = loss
 
@@ -496,17 +494,12 @@ class PeakSearcher(Measurement):
                             IL_fit_fctn = PeakSearcher._gaussian(
                                 d_range_highres, *popt)
                             # plot fit data
-                            fit_plot.x.extend(d_range_highres)
-                            fit_plot.y.extend(IL_fit_fctn[0:-1])
-                            # trigger plot update
-                            fit_plot.y.append(IL_fit_fctn[-1])
+                            fit_plot.extend(d_range_highres, IL_fit_fctn)
 
                         # mark the point where we move to in any case
                         estimated_through_power = self._gaussian(
                             optimized_target, *popt)
-                        # do not trigger plot update just yet
-                        opt_pos_plot.x.extend([optimized_target])
-                        opt_pos_plot.y.append(estimated_through_power)
+                        opt_pos_plot.append(optimized_target, estimated_through_power)
 
                     # inform user and store the fitting information
                     self.logger.debug(
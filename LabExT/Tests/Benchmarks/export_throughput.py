@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import argparse
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from LabExT.Exporter.ExportRunner import ExportRunner
+from LabExT.Exporter.Formats.ExportCSV import write_csv
+from LabExT.Exporter.Formats.ExportHDF5 import write_hdf5
+from LabExT.Tests.Utils import measurement_dict
+
+WRITE_FUNCTIONS = {"csv": write_csv, "hdf5": write_hdf5}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measures the throughput of exporting sweeps, not part of the test suite.",
+        usage='python -m LabExT.Tests.Benchmarks.export_throughput ...')
+    parser.add_argument('--format', choices=list(WRITE_FUNCTIONS), default="csv", help='Export file format.')
+    parser.add_argument('--n_files', type=int, default=100, help='Number of exported sweeps.')
+    parser.add_argument('--n_points', type=int, default=20000, help='Number of points per sweep.')
+    parser.add_argument('--max_workers', type=int, default=None,
+                        help='Number of worker processes, by default the number of CPUs.')
+    options = parser.parse_args()
+
+    with TemporaryDirectory() as tmp_dir:
+        jobs = [(dict(measurement_dict(i, options.n_points), file_path_known=f"/data/meas{i:d}.json"),
+                 join(tmp_dir, f"meas{i:d}.{options.format}"))
+                for i in range(options.n_files)]
+        result = ExportRunner(WRITE_FUNCTIONS[options.format], max_workers=options.max_workers).run(jobs)
+
+    print(f"{options.format} export throughput: {result.throughput:.1f} MB/s "
+          f"({len(result.written):d} files, {result.n_bytes / 1e6:.1f} MB in {result.duration:.2f} s)")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import unittest
+from glob import glob
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from LabExT.Experiments.AdaptiveSweep import AdaptiveSweepSettings, GOAL_GRADIENT, GOAL_MAXIMUM, GOAL_MINIMUM, \
+    evaluate_metric, propose_points
+from LabExT.Experiments.QueueJournal import QueueJournal, restore_todos
+from LabExT.Experiments.SweepSummary import SweepSummary
+from LabExT.Tests.Utils import TEST_DEVICES, headless_experiment
+from LabExT.View.EditMeasurementWizard.WizardEntry.SaveButtons import create_parameter_sweep_todos
+
+DEVICE = TEST_DEVICES[0]
+
+
+class ProposePointsTest(unittest.TestCase):
+
+    def test_gradient_refines_steepest_interval(self):
+        settings = AdaptiveSweepSettings(goal=GOAL_GRADIENT, points_per_round=1)
+        x = [0.0, 1.0, 2.0, 3.0, 4.0]
+        y = [0.0, 0.0, 10.0, 10.0, 10.0]
+        self.assertListEqual(propose_points(x, y, settings), [1.5])
+
+        settings.points_per_round = 2
+        self.assertListEqual(propose_points(x[::-1], y[::-1], settings), [1.5, 0.5])
+
+    def test_optimum_refines_neighbours_of_best_point(self):
+        x = [0.0, 2.0, 3.0, 4.0]
+        y = [5.0, 1.0, 3.0, 0.0]
+        self.assertListEqual(propose_points(x, y, AdaptiveSweepSettings(goal=GOAL_MINIMUM)), [3.5])
+        self.assertListEqual(propose_points(x, y, AdaptiveSweepSettings(goal=GOAL_MAXIMUM)), [1.0])
+
+        y = [5.0, 0.0, 3.0, 1.0]
+        self.assertListEqual(propose_points(x, y, AdaptiveSweepSettings(goal=GOAL_MINIMUM)), [1.0, 2.5])
+
+    def test_stops_at_tolerance_and_budget(self):
+        x = [0.0, 1.0, 2.0]
+        y = [0.0, 1.0, 0.0]
+        self.assertListEqual(propose_points(x, y, AdaptiveSweepSettings(tolerance=0.5)), [0.5, 1.5])
+        self.assertListEqual(propose_points(x, y, AdaptiveSweepSettings(tolerance=0.6)), [])
+        self.assertListEqual(propose_points(x, y, AdaptiveSweepSettings(budget=4)), [0.5])
+        self.assertListEqual(propose_points(x, y, AdaptiveSweepSettings(budget=3)), [])
+
+    def test_integer_parameter(self):
+        settings = AdaptiveSweepSettings(goal=GOAL_MINIMUM)
+        self.assertListEqual(propose_points([10, 13, 20], [1.0, 0.0, 1.0], settings, integer=True), [16, 12])
+        self.assertListEqual(propose_points([10, 11, 12], [1.0, 0.0, 1.0], settings, integer=True), [])
+
+    def test_missing_figures_of_merit(self):
+        settings = AdaptiveSweepSettings(goal=GOAL_MINIMUM)
+        self.assertListEqual(propose_points([0.0, 1.0], [np.nan, np.nan], settings), [])
+        self.assertListEqual(propose_points([0.0, 1.0, 2.0], [np.nan, 1.0, 2.0], settings), [0.5, 1.5])
+
+    def test_evaluate_metric(self):
+        values = {"transmission": [-3.0, -10.0, np.nan, -1.0], "text": ["a"]}
+        self.assertEqual(evaluate_metric(values, AdaptiveSweepSettings(metric="transmission", reduction="min")), -10.0)
+        self.assertEqual(evaluate_metric(values, AdaptiveSweepSettings(metric="transmission", reduction="max")), -1.0)
+        self.assertTrue(np.isnan(evaluate_metric(values, AdaptiveSweepSettings(metric="text"))))
+        self.assertTrue(np.isnan(evaluate_metric(values, AdaptiveSweepSettings(metric="unknown"))))
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            AdaptiveSweepSettings(reduction="median")
+        with self.assertRaises(ValueError):
+            AdaptiveSweepSettings(budget=1)
+        settings = AdaptiveSweepSettings(metric="m", goal=GOAL_MAXIMUM)
+        self.assertEqual(AdaptiveSweepSettings.from_dict(settings.as_dict()), settings)
+
+
+class AdaptiveSweepTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.output_path = join(self.tmp_dir.name, "out")
+        self.journal_path = join(self.tmp_dir.name, "journal.jsonl")
+        self.experiment = headless_experiment("AdaptiveChip", output_path=self.output_path,
+                                              settings={"journal_queue": True})
+        self.experiment.queue_journal = QueueJournal(self.journal_path)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def create_sweep(self, sweep_ranges, settings):
+        template = self.experiment.create_measurement_object("DummyMeas")
+        template.parameters["total measurement time"].value = 0.0
+        template.parameters["std. deviation"].value = 0.0
+        template.parameters["number of points"].value = 5
+        for name, (series, category) in sweep_ranges.items():
+            if category == "adaptive":
+                series.attrs["adaptive"] = settings.as_dict()
+        create_parameter_sweep_todos(self.experiment, sweep_ranges, template, DEVICE)
+
+    def test_refines_towards_minimum(self):
+        settings = AdaptiveSweepSettings(metric="point values", reduction="mean", goal=GOAL_MINIMUM, tolerance=0.05)
+        self.create_sweep({"mean": (pd.Series(np.linspace(-1, 1, 5)), "adaptive")}, settings)
+        self.assertEqual(len(self.experiment.to_do_list), 5)
+        params = self.experiment.to_do_list[0].sweep_parameters
+
+        self.experiment.run()
+
+        means = [m["measurement settings"]["mean"]["value"] for m in self.experiment.measurements]
+        self.assertListEqual(means, [-1.0, -0.5, 0.0, 0.5, 1.0, -0.75, -0.875, -0.9375])
+        self.assertEqual(len(params), 8)
+        self.assertTrue(params["metadata", "finished"].all())
+
+        sidecar = glob(join(self.output_path, "*", "*_sweep_summary.jsonl"))[0]
+        summary = SweepSummary.load(sidecar)
+        self.assertTrue(summary.complete)
+        with open(summary.json_path) as fp:
+            entries = json.load(fp)["sweep_association_list"]
+        self.assertListEqual([e["measurement settings"]["mean"] for e in entries], means)
+
+    def test_lines_are_refined_independently(self):
+        settings = AdaptiveSweepSettings(metric="point values", reduction="mean", goal=GOAL_MAXIMUM, budget=4)
+        self.create_sweep({
+            "number of points": (pd.Series([3, 4]), None),
+            "mean": (pd.Series([0.0, 1.0, 2.0]), "adaptive"),
+        }, settings)
+        self.experiment.run()
+
+        settings = [m["measurement settings"] for m in self.experiment.measurements]
+        points = [(p["number of points"]["value"], p["mean"]["value"]) for p in settings]
+        # the points of a line are measured as soon as the line is complete
+        self.assertListEqual(points, [(3, 0.0), (3, 1.0), (3, 2.0), (3, 1.5), (4, 0.0), (4, 1.0), (4, 2.0), (4, 1.5)])
+
+    def test_added_points_are_journaled(self):
+        settings = AdaptiveSweepSettings(metric="point values", reduction="mean", goal=GOAL_MINIMUM, budget=4)
+        self.create_sweep({"mean": (pd.Series([0.0, 1.0, 2.0]), "adaptive")}, settings)
+        self.experiment.exctrl_pause_after_device = True
+        for _ in range(3):
+            self.experiment.run()
+
+        state = self.experiment.queue_journal.load()
+        self.assertEqual(len(state.queue), 1)
+        todos, _ = restore_todos(self.experiment, state)
+        self.assertEqual(todos[0].get_parameter_value("mean"), 0.5)
+        self.assertEqual(len(todos[0].sweep_parameters), 4)
+
+    def measured_means(self):
+        return [m["measurement settings"]["mean"]["value"] for m in self.experiment.measurements]
+
+    def test_removed_points_are_not_waited_for(self):
+        settings = AdaptiveSweepSettings(metric="point values", reduction="mean", goal=GOAL_MAXIMUM, budget=4)
+        self.create_sweep({"mean": (pd.Series([0.0, 1.0, 2.0, 3.0]), "adaptive")}, settings)
+        self.experiment.to_do_list.pop()
+        self.experiment.run()
+
+        self.assertListEqual(self.measured_means(), [0.0, 1.0, 2.0, 1.5])
+
+    def test_failed_points_are_not_waited_for(self):
+        settings = AdaptiveSweepSettings(metric="point values", reduction="mean", goal=GOAL_MAXIMUM, budget=4)
+        self.create_sweep({"mean": (pd.Series([0.0, 1.0, 2.0]), "adaptive")}, settings)
+        # the plugin loader imports its own copy of the DummyMeas class
+        dummy_meas = type(self.experiment.to_do_list[0].measurement)
+        algorithm = dummy_meas.algorithm
+
+        def fail_at_two(meas, device, data, instruments, parameters):
+            if parameters["mean"].value == 2.0:
+                raise RuntimeError("simulated failure")
+            return algorithm(meas, device, data, instruments, parameters)
+
+        with patch.object(dummy_meas, "algorithm", fail_at_two):
+            self.experiment.run()
+            # the line is refined from the finished points, the new points are queued after the failed ToDo
+            self.assertListEqual(self.measured_means(), [0.0, 1.0])
+            self.assertListEqual([t.get_parameter_value("mean") for t in self.experiment.to_do_list], [2.0, 0.5])
+
+        self.experiment.exctrl_pause_after_device = False
+        self.experiment.run()
+        self.assertListEqual(self.measured_means(), [0.0, 1.0, 2.0, 0.5])
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import os
+import time
+import unittest
+from collections import OrderedDict
+from copy import deepcopy
+from glob import glob
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from LabExT.Experiments.AutosaveDict import AutosaveDict, JournaledAutosaveDict, load_autosave_journal
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Tests.Utils import TEST_DEVICES, headless_experiment
+
+
+class AutosaveDictTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.file_path = join(self.tmp_dir.name, "data.json.part")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def journal_records(self, data):
+        with open(data.journal_path) as fp:
+            return [json.loads(line) for line in fp]
+
+    def test_write_amplification(self):
+        data = AutosaveDict(file_path=self.file_path, auto_save=False)
+        data["a"] = 1
+        data.save(indented=False)
+        data.save(indented=False)
+        self.assertEqual(data.file_size, os.path.getsize(self.file_path))
+        self.assertEqual(data.bytes_written, 2 * data.file_size)
+        self.assertEqual(data.write_amplification, 2.0)
+
+    def test_numpy_arrays(self):
+        data = AutosaveDict(file_path=self.file_path, auto_save=False)
+        data["values"] = {"x": np.arange(3, dtype=np.float32), "n": np.int64(2)}
+        data.save()
+        with open(self.file_path) as fp:
+            self.assertEqual(json.load(fp), {"values": {"x": [0.0, 1.0, 2.0], "n": 2}})
+
+        data = JournaledAutosaveDict(file_path=self.file_path + "2", auto_save=False)
+        data["values"] = {"x": np.arange(3)}
+        data.flush()
+        self.assertEqual(data.flush(), 0)
+        self.assertEqual(load_autosave_journal(data.file_path), {"values": {"x": [0, 1, 2]}})
+
+    def test_journal_appends_changes(self):
+        data = JournaledAutosaveDict(file_path=self.file_path, auto_save=False)
+        data["name"] = "meas"
+        data["values"] = OrderedDict()
+        data["values"]["x"] = [0, 1]
+        data.flush()
+
+        data["values"]["x"].extend([2, 3])
+        data["values"]["y"] = [5]
+        data["name"] = "renamed"
+        data["error"] = {}
+        data.flush()
+        del data["error"]
+        data.flush()
+
+        self.assertFalse(os.path.exists(self.file_path))
+        records = self.journal_records(data)
+        self.assertListEqual([(r["op"], r["path"]) for r in records[3:]], [
+            ("set", ["name"]),
+            ("extend", ["values", "x"]),
+            ("set", ["values", "y"]),
+            ("set", ["error"]),
+            ("del", ["error"]),
+        ])
+        self.assertListEqual(records[4]["items"], [2, 3])
+        self.assertEqual(data.n_flushes, 3)
+        self.assertEqual(data.journal_bytes, os.path.getsize(data.journal_path))
+
+        # nothing changed, nothing written
+        self.assertEqual(data.flush(), 0)
+        self.assertEqual(load_autosave_journal(self.file_path), data)
+
+    def test_reads_do_not_write(self):
+        data = JournaledAutosaveDict(file_path=self.file_path, auto_save=False)
+        data["values"] = {"x": [1.0] * 100}
+        data.flush()
+        size = os.path.getsize(data.journal_path)
+        for _ in range(1000):
+            _ = data["values"]
+        self.assertEqual(data.flush(), 0)
+        self.assertEqual(os.path.getsize(data.journal_path), size)
+
+    def test_byte_budget(self):
+        data = JournaledAutosaveDict(file_path=self.file_path, auto_save=False)
+        for idx in range(10):
+            data[f"key {idx}"] = "x" * 100
+        self.assertLess(data.flush(max_bytes=300), 300)
+        self.assertEqual(len(self.journal_records(data)), 2)
+        while data.flush(max_bytes=300) > 0:
+            pass
+        self.assertEqual(load_autosave_journal(self.file_path), data)
+
+    def test_compaction(self):
+        data = JournaledAutosaveDict(file_path=self.file_path, auto_save=False)
+        data["values"] = {"x": [1, 2]}
+        data.flush()
+        data.save()
+        self.assertFalse(os.path.exists(data.journal_path))
+        with open(self.file_path) as fp:
+            self.assertEqual(json.load(fp), data)
+        self.assertEqual(data.bytes_written, data.journal_bytes + data.file_size)
+
+        # after compaction, the journal only holds changes relative to the saved file
+        data["values"]["x"].append(3)
+        data.flush()
+        self.assertListEqual([r["op"] for r in self.journal_records(data)], ["extend"])
+        self.assertEqual(load_autosave_journal(self.file_path), data)
+
+    def test_background_flushing(self):
+        data = JournaledAutosaveDict(file_path=self.file_path, flush_interval=0.01)
+        data["values"] = {"x": []}
+        for idx in range(5):
+            data["values"]["x"].append(idx)
+            time.sleep(0.03)
+        data.auto_save = False
+        self.assertGreater(data.n_flushes, 1)
+        self.assertEqual(load_autosave_journal(self.file_path), data)
+
+    def test_corrupt_journal_line(self):
+        data = JournaledAutosaveDict(file_path=self.file_path, auto_save=False)
+        data["a"] = 1
+        data.flush()
+        with open(data.journal_path, "a") as fp:
+            fp.write('{"op": "set", "pa')
+        self.assertEqual(load_autosave_journal(self.file_path), {"a": 1})
+
+    def test_copies_are_plain_dictionaries(self):
+        data = JournaledAutosaveDict(file_path=self.file_path, flush_interval=10)
+        data["values"] = {"x": [1, 2]}
+        copy = deepcopy(data)
+        data.auto_save = False
+        self.assertIs(type(copy), OrderedDict)
+        self.assertEqual(copy, data)
+        self.assertIsNot(copy["values"], data["values"])
+
+    def test_experiment_with_journaled_autosave(self):
+        experiment = headless_experiment("AutosaveChip", output_path=self.tmp_dir.name,
+                                         settings={"journaled_autosave": True, "journal_queue": False})
+        measurement = experiment.create_measurement_object("DummyMeas")
+        measurement.parameters["total measurement time"].value = 0.0
+        experiment.to_do_list.append(ToDo(TEST_DEVICES[0], measurement))
+        with self.assertLogs(level="INFO") as logs:
+            experiment.run()
+
+        self.assertEqual(len(glob(join(self.tmp_dir.name, "*.json"))), 1)
+        self.assertListEqual(glob(join(self.tmp_dir.name, "*.jsonl")), [])
+        self.assertTrue(any("write amplification" in line for line in logs.output))
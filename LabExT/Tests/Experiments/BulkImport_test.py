@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from LabExT.Experiments.BulkImport import BulkImporter
+from LabExT.Tests.Utils import headless_experiment, measurement_dict, write_measurement_file
+
+
+class BulkImportTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.experiment = headless_experiment("ImportChip", output_path=self.tmp_dir.name)
+
+        self.file_paths = []
+        for i in range(20):
+            self.file_paths.append(self.write(f"meas{i:d}.json.gz" if i % 2 else f"meas{i:d}.json",
+                                              measurement_dict(i, n_points=3, chip_name="ImportChip")))
+        without_values = dict(measurement_dict(20, chip_name="ImportChip"), values={})
+        self.invalid_paths = [self.write("broken.json", "{no json"),
+                              self.write("list.json", [1, 2]),
+                              self.write("no_values.json", without_values),
+                              self.write("duplicate.json", measurement_dict(0, n_points=3, chip_name="ImportChip"))]
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def write(self, file_name, content):
+        return write_measurement_file(join(self.tmp_dir.name, file_name), content)
+
+    def check_import(self, max_workers):
+        importer = BulkImporter(self.experiment, self.file_paths + self.invalid_paths, max_workers=max_workers,
+                                batch_size=3)
+        with patch.object(self.experiment, "update") as update, self.assertLogs(level="INFO") as logs:
+            result = importer.run()
+
+        self.assertTrue(importer.finished)
+        self.assertEqual(result.n_files, 24)
+        self.assertListEqual(sorted(result.loaded), sorted(self.file_paths))
+        self.assertListEqual(sorted(result.failed), sorted(self.invalid_paths))
+        self.assertIn("Duplicate", result.failed[self.invalid_paths[-1]])
+        self.assertEqual(importer.n_processed, 24)
+        self.assertEqual(len(self.experiment.measurements), 20)
+        self.assertEqual({m["file_path_known"] for m in self.experiment.measurements}, set(self.file_paths))
+        # the GUI is refreshed once per batch, not once per file
+        self.assertLessEqual(update.call_count, 8)
+        self.assertTrue(any("Imported 20 of 24 data files" in line for line in logs.output))
+
+    def test_import_in_background_thread(self):
+        self.check_import(max_workers=1)
+
+    def test_import_in_worker_processes(self):
+        self.check_import(max_workers=2)
+
+    def test_load_parsed_does_not_block(self):
+        importer = BulkImporter(self.experiment, self.file_paths, max_workers=1)
+        self.assertFalse(importer.load_parsed())
+        importer.start()
+        with self.assertRaises(RuntimeError):
+            importer.start()
+        while not importer.load_parsed(timeout=0.1, force_gui_update=False):
+            pass
+        self.assertEqual(len(importer.result.loaded), 20)
+        self.assertTrue(importer.load_parsed())
+
+    def test_load_parsed_adds_one_batch(self):
+        importer = BulkImporter(self.experiment, self.file_paths, max_workers=1, batch_size=8)
+        importer.start()
+        importer._thread.join()
+        loaded = []
+        while not importer.load_parsed(force_gui_update=False):
+            loaded.append(len(importer.result.loaded))
+        self.assertListEqual(loaded, [8, 16, 20])
+
+    def test_cancel(self):
+        importer = BulkImporter(self.experiment, self.file_paths, max_workers=1, batch_size=1)
+        importer.cancel()
+        result = importer.run(force_gui_update=False)
+        self.assertEqual(len(result.loaded) + len(result.failed), 0)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import os
+import time
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from LabExT.Experiments.DirectoryWatcher import DirectoryWatcher, inotify_available
+from LabExT.Tests.Utils import headless_experiment, measurement_dict, write_measurement_file
+
+
+class DirectoryWatcherTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.experiment = headless_experiment("WatchedChip", output_path=self.tmp_dir.name)
+        self.watched = join(self.tmp_dir.name, "watched")
+        os.makedirs(self.watched)
+        self.write("existing.json", measurement_dict(0, chip_name="WatchedChip"))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def write(self, file_name, content):
+        return write_measurement_file(join(self.watched, file_name), content)
+
+    def wait_for(self, watcher, n_files, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            watcher.load_new(force_gui_update=False)
+            if len(watcher.loaded) + len(watcher.failed) + watcher.n_duplicates >= n_files:
+                return
+            time.sleep(0.02)
+        self.fail(f"Only {len(watcher.loaded):d} of {n_files:d} new files were imported.")
+
+    def check_watcher(self, use_inotify):
+        watcher = DirectoryWatcher(self.experiment, [self.watched], poll_interval=0.05, settle_time=0.0,
+                                   use_inotify=use_inotify)
+        watcher.start()
+        try:
+            self.write("meas1.json.part", measurement_dict(1, chip_name="WatchedChip"))
+            new_paths = [self.write("meas2.json", measurement_dict(2, chip_name="WatchedChip")),
+                         self.write(join("sub", "meas3.json.gz"), measurement_dict(3, chip_name="WatchedChip"))]
+            # files written by LabExT are renamed once they are complete
+            os.rename(join(self.watched, "meas1.json.part"), join(self.watched, "meas1.json"))
+            new_paths.append(join(self.watched, "meas1.json"))
+            broken_path = self.write("broken.json", "{no json")
+            self.wait_for(watcher, 4)
+            self.write("copy.json", measurement_dict(2, chip_name="WatchedChip"))
+            self.wait_for(watcher, 5)
+        finally:
+            watcher.stop()
+
+        self.assertFalse(watcher.running)
+        self.assertListEqual(sorted(watcher.loaded), sorted(new_paths))
+        self.assertListEqual(list(watcher.failed), [broken_path])
+        self.assertEqual(watcher.n_duplicates, 1)
+        self.assertEqual(len(self.experiment.measurements), 3)
+        self.assertNotIn(0, [m["device"]["id"] for m in self.experiment.measurements])
+
+    def test_polling(self):
+        self.check_watcher(use_inotify=False)
+
+    @unittest.skipUnless(inotify_available(), "watchdog is not installed")
+    def test_inotify(self):
+        self.check_watcher(use_inotify=True)
+
+    def test_unchanged_directories_are_not_listed(self):
+        watcher = DirectoryWatcher(self.experiment, [self.watched], use_inotify=False)
+        with patch("os.scandir", side_effect=os.scandir) as scandir:
+            watcher._poll_directories()
+            scandir.assert_not_called()
+            self.write("meas1.json", measurement_dict(1, chip_name="WatchedChip"))
+            watcher._poll_directories()
+        scandir.assert_called_once_with(self.watched)
+        self.assertListEqual(list(watcher._candidates), [join(self.watched, "meas1.json")])
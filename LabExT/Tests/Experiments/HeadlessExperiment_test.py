@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import io
+import json
+import unittest
+from glob import glob
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest.mock import Mock
+
+from LabExT.Experiments.HeadlessExperiment import HeadlessExperimentManager, QueueDescriptionError, create_todos, \
+    load_chip_file, load_instruments_config, select_instrument
+from LabExT.Headless import EXIT_CONFIGURATION_ERROR, EXIT_MEASUREMENT_ERROR, EXIT_SUCCESS, run_queue
+
+CHIP = {
+    "name": "HeadlessTestChip",
+    "path": "none",
+    "devices": [
+        {"id": "1", "type": "wg", "in_position": [0, 0], "out_position": [500, 0]},
+        {"id": "2", "type": "ring", "in_position": [0, 2000], "out_position": [500, 2000]},
+    ]
+}
+
+QUEUE = {
+    "output": "out",
+    "todos": [
+        {
+            "measurement": "InsertionLossSweep",
+            "devices": "all",
+            "parameters": {"wavelength start": 1540.0, "wavelength stop": 1550.0},
+            "instruments": {"Laser": {"class": "LaserSimulator", "channel": 2}},
+        },
+        {"measurement": "DummyMeas", "devices": ["2"], "repeat": 2},
+    ]
+}
+
+
+class HeadlessExperimentTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.chip_path = join(self.tmp_dir.name, "chip.json")
+        self.queue_path = join(self.tmp_dir.name, "queue.json")
+        with open(self.chip_path, "w") as fp:
+            json.dump(CHIP, fp)
+        self.output_path = join(self.tmp_dir.name, "out")
+        self.write_queue(QUEUE)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def write_queue(self, queue):
+        with open(self.queue_path, "w") as fp:
+            json.dump(queue, fp)
+
+    def create_manager(self, queue, **kwargs):
+        chip = load_chip_file(self.chip_path)
+        instruments_config = load_instruments_config()
+        manager = HeadlessExperimentManager(chip, instruments_config, output_path=self.output_path,
+                                            stream=io.StringIO(), **kwargs)
+        create_todos(manager.exp, queue, instruments_config)
+        return manager
+
+    def test_queue_is_executed(self):
+        stream = io.StringIO()
+        exit_code = run_queue(self.queue_path, self.chip_path, stream=stream)
+        self.assertEqual(exit_code, EXIT_SUCCESS)
+
+        saved_files = sorted(glob(join(self.output_path, "*.json")))
+        self.assertEqual(len(saved_files), 4)
+        self.assertEqual(len(glob(join(self.output_path, "*DummyMeas*.json"))), 2)
+
+        for file_path in saved_files:
+            with open(file_path) as fp:
+                data = json.load(fp)
+            for key in ["software", "chip", "device", "timestamp start", "timestamp end", "measurement name",
+                        "measurement id long", "instruments", "measurement settings", "values", "error",
+                        "sweep_information", "finished", "search for peak"]:
+                self.assertIn(key, data)
+            self.assertTrue(data["finished"])
+            self.assertEqual(data["chip"]["name"], "HeadlessTestChip")
+
+        lines = stream.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("[1/4] InsertionLossSweep"))
+        self.assertTrue(lines[-1].startswith("Executed 4 of 4 ToDos"))
+
+    def test_parameters_and_instruments_are_applied(self):
+        manager = self.create_manager(QUEUE)
+        todos = manager.exp.to_do_list
+        self.assertListEqual([t.device.id for t in todos], ["1", "2", "2", "2"])
+        sweep = todos[0].measurement
+        self.assertEqual(sweep.parameters["wavelength start"].value, 1540.0)
+        self.assertEqual(sweep.selected_instruments["Laser"]["channel"], 2)
+        self.assertEqual(sweep.selected_instruments["Power Meter"]["class"], "PowerMeterSimulator")
+        self.assertEqual(sweep.selected_instruments["Power Meter"]["channel"], 1)
+
+    def test_todo_without_parameters_uses_the_defaults(self):
+        self.write_queue({"todos": [{"measurement": "InsertionLossSweep", "devices": ["1"]}]})
+        exit_code = run_queue(self.queue_path, self.chip_path, output_path=self.output_path, stream=io.StringIO())
+        self.assertEqual(exit_code, EXIT_SUCCESS)
+        self.assertEqual(len(glob(join(self.output_path, "*_error.json"))), 0)
+
+        manager = self.create_manager({"todos": [{"measurement": "InsertionLossSweep", "devices": ["1"]}]})
+        sweep = manager.exp.to_do_list[0].measurement
+        defaults = sweep.get_default_parameter()
+        self.assertSetEqual(set(sweep._parameters), set(defaults))
+        self.assertEqual(sweep.parameters["wavelength start"].value, defaults["wavelength start"].value)
+
+    def test_dummy_stages_move_to_each_device(self):
+        exit_code = run_queue(self.queue_path, self.chip_path, dummy_stages=True, stream=io.StringIO())
+        self.assertEqual(exit_code, EXIT_SUCCESS)
+        self.assertEqual(len(glob(join(self.output_path, "*.json"))), 4)
+
+    def test_failing_measurement_stops_execution(self):
+        manager = self.create_manager(QUEUE)
+        manager.exp.to_do_list[1].measurement.algorithm = Mock(side_effect=RuntimeError("instrument on fire"))
+        manager.exp.run()
+
+        self.assertEqual(len(manager.exp.failed_todos), 1)
+        self.assertEqual(len(manager.exp.to_do_list), 3)
+        self.assertEqual(len(glob(join(self.output_path, "*_error.json"))), 1)
+
+    def test_failing_measurement_is_skipped_with_keep_going(self):
+        manager = self.create_manager(QUEUE, keep_going=True)
+        manager.exp.to_do_list[1].measurement.algorithm = Mock(side_effect=RuntimeError("instrument on fire"))
+        manager.exp.run()
+
+        self.assertEqual(len(manager.exp.failed_todos), 1)
+        self.assertListEqual(manager.exp.to_do_list, [])
+        self.assertEqual(len(glob(join(self.output_path, "*_error.json"))), 1)
+        self.assertEqual(len(glob(join(self.output_path, "*.json"))), 4)
+
+    def test_invalid_queue_is_rejected(self):
+        for invalid_todo in [
+            {"measurement": "NoSuchMeasurement"},
+            {"measurement": "DummyMeas", "devices": ["42"]},
+            {"measurement": "DummyMeas", "parameters": {"no such parameter": 1}},
+            {"measurement": "DummyMeas", "unknown key": 1},
+        ]:
+            self.write_queue({"todos": [invalid_todo]})
+            exit_code = run_queue(self.queue_path, self.chip_path, output_path=self.output_path,
+                                  stream=io.StringIO())
+            self.assertEqual(exit_code, EXIT_CONFIGURATION_ERROR)
+
+    def test_measurement_error_exit_code(self):
+        self.write_queue({"todos": [{"measurement": "InsertionLossSweep", "parameters": {"sweep speed": -1.0}}]})
+        exit_code = run_queue(self.queue_path, self.chip_path, output_path=self.output_path, stream=io.StringIO())
+        self.assertEqual(exit_code, EXIT_MEASUREMENT_ERROR)
+
+    def test_select_instrument(self):
+        config = {"Instruments": {"SMU": [
+            {"visa": "a", "class": "SMU1", "channels": [3, 4]},
+            {"visa": "b", "class": "SMU2"},
+        ]}}
+        self.assertDictEqual(select_instrument(config, "SMU"),
+                             {"visa": "a", "class": "SMU1", "channels": [3, 4], "channel": 3})
+        self.assertDictEqual(select_instrument(config, "SMU 2", 1), {"visa": "b", "class": "SMU2", "channel": None})
+        self.assertEqual(select_instrument(config, "SMU", {"visa": "a", "channel": 4})["channel"], 4)
+        with self.assertRaises(QueueDescriptionError):
+            select_instrument(config, "Laser")
+        with self.assertRaises(QueueDescriptionError):
+            select_instrument(config, "SMU", {"class": "SMU3"})
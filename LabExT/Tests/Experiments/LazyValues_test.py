@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import os
+import unittest
+
+import numpy as np
+
+from LabExT.Experiments.LazyValues import LazyValues, ValuesCache, ValuesStore, materialize_values
+
+
+class ValuesCacheTest(unittest.TestCase):
+
+    def test_least_recently_used_arrays_are_evicted(self):
+        cache = ValuesCache(max_bytes=3 * 80)
+        for key in "abc":
+            cache.put(key, np.zeros(10))
+        cache.get("a")
+        cache.put("d", np.zeros(10))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.nbytes, 3 * 80)
+
+        cache.resize(80)
+        self.assertEqual(len(cache), 1)
+        self.assertIsNotNone(cache.get("a"))
+
+    def test_arrays_larger_than_the_cache_are_not_cached(self):
+        cache = ValuesCache(max_bytes=80)
+        cache.put("a", np.zeros(10))
+        cache.put("b", np.zeros(11))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+
+
+class ValuesStoreTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.store = ValuesStore(cache_size_mb=1)
+
+    def tearDown(self) -> None:
+        self.store.close()
+
+    def test_offloaded_values_are_read_back(self):
+        values = {
+            "transmission": [0.5, 0.25, 0.125],
+            "indices": [1, 2, 3],
+            "matrix": [[1.0, 2.0], [3.0, 4.0]],
+            "labels": ["a", "b"],
+            "empty": [],
+        }
+        lazy = self.store.offload(values)
+
+        self.assertIsInstance(lazy, LazyValues)
+        self.assertListEqual(list(lazy.keys()), list(values.keys()))
+        for key, vector in values.items():
+            self.assertListEqual(np.asarray(lazy[key]).tolist(), vector)
+        self.assertEqual(lazy["indices"].dtype, np.asarray(values["indices"]).dtype)
+        self.assertFalse(lazy["transmission"].flags.writeable)
+        self.assertIs(self.store.offload(lazy), lazy)
+
+        # stored as JSON exactly like the original values
+        self.assertEqual(json.dumps(materialize_values(lazy)), json.dumps(values))
+
+    def test_values_are_read_from_disk_only_on_cache_miss(self):
+        lazy = self.store.offload({"x": list(range(1000))})
+        self.assertEqual(len(self.store.cache), 0)
+        first = lazy["x"]
+        self.assertEqual(len(self.store.cache), 1)
+        self.assertIs(lazy["x"], first)
+
+        self.store.set_cache_size(0)
+        self.assertEqual(len(self.store.cache), 0)
+        self.assertIsNot(lazy["x"], first)
+
+    def test_release_deletes_the_values_file(self):
+        lazy = self.store.offload({"x": [1.0, 2.0]})
+        _ = lazy["x"]
+        self.assertTrue(os.path.isfile(lazy.file_path))
+
+        self.store.release(lazy)
+        self.assertFalse(os.path.isfile(lazy.file_path))
+        self.assertEqual(len(self.store.cache), 0)
+
+        directory = self.store.directory
+        self.store.close()
+        self.assertFalse(os.path.isdir(directory))
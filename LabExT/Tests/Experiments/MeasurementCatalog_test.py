@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import datetime
+import json
+import os
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from LabExT.Experiments.MeasurementCatalog import MeasurementCatalog
+from LabExT.Experiments.ResultCompression import open_result_file
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Tests.Utils import TEST_DEVICES, headless_experiment
+
+DEVICE = TEST_DEVICES[0]
+
+
+def measurement_dict(chip="ChipA", device_id=1, name="DummyMeas", start="2024-05-03T14:12:31.084313", error=None):
+    meas_dict = {
+        "chip": {"name": chip},
+        "device": {"id": device_id, "type": "MZM"},
+        "measurement name": name,
+        "measurement id long": f"{chip}{device_id}{name}{start}",
+        "timestamp iso start": start,
+        "timestamp end": "2024-05-03_141240",
+        "finished": error is None,
+        "measurement settings": {"mean": {"value": 1.0, "unit": "dB"}},
+        "values": {"transmission [dB]": [-3.0, -1.0, -2.0], "label": ["a", "b", "c"]},
+    }
+    if error is not None:
+        meas_dict["error"] = {"type": "RuntimeError", "desc": error}
+    return meas_dict
+
+
+class MeasurementCatalogTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.catalog = MeasurementCatalog(join(self.tmp_dir.name, "catalog.sqlite"))
+
+    def tearDown(self) -> None:
+        self.catalog.close()
+        self.tmp_dir.cleanup()
+
+    def write(self, file_name, meas_dict):
+        file_path = join(self.tmp_dir.name, file_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open_result_file(file_path, "w") as fp:
+            json.dump(meas_dict, fp)
+        return file_path
+
+    def test_add_and_query(self):
+        for i, (chip, device_id, name, start, error) in enumerate([
+            ("ChipA", 1, "DummyMeas", "2024-05-01T10:00:00", None),
+            ("ChipA", 2, "DummyMeas", "2024-05-02T10:00:00", "laser off"),
+            ("ChipB", 1, "InsertionLossSweep", "2024-05-03T10:00:00", None),
+        ]):
+            meas_dict = measurement_dict(chip, device_id, name, start, error)
+            self.catalog.add(meas_dict, self.write(f"meas{i:d}.json", meas_dict))
+
+        self.assertEqual(len(self.catalog), 3)
+        self.assertListEqual([e.device_id for e in self.catalog.query(chip="ChipA")], ["2", "1"])
+        self.assertListEqual([e.chip for e in self.catalog.query(device_id=1)], ["ChipB", "ChipA"])
+        self.assertEqual(len(self.catalog.query(measurement_name="InsertionLossSweep")), 1)
+        self.assertEqual(len(self.catalog.query(since=datetime.datetime(2024, 5, 2))), 2)
+        self.assertEqual(len(self.catalog.query(until=datetime.datetime(2024, 5, 2))), 1)
+        self.assertEqual(len(self.catalog.query(include_errors=False)), 2)
+        self.assertEqual(len(self.catalog.query(limit=1)), 1)
+        self.assertListEqual(self.catalog.distinct("chip"), ["ChipA", "ChipB"])
+        with self.assertRaises(ValueError):
+            self.catalog.distinct("file_path")
+
+        entry, = self.catalog.query(chip="ChipA", device_id=2)
+        self.assertEqual(entry.error, "laser off")
+        self.assertFalse(entry.finished)
+        self.assertEqual(entry.parameters, {"mean": 1.0})
+        self.assertEqual(entry.metrics["transmission [dB]"], {"min": -3.0, "max": -1.0, "mean": -2.0, "points": 3})
+        self.assertNotIn("label", entry.metrics)
+
+    def test_prune(self):
+        meas_dict = measurement_dict()
+        file_path = self.write("meas.json", meas_dict)
+        self.catalog.add(meas_dict, file_path)
+        os.remove(file_path)
+        self.assertEqual(self.catalog.prune(), 1)
+        self.assertEqual(len(self.catalog), 0)
+
+    def index_directory(self, max_workers):
+        for i in range(5):
+            self.write(join("sub", f"meas{i:d}.json.gz"), measurement_dict(device_id=i))
+        self.write("broken.json", {"no": "measurement"})
+        with open(join(self.tmp_dir.name, "notes.txt"), "w") as fp:
+            fp.write("not a data file")
+
+        progress = []
+        result = self.catalog.index_directory(self.tmp_dir.name, max_workers=max_workers, batch_size=2,
+                                              progress=lambda n, total: progress.append((n, total)))
+        self.assertEqual(result.indexed, 5)
+        self.assertEqual(list(result.failed), [join(self.tmp_dir.name, "broken.json")])
+        self.assertEqual(progress[-1], (6, 6))
+        self.assertListEqual(self.catalog.distinct("device_id"), ["0", "1", "2", "3", "4"])
+
+        # unchanged files are not read again
+        result = self.catalog.index_directory(self.tmp_dir.name, max_workers=max_workers)
+        self.assertEqual((result.indexed, result.unchanged), (0, 5))
+
+        result = self.catalog.index_directory(self.tmp_dir.name, recursive=False, max_workers=max_workers)
+        self.assertEqual((result.indexed, result.unchanged, len(result.failed)), (0, 0, 1))
+
+    def test_index_directory_in_calling_thread(self):
+        self.index_directory(max_workers=1)
+
+    def test_index_directory_in_worker_processes(self):
+        self.index_directory(max_workers=2)
+
+    def test_experiment_adds_saved_measurements(self):
+        experiment = headless_experiment("CatalogChip", output_path=self.tmp_dir.name,
+                                         settings={"measurement_catalog": True, "journal_queue": False})
+        experiment.measurement_catalog = self.catalog
+        measurement = experiment.create_measurement_object("DummyMeas")
+        measurement.parameters["total measurement time"].value = 0.0
+        experiment.to_do_list.append(ToDo(DEVICE, measurement))
+        experiment.run()
+
+        entry, = self.catalog.query(chip="CatalogChip")
+        self.assertEqual(entry.file_path, os.path.abspath(experiment.measurements[0]["file_path_known"]))
+        self.assertEqual(entry.measurement_name, "DummyMeas")
+        self.assertEqual(entry.device_id, "0")
+        self.assertTrue(entry.finished)
+        self.assertIn("total measurement time", entry.parameters)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import datetime
+import os
+import time
+import unittest
+import uuid
+from os.path import join
+from tempfile import TemporaryDirectory
+from threading import Event
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+from LabExT.Experiments.MeasurementPipeline import MeasurementPipeline
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Tests.Utils import TEST_DEVICES, headless_experiment
+
+DEVICES = TEST_DEVICES[:3]
+
+
+class FixedDatetime(datetime.datetime):
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2021, 5, 3, 14, 0, 0)
+
+
+class MeasurementPipelineTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.pipeline = MeasurementPipeline()
+
+    def tearDown(self) -> None:
+        self.pipeline.shutdown()
+
+    def test_save_runs_in_background(self):
+        may_finish = Event()
+        future = self.pipeline.submit_save(may_finish.wait, 5.0)
+        self.assertFalse(future.done())
+
+        may_finish.set()
+        self.assertTrue(future.result())
+
+    def test_save_errors_are_raised_by_the_future(self):
+        def save():
+            raise OSError("disk full")
+
+        with self.assertRaises(OSError):
+            self.pipeline.submit_save(save).result()
+
+    def test_finish_movement_for_prefetched_device(self):
+        moved_to = []
+        device_a = object()
+        device_b = object()
+
+        self.pipeline.start_movement(device_a, moved_to.append, device_a)
+        self.assertTrue(self.pipeline.finish_movement(device_a))
+        self.assertListEqual(moved_to, [device_a])
+
+        # nothing prefetched anymore
+        self.assertFalse(self.pipeline.finish_movement(device_a))
+
+        # prefetched device does not match, caller must move itself
+        self.pipeline.start_movement(device_a, moved_to.append, device_a)
+        self.assertFalse(self.pipeline.finish_movement(device_b))
+
+    def test_finish_movement_reraises_errors(self):
+        def move():
+            raise ValueError("stage error")
+
+        device = object()
+        self.pipeline.start_movement(device, move)
+        with self.assertRaises(ValueError):
+            self.pipeline.finish_movement(device)
+
+
+class PipelinedExecutionTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def run_queue(self, pipelined: bool) -> dict:
+        """Runs the same queue with fixed ids, timestamps and values and returns the content of the saved files."""
+        output_path = join(self.tmp_dir.name, "pipelined" if pipelined else "sequential")
+        experiment = headless_experiment("PipelineChip", DEVICES, output_path=output_path,
+                                         settings={"pipelined_execution": pipelined})
+        for idx, device in enumerate(2 * DEVICES):
+            measurement = experiment.create_measurement_object("DummyMeas")
+            measurement.parameters["total measurement time"].value = 0.0
+            measurement._id = uuid.UUID(int=idx)
+            experiment.to_do_list.append(ToDo(device, measurement))
+
+        np.random.seed(0)
+        fixed_datetime = SimpleNamespace(datetime=FixedDatetime)
+        with patch("LabExT.Experiments.StandardExperiment.datetime", fixed_datetime), \
+                patch("LabExT.Experiments.MeasurementTiming.datetime", fixed_datetime), \
+                patch("LabExT.Experiments.MeasurementTiming.perf_counter", return_value=0.0):
+            experiment.run()
+
+        self.assertListEqual(experiment.to_do_list, [])
+        self.assertEqual(len(experiment.measurements), 6)
+        files = {}
+        for file_name in os.listdir(output_path):
+            with open(join(output_path, file_name), "rb") as fp:
+                files[file_name] = fp.read()
+        return files
+
+    def test_saved_files_are_identical_to_sequential_execution(self):
+        sequential = self.run_queue(pipelined=False)
+        pipelined = self.run_queue(pipelined=True)
+
+        self.assertEqual(len(sequential), 6)
+        self.assertListEqual(sorted(pipelined), sorted(sequential))
+        for file_name, content in sequential.items():
+            self.assertEqual(pipelined[file_name], content, file_name)
+
+    def test_movement_is_finished_before_save_errors_are_raised(self):
+        experiment = headless_experiment("PipelineChip", DEVICES, output_path=join(self.tmp_dir.name, "out"),
+                                         settings={"pipelined_execution": True})
+        for device in DEVICES[:2]:
+            measurement = experiment.create_measurement_object("DummyMeas")
+            measurement.parameters["total measurement time"].value = 0.0
+            experiment.to_do_list.append(ToDo(device, measurement))
+
+        moved_to = []
+
+        def move_to_device(chip, device):
+            time.sleep(0.2)
+            moved_to.append(device)
+
+        experiment.exctrl_auto_move_stages = True
+        experiment._mover = Mock(move_to_device=move_to_device)
+        experiment._save_todo_data = Mock(side_effect=OSError("disk full"))
+
+        pipeline = MeasurementPipeline()
+        try:
+            with self.assertRaises(OSError):
+                experiment._execute_to_do_list(pipeline)
+            # the movement to the next device was waited for
+            self.assertListEqual(moved_to, DEVICES[:2])
+        finally:
+            pipeline.shutdown()
+        self.assertEqual(len(experiment.to_do_list), 2)
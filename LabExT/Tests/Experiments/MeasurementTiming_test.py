@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import csv
+import json
+import unittest
+from glob import glob
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from LabExT.Experiments.MeasurementTiming import PHASE_MEASUREMENT, PHASE_SAVING, PhaseTimer, ThroughputStatistics
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Tests.Utils import TEST_DEVICES, headless_experiment
+
+DEVICES = TEST_DEVICES[:3]
+
+
+def timer_with_phases(device_id, **durations):
+    timer = PhaseTimer(device_id=device_id, measurement_name="DummyMeas")
+    for name, duration in durations.items():
+        timer.add(name.replace("_", " "), timer.start_time, timer.start_time + duration)
+    return timer
+
+
+class MeasurementTimingTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_repeated_phases_are_accumulated(self):
+        timer = PhaseTimer()
+        with timer.phase("instrument snapshot"):
+            pass
+        with timer.phase("measurement"):
+            pass
+        with timer.phase("instrument snapshot"):
+            pass
+
+        timing = timer.as_dict()
+        self.assertListEqual(list(timing["phases"]), ["instrument snapshot", "measurement"])
+        self.assertLessEqual(timing["phases"]["instrument snapshot"]["start"],
+                             timing["phases"]["measurement"]["start"])
+        self.assertGreaterEqual(timing["elapsed"], sum(p["duration"] for p in timing["phases"].values()))
+
+    def test_summary(self):
+        statistics = ThroughputStatistics()
+        for device_id, duration in [("1", 1.0), ("2", 2.0), ("2", 3.0)]:
+            statistics.add(timer_with_phases(device_id, measurement=duration, saving=0.5))
+        statistics.add(timer_with_phases("3", measurement=10.0, saving=0.5, gui_refresh=0.1))
+
+        summary = statistics.summary()
+        self.assertEqual(summary["todos"], 4)
+        self.assertEqual(summary["devices"], 3)
+        self.assertListEqual(list(summary["phases"]), [PHASE_MEASUREMENT, PHASE_SAVING, "gui refresh"])
+        measurement = summary["phases"][PHASE_MEASUREMENT]
+        self.assertEqual(measurement["count"], 4)
+        self.assertAlmostEqual(measurement["mean"], 4.0)
+        self.assertAlmostEqual(measurement["total"], 16.0)
+        self.assertNotIn("p50", measurement)
+        self.assertEqual(summary["phases"]["gui refresh"]["count"], 1)
+        # the sum of the elapsed times, regardless of the time in between the ToDos
+        self.assertAlmostEqual(summary["execution time"], 16.0)
+        self.assertAlmostEqual(summary["todos per hour"], 900.0)
+        self.assertGreater(summary["todos per hour"], summary["devices per hour"])
+
+        statistics.reset()
+        self.assertEqual(statistics.summary()["todos"], 0)
+
+    def test_export(self):
+        statistics = ThroughputStatistics()
+        statistics.add(timer_with_phases("1", measurement=1.0))
+        statistics.add(timer_with_phases("2", measurement=2.0, sweep_summary=0.2))
+
+        csv_path = join(self.tmp_dir.name, "timing.csv")
+        statistics.export_csv(csv_path)
+        with open(csv_path, newline="") as fp:
+            rows = list(csv.DictReader(fp))
+        self.assertListEqual([r["device id"] for r in rows], ["1", "2"])
+        self.assertEqual(float(rows[1]["measurement [s]"]), 2.0)
+        self.assertEqual(rows[0]["sweep summary [s]"], "")
+
+        json_path = join(self.tmp_dir.name, "timing.json")
+        statistics.export_json(json_path)
+        with open(json_path) as fp:
+            content = json.load(fp)
+        self.assertEqual(content["summary"]["todos"], 2)
+        self.assertAlmostEqual(content["summary"]["phases"]["measurement"]["p50"], 1.5)
+        self.assertAlmostEqual(content["summary"]["phases"]["measurement"]["p95"], 1.95)
+        self.assertEqual(content["todos"][1]["phases"]["sweep summary"]["duration"], 0.2)
+
+    def test_executed_todos_are_timed(self):
+        output_path = join(self.tmp_dir.name, "out")
+        experiment = headless_experiment("TimingChip", DEVICES, output_path=output_path)
+        for device in DEVICES:
+            measurement = experiment.create_measurement_object("DummyMeas")
+            measurement.parameters["total measurement time"].value = 0.0
+            experiment.to_do_list.append(ToDo(device, measurement))
+        experiment.run()
+
+        saved_files = glob(join(output_path, "*.json"))
+        self.assertEqual(len(saved_files), 3)
+        for file_path in saved_files:
+            with open(file_path) as fp:
+                timing = json.load(fp)["timing"]
+            self.assertIn("measurement", timing["phases"])
+            self.assertIn("instrument snapshot", timing["phases"])
+            # the file is written after the timing is stored
+            self.assertNotIn("saving", timing["phases"])
+
+        summary = experiment.throughput_statistics.summary()
+        self.assertEqual(summary["todos"], 3)
+        self.assertEqual(summary["phases"]["saving"]["count"], 3)
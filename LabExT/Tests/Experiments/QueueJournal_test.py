@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import os
+import unittest
+from glob import glob
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+from LabExT.Experiments.QueueJournal import QueueJournal, restore_todos
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Tests.Utils import TEST_DEVICES, headless_experiment
+from LabExT.View.EditMeasurementWizard.WizardEntry.SaveButtons import create_parameter_sweep_todos
+
+DEVICES = TEST_DEVICES
+
+
+class QueueJournalTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.output_path = join(self.tmp_dir.name, "out")
+        self.journal_path = join(self.tmp_dir.name, "journal.jsonl")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def create_experiment(self):
+        """Creates a fresh experiment, as after a restart of LabExT."""
+        experiment = headless_experiment("JournalChip", DEVICES, output_path=self.output_path,
+                                         settings={"journal_queue": True})
+        experiment.queue_journal = QueueJournal(self.journal_path)
+        return experiment
+
+    def journal_records(self):
+        with open(self.journal_path) as fp:
+            return [json.loads(line) for line in fp]
+
+    @staticmethod
+    def dummy_todo(experiment, device, mean=0.0):
+        measurement = experiment.create_measurement_object("DummyMeas")
+        measurement.parameters["total measurement time"].value = 0.0
+        measurement.parameters["mean"].value = mean
+        return ToDo(device, measurement)
+
+    @staticmethod
+    def crash_in_todo(experiment, todo):
+        """Simulates a crash of LabExT while the given ToDo writes its data."""
+        def crashing_algorithm(device, data, instruments, parameters):
+            data.save()
+            raise KeyboardInterrupt()
+        todo.measurement.algorithm = crashing_algorithm
+
+        # a crashed process never saves the data of the ToDo
+        save_todo_data = experiment._save_todo_data
+
+        def save_unless_crashed(measurement, *args, **kwargs):
+            if measurement is todo.measurement:
+                raise KeyboardInterrupt()
+            save_todo_data(measurement, *args, **kwargs)
+        experiment._save_todo_data = save_unless_crashed
+
+    def test_resume_after_crash(self):
+        experiment = self.create_experiment()
+        experiment.to_do_list.extend(self.dummy_todo(experiment, d, mean=float(d.id)) for d in DEVICES)
+        keys = [t.measurement.id.hex for t in experiment.to_do_list]
+        self.crash_in_todo(experiment, experiment.to_do_list[2])
+
+        with self.assertRaises(KeyboardInterrupt):
+            experiment.run()
+        self.assertEqual(len(glob(join(self.output_path, "*.json"))), 2)
+        self.assertEqual(len(glob(join(self.output_path, "*.json.part"))), 1)
+
+        experiment = self.create_experiment()
+        state = experiment.queue_journal.load()
+        self.assertListEqual(state.pending, keys[2:])
+        self.assertEqual(len(state.finished), 2)
+
+        self.assertEqual(len(QueueJournal.remove_partial_files(state)), 1)
+        self.assertListEqual(glob(join(self.output_path, "*.json.part")), [])
+
+        todos, failed = restore_todos(experiment, state)
+        self.assertListEqual(failed, [])
+        self.assertListEqual([t.measurement.id.hex for t in todos], keys[2:])
+        self.assertListEqual([t.device.id for t in todos], ["2", "3", "4"])
+        self.assertListEqual([t.measurement.parameters["mean"].value for t in todos], [2.0, 3.0, 4.0])
+
+        experiment.to_do_list.extend(todos)
+        experiment.queue_journal.rewrite(experiment.to_do_list)
+        experiment.run()
+
+        self.assertListEqual(experiment.to_do_list, [])
+        self.assertEqual(len(glob(join(self.output_path, "*.json"))), 5)
+        # the journal is deleted once the queue is finished
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_failed_todos_stay_pending(self):
+        experiment = self.create_experiment()
+        experiment.to_do_list.extend(self.dummy_todo(experiment, d) for d in DEVICES[:2])
+        experiment.to_do_list[0].measurement.parameters["simulate measurement error"].value = True
+        experiment.run()
+
+        state = experiment.queue_journal.load()
+        self.assertListEqual(state.pending, [t.measurement.id.hex for t in experiment.to_do_list])
+        self.assertEqual(len(state.pending), 2)
+        self.assertDictEqual(state.started, {})
+
+    def test_resume_sweep(self):
+        experiment = self.create_experiment()
+        template = experiment.create_measurement_object("DummyMeas")
+        template.parameters["total measurement time"].value = 0.0
+        create_parameter_sweep_todos(experiment, {"mean": (pd.Series([0.0, 1.0, 2.0, 3.0]), None)}, template,
+                                     DEVICES[0])
+        keys = [t.measurement.id.hex for t in experiment.to_do_list]
+        self.crash_in_todo(experiment, experiment.to_do_list[2])
+
+        with self.assertRaises(KeyboardInterrupt):
+            experiment.run()
+        sweep_folders = glob(join(self.output_path, "*"))
+        self.assertEqual(len(sweep_folders), 1)
+
+        experiment = self.create_experiment()
+        state = experiment.queue_journal.load()
+        QueueJournal.remove_partial_files(state)
+        todos, _ = restore_todos(experiment, state)
+        self.assertListEqual([t.measurement.id.hex for t in todos], keys[2:])
+        self.assertTrue(all(t.part_of_sweep for t in todos))
+        self.assertIs(todos[0].sweep_parameters, todos[1].sweep_parameters)
+        self.assertListEqual(list(todos[0].sweep_parameters["metadata", "finished"]), [True, True, False, False])
+
+        experiment.to_do_list.extend(todos)
+        experiment.run()
+
+        # the remaining measurements are stored into the same folder, the sweep summary lists all of them
+        self.assertListEqual(glob(join(self.output_path, "*")), sweep_folders)
+        # the summary of the interrupted run is kept next to the complete one
+        summaries = []
+        for summary_path in glob(join(sweep_folders[0], "*_sweep_summary.json")):
+            with open(summary_path) as fp:
+                summaries.append(json.load(fp)["sweep_association_list"])
+        self.assertEqual(len(summaries), 2)
+        complete = [s for s in summaries if all("file_path" in e["metadata"] for e in s)]
+        self.assertEqual(len(complete), 1)
+        self.assertListEqual([e["metadata"]["id"] for e in complete[0]], keys)
+
+    def test_unchanged_queue_is_not_rewritten(self):
+        experiment = self.create_experiment()
+        experiment.to_do_list.extend(self.dummy_todo(experiment, d) for d in DEVICES)
+        journal = experiment.queue_journal
+
+        journal.record_queue(experiment.to_do_list)
+        size = os.path.getsize(self.journal_path)
+        journal.record_queue(experiment.to_do_list)
+        self.assertEqual(os.path.getsize(self.journal_path), size)
+
+        # a reordered queue only adds the new order
+        experiment.to_do_list.reverse()
+        journal.record_queue(experiment.to_do_list)
+        self.assertListEqual(journal.load().pending, [t.measurement.id.hex for t in experiment.to_do_list])
+
+    def test_queue_changes_are_journaled(self):
+        experiment = self.create_experiment()
+        experiment.to_do_list.extend(self.dummy_todo(experiment, d) for d in DEVICES)
+        todo_list = experiment.to_do_list
+
+        def pending():
+            return QueueJournal(self.journal_path).load().pending
+
+        self.assertListEqual(pending(), [t.measurement.id.hex for t in todo_list])
+        # the edits of the ToDo queue frame
+        removed = todo_list.pop(1)
+        # only the removed key is written, not the whole queue
+        self.assertDictEqual(self.journal_records()[-1], {"op": "change", "removed": [removed.measurement.id.hex]})
+        todo_list[0], todo_list[1] = todo_list[1], todo_list[0]
+        todo_list.insert(2, self.dummy_todo(experiment, DEVICES[0]))
+        todo_list.append(self.dummy_todo(experiment, DEVICES[1]))
+        self.assertListEqual(pending(), [t.measurement.id.hex for t in todo_list])
+
+        todo_list.clear()
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_moved_todo_is_journaled_by_position(self):
+        experiment = self.create_experiment()
+        experiment.to_do_list.extend(self.dummy_todo(experiment, d) for d in DEVICES)
+        todo_list = experiment.to_do_list
+
+        todo_list.insert(1, todo_list.pop())
+        self.assertDictEqual(self.journal_records()[-1],
+                             {"op": "change", "removed": [], "inserted": [[1, todo_list[1].measurement.id.hex]]})
+        self.assertListEqual(QueueJournal(self.journal_path).load().pending,
+                             [t.measurement.id.hex for t in todo_list])
+
+    def test_sweep_todos_are_defined_by_their_sweep(self):
+        experiment = self.create_experiment()
+        template = experiment.create_measurement_object("DummyMeas")
+        create_parameter_sweep_todos(experiment, {"mean": (pd.Series([0.0, 1.0, 2.0, 3.0]), None)}, template,
+                                     DEVICES[0])
+
+        ops = [r["op"] for r in self.journal_records()]
+        self.assertEqual(ops.count("sweep"), 1)
+        self.assertNotIn("todo", ops)
+
+        state = experiment.queue_journal.load()
+        keys = [t.measurement_id_hex for t in experiment.to_do_list]
+        self.assertListEqual(state.pending, keys)
+        self.assertListEqual([state.definition(k)["parameters"]["mean"] for k in keys], [0.0, 1.0, 2.0, 3.0])
+        self.assertIsNone(state.definition("unknown"))
+
+    def test_queue_changes_are_not_journaled_if_disabled(self):
+        experiment = self.create_experiment()
+        experiment._meas_control_settings.journal_queue = False
+        experiment.to_do_list.extend(self.dummy_todo(experiment, d) for d in DEVICES)
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_journal_is_compacted(self):
+        experiment = self.create_experiment()
+        experiment.to_do_list.extend(self.dummy_todo(experiment, d) for d in DEVICES)
+        journal = experiment.queue_journal
+        journal.COMPACTION_MIN_FINISHED = 2
+
+        journal.record_queue(experiment.to_do_list)
+        for todo in experiment.to_do_list[:3]:
+            journal.record_finished(todo, "somewhere.json", success=True)
+        del experiment.to_do_list[:3]
+        journal.record_queue(experiment.to_do_list)
+
+        state = journal.load()
+        self.assertEqual(len(state.definitions), 2)
+        self.assertDictEqual(state.finished, {})
+        self.assertListEqual(state.pending, [t.measurement.id.hex for t in experiment.to_do_list])
+
+    def test_corrupt_last_line_is_ignored(self):
+        experiment = self.create_experiment()
+        experiment.to_do_list.extend(self.dummy_todo(experiment, d) for d in DEVICES[:2])
+        experiment.queue_journal.record_queue(experiment.to_do_list)
+        with open(self.journal_path, "a") as fp:
+            fp.write('{"op": "finished", "ke')
+
+        state = experiment.queue_journal.load()
+        self.assertEqual(len(state.pending), 2)
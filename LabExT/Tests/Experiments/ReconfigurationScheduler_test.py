@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import random
+import unittest
+from unittest.mock import Mock
+
+from LabExT.Experiments.ReconfigurationScheduler import batch_todos_by_instrument_settings, \
+    queue_reconfiguration_cost, queue_setting_changes, reconfiguration_cost
+from LabExT.Experiments.ToDo import ToDo, DictionaryWrapper
+from LabExT.Measurements.InsertionLossSweep import InsertionLossSweep
+from LabExT.Measurements.ReadOSA import ReadOSA
+from LabExT.Wafer.Device import Device
+
+DEVICE_A = Device(id="A", type="test", in_position=[0, 0], out_position=[100, 0])
+DEVICE_B = Device(id="B", type="test", in_position=[0, 500], out_position=[100, 500])
+
+
+def il_sweep_todo(device, start=1530.0, power=6.0, **sweep_kwargs):
+    meas = InsertionLossSweep()
+    meas.parameters['wavelength start'].value = start
+    meas.parameters['laser power'].value = power
+    return ToDo(device, meas, **sweep_kwargs)
+
+
+def osa_todo(device, center=1550.0):
+    meas = ReadOSA()
+    meas.parameters['OSA center wavelength'].value = center
+    return ToDo(device, meas)
+
+
+class ReconfigurationSchedulerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(42)
+
+    def test_reconfiguration_cost(self):
+        full_cost = sum(InsertionLossSweep.get_instrument_setting_costs().values())
+        first = il_sweep_todo(DEVICE_A)
+        self.assertEqual(reconfiguration_cost(None, first), full_cost)
+        self.assertEqual(reconfiguration_cost(first, il_sweep_todo(DEVICE_A)), 0)
+        # power changes are cheaper than wavelength range changes
+        power_cost = reconfiguration_cost(first, il_sweep_todo(DEVICE_A, power=0.0))
+        range_cost = reconfiguration_cost(first, il_sweep_todo(DEVICE_A, start=1540.0))
+        self.assertGreater(power_cost, 0)
+        self.assertGreater(range_cost, power_cost)
+        # a different measurement requires a full setup
+        osa = osa_todo(DEVICE_A)
+        self.assertEqual(reconfiguration_cost(first, osa), sum(ReadOSA.get_instrument_setting_costs().values()))
+
+    def test_setting_changes(self):
+        todos = [il_sweep_todo(DEVICE_A), il_sweep_todo(DEVICE_A), il_sweep_todo(DEVICE_A, power=0.0),
+                 osa_todo(DEVICE_A)]
+        n_groups = len(InsertionLossSweep.get_instrument_setting_costs())
+        self.assertEqual(queue_setting_changes(todos), n_groups + 0 + 1 + len(ReadOSA.get_instrument_setting_costs()))
+
+    def test_mixed_queue_is_grouped(self):
+        todos = [il_sweep_todo(DEVICE_A)]
+        for _ in range(20):
+            if random.random() > 0.5:
+                todos.append(osa_todo(DEVICE_A, center=random.choice([1550.0, 1560.0])))
+            else:
+                todos.append(il_sweep_todo(DEVICE_A, start=random.choice([1530.0, 1540.0]),
+                                           power=random.choice([0.0, 6.0])))
+        original = list(todos)
+
+        result = batch_todos_by_instrument_settings(todos)
+        result.apply(todos)
+
+        self.assertIs(todos[0], original[0])
+        self.assertCountEqual([id(t) for t in todos], [id(t) for t in original])
+        self.assertTrue(result.reordered)
+        self.assertLess(result.batched_cost, result.original_cost)
+        self.assertEqual(result.batched_cost, queue_reconfiguration_cost(todos))
+        self.assertEqual(result.original_cost, queue_reconfiguration_cost(original))
+        self.assertLess(result.batched_setting_changes, result.original_setting_changes)
+        self.assertEqual(result.batched_setting_changes, queue_setting_changes(todos))
+
+        # after the first ToDo, all InsertionLossSweeps and all ReadOSAs are executed back-to-back
+        classes = [type(t.measurement) for t in todos[1:]]
+        n_changes = sum(1 for a, b in zip(classes[:-1], classes[1:]) if a is not b)
+        self.assertLessEqual(n_changes, 1)
+
+    def test_only_adjacent_todos_on_same_device_are_reordered(self):
+        todos = [
+            il_sweep_todo(DEVICE_A, start=1530.0),
+            il_sweep_todo(DEVICE_A, start=1540.0),
+            il_sweep_todo(DEVICE_B, start=1530.0),
+            il_sweep_todo(DEVICE_A, start=1530.0),
+            il_sweep_todo(DEVICE_A, start=1540.0),
+            il_sweep_todo(DEVICE_A, start=1530.0),
+        ]
+        result = batch_todos_by_instrument_settings(todos)
+        self.assertListEqual(result.order, [0, 1, 2, 3, 5, 4])
+
+    def test_sweep_points_stay_contiguous(self):
+        wrapper = DictionaryWrapper()
+        sweep = [il_sweep_todo(DEVICE_A, power=power, part_of_sweep=True, sweep_parameters=Mock(),
+                               dictionary_wrapper=wrapper)
+                 for power in [0.0, 6.0, 0.0, 6.0]]
+        todos = [osa_todo(DEVICE_A), sweep[0], il_sweep_todo(DEVICE_A, power=0.0), sweep[1], sweep[2], sweep[3]]
+
+        result = batch_todos_by_instrument_settings(todos)
+        result.apply(todos)
+
+        sweep_positions = sorted(todos.index(t) for t in sweep)
+        self.assertListEqual(sweep_positions, list(range(sweep_positions[0], sweep_positions[0] + 4)))
+        # sweep points are sorted by laser power
+        self.assertListEqual([todos[i].measurement.parameters['laser power'].value for i in sweep_positions],
+                             [0.0, 0.0, 6.0, 6.0])
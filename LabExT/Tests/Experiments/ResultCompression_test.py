@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import gzip
+import json
+import os
+import unittest
+from glob import glob
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from LabExT.Experiments.AutosaveDict import AutosaveDict
+from LabExT.Experiments.ResultCompression import COMPRESSION_GZIP, COMPRESSION_ZSTD, compression_from_path, \
+    is_result_file, load_result_file, open_result_file, strip_compression_ending, zstd_available
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Experiments.ValuesSidecar import sidecar_directory
+from LabExT.Tests.Utils import TEST_DEVICES, headless_experiment
+
+DEVICE = TEST_DEVICES[0]
+
+
+class ResultCompressionTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_file_names(self):
+        self.assertEqual(compression_from_path("a/meas.json.gz"), COMPRESSION_GZIP)
+        self.assertEqual(compression_from_path("a/meas.json.zst"), COMPRESSION_ZSTD)
+        self.assertEqual(strip_compression_ending("a/meas_error.json.gz"), "a/meas_error.json")
+        self.assertEqual(strip_compression_ending("a/meas.json"), "a/meas.json")
+        self.assertEqual(sidecar_directory("a/meas.json.gz"), "a/meas_values")
+        self.assertTrue(is_result_file("meas.JSON"))
+        self.assertTrue(is_result_file("meas.json.zst"))
+        self.assertFalse(is_result_file("meas.json.part"))
+
+    def test_gzip_round_trip(self):
+        file_path = join(self.tmp_dir.name, "meas.json.gz")
+        with open_result_file(file_path, "w") as fp:
+            json.dump({"values": {"x": [1, 2]}}, fp)
+        with gzip.open(file_path, "rt") as fp:
+            self.assertEqual(json.load(fp), {"values": {"x": [1, 2]}})
+        self.assertEqual(load_result_file(file_path), {"values": {"x": [1, 2]}})
+
+    def test_compression_is_detected_from_content(self):
+        file_path = join(self.tmp_dir.name, "renamed.json")
+        with open_result_file(file_path, "w", compression=COMPRESSION_GZIP) as fp:
+            fp.write('{"a": 1}')
+        self.assertEqual(load_result_file(file_path), {"a": 1})
+
+        file_path = join(self.tmp_dir.name, "plain.json")
+        with open(file_path, "w") as fp:
+            fp.write('{"a": 2}')
+        self.assertEqual(load_result_file(file_path), {"a": 2})
+
+    @unittest.skipUnless(zstd_available(), "zstandard is not installed")
+    def test_zstd_round_trip(self):
+        file_path = join(self.tmp_dir.name, "meas.json.zst")
+        with open_result_file(file_path, "w", level=10) as fp:
+            json.dump({"a": [1.5] * 100}, fp)
+        self.assertEqual(load_result_file(file_path), {"a": [1.5] * 100})
+
+    def test_autosave_dict_reports_compression(self):
+        data = AutosaveDict(file_path=join(self.tmp_dir.name, "data.json.part"), auto_save=False)
+        data["values"] = {"x": [0.125] * 1000}
+        data.save(compression=COMPRESSION_GZIP, level=9)
+
+        self.assertEqual(load_result_file(data.file_path), data)
+        self.assertEqual(data.file_size, os.path.getsize(data.file_path))
+        self.assertEqual(data.json_size, len(json.dumps(data, indent="\t")))
+        self.assertGreater(data.compression_ratio, 10)
+        self.assertGreaterEqual(data.save_time, 0.0)
+
+        data.save()
+        self.assertEqual(data.compression_ratio, 1.0)
+
+    def run_experiment(self, settings):
+        experiment = headless_experiment("CompressedChip", output_path=self.tmp_dir.name,
+                                         settings=dict(settings, journal_queue=False))
+        measurement = experiment.create_measurement_object("DummyMeas")
+        measurement.parameters["total measurement time"].value = 0.0
+        experiment.to_do_list.append(ToDo(DEVICE, measurement))
+        with self.assertLogs(level="INFO") as logs:
+            experiment.run()
+        return experiment, logs.output
+
+    def test_experiment_saves_compressed_files(self):
+        experiment, logs = self.run_experiment({"result_compression": COMPRESSION_GZIP, "binary_values": True})
+
+        self.assertListEqual(glob(join(self.tmp_dir.name, "*.json")), [])
+        file_path, = glob(join(self.tmp_dir.name, "*.json.gz"))
+        self.assertEqual(experiment.measurements[0]["file_path_known"], file_path)
+        self.assertTrue(any("compression ratio" in line for line in logs))
+
+        stored = load_result_file(file_path)
+        self.assertEqual(stored["values storage"], "npy")
+        self.assertTrue(os.path.isdir(sidecar_directory(file_path)))
+
+    @unittest.skipIf(zstd_available(), "zstandard is installed")
+    def test_zstd_falls_back_to_gzip(self):
+        _, logs = self.run_experiment({"result_compression": COMPRESSION_ZSTD})
+        self.assertEqual(len(glob(join(self.tmp_dir.name, "*.json.gz"))), 1)
+        self.assertTrue(any("zstandard package is not installed" in line for line in logs))
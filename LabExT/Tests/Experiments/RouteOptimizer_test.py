@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import random
+import unittest
+from unittest.mock import Mock
+
+from LabExT.Experiments.RouteOptimizer import optimize_todo_route
+from LabExT.Experiments.ToDo import ToDo, DictionaryWrapper
+from LabExT.Wafer.Device import Device
+
+
+def make_device(idx, x, y):
+    return Device(id=str(idx), type="test", in_position=[x, y], out_position=[x + 100, y])
+
+
+class RouteOptimizerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(42)
+
+    def test_zig_zag_queue_gets_shorter(self):
+        # devices on a line, queued in a zig-zag order
+        devices = [make_device(idx, 50 * idx, 0) for idx in range(20)]
+        zig_zag = [devices[i] for i in [0, 19, 1, 18, 2, 17, 3, 16, 4, 15, 5, 14, 6, 13, 7, 12, 8, 11, 9, 10]]
+        todos = [ToDo(d, Mock()) for d in zig_zag]
+
+        result = optimize_todo_route(todos)
+
+        self.assertGreater(result.travel_saved, 0)
+        # optimal route along the line: from device 0 straight to device 19
+        self.assertAlmostEqual(result.optimized_travel, 2 * 50 * 19)
+        self.assertEqual(result.n_devices, 20)
+
+        result.apply(todos)
+        self.assertListEqual([t.device.id for t in todos], [str(i) for i in range(20)])
+
+    def test_all_todos_kept_and_first_todo_stays_first(self):
+        devices = [make_device(idx, random.uniform(0, 5000), random.uniform(0, 5000)) for idx in range(60)]
+        todos = [ToDo(random.choice(devices), Mock()) for _ in range(200)]
+        original = list(todos)
+
+        result = optimize_todo_route(todos)
+        result.apply(todos)
+
+        self.assertIs(todos[0], original[0])
+        self.assertCountEqual([id(t) for t in todos], [id(t) for t in original])
+        self.assertLessEqual(result.optimized_travel, result.original_travel)
+
+        # ToDos of the same device are executed back-to-back in their original order
+        seen_devices = []
+        for todo in todos:
+            if not seen_devices or seen_devices[-1] != todo.device.id:
+                self.assertNotIn(todo.device.id, seen_devices)
+                seen_devices.append(todo.device.id)
+        for device in devices:
+            on_device = [t for t in original if t.device is device]
+            self.assertListEqual([t for t in todos if t.device is device], on_device)
+
+    def test_sweeps_stay_contiguous(self):
+        far, near = make_device(0, 10000, 0), make_device(1, 0, 0)
+        sweep_wrapper = DictionaryWrapper()
+        sweep = [ToDo(far, Mock(), part_of_sweep=True, sweep_parameters=Mock(), dictionary_wrapper=sweep_wrapper)
+                 for _ in range(3)]
+        single = ToDo(far, Mock())
+        todos = [ToDo(near, Mock()), sweep[0], single, sweep[1], ToDo(near, Mock()), sweep[2]]
+
+        result = optimize_todo_route(todos)
+        result.apply(todos)
+
+        sweep_positions = [todos.index(t) for t in sweep]
+        self.assertListEqual(sweep_positions, list(range(sweep_positions[0], sweep_positions[0] + 3)))
+        self.assertEqual(todos.index(single), sweep_positions[-1] + 1)
+
+    def test_devices_without_coordinates_moved_to_end(self):
+        ad_hoc = Device(id="adhoc", type="test")
+        placed = [make_device(idx, 100 * idx, 0) for idx in range(3)]
+        todos = [ToDo(placed[0], Mock()), ToDo(ad_hoc, Mock()), ToDo(placed[2], Mock()), ToDo(placed[1], Mock())]
+
+        result = optimize_todo_route(todos)
+        result.apply(todos)
+
+        self.assertEqual(result.n_unplaced_todos, 1)
+        self.assertListEqual([t.device.id for t in todos], ["0", "1", "2", "adhoc"])
+
+    def test_optimal_queue_is_not_changed(self):
+        todos = [ToDo(make_device(idx, 100 * idx, 0), Mock()) for idx in range(10)]
+        result = optimize_todo_route(todos)
+        self.assertListEqual(result.order, list(range(10)))
+        self.assertAlmostEqual(result.travel_saved, 0)
+
+    def test_apply_fails_on_changed_queue(self):
+        todos = [ToDo(make_device(idx, 100 * idx, 0), Mock()) for idx in range(3)]
+        result = optimize_todo_route(todos)
+        todos.pop(0)
+        with self.assertRaises(ValueError):
+            result.apply(todos)
+
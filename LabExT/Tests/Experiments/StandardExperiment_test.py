@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import os
+import time
+import unittest
+import uuid
+
+from LabExT.Tests.Utils import headless_experiment
+
+
+def measurement_dict(timestamp: str, device_id: int = 0) -> dict:
+    return {
+        "chip": {"name": "StoreChip"},
+        "device": {"id": device_id, "type": "test"},
+        "timestamp": timestamp,
+        "measurement name": "DummyMeas",
+        "measurement id long": uuid.uuid4().hex,
+        "values": {"x": [1, 2, 3]},
+    }
+
+
+class FinishedMeasurementsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.experiment = headless_experiment("StoreChip", devices=(),
+                                              settings={"finished_meas_limited": True, "max_finished_meas": 3})
+        self.experiment._meas_control_settings.update()
+
+        self.changes = []
+        self.experiment.measurements.items_changed.append(lambda added, removed: self.changes.append(
+            ([m["timestamp"] for m in added], [m["timestamp"] for m in removed])))
+
+    def timestamps(self):
+        return [m["timestamp"] for m in self.experiment.measurements]
+
+    def test_oldest_measurements_are_evicted(self):
+        for ts in ["2024-01-05", "2024-01-02", "2024-01-04", "2024-01-02", "2024-01-06"]:
+            self.experiment.load_measurement_dataset(measurement_dict(ts), "file.json", force_gui_update=False)
+
+        # of two measurements with the same timestamp, the one loaded first is evicted first
+        self.assertListEqual(self.timestamps(), ["2024-01-05", "2024-01-04", "2024-01-06"])
+        self.assertEqual(len(self.experiment.measurements_hashes), 3)
+        self.assertListEqual(self.changes, [([], ["2024-01-02"]), ([], ["2024-01-02"])])
+
+    def test_duplicates_are_rejected(self):
+        meas = measurement_dict("2024-01-01")
+        self.experiment.load_measurement_dataset(meas, "file.json", force_gui_update=False)
+        with self.assertRaises(ValueError):
+            self.experiment.load_measurement_dataset(dict(meas), "file.json", force_gui_update=False)
+
+    def test_removed_measurements_are_not_evicted(self):
+        datasets = [(measurement_dict(ts), "file.json") for ts in ["2024-01-01", "2024-01-02", "2024-01-03"]]
+        self.experiment.load_measurement_datasets(datasets, force_gui_update=False)
+        self.experiment.remove_measurement_dataset(datasets[0][0])
+        self.experiment.load_measurement_dataset(measurement_dict("2024-01-04"), "file.json", force_gui_update=False)
+        self.assertListEqual(self.timestamps(), ["2024-01-02", "2024-01-03", "2024-01-04"])
+
+        # removing a measurement allows to load it again
+        self.experiment.remove_measurement_datasets([datasets[1][0], datasets[2][0]])
+        self.experiment.load_measurement_dataset(datasets[1][0], "file.json", force_gui_update=False)
+        self.assertListEqual(self.timestamps(), ["2024-01-04", "2024-01-02"])
+
+    def test_bulk_load_notifies_once(self):
+        datasets = [(measurement_dict(f"2024-01-{day:02d}"), "file.json") for day in range(1, 11)]
+        datasets.append(({"invalid": "dataset"}, "invalid.json"))
+        errors = self.experiment.load_measurement_datasets(datasets, force_gui_update=False)
+
+        self.assertListEqual([path for path, _ in errors], ["invalid.json"])
+        self.assertListEqual(self.timestamps(), ["2024-01-08", "2024-01-09", "2024-01-10"])
+        self.assertEqual(len(self.changes), 1)
+        self.assertEqual(len(self.changes[0][1]), 7)
+
+    def test_many_measurements(self):
+        self.experiment._meas_control_settings.max_finished_meas = 1000
+        datasets = [(measurement_dict(f"2024-01-01_{idx:06d}", device_id=idx), "file.json") for idx in range(10000)]
+
+        start = time.perf_counter()
+        self.experiment.load_measurement_datasets(datasets, force_gui_update=False)
+        self.experiment.remove_measurement_datasets(list(self.experiment.measurements)[::2])
+        duration = time.perf_counter() - start
+
+        self.assertEqual(len(self.experiment.measurements), 500)
+        self.assertEqual(self.timestamps()[0], "2024-01-01_009001")
+        self.assertLess(duration, 5.0)
+
+    def test_values_kept_on_disk(self):
+        self.experiment._meas_control_settings.lazy_values = True
+        self.experiment._meas_control_settings.values_cache_mb = 1
+        self.experiment._meas_control_settings.max_finished_meas = 100
+        self.addCleanup(self.experiment.close_values_store)
+
+        for idx in range(200):
+            meas = measurement_dict(f"2024-01-01_{idx:06d}", device_id=idx)
+            meas["values"] = {"x": list(range(20000)), "y": [0.5] * 20000}
+            self.experiment.load_measurement_dataset(meas, "file.json", force_gui_update=False)
+            _ = self.experiment.measurements[-1]["values"]["y"]
+
+        store = self.experiment.values_store
+        # evicted measurements do not leave their values on disk, the cache stays within its size
+        self.assertEqual(len(os.listdir(store.directory)), 100)
+        self.assertLessEqual(store.cache.nbytes, 1024 * 1024)
+
+        values = self.experiment.measurements[0]["values"]
+        self.assertListEqual(list(values.keys()), ["x", "y"])
+        self.assertEqual(values["x"][-1], 19999)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import time
+import unittest
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from LabExT.Experiments.QueueJournal import todo_key
+from LabExT.Tests.Utils import TEST_DEVICES, headless_experiment
+from LabExT.View.EditMeasurementWizard.WizardEntry.SaveButtons import create_parameter_sweep_todos
+
+DEVICE = TEST_DEVICES[0]
+
+
+class SweepGridTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.experiment = headless_experiment("GridChip")
+        self.template = self.experiment.create_measurement_object("DummyMeas")
+        self.template.parameters["total measurement time"].value = 0.5
+
+    def test_cross_product(self):
+        create_parameter_sweep_todos(self.experiment, {
+            "mean": (pd.Series([1.0, 2.0]), None),
+            "number of points": (pd.Series([10.0, 20.0, 30.0]), None),
+        }, self.template, DEVICE)
+        todos = self.experiment.to_do_list
+
+        self.assertEqual(len(todos), 6)
+        self.assertListEqual([(t.get_parameter_value("mean"), t.get_parameter_value("number of points"))
+                              for t in todos],
+                             [(1.0, 10), (1.0, 20), (1.0, 30), (2.0, 10), (2.0, 20), (2.0, 30)])
+        self.assertIsInstance(todos[0].get_parameter_value("number of points"), int)
+        self.assertEqual(todos[0].get_parameter_value("total measurement time"), 0.5)
+        self.assertIsNone(todos[0].get_parameter_value("unknown"))
+
+        params = todos[0].sweep_parameters
+        self.assertTrue(all(t.sweep_parameters is params for t in todos))
+        self.assertListEqual(list(params["measurement settings", "mean"]), [1.0, 1.0, 1.0, 2.0, 2.0, 2.0])
+        self.assertListEqual(list(params["metadata", "id"]), [todo_key(t) for t in todos])
+        self.assertListEqual(list(params["metadata", "finished"]), [False] * 6)
+        self.assertTrue(all(uuid.UUID(hex=key).version == 4 for key in params["metadata", "id"]))
+
+    def test_measurements_are_created_on_access(self):
+        create_parameter_sweep_todos(self.experiment, {"mean": (pd.Series([1.0, 2.0, 3.0]), None)},
+                                     self.template, DEVICE)
+        todo = self.experiment.to_do_list[1]
+        name_with_id = todo.get_measurement_name_with_id()
+        str(todo), todo.get_hash(), todo.get_parameter_values()
+        self.assertIsNone(todo._measurement)
+        self.assertListEqual(self.experiment.selected_measurements, [self.template])
+
+        measurement = todo.measurement
+        self.assertIs(todo.measurement, measurement)
+        self.assertEqual(measurement.get_name_with_id(), name_with_id)
+        self.assertEqual(measurement.id, todo.measurement_id)
+        self.assertEqual(measurement.parameters["mean"].value, 2.0)
+        self.assertEqual(measurement.parameters["total measurement time"].value, 0.5)
+        self.assertIsNot(measurement.parameters["total measurement time"],
+                         self.template.parameters["total measurement time"])
+        self.assertListEqual(self.experiment.selected_measurements, [self.template])
+
+        # once created, the measurement is the reference, e.g. after editing the ToDo
+        measurement.parameters["mean"].value = 5.0
+        self.assertEqual(todo.get_parameter_value("mean"), 5.0)
+
+    def test_large_sweep(self):
+        start = time.perf_counter()
+        create_parameter_sweep_todos(self.experiment, {
+            "mean": (pd.Series(np.linspace(0, 1, 50)), None),
+            "std. deviation": (pd.Series(np.linspace(0, 1, 40)), None),
+            "number of points": (pd.Series(np.arange(10, 60)), None),
+        }, self.template, DEVICE)
+        duration = time.perf_counter() - start
+
+        self.assertEqual(len(self.experiment.to_do_list), 100000)
+        self.assertLess(duration, 3.0)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import os
+import unittest
+from glob import glob
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+from LabExT.Experiments.SweepSummary import SweepSummary, load_sweep_association, \
+    reconstruct_sweep_summary
+from LabExT.Tests.Utils import TEST_DEVICES, headless_experiment
+from LabExT.View.EditMeasurementWizard.WizardEntry.SaveButtons import create_parameter_sweep_todos
+
+DEVICE = TEST_DEVICES[0]
+
+
+class SweepSummaryTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.output_path = join(self.tmp_dir.name, "out")
+        self.experiment = headless_experiment("SweepChip", output_path=self.output_path)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def create_sweep(self, means):
+        template = self.experiment.create_measurement_object("DummyMeas")
+        template.parameters["total measurement time"].value = 0.0
+        create_parameter_sweep_todos(self.experiment, {"mean": (pd.Series(means), None)}, template, DEVICE)
+        return [t.measurement.id.hex for t in self.experiment.to_do_list]
+
+    def test_summary_is_appended_per_measurement(self):
+        keys = self.create_sweep([0.0, 1.0, 2.0])
+        self.experiment.run()
+
+        sidecars = glob(join(self.output_path, "*", "*_sweep_summary.jsonl"))
+        self.assertEqual(len(sidecars), 1)
+        with open(sidecars[0]) as fp:
+            records = [json.loads(line) for line in fp]
+        self.assertListEqual([r["op"] for r in records], ["header", "finished", "finished", "finished"])
+        self.assertListEqual([r["id"] for r in records[1:]], keys)
+
+        # the full summary is written once the sweep is complete
+        summary_path = sidecars[0][:-1]
+        with open(summary_path) as fp:
+            summary = json.load(fp)
+        self.assertEqual(summary["software"]["name"], "LabExT")
+        self.assertEqual(summary["chip"]["name"], "SweepChip")
+        entries = summary["sweep_association_list"]
+        self.assertListEqual([e["metadata"]["id"] for e in entries], keys)
+        self.assertListEqual([e["measurement settings"]["mean"] for e in entries], [0.0, 1.0, 2.0])
+        self.assertTrue(all(os.path.isfile(e["metadata"]["file_path"]) for e in entries))
+
+        # every dataset only stores its own row and refers to the summary
+        with open(entries[1]["metadata"]["file_path"]) as fp:
+            sweep_information = json.load(fp)["sweep_information"]
+        self.assertEqual(sweep_information["sweep_summary_file"], summary_path)
+        self.assertEqual(len(sweep_information["sweep_association"]), 1)
+        self.assertEqual(sweep_information["sweep_association"][0]["metadata"]["id"], keys[1])
+
+        os.remove(summary_path)
+        self.assertEqual(reconstruct_sweep_summary(sidecars[0]), summary_path)
+        with open(summary_path) as fp:
+            self.assertEqual(json.load(fp), summary)
+
+    def test_incomplete_summary(self):
+        keys = self.create_sweep([0.0, 1.0, 2.0])
+        self.experiment.exctrl_pause_after_device = True
+        self.experiment.run()
+
+        # the summary of the interrupted sweep is written when the run stops
+        sidecar = glob(join(self.output_path, "*", "*_sweep_summary.jsonl"))[0]
+        with open(sidecar[:-1]) as fp:
+            entries = json.load(fp)["sweep_association_list"]
+        self.assertListEqual([e["metadata"]["id"] for e in entries], keys)
+        self.assertListEqual(["file_path" in e["metadata"] for e in entries], [True, False, False])
+        os.remove(sidecar[:-1])
+
+        # a line cut off by a crash is ignored
+        with open(sidecar, "a") as fp:
+            fp.write('{"op": "finished", "ro')
+        summary = SweepSummary.load(sidecar)
+        self.assertFalse(summary.complete)
+        entries = summary.to_dict()["sweep_association_list"]
+        self.assertListEqual([e["metadata"]["id"] for e in entries], keys)
+        self.assertListEqual(["file_path" in e["metadata"] for e in entries], [True, False, False])
+
+    def test_load_sweep_association(self):
+        keys = self.create_sweep([0.0, 1.0])
+        self.experiment.run()
+
+        data_file = glob(join(self.output_path, "*", "*DummyMeas*[0-9].json"))[0]
+        with open(data_file) as fp:
+            meas_dict = json.load(fp)
+        entries = load_sweep_association(meas_dict)
+        self.assertListEqual([e["metadata"]["id"] for e in entries], keys)
+
+        # without the summary file, the list is read from the sidecar file next to the data file
+        os.remove(meas_dict["sweep_information"]["sweep_summary_file"])
+        meas_dict["sweep_information"]["sweep_summary_file"] = join("moved", "elsewhere_sweep_summary.json")
+        self.assertListEqual(load_sweep_association(meas_dict), meas_dict["sweep_information"]["sweep_association"])
+        meas_dict["sweep_information"]["sweep_summary_file"] = join("moved", os.path.basename(
+            glob(join(self.output_path, "*", "*_sweep_summary.jsonl"))[0][:-1]))
+        entries = load_sweep_association(meas_dict, file_path=data_file)
+        self.assertListEqual([e["metadata"]["id"] for e in entries], keys)
+
+        # data files written before the sweep summary store the full list
+        old_dict = {"sweep_information": {"part_of_sweep": True, "sweep_association": entries}}
+        self.assertListEqual(load_sweep_association(old_dict), entries)
+        self.assertListEqual(load_sweep_association({"sweep_information": {"part_of_sweep": False,
+                                                                           "sweep_association": []}}), [])
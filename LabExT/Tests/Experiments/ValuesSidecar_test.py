@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import os
+import unittest
+from collections import OrderedDict
+from glob import glob
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Experiments.ValuesSidecar import SIDECAR_REFERENCES_KEY, load_values_sidecar, resolve_values_sidecar, \
+    sidecar_directory, write_values_sidecar
+from LabExT.Tests.Utils import TEST_DEVICES, headless_experiment
+
+DEVICE = TEST_DEVICES[0]
+
+
+class ValuesSidecarTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.json_path = join(self.tmp_dir.name, "meas.json")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        values = OrderedDict([
+            ("x", [0.5, 1.5, 2.5]),
+            ("n", np.arange(4, dtype=np.int32)),
+            ("labels", ["a", "b"]),
+            ("ragged", [[1], [1, 2]]),
+            ("empty", []),
+        ])
+        references = write_values_sidecar(self.json_path, values)
+
+        self.assertListEqual(list(references.keys()), list(values.keys()))
+        self.assertEqual(references["x"], {"npy": "meas_values/0000.npy", "dtype": "<f8", "shape": [3]})
+        self.assertEqual(references["n"]["dtype"], "<i4")
+        self.assertEqual(references["labels"], ["a", "b"])
+        self.assertEqual(references["ragged"], [[1], [1, 2]])
+        self.assertEqual(len(os.listdir(sidecar_directory(self.json_path))), 3)
+        # the references are JSON serializable
+        json.dumps(references)
+
+        loaded = load_values_sidecar(self.json_path, references)
+        self.assertIsInstance(loaded["x"], np.memmap)
+        self.assertFalse(loaded["x"].flags.writeable)
+        np.testing.assert_array_equal(loaded["x"], values["x"])
+        np.testing.assert_array_equal(loaded["n"], values["n"])
+        self.assertEqual(loaded["labels"], ["a", "b"])
+
+    def test_resolve(self):
+        inline = {"values": {"x": [1.0]}}
+        self.assertIs(resolve_values_sidecar(inline, self.json_path), inline)
+        self.assertEqual(inline, {"values": {"x": [1.0]}})
+
+        references = write_values_sidecar(self.json_path, {"x": [1.0, 2.0]})
+        meas = {"values storage": "npy", "values": references}
+        resolve_values_sidecar(meas, self.json_path)
+        self.assertListEqual(meas["values"]["x"].tolist(), [1.0, 2.0])
+        self.assertEqual(meas[SIDECAR_REFERENCES_KEY], references)
+
+        # resolving again does not change anything
+        values = meas["values"]
+        resolve_values_sidecar(meas, self.json_path)
+        self.assertIs(meas["values"], values)
+
+    def test_experiment_saves_binary_values(self):
+        output_path = join(self.tmp_dir.name, "out")
+        experiment = headless_experiment("BinaryChip", output_path=output_path,
+                                         settings={"binary_values": True, "journal_queue": False})
+        measurement = experiment.create_measurement_object("DummyMeas")
+        measurement.parameters["total measurement time"].value = 0.0
+        measurement.parameters["number of points"].value = 1000
+        experiment.to_do_list.append(ToDo(DEVICE, measurement))
+        experiment.run()
+
+        json_path = glob(join(output_path, "*.json"))[0]
+        with open(json_path) as fp:
+            stored = json.load(fp)
+        self.assertEqual(stored["values storage"], "npy")
+        self.assertTrue(all("npy" in ref for ref in stored["values"].values()))
+        self.assertEqual(len(glob(join(sidecar_directory(json_path), "*.npy"))), len(stored["values"]))
+
+        finished = experiment.measurements[0]
+        self.assertIsInstance(finished["values"]["point values"], np.memmap)
+        self.assertEqual(len(finished["values"]["point values"]), 1000)
+
+        # importing the file memory-maps the values again
+        other = headless_experiment("BinaryChip", output_path=output_path)
+        other.load_measurement_dataset(stored, json_path, force_gui_update=False)
+        np.testing.assert_array_equal(other.measurements[0]["values"]["point values"],
+                                      finished["values"]["point values"])
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import time
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from LabExT.Exporter.Formats.ExportParquet import PARAMETER_PREFIX, column_types, long_format_columns, \
+    parameter_definitions, write_parquet_dataset, pyarrow
+from LabExT.Measurements.MeasAPI.Measparam import MeasParamBool, MeasParamFloat, MeasParamInt, MeasParamString
+from LabExT.Tests.Utils import measurement_dict
+
+DEFINITIONS = {
+    name: {"wavelength start": MeasParamFloat(1520.0, "nm"), "detector": MeasParamString("PM1"),
+           "averages": MeasParamInt(1), "sweep": MeasParamBool(True)}
+    for name in ("DummyMeas", "InsertionLossSweep")
+}
+
+
+class LongFormatTest(unittest.TestCase):
+
+    def test_columns(self):
+        short = measurement_dict(1, n_points=3)
+        short["values"]["power [mW]"] = [1.0]
+        columns = long_format_columns([measurement_dict(0, n_points=5), short],
+                                      column_types([measurement_dict(0, n_points=5), short], DEFINITIONS))
+
+        self.assertEqual({len(c) for c in columns.values()}, {8})
+        self.assertListEqual(list(columns["sample_index"]), [0, 1, 2, 3, 4, 0, 1, 2])
+        self.assertListEqual(list(columns["dataset_id"]), 5 * ["id0000"] + 3 * ["id0001"])
+        self.assertListEqual(list(columns["device_id"]), 5 * ["0"] + 3 * ["1"])
+        self.assertListEqual(list(columns["measurement_name"]), 5 * ["DummyMeas"] + 3 * ["InsertionLossSweep"])
+        self.assertEqual(columns["timestamp_start"][0], np.datetime64("2024-05-03T14:00:00"))
+        self.assertEqual(columns["timestamp_end"][-1], np.datetime64("2024-05-03T14:00:01"))
+
+        np.testing.assert_array_equal(columns[PARAMETER_PREFIX + "wavelength start"], 5 * [1520.0] + 3 * [1521.0])
+        self.assertListEqual(list(columns[PARAMETER_PREFIX + "detector"]), 8 * ["PM1"])
+        np.testing.assert_array_equal(columns["transmission [dB]"], 5 * [-3.0] + 3 * [-4.0])
+        np.testing.assert_array_equal(columns["power [mW]"], 5 * [np.nan] + [1.0, np.nan, np.nan])
+
+    def test_column_types_follow_the_definitions(self):
+        measurements = [measurement_dict(i, n_points=5) for i in range(2)]
+        measurements[0]["measurement settings"].update({"sweep": {"value": False}, "averages": {"value": 4}})
+        measurements[1]["measurement settings"].update({"sweep": {"value": None}, "averages": {"value": 2.5}})
+        for measurement in measurements:
+            measurement["measurement settings"]["wavelength start"]["value"] = None
+        types = column_types(measurements, DEFINITIONS)
+
+        self.assertEqual(types[PARAMETER_PREFIX + "wavelength start"], "float64")
+        self.assertEqual(types[PARAMETER_PREFIX + "detector"], "string")
+        self.assertEqual(types[PARAMETER_PREFIX + "sweep"], "bool")
+        self.assertEqual(types[PARAMETER_PREFIX + "averages"], "int64")
+        self.assertEqual(types["transmission [dB]"], "float64")
+
+        columns = long_format_columns(measurements, types)
+        self.assertTrue(np.isnan(columns[PARAMETER_PREFIX + "wavelength start"]).all())
+        self.assertListEqual(list(columns[PARAMETER_PREFIX + "sweep"]), 5 * [False] + 5 * [None])
+        self.assertListEqual(list(columns[PARAMETER_PREFIX + "averages"]), 5 * [4] + 5 * [None])
+
+    def test_settings_without_definition_are_text(self):
+        measurements = [measurement_dict(0, n_points=5)]
+        measurements[0]["measurement settings"]["sweep"] = {"value": True}
+        types = column_types(measurements, {"InsertionLossSweep": DEFINITIONS["InsertionLossSweep"]})
+        self.assertEqual(types[PARAMETER_PREFIX + "wavelength start"], "string")
+
+        columns = long_format_columns(measurements, types)
+        self.assertListEqual(list(columns[PARAMETER_PREFIX + "sweep"]), 5 * ["True"])
+
+    def test_columns_of_other_batches_are_missing(self):
+        measurements = [measurement_dict(0, n_points=5), measurement_dict(2, n_points=5)]
+        measurements[1]["values"]["power [mW]"] = np.ones(5)
+        measurements[1]["measurement settings"]["averages"] = {"value": 3}
+        types = column_types(measurements, DEFINITIONS)
+
+        columns = long_format_columns(measurements[:1], types)
+        self.assertListEqual(list(columns), list(types))
+        self.assertListEqual(list(columns[PARAMETER_PREFIX + "averages"]), 5 * [None])
+        self.assertTrue(np.isnan(columns["power [mW]"]).all())
+
+    def test_parameter_definitions(self):
+        class BrokenMeas:
+            @staticmethod
+            def get_default_parameter():
+                raise RuntimeError("no parameters")
+
+        class SweepMeas:
+            @staticmethod
+            def get_default_parameter():
+                return DEFINITIONS["DummyMeas"]
+
+        definitions = parameter_definitions({"BrokenMeas": BrokenMeas, "SweepMeas": SweepMeas})
+        self.assertDictEqual(definitions, {"SweepMeas": DEFINITIONS["DummyMeas"]})
+
+    def test_many_small_measurements(self):
+        measurements = [measurement_dict(i, n_points=10) for i in range(10000)]
+        start = time.perf_counter()
+        columns = long_format_columns(measurements)
+        self.assertLess(time.perf_counter() - start, 10.0)
+        self.assertEqual(len(columns["sample_index"]), 100000)
+        self.assertEqual(columns["device_id"][-1], "9999")
+
+
+@unittest.skipUnless(pyarrow is not None, "pyarrow is not installed")
+class WriteParquetTest(unittest.TestCase):
+
+    def test_write_dataset(self):
+        with TemporaryDirectory() as tmp_dir:
+            n_rows = write_parquet_dataset([measurement_dict(i, n_points=5) for i in range(6)], tmp_dir)
+            table = pyarrow.parquet.read_table(tmp_dir)
+
+        self.assertEqual(n_rows, 30)
+        self.assertEqual(table.num_rows, 30)
+        frame = table.to_pandas()
+        self.assertSetEqual(set(frame["measurement_name"].astype(str)), {"DummyMeas", "InsertionLossSweep"})
+        self.assertSetEqual(set(frame["dataset_id"]), {f"id{i:04d}" for i in range(6)})
+
+    def test_schema_does_not_depend_on_the_values(self):
+        first = measurement_dict(0, n_points=5)
+        first["measurement settings"]["sweep"] = {"value": True}
+        second = measurement_dict(2, n_points=5)
+        second["measurement settings"]["sweep"] = {"value": None}
+        second["measurement settings"]["wavelength start"] = {"value": None}
+        with TemporaryDirectory() as tmp_dir:
+            write_parquet_dataset([first], tmp_dir, DEFINITIONS)
+            write_parquet_dataset([second], tmp_dir, DEFINITIONS)
+            table = pyarrow.parquet.read_table(tmp_dir)
+
+        self.assertEqual(table.num_rows, 10)
+        self.assertEqual(table.schema.field(PARAMETER_PREFIX + "sweep").type, pyarrow.bool_())
+        self.assertEqual(table.schema.field(PARAMETER_PREFIX + "wavelength start").type, pyarrow.float64())
+        self.assertEqual(table.column(PARAMETER_PREFIX + "sweep").null_count, 5)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import os
+import unittest
+from itertools import zip_longest
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import h5py
+import numpy as np
+
+from LabExT.Exporter.ExportRunner import ExportResult, ExportRunner
+from LabExT.Exporter.Formats.ExportCSV import write_csv
+from LabExT.Exporter.Formats.ExportHDF5 import write_hdf5
+from LabExT.Tests.Utils import measurement_dict
+
+
+def loaded_measurement(index, n_points=100):
+    """Returns a measurement with the path of its data file, as the export wizard gets it."""
+    return dict(measurement_dict(index, n_points), file_path_known=f"/data/meas{index:d}.json")
+
+
+def csv_rows(file_path):
+    with open(file_path) as fp:
+        return [line.rstrip("\n") for line in fp if not line.startswith("#")]
+
+
+class ExportRunnerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_csv_matches_cell_by_cell_formatting(self):
+        measurement = loaded_measurement(1, n_points=5000)
+        measurement["values"]["markers"] = [1, 2, np.nan, -np.inf]
+        file_path = join(self.tmp_dir.name, "meas1.csv")
+        write_csv(measurement, file_path)
+
+        expected = [",".join("{:e}".format(v) for v in row)
+                    for row in zip_longest(*measurement["values"].values(), fillvalue=np.nan)]
+        self.assertListEqual(csv_rows(file_path), expected)
+        with open(file_path, newline="") as fp:
+            self.assertTrue(fp.readlines()[-1].endswith("\r\n"))
+
+    def check_export(self, max_workers):
+        jobs = [(loaded_measurement(i), join(self.tmp_dir.name, f"meas{i:d}.csv")) for i in range(6)]
+        broken = loaded_measurement(6)
+        broken["values"]["label"] = ["a", "b"]
+        jobs.append((broken, join(self.tmp_dir.name, "meas6.csv")))
+
+        runner = ExportRunner(write_csv, max_workers=max_workers, max_pending=2)
+        with self.assertLogs(level="INFO") as logs:
+            result = runner.run(jobs)
+
+        self.assertListEqual(sorted(result.written), sorted(path for _, path in jobs[:-1]))
+        self.assertListEqual(list(result.failed), [jobs[-1][1]])
+        self.assertFalse(os.path.exists(jobs[-1][1]))
+        self.assertEqual(result.n_bytes, sum(os.path.getsize(path) for path in result.written))
+        self.assertEqual(runner.n_done, 7)
+        self.assertTrue(any("MB/s" in line for line in logs.output))
+        self.assertEqual(len(csv_rows(jobs[3][1])), 100)
+
+    def test_export_in_calling_thread(self):
+        self.check_export(max_workers=1)
+
+    def test_export_in_worker_processes(self):
+        self.check_export(max_workers=2)
+
+    def test_hdf5_export(self):
+        jobs = [(loaded_measurement(i), join(self.tmp_dir.name, f"meas{i:d}.h5")) for i in range(3)]
+        result = ExportRunner(write_hdf5, max_workers=2).run(jobs)
+        self.assertEqual(len(result.written), 3)
+        with h5py.File(jobs[2][1], "r") as file:
+            self.assertEqual(file.attrs["device - id"], "2")
+            np.testing.assert_allclose(file["values"]["transmission [dB]"][:],
+                                       np.asarray(jobs[2][0]["values"]["transmission [dB]"]), rtol=1e-6)
+
+    def test_cancel(self):
+        runner = ExportRunner(write_csv, max_workers=2)
+        runner.cancel()
+        result = runner.run([(loaded_measurement(i), join(self.tmp_dir.name, f"meas{i:d}.csv")) for i in range(4)])
+        self.assertTrue(result.cancelled)
+        self.assertListEqual(result.written, [])
+        self.assertListEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_throughput(self):
+        jobs = [(loaded_measurement(i, n_points=10), join(self.tmp_dir.name, f"meas{i:d}.csv")) for i in range(2)]
+        result = ExportRunner(write_csv, max_workers=1).run(jobs)
+        self.assertGreater(result.duration, 0.0)
+        self.assertAlmostEqual(result.throughput, result.n_bytes / 1e6 / result.duration)
+        self.assertEqual(ExportResult().throughput, 0.0)
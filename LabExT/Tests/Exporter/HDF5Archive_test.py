@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import os
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import h5py
+import numpy as np
+
+from LabExT.Exporter.HDF5Archive import append_measurements, read_index, read_values
+from LabExT.Tests.Utils import measurement_dict
+
+
+def archived_measurement(index):
+    """Returns a measurement with the metadata types stored differently in the archive."""
+    measurement = measurement_dict(index, n_points=1000, chip_name="ArchiveChip")
+    measurement["chip"]["description file path"] = None
+    measurement["device"]["in_position"] = [1.5, -2.0]
+    measurement["finished"] = True
+    measurement["sweep_information"] = {"part_of_sweep": False, "sweep_association": [{"a": 1}]}
+    measurement["values"].update({"counts": list(range(10)), "labels": ["a", "b"]})
+    return measurement
+
+
+class HDF5ArchiveTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.archive_path = join(self.tmp_dir.name, "archive.h5")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_archive_layout(self):
+        added = append_measurements(self.archive_path, [archived_measurement(i) for i in range(3)])
+        self.assertListEqual(added, ["id0000", "id0001", "id0002"])
+
+        with h5py.File(self.archive_path, "r") as archive:
+            group = archive["measurements"]["id0001"]
+            wavelength = group["values"]["wavelength [nm]"]
+            self.assertEqual(wavelength.dtype, np.float64)
+            self.assertEqual(wavelength.compression, "gzip")
+            self.assertIsNotNone(wavelength.chunks)
+            self.assertEqual(group.attrs["measurement name"], "InsertionLossSweep")
+            self.assertIs(type(group.attrs["finished"]), np.bool_)
+            self.assertEqual(group["device"].attrs["id"], 1)
+            np.testing.assert_array_equal(group["device"].attrs["in_position"], [1.5, -2.0])
+            self.assertEqual(group["measurement settings"]["wavelength start"].attrs["value"], 1521.0)
+            self.assertEqual(group["sweep_information"].attrs["sweep_association"], '[{"a": 1}]')
+            self.assertEqual(group["chip"].attrs["description file path"].shape, None)
+
+        values = read_values(self.archive_path, "id0002")
+        np.testing.assert_array_equal(values["transmission [dB]"], np.full(1000, -5.0))
+        np.testing.assert_array_equal(values["counts"], np.arange(10.0))
+        self.assertListEqual(list(values["labels"]), ["a", "b"])
+
+    def test_index_selects_subsets(self):
+        append_measurements(self.archive_path, [archived_measurement(i) for i in range(6)], compression="lzf")
+        index = read_index(self.archive_path)
+
+        self.assertListEqual(list(index.columns[:3]), ["group", "measurement_name", "chip"])
+        selected = index[(index.measurement_name == "InsertionLossSweep") & (index.device_id != "1")]
+        self.assertListEqual(list(selected.group), ["id0003", "id0005"])
+        self.assertEqual(index.parameters[4], {"wavelength start": 1524.0, "detector": "PM1"})
+        self.assertTrue(index.finished.all())
+
+    def test_incremental_append(self):
+        append_measurements(self.archive_path, [archived_measurement(i) for i in range(3)], compression="none")
+        size = os.path.getsize(self.archive_path)
+
+        added = append_measurements(self.archive_path, [archived_measurement(i) for i in range(2, 5)])
+        self.assertListEqual(added, ["id0003", "id0004"])
+        self.assertListEqual(list(read_index(self.archive_path).group), [f"id{i:04d}" for i in range(5)])
+        self.assertGreater(os.path.getsize(self.archive_path), size)
+
+        self.assertListEqual(append_measurements(self.archive_path, [archived_measurement(0)]), [])
+
+    def test_failed_measurements_are_removed(self):
+        broken = archived_measurement(1)
+        broken["values"] = None
+        with self.assertRaises(AttributeError):
+            append_measurements(self.archive_path, [archived_measurement(0), broken, archived_measurement(2)])
+
+        with h5py.File(self.archive_path, "r") as archive:
+            self.assertListEqual(list(archive["measurements"]), ["id0000"])
+        self.assertListEqual(list(read_index(self.archive_path).group), ["id0000"])
+
+        added = append_measurements(self.archive_path, [archived_measurement(i) for i in range(3)])
+        self.assertListEqual(added, ["id0001", "id0002"])
+
+    def test_groups_without_index_row_are_replaced(self):
+        append_measurements(self.archive_path, [archived_measurement(0)])
+        with h5py.File(self.archive_path, "a") as archive:
+            archive["measurements"].create_group("id0001")
+
+        appended = append_measurements(self.archive_path, [archived_measurement(1), archived_measurement(1)])
+        self.assertListEqual(appended, ["id0001"])
+        self.assertListEqual(list(read_index(self.archive_path).group), ["id0000", "id0001"])
+        np.testing.assert_array_equal(read_values(self.archive_path, "id0001")["counts"], range(10))
+
+    def test_rejects_other_files(self):
+        other_path = join(self.tmp_dir.name, "other.h5")
+        with h5py.File(other_path, "w") as file:
+            file.create_dataset("index", data=[1, 2])
+        with self.assertRaises(ValueError):
+            append_measurements(other_path, [archived_measurement(0)])
+        with self.assertRaises(ValueError):
+            append_measurements(self.archive_path, [archived_measurement(0)], compression="bzip2")
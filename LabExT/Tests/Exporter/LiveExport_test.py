@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import os
+import threading
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import numpy as np
+
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Exporter import LiveExport
+from LabExT.Exporter.HDF5Archive import read_index, read_values
+from LabExT.Exporter.LiveExport import LIVE_EXPORT_CSV, LIVE_EXPORT_HDF5, LiveExportSink
+from LabExT.Tests.Utils import TEST_DEVICES, headless_experiment, measurement_dict
+
+
+class LiveExportSinkTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_hdf5_archive(self):
+        sink = LiveExportSink(LIVE_EXPORT_HDF5, self.tmp_dir.name)
+        sink.start()
+        for i in range(10):
+            sink.submit(measurement_dict(i), f"meas{i:d}.json")
+        sink.close()
+
+        self.assertFalse(sink.running)
+        self.assertEqual(sink.n_pending, 0)
+        self.assertListEqual(sink.written, [f"meas{i:d}.json" for i in range(10)])
+        index = read_index(sink.target_path)
+        self.assertListEqual(list(index.group), [f"id{i:04d}" for i in range(10)])
+        np.testing.assert_array_equal(read_values(sink.target_path, "id0007")["transmission [dB]"], 100 * [-10.0])
+
+    def test_csv_files(self):
+        sink = LiveExportSink(LIVE_EXPORT_CSV, self.tmp_dir.name)
+        sink.start()
+        sink.submit(measurement_dict(0), join(self.tmp_dir.name, "meas0.json.gz"))
+        sink.submit(measurement_dict(1), join(self.tmp_dir.name, "meas0.json"))
+        sink.close()
+
+        self.assertListEqual(os.listdir(self.tmp_dir.name), ["meas0.csv"])
+        self.assertEqual(len(sink.written), 1)
+        self.assertListEqual(list(sink.failed), [join(self.tmp_dir.name, "meas0.json")])
+
+    def test_backpressure(self):
+        release = threading.Event()
+
+        def slow_append(*args, **kwargs):
+            release.wait()
+            return append_measurements(*args, **kwargs)
+
+        append_measurements = LiveExport.append_measurements
+        sink = LiveExportSink(LIVE_EXPORT_HDF5, self.tmp_dir.name, max_queue=2)
+        with patch.object(LiveExport, "append_measurements", side_effect=slow_append):
+            sink.start()
+            submitter = threading.Thread(target=lambda: [sink.submit(measurement_dict(i), str(i)) for i in range(5)])
+            submitter.start()
+            submitter.join(0.5)
+            # one measurement is being written and two are waiting, the fourth one blocks
+            self.assertTrue(submitter.is_alive())
+            self.assertEqual(sink.n_submitted, 3)
+            release.set()
+            submitter.join()
+            sink.close()
+
+        self.assertGreater(sink.blocked_time, 0.0)
+        self.assertEqual(len(read_index(sink.target_path)), 5)
+
+    def test_failed_measurements_do_not_stop_the_export(self):
+        broken = measurement_dict(1)
+        broken["values"]["ragged"] = [[1.0, 2.0], [3.0]]
+        sink = LiveExportSink(LIVE_EXPORT_HDF5, self.tmp_dir.name)
+        outcomes = [["id0000"], OSError("disk full"), ["id0002"]]
+        with patch.object(LiveExport, "append_measurements", side_effect=outcomes):
+            sink.start()
+            for i in range(3):
+                sink.submit(measurement_dict(i), f"meas{i:d}.json")
+            sink.close()
+        self.assertListEqual(list(sink.failed), ["meas1.json"])
+        self.assertIn("disk full", sink.failed["meas1.json"])
+        self.assertListEqual(sink.written, ["meas0.json", "meas2.json"])
+
+        # only the failing measurement of the archive is missing
+        sink = LiveExportSink(LIVE_EXPORT_HDF5, self.tmp_dir.name)
+        sink.start()
+        sink.submit(measurement_dict(0), "meas0.json")
+        sink.submit(broken, "meas1.json")
+        sink.submit(measurement_dict(2), "meas2.json")
+        sink.close()
+        self.assertListEqual(list(sink.failed), ["meas1.json"])
+        self.assertListEqual(list(read_index(sink.target_path).group), ["id0000", "id0002"])
+
+    def test_experiment_exports_finished_measurements(self):
+        export_dir = join(self.tmp_dir.name, "live")
+        experiment = headless_experiment("LiveChip", output_path=self.tmp_dir.name,
+                                         settings={"live_export": True, "live_export_format": LIVE_EXPORT_HDF5,
+                                                   "live_export_directory": export_dir})
+        for _ in range(3):
+            measurement = experiment.create_measurement_object("DummyMeas")
+            measurement.parameters["total measurement time"].value = 0.0
+            experiment.to_do_list.append(ToDo(TEST_DEVICES[0], measurement))
+        experiment.run()
+
+        index = read_index(join(export_dir, LiveExport.LIVE_ARCHIVE_NAME))
+        self.assertSetEqual(set(index.group), {m["measurement id long"] for m in experiment.measurements})
+        self.assertListEqual(list(index.chip), 3 * ["LiveChip"])
+        self.assertIsNone(experiment._live_export)
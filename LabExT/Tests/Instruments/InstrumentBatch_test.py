@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import threading
+import unittest
+
+from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentBatchException, InstrumentException, \
+    parameter_setter
+from LabExT.Instruments.LaserMainframeKeysight import LaserMainframeKeysight
+
+
+class FakeScpiResource:
+    """VISA resource executing the commands of every message, commands containing 'bad' raise an error."""
+
+    def __init__(self):
+        self.session = 1
+        self.lrm_rlock = threading.RLock()
+        # every message written or queried, i.e. one element per round trip
+        self.messages = []
+        self.executed = []
+        self.errors = []
+
+    def _execute(self, message):
+        answers = []
+        for command in message.split(';'):
+            self.executed.append(command)
+            if 'bad' in command:
+                self.errors.append('-113,"Undefined header;' + command.lstrip(':') + '"')
+            if command == '*OPC?':
+                answers.append('1')
+            elif '?' in command:
+                answers.append(self.answer(command))
+        return ';'.join(answers)
+
+    def answer(self, request):
+        return 'answer'
+
+    def write(self, message):
+        self.messages.append(message)
+        self._execute(message)
+
+    def query(self, message):
+        self.messages.append(message)
+        if message == 'SYST:ERR?':
+            return self.errors.pop(0) if self.errors else '+0,"No error"'
+        return self._execute(message)
+
+
+class ScpiInstrument(Instrument):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.networked_instrument_properties.append('wavelength')
+
+    def open(self):
+        self._inst = FakeScpiResource()
+
+    def close(self):
+        self._inst = None
+
+    @property
+    def wavelength(self):
+        return float(self.request_channel('sour', ':wav?'))
+
+    @wavelength.setter
+    @parameter_setter
+    def wavelength(self, wavelength_nm):
+        self.command_channel('sour', ':wav ' + str(wavelength_nm) + 'nm')
+
+
+class SweepLaserResource(FakeScpiResource):
+    """Answers the requests of LaserMainframeKeysight.sweep_wl_setup, the sweep check fails for negative speeds."""
+
+    def answer(self, request):
+        if 'chec?' in request:
+            bad_speed = any(':wav:swe:spe -' in command for command in self.executed)
+            return '368,End Wavelength <= Start Wavelength' if bad_speed else '0,OK'
+        if 'pmax?' in request:
+            return '0.01'
+        return '0'
+
+
+class InstrumentBatchTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.instr = ScpiInstrument(visa_address=self.id(), channel=1)
+        self.instr.open()
+        self.resource = self.instr._inst
+
+    def test_commands_without_batch(self):
+        self.instr.command('trig:conf loop')
+        self.instr.wavelength = 1550
+        self.assertListEqual(self.resource.messages,
+                             ['trig:conf loop', '*OPC?', 'SYST:ERR?', 'sour1:wav 1550nm', '*OPC?', 'SYST:ERR?'])
+
+    def test_batch_sends_one_message(self):
+        with self.instr.batch():
+            self.instr.command('trig:conf loop')
+            self.instr.command('*CLS')
+            self.instr.wavelength = 1550
+            self.instr.command_channel('sour', ':wav:swe:mode cont')
+            self.assertListEqual(self.resource.messages, [])
+
+        self.assertListEqual(self.resource.messages, [
+            'trig:conf loop;*CLS;:sour1:wav 1550nm;:sour1:wav:swe:mode cont;*OPC?',
+            'SYST:ERR?',
+        ])
+        # the other commands might have changed the wavelength
+        self.assertNotIn('wavelength', self.instr._parameter_cache)
+
+    def test_batched_setters_write_through(self):
+        with self.instr.batch():
+            self.instr.wavelength = 1550
+        self.assertEqual(self.instr._parameter_cache.get('wavelength'), 1550)
+
+    def test_messages_are_split_at_the_maximum_length(self):
+        self.instr.batch_max_message_length = 40
+        commands = [f'sour1:wav:swe:star {i:d}nm' for i in range(5)]
+        with self.instr.batch():
+            for command in commands:
+                self.instr.command(command)
+
+        self.assertEqual(len(self.resource.messages), 5 + 1)
+        self.assertTrue(all(len(m) <= 40 for m in self.resource.messages))
+        self.assertTrue(self.resource.messages[-2].endswith(';*OPC?'))
+        self.assertListEqual([c.lstrip(':') for c in self.resource.executed if c[0] != '*'][:5], commands)
+
+    def test_requests_send_the_queued_commands_first(self):
+        with self.instr.batch():
+            self.instr.command('sour1:wav:swe:star 1520nm')
+            self.instr.command('sour1:wav:swe:stop 1580nm')
+            answer = self.instr.request('sour1:wav:swe:chec?')
+            self.instr.command('sour1:wav:swe:llog 1')
+
+        self.assertEqual(answer, 'answer')
+        self.assertListEqual(self.resource.messages, [
+            'sour1:wav:swe:star 1520nm;:sour1:wav:swe:stop 1580nm;*OPC?',
+            'sour1:wav:swe:chec?',
+            'sour1:wav:swe:llog 1;*OPC?',
+            'SYST:ERR?',
+        ])
+
+    def test_errors_are_assigned_to_commands(self):
+        self.instr.wavelength = 1550
+        with self.assertRaises(InstrumentBatchException) as cm:
+            with self.instr.batch():
+                self.instr.command('trig:conf loop')
+                self.instr.command('sour1:bad:header 1')
+                self.instr.command('sour1:wav:swe:mode cont')
+
+        self.assertIsInstance(cm.exception, InstrumentException)
+        self.assertListEqual(cm.exception.suspects, ['sour1:bad:header 1'])
+        self.assertEqual(len(cm.exception.commands), 3)
+        self.assertNotIn('wavelength', self.instr._parameter_cache)
+        self.assertListEqual(self.resource.errors, [])
+
+    def test_failed_block_discards_the_queued_commands(self):
+        with self.assertRaises(ValueError):
+            with self.instr.batch():
+                self.instr.wavelength = 1550
+                raise ValueError("sweep check failed")
+
+        self.assertListEqual(self.resource.messages, [])
+        self.assertNotIn('wavelength', self.instr._parameter_cache)
+        self.instr.command('trig:conf loop')
+        self.assertEqual(len(self.resource.messages), 3)
+
+    def test_failed_request_reports_the_error_queue(self):
+        with self.assertRaises(InstrumentBatchException) as cm:
+            with self.instr.batch():
+                self.instr.command('sour1:bad:header 1')
+                answer = self.instr.request('sour1:wav:swe:chec?')
+                raise InstrumentException('Sweep parameters incorrectly set! Error message: ' + answer)
+
+        self.assertIn('Sweep parameters incorrectly set!', str(cm.exception))
+        self.assertIn('-113,"Undefined header;sour1:bad:header 1"', str(cm.exception))
+        self.assertListEqual(cm.exception.suspects, ['sour1:bad:header 1'])
+        self.assertIsInstance(cm.exception.__cause__, InstrumentException)
+        self.assertListEqual(self.resource.errors, [])
+
+    def test_failed_request_without_errors(self):
+        with self.assertRaises(InstrumentException) as cm:
+            with self.instr.batch():
+                self.instr.request('sour1:wav:swe:chec?')
+                raise InstrumentException('Sweep parameters incorrectly set!')
+
+        self.assertNotIsInstance(cm.exception, InstrumentBatchException)
+        self.assertEqual(self.resource.messages[-1], 'SYST:ERR?')
+
+    def test_nested_batches(self):
+        with self.instr.batch():
+            with self.instr.batch():
+                self.instr.command('trig:conf loop')
+            self.assertListEqual(self.resource.messages, [])
+            self.instr.command('trig:conf def')
+
+        self.assertListEqual(self.resource.messages, ['trig:conf loop;:trig:conf def;*OPC?', 'SYST:ERR?'])
+
+    def test_commands_of_other_threads_are_not_batched(self):
+        with self.instr.batch():
+            self.instr.command('trig:conf loop')
+            thread = threading.Thread(target=self.instr.command, args=('trig2:inp sws',))
+            thread.start()
+            thread.join()
+            self.assertListEqual(self.resource.messages, ['trig2:inp sws', '*OPC?', 'SYST:ERR?'])
+
+        self.assertEqual(self.resource.messages[3], 'trig:conf loop;*OPC?')
+
+    def test_unsupported_batch(self):
+        self.instr.batch_supported = False
+        with self.instr.batch():
+            self.instr.command('trig:conf loop')
+            self.assertListEqual(self.resource.messages, ['trig:conf loop', '*OPC?', 'SYST:ERR?'])
+
+
+class SweepSetupBatchTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.laser = LaserMainframeKeysight(visa_address=self.id(), channel=1)
+        self.laser._inst = SweepLaserResource()
+        self.resource = self.laser._inst
+
+    def tearDown(self) -> None:
+        # the fake resource was not opened by the resource manager
+        self.laser._inst = None
+
+    def test_sweep_setup_round_trips(self):
+        self.laser.sweep_wl_setup(1520, 1580, 10)
+
+        # the setup commands, the two sweep checks and the error check, then the unit and power are read
+        self.assertTrue(self.resource.messages[0].startswith('trig1:inp sws;:trig:conf loop;'))
+        self.assertTrue(self.resource.messages[0].endswith(':sour1:wav:swe:llog 1;*OPC?'))
+        self.assertListEqual(self.resource.messages[1:4], [
+            'sour1:wav:swe:chec?',
+            'sour1:wav:swe:pmax? 1520nm,1580nm',
+            'SYST:ERR?',
+        ])
+        self.assertEqual(self.resource.messages[4], 'SOUR1:POW:UNIT?')
+        self.assertTrue(self.laser.sweep_configured)
+
+    def test_failed_sweep_check(self):
+        self.resource.errors.append('-222,"Data out of range"')
+        with self.assertRaises(InstrumentBatchException) as cm:
+            self.laser.sweep_wl_setup(1520, 1580, 10, sweep_speed_nm_per_s=-40)
+
+        self.assertIn('368,End Wavelength <= Start Wavelength', str(cm.exception))
+        self.assertIn('-222,"Data out of range"', str(cm.exception))
+        self.assertEqual(len(self.resource.messages), 4)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import unittest
+from unittest.mock import Mock
+
+from LabExT.Instruments.InstrumentAPI import Instrument, parameter_setter
+from LabExT.Tests.Utils import TEST_DEVICES, headless_experiment
+from LabExT.View.MeasurementControlSettings import SNAPSHOT_EVERY_N_DEVICES
+
+
+class CountingInstrument(Instrument):
+    """Instrument without connection, counting how often its parameters are read."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.networked_instrument_properties.extend(['power', 'unit'])
+        self.reads = 0
+        self._is_open = False
+        self._power = 0.0
+        self._unit = 'dBm'
+
+    @Instrument._open.getter
+    def _open(self):
+        return self._is_open
+
+    def open(self):
+        self._is_open = True
+        self._inst = Mock()
+
+    def close(self):
+        self._is_open = False
+
+    def idn(self):
+        self.reads += 1
+        return "CountingInstrument"
+
+    @property
+    def power(self):
+        self.reads += 1
+        return self._power
+
+    @power.setter
+    @parameter_setter
+    def power(self, power):
+        if power > 10:
+            raise ValueError("too much power")
+        self._power = power
+
+    @property
+    def unit(self):
+        self.reads += 1
+        return self._unit
+
+    @unit.setter
+    @parameter_setter
+    def unit(self, unit):
+        self._unit = 'Watt' if 'watt' in unit.lower() else 'dBm'
+        self.invalidate_parameter_cache('unit')
+
+
+class InstrumentParameterCacheTest(unittest.TestCase):
+
+    def create_instrument(self):
+        # the cache is shared between all instruments with the same address and channel
+        return CountingInstrument(visa_address=self.id(), channel=1)
+
+    def test_cached_parameters_are_not_read(self):
+        instr = self.create_instrument()
+        params = instr.get_instrument_parameter()
+        self.assertEqual(instr.reads, 3)
+        self.assertEqual(params['idn'], "CountingInstrument")
+        self.assertFalse(instr._open)
+
+        self.assertDictEqual(instr.get_instrument_parameter(refresh=False), params)
+        self.assertEqual(instr.reads, 3)
+
+        instr.get_instrument_parameter(refresh=True)
+        self.assertEqual(instr.reads, 6)
+
+    def test_setters_write_through(self):
+        instr = self.create_instrument()
+        instr.get_instrument_parameter()
+
+        instr.power = 3.0
+        self.assertEqual(instr.get_instrument_parameter(refresh=False)['power'], 3.0)
+        self.assertEqual(instr.reads, 3)
+
+        # a setter can invalidate its value if the getter returns something different
+        instr.unit = 'WATT'
+        self.assertEqual(instr.get_instrument_parameter(refresh=False)['unit'], 'Watt')
+        self.assertEqual(instr.reads, 4)
+
+        # a failing setter invalidates all values, the state of the instrument is unknown
+        with self.assertRaises(ValueError):
+            instr.power = 42.0
+        self.assertEqual(instr.get_instrument_parameter(refresh=False)['power'], 3.0)
+        self.assertEqual(instr.reads, 7)
+
+    def test_writes_invalidate_the_cache(self):
+        instr = self.create_instrument()
+        instr.open()
+        instr.get_instrument_parameter()
+
+        instr.write('pow:unit 1')
+        self.assertEqual(len(instr._parameter_cache.snapshot()[0]), 0)
+        instr.get_instrument_parameter(refresh=False)
+        self.assertEqual(instr.reads, 6)
+
+    def test_values_changed_while_reading_are_kept(self):
+        class SetDuringReadInstrument(CountingInstrument):
+            @property
+            def unit(self):
+                # another thread sets a parameter while this one reads the parameters
+                self._parameter_cache.set('power', 5.0)
+                return 'dBm'
+
+        instr = SetDuringReadInstrument(visa_address=self.id(), channel=1)
+        self.assertEqual(instr.get_instrument_parameter()['power'], 0.0)
+        self.assertEqual(instr._parameter_cache.get('power'), 5.0)
+        self.assertNotIn('unit', instr._parameter_cache)
+
+    def test_cache_is_shared_between_driver_instances(self):
+        self.create_instrument().get_instrument_parameter()
+        other_instr = self.create_instrument()
+        other_instr.get_instrument_parameter(refresh=False)
+        self.assertEqual(other_instr.reads, 0)
+
+        other_channel = CountingInstrument(visa_address=self.id(), channel=2)
+        other_channel.get_instrument_parameter(refresh=False)
+        self.assertEqual(other_channel.reads, 3)
+
+    def test_refresh_every_n_devices(self):
+        experiment = headless_experiment("SnapshotChip", TEST_DEVICES, settings={
+            "instrument_snapshot_policy": SNAPSHOT_EVERY_N_DEVICES, "instrument_snapshot_interval": 2})
+        experiment._meas_control_settings.update()
+
+        measured_devices = [TEST_DEVICES[i] for i in (0, 0, 1, 2, 2, 3, 4)]
+        refreshed = [experiment._refresh_instrument_snapshot(d) for d in measured_devices]
+        self.assertListEqual(refreshed, [True, False, False, True, False, False, True])
@@ -8,9 +8,11 @@ Required lab setup:
  An OSA with no input.
 """
 
+import threading
 import unittest
 
 import numpy as np
+from pyvisa.util import from_ascii_block, from_ieee_block, to_ieee_block
 
 from LabExT.Instruments.OpticalSpectrumAnalyzerAQ6370C import OpticalSpectrumAnalyzerAQ6370C
 from LabExT.Tests.Utils import ask_user_yes_no, mark_as_laboratory_test
@@ -138,3 +140,83 @@ class OpticalSpectrumAnalyzerAQ6370CTest(unittest.TestCase):
     #     with self.assertRaises(ValueError):
     #         self.instr.marker_search_mode = 'asdf'
 
+
+class FakeAQ6370CResource:
+    """VISA resource answering the trace queries of the OSA in the data format which was set last."""
+
+    def __init__(self, wavelengths_m, powers_dbm):
+        self.session = 1
+        self.lrm_rlock = threading.RLock()
+        self.traces = {'X': wavelengths_m, 'Y': powers_dbm}
+        self.data_format = None
+        self.messages = []
+
+    def write(self, message):
+        self.messages.append(message)
+
+    def query(self, message):
+        self.messages.append(message)
+        for command in message.split(';'):
+            if command.startswith('FORMAT:DATA'):
+                self.data_format = command.split()[1]
+        answers = {':TRAC:ACT?': 'TRA', 'SYST:ERR?': '0,"No error"', ':SENS:WAV:STAR?': '1.54E-06',
+                   ':SENS:WAV:STOP?': '1.56E-06'}
+        return answers.get(message, '1')
+
+    def query_binary_values(self, message, datatype, is_big_endian, container):
+        self.messages.append(message)
+        assert self.data_format == 'REAL,64'
+        block = to_ieee_block(self.traces[message[11]].tolist(), datatype, is_big_endian)
+        return from_ieee_block(block, datatype, is_big_endian, container)
+
+    def query_ascii_values(self, message, converter, separator, container):
+        self.messages.append(message)
+        assert self.data_format == 'ASCII'
+        text = ','.join('{:.10e}'.format(v) for v in self.traces[message[11]])
+        return from_ascii_block(text, converter, separator, container)
+
+
+class OpticalSpectrumAnalyzerAQ6370CTraceTransferTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.instruments = []
+
+    def tearDown(self) -> None:
+        # the fake connections cannot be closed by the resource manager
+        for instr in self.instruments:
+            instr._inst = None
+
+    def create_instrument(self, **kwargs):
+        instr = OpticalSpectrumAnalyzerAQ6370C(visa_address=self.id(), **kwargs)
+        instr._inst = FakeAQ6370CResource(np.linspace(1540e-9, 1560e-9, 50001), np.linspace(-70, -20, 50001))
+        self.instruments.append(instr)
+        return instr
+
+    def test_binary_transfer(self):
+        self.instr = self.create_instrument()
+        wl, p = self.instr.get_data()
+        self.assertIsInstance(p, np.ndarray)
+        self.assertTrue(p.flags.writeable)
+        np.testing.assert_array_equal(p, np.linspace(-70, -20, 50001))
+        np.testing.assert_allclose(wl, np.linspace(1540, 1560, 50001))
+        self.assertListEqual(self.instr._inst.messages, [
+            'FORMAT:DATA REAL,64;*OPC?', ':TRAC:ACT?', ':TRAC:DATA:Y? TRA', ':TRAC:DATA:X? TRA', 'SYST:ERR?'
+        ])
+
+    def test_ascii_transfer(self):
+        self.instr = self.create_instrument(binary_transfer=False)
+        wl, p = self.instr.get_data()
+        self.assertEqual(self.instr._inst.data_format, 'ASCII')
+        np.testing.assert_allclose(wl, np.linspace(1540, 1560, 50001))
+
+    def test_reconstructed_wavelengths(self):
+        self.instr = self.create_instrument()
+        wl, p = self.instr.get_data(wavelength_range=(1540, 1560))
+        np.testing.assert_allclose(wl, np.linspace(1540, 1560, 50001))
+        self.assertNotIn(':TRAC:DATA:X? TRA', self.instr._inst.messages)
+
+        self.instr = self.create_instrument(reconstruct_wavelengths=True)
+        wl, _ = self.instr.get_data()
+        np.testing.assert_allclose(wl, np.linspace(1540, 1560, 50001))
+        self.assertIn(':SENS:WAV:STAR?', self.instr._inst.messages)
+        self.assertNotIn(':TRAC:DATA:X? TRA', self.instr._inst.messages)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import pickle
+import unittest
+from copy import deepcopy
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from LabExT.Experiments.AutosaveDict import AutosaveDict, JournaledAutosaveDict, load_autosave_journal
+from LabExT.Experiments.LazyValues import materialize_values
+from LabExT.Measurements.MeasAPI import ValuesBuffer
+from LabExT.View.Controls.PlotControl import PlotData
+
+
+class ValuesBufferTest(unittest.TestCase):
+
+    def test_append_and_extend(self):
+        buffer = ValuesBuffer(capacity=2)
+        for idx in range(5):
+            buffer.append(idx)
+        buffer.extend([5.0, 6.0])
+        buffer.extend(np.arange(7, 10))
+        buffer.extend(x for x in (10, 11))
+
+        self.assertEqual(len(buffer), 12)
+        self.assertGreaterEqual(buffer.capacity, 12)
+        self.assertEqual(buffer.nbytes, 12 * 8)
+        self.assertListEqual(buffer.tolist(), list(range(12)))
+        self.assertEqual(buffer[3], 3.0)
+        np.testing.assert_array_equal(buffer[-2:], [10.0, 11.0])
+        self.assertEqual(buffer, list(range(12)))
+
+    def test_views_are_not_copies(self):
+        buffer = ValuesBuffer([1.0, 2.0], capacity=4)
+        view = buffer.view()
+        self.assertTrue(np.shares_memory(view, np.asarray(buffer)))
+        self.assertFalse(view.flags.writeable)
+        with self.assertRaises(ValueError):
+            view[0] = 5.0
+
+        # growing the buffer does not change earlier views
+        buffer.extend(np.arange(10))
+        self.assertListEqual(view.tolist(), [1.0, 2.0])
+        self.assertEqual(len(buffer), 12)
+
+        self.assertEqual(np.asarray(buffer, dtype=np.float32).dtype, np.float32)
+        self.assertFalse(np.shares_memory(np.array(buffer), buffer.view()))
+
+    def test_dtype(self):
+        buffer = ValuesBuffer(np.arange(3), dtype=np.int32)
+        buffer.append(3)
+        self.assertEqual(buffer.dtype, np.int32)
+        self.assertEqual(json.dumps(buffer.tolist()), "[0, 1, 2, 3]")
+
+    def test_copies_hold_values_only(self):
+        buffer = ValuesBuffer([1.0, 2.0])
+        buffer.data_changed.append(lambda b: None)
+        for copy in (deepcopy(buffer), pickle.loads(pickle.dumps(buffer))):
+            self.assertIsInstance(copy, ValuesBuffer)
+            self.assertEqual(copy, buffer)
+            self.assertListEqual(copy.data_changed, [])
+
+    def test_notifies_plot_data(self):
+        plot_data = PlotData(ValuesBuffer(), ValuesBuffer())
+        updates = []
+        plot_data.data_changed.append(updates.append)
+        plot_data.x.append(1.0)
+        plot_data.y.extend([2.0, 3.0])
+        self.assertEqual(len(updates), 2)
+
+        old_x = plot_data.x
+        plot_data.x = [1.0]
+        old_x.append(2.0)
+        self.assertEqual(len(updates), 3)
+
+    def test_plot_data_points(self):
+        plot_data = PlotData(ValuesBuffer(), ValuesBuffer())
+        lengths = []
+        plot_data.data_changed.append(lambda p: lengths.append((len(p.x), len(p.y))))
+        plot_data.append(1.0, 2.0)
+        plot_data.extend([2.0, 3.0], np.array([4.0, 5.0]))
+        # one update per call, when x and y are equally long
+        self.assertListEqual(lengths, [(1, 1), (3, 3)])
+
+        with plot_data.hold_updates():
+            plot_data.append(4.0, 6.0)
+            plot_data.append(5.0, 7.0)
+        self.assertListEqual(lengths[2:], [(5, 5)])
+
+
+class ValuesBufferSerializationTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.file_path = join(self.tmp_dir.name, "data.json.part")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_autosave(self):
+        data = AutosaveDict(file_path=self.file_path, auto_save=False)
+        data["values"] = {"x": ValuesBuffer([0.5, 1.5])}
+        data.save()
+        with open(self.file_path) as fp:
+            self.assertEqual(json.load(fp), {"values": {"x": [0.5, 1.5]}})
+        self.assertEqual(materialize_values(data["values"]), {"x": [0.5, 1.5]})
+
+    def test_journal_appends_new_values(self):
+        data = JournaledAutosaveDict(file_path=self.file_path, auto_save=False)
+        data["values"] = {"x": ValuesBuffer([0.0, 1.0])}
+        data.flush()
+        data["values"]["x"].extend([2.0, 3.0])
+        data.flush()
+
+        with open(data.journal_path) as fp:
+            records = [json.loads(line) for line in fp]
+        self.assertEqual(records[-1], {"op": "extend", "path": ["values", "x"], "items": [2.0, 3.0]})
+        self.assertEqual(data.flush(), 0)
+        self.assertEqual(load_autosave_journal(self.file_path), {"values": {"x": [0.0, 1.0, 2.0, 3.0]}})
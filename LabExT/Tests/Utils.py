@@ -5,13 +5,19 @@ LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
 This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
 """
 
-from os import path
+from os import path, makedirs
+import io
 import json
 import numpy as np
 import _tkinter
 import tkinter
+from typing import Sequence
 from unittest.mock import patch
+from LabExT.Experiments.ResultCompression import open_result_file
+from LabExT.Measurements.MeasAPI.ValuesBuffer import ValuesBuffer
 from LabExT.Movement.Stage import Stage
+from LabExT.Wafer.Chip import Chip
+from LabExT.Wafer.Device import Device
 import pytest
 from unittest import TestCase
 import random
@@ -20,6 +26,10 @@ import string
 RUNTESTS_DIR = path.abspath(path.dirname(__file__))
 TRANSFORMATIONS_DIR = path.join(RUNTESTS_DIR, "transformations")
 
+# devices of the chips of headless test experiments, 1 mm apart
+TEST_DEVICES = [Device(id=str(idx), type="test", in_position=[0, 1000 * idx], out_position=[500, 1000 * idx])
+                for idx in range(5)]
+
 
 class TKinterTestCase(TestCase):
     def setUp(self):
@@ -107,3 +117,43 @@ def ask_user_yes_no(ask_string="Is one kg of feathers lighter than one kg of iro
 def randomword(length):
     letters = string.ascii_lowercase
     return ''.join(random.choice(letters) for _ in range(length))
+
+
+def headless_experiment(chip_name, devices: Sequence[Device] = TEST_DEVICES[:1], output_path=None, settings=None):
+    """ Returns the experiment of a headless experiment manager for a chip with the given devices. The log output is
+    discarded, the measurement control settings are overridden with `settings`. """
+    # imported here, such that tests only using the devices or measurements do not import the experiment
+    from LabExT.Experiments.HeadlessExperiment import HeadlessExperimentManager, load_instruments_config
+
+    chip = Chip(name=chip_name, devices=list(devices), path="none", _serialize_to_disk=False)
+    return HeadlessExperimentManager(chip, load_instruments_config(), output_path=output_path, settings=settings,
+                                     stream=io.StringIO()).exp
+
+
+def measurement_dict(index, n_points=100, chip_name="TestChip"):
+    """ Returns a finished measurement of device `index`, as stored in the measurements list of an experiment.
+
+    The id, timestamps, device, measurement settings and values differ by `index`, odd indices are
+    InsertionLossSweep and even ones DummyMeas measurements. The transmission is a ValuesBuffer. """
+    return {
+        "measurement id long": f"id{index:04d}",
+        "measurement name": "InsertionLossSweep" if index % 2 else "DummyMeas",
+        "timestamp iso start": f"2024-05-03T14:{index // 60 % 60:02d}:{index % 60:02d}",
+        "timestamp": f"2024-05-03_14{index // 60 % 60:02d}{index % 60:02d}",
+        "chip": {"name": chip_name},
+        "device": {"id": index, "type": "MZM"},
+        "measurement settings": {"wavelength start": {"value": 1520.0 + index, "unit": "nm"},
+                                 "detector": {"value": "PM1"}},
+        "values": {
+            "wavelength [nm]": np.linspace(1520, 1580, n_points),
+            "transmission [dB]": ValuesBuffer(np.full(n_points, -3.0 - index)),
+        },
+    }
+
+
+def write_measurement_file(file_path, content):
+    """ Writes a measurement dictionary, or any other text, to a (compressed) data file and returns its path. """
+    makedirs(path.dirname(file_path), exist_ok=True)
+    with open_result_file(file_path, "w") as fp:
+        fp.write(content if isinstance(content, str) else json.dumps(content, default=lambda v: v.tolist()))
+    return file_path
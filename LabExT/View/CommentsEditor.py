@@ -11,6 +11,9 @@ from collections import OrderedDict
 from tkinter import Toplevel, Label, Checkbutton, Button, Text, IntVar, Entry, Frame
 from tkinter.scrolledtext import ScrolledText
 
+from LabExT.Experiments.LazyValues import materialize_values
+from LabExT.Experiments.ResultCompression import open_result_file
+from LabExT.Experiments.ValuesSidecar import SIDECAR_REFERENCES_KEY
 from LabExT.View.Controls.CustomFrame import CustomFrame
 from LabExT.View.Controls.KeyboardShortcutButtonPress import callback_if_btn_enabled
 
@@ -221,9 +224,15 @@ class CommentsEditor:
         self.meas_dict[self.meas_comment_key] = comment_text
         self.meas_dict[self.meas_plot_legend_key] = legend_text
 
-        with open(self.meas_dict["file_path_known"], "w+") as f:
+        # compressed files are written with the same compression again
+        with open_result_file(self.meas_dict["file_path_known"], "w") as f:
             # remove all software added keys, all those end in _known
             save_dict = {k: v for k, v in self.meas_dict.items() if not k.endswith("_known")}
+            if SIDECAR_REFERENCES_KEY in self.meas_dict:
+                # the values stay in their .npy files
+                save_dict["values"] = self.meas_dict[SIDECAR_REFERENCES_KEY]
+            else:
+                save_dict["values"] = materialize_values(save_dict["values"])
             json.dump(save_dict, f, indent=4)
 
         if self._callback_on_save is not None:
@@ -7,6 +7,7 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 
 import queue
 import threading
+from contextlib import contextmanager
 from functools import wraps, partial
 from tkinter import Frame, BOTH, TOP
 
@@ -15,6 +16,7 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolb
 from matplotlib.collections import PathCollection
 from matplotlib.figure import Figure
 
+from LabExT.Measurements.MeasAPI.ValuesBuffer import ValuesBuffer
 from LabExT.ViewModel.Utilities.ObservableList import ObservableList
 
 
@@ -42,10 +44,14 @@ class PlotData(object):
         if type(self._x) is ObservableList:  # if the old value was observable stop listening for changes
             self._x.item_added.remove(self.__item_changed__)
             self._x.item_removed.remove(self.__item_changed__)
+        elif isinstance(self._x, ValuesBuffer):
+            self._x.data_changed.remove(self.__item_changed__)
 
         if type(value) is ObservableList:  # if the value it observable start listening for changes
             value.item_added.append(self.__item_changed__)
             value.item_removed.append(self.__item_changed__)
+        elif isinstance(value, ValuesBuffer):  # value buffers notify about appended values
+            value.data_changed.append(self.__item_changed__)
 
         self._x = value
         self.__update__()
@@ -63,10 +69,14 @@ class PlotData(object):
         if type(self._y) is ObservableList:  # if the old value was observable stop listening for changes
             self._y.item_added.remove(self.__item_changed__)
             self._y.item_removed.remove(self.__item_changed__)
+        elif isinstance(self._y, ValuesBuffer):
+            self._y.data_changed.remove(self.__item_changed__)
 
         if type(value) is ObservableList:  # if the value is observable start listening for changes
             value.item_added.append(self.__item_changed__)
             value.item_removed.append(self.__item_changed__)
+        elif isinstance(value, ValuesBuffer):  # value buffers notify about appended values
+            value.data_changed.append(self.__item_changed__)
 
         self._y = value
         self.__update__()
@@ -81,9 +91,38 @@ class PlotData(object):
         self.plot_control = None
         self._color = color
 
+    # True while x and y are changed together, see hold_updates()
+    _updates_held = False
+
+    @contextmanager
+    def hold_updates(self):
+        """Context manager updating the plot only once at the end of the block, e.g. after both x and y changed."""
+        if self._updates_held:
+            yield self
+            return
+        self._updates_held = True
+        try:
+            yield self
+        finally:
+            self._updates_held = False
+            self.__update__()
+
+    def append(self, x, y):
+        """Appends a point to observable x and y values and updates the plot once."""
+        with self.hold_updates():
+            self._x.append(x)
+            self._y.append(y)
+
+    def extend(self, x, y):
+        """Appends several points to observable x and y values and updates the plot once."""
+        with self.hold_updates():
+            self._x.extend(x)
+            self._y.extend(y)
+
     def __item_changed__(self, item):
         """Gets called in case that x and y are observable and one of them has changed"""
-        self.__update__()
+        if not self._updates_held:
+            self.__update__()
 
     def __update__(self):
         for callback in self.data_changed:
@@ -452,13 +491,20 @@ class PlotControl(Frame):
             item.data_changed.remove(self.__plotdata_changed__)  # stop listening to changes of this plot data item
         self.__update_canvas__()
 
+    @staticmethod
+    def _copy_values(values) -> np.ndarray:
+        if isinstance(values, (ValuesBuffer, np.ndarray)):
+            # a single copy of the array, without converting each value to a Python object
+            return np.array(values)
+        return np.array([v for v in values])
+
     def sanitize_plot_data(self, plot_data: PlotData, sanitize_lengths=True):
         # do nothing if either the x or y data is set to None
         if plot_data.x is None or plot_data.y is None:
             return None, None
         # Copy our data into arrays that don't get updated by other threads anymore
-        x_data = np.array([x for x in plot_data.x])  # get data for x axis
-        y_data = np.array([y for y in plot_data.y])  # get data for y axis
+        x_data = self._copy_values(plot_data.x)  # get data for x axis
+        y_data = self._copy_values(plot_data.y)  # get data for y axis
         # If the shapes mismatch, we cut away the end of the longer list.
         if sanitize_lengths:
             if len(x_data) != len(y_data):
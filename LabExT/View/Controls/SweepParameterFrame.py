@@ -15,12 +15,15 @@ from typing import TYPE_CHECKING, Dict, List, Tuple, Union, Literal
 
 from tkinter import Tk, StringVar, Label, Entry, OptionMenu, Button, Frame, NORMAL, DISABLED
 
+from LabExT.Experiments.AdaptiveSweep import GOAL_GRADIENT, GOAL_MAXIMUM, GOAL_MINIMUM, REDUCTIONS, \
+    AdaptiveSweepSettings
 from LabExT.View.Controls.CustomFrame import CustomFrame
 from LabExT.Measurements.MeasAPI.Measparam import MeasParam, MeasParamInt, MeasParamFloat
 
 if TYPE_CHECKING:
     CategoryType = Literal[
-        "step_size", "step_count_linear", "step_count_logarithmic", "step_count_repetition", "binary", "list"
+        "step_size", "step_count_linear", "step_count_logarithmic", "step_count_repetition", "adaptive", "binary",
+        "list"
     ]
 
     RangeRepresentation = Tuple[pd.Series, CategoryType]
@@ -32,7 +35,10 @@ else:
 
 
 class RangeEntry(Frame):
-    """A `Frame` which holds three entry fields and a category selector."""
+    """A `Frame` which holds three entry fields and a category selector.
+
+    For adaptive sweeps, a second row holds the settings of the refinement, see `AdaptiveSweep`.
+    """
 
     def _validate_float(self, mode: str, text: str) -> bool:
         """Allows only ints and floats in the text field.
@@ -115,6 +121,7 @@ class RangeEntry(Frame):
         default_step: Union[int, float] = 0.1,
         default_category: CategoryType = "step_size",
         start_enabled: bool = True,
+        default_adaptive: dict = None,
         *args,
         **kwargs,
     ) -> None:
@@ -128,6 +135,7 @@ class RangeEntry(Frame):
             default_to: The default value for the end of the range. (default: 1)
             default_step: The default value for the stepsize/no of points in the range. (default: 0.1)
             start_enabled: Whether this entry should start interactable or not.
+            default_adaptive: The default settings of an adaptive sweep, see `AdaptiveSweepSettings`.
         """
         super().__init__(parent, *args, **kwargs)
 
@@ -145,6 +153,7 @@ class RangeEntry(Frame):
             "step_count_linear": "No. of Points (linear):",
             "step_count_logarithmic": "No. of Points (logarithmic):",
             "step_count_repetition": "Repetitions:",
+            "adaptive": "No. of Points (adaptive):",
         }
         """A mapping of the possible categories to the displayed name."""
 
@@ -193,8 +202,53 @@ class RangeEntry(Frame):
             validatecommand=(self.register(self._validate_step), "%d", "%P"),
         )
 
+        self._setup_adaptive_settings(var_master, AdaptiveSweepSettings.from_dict(default_adaptive or {}))
+
         self.__setup__()
 
+    def _setup_adaptive_settings(self, var_master: Tk, defaults: AdaptiveSweepSettings) -> None:
+        """Creates the row with the settings of an adaptive sweep."""
+        self._goals = {
+            GOAL_GRADIENT: "where it changes fastest",
+            GOAL_MINIMUM: "around its minimum",
+            GOAL_MAXIMUM: "around its maximum",
+        }
+        self._metric = StringVar(master=var_master, value=defaults.metric)
+        self._reduction = StringVar(master=var_master, value=defaults.reduction)
+        self._goal = StringVar(master=var_master, value=self._goals[defaults.goal])
+        self._tolerance = StringVar(master=var_master, value=defaults.tolerance)
+        self._budget = StringVar(master=var_master, value=defaults.budget)
+
+        self._adaptive_frame = Frame(self)
+        Label(self._adaptive_frame, text="Figure of merit:").grid(row=0, column=0, sticky="e")
+        self._reduction_menu = OptionMenu(self._adaptive_frame, self._reduction, *REDUCTIONS.keys())
+        self._reduction_menu.grid(row=0, column=1, sticky="w")
+        self._metric_entry = Entry(self._adaptive_frame, textvariable=self._metric, width=24, state=self._state)
+        self._metric_entry.grid(row=0, column=2, sticky="w")
+        Label(self._adaptive_frame, text="refined").grid(row=0, column=3, sticky="e")
+        self._goal_menu = OptionMenu(self._adaptive_frame, self._goal, *self._goals.values())
+        self._goal_menu.grid(row=0, column=4, sticky="w")
+        Label(self._adaptive_frame, text="Tolerance:").grid(row=0, column=5, sticky="e")
+        self._tolerance_entry = Entry(
+            self._adaptive_frame,
+            textvariable=self._tolerance,
+            width=8,
+            state=self._state,
+            validate="key",
+            validatecommand=(self.register(self._validate_float), "%d", "%P"),
+        )
+        self._tolerance_entry.grid(row=0, column=6, sticky="w")
+        Label(self._adaptive_frame, text="Max. points:").grid(row=0, column=7, sticky="e")
+        self._budget_entry = Entry(
+            self._adaptive_frame,
+            textvariable=self._budget,
+            width=6,
+            state=self._state,
+            validate="key",
+            validatecommand=(self.register(self._validate_int), "%d", "%P"),
+        )
+        self._budget_entry.grid(row=0, column=8, sticky="w")
+
     def __setup__(self) -> None:
         """Redraws this widget."""
         self._from_label.grid_forget()
@@ -224,6 +278,11 @@ class RangeEntry(Frame):
         self._category_menu.grid(row=0, column=4, sticky="e")
         self._step_entry.grid(row=0, column=5, sticky="w")
 
+        if self._step_category.get() == self._selection["adaptive"]:
+            self._adaptive_frame.grid(row=1, column=0, columnspan=6, sticky="w")
+        else:
+            self._adaptive_frame.grid_forget()
+
         for i in range(6):
             self.columnconfigure(index=i, weight=1)
 
@@ -267,6 +326,14 @@ class RangeEntry(Frame):
         elif category == self._selection["step_count_linear"]:
             step_size = (to - from_) / (step - 1)
             return (pd.Series([from_ + i * step_size for i in range(step)]), "step_count_linear")
+        elif category == self._selection["adaptive"]:
+            if step < 2:
+                raise ValueError(f"An adaptive sweep needs at least 2 initial points, not {step}.")
+            step_size = (to - from_) / (step - 1)
+            series = pd.Series([from_ + i * step_size for i in range(step)])
+            # the refinement settings travel with the coarse grid, see `AdaptiveSweep.refined_parameter`
+            series.attrs["adaptive"] = self.adaptive_settings.as_dict()
+            return (series, "adaptive")
         elif category == self._selection["step_count_logarithmic"]:
             return (pd.Series(((np.logspace(0, 1, step) - 1) / 9 * (to - from_) + from_)), "step_count_logarithmic")
         else:
@@ -294,6 +361,21 @@ class RangeEntry(Frame):
             cat_type for cat_type, cat_name in self._selection.items() if cat_name == self._step_category.get()
         )
 
+    @property
+    def adaptive_settings(self) -> AdaptiveSweepSettings:
+        """The user-specified settings of an adaptive sweep
+
+        Raises:
+            `ValueError` if the user enters illegal values
+        """
+        return AdaptiveSweepSettings(
+            metric=self._metric.get(),
+            reduction=self._reduction.get(),
+            goal=next(goal for goal, name in self._goals.items() if name == self._goal.get()),
+            tolerance=float(self._tolerance.get() or 0),
+            budget=int(self._budget.get()),
+        )
+
     @property
     def enabled(self) -> bool:
         """True if and only if at least one entry is editable"""
@@ -307,6 +389,11 @@ class RangeEntry(Frame):
         self._to_entry.config(state=self._state)
         self._step_entry.config(state=self._state)
         self._category_menu.config(state=self._state)
+        self._metric_entry.config(state=self._state)
+        self._reduction_menu.config(state=self._state)
+        self._goal_menu.config(state=self._state)
+        self._tolerance_entry.config(state=self._state)
+        self._budget_entry.config(state=self._state)
 
     @property
     def meas_param(self) -> MeasParam:
@@ -555,7 +642,10 @@ class SweepParameterFrame(CustomFrame):
             del settings[key]
 
         for _, range_entry, text in self._ranges:
-            if type(range_entry) == RangeEntry:
+            if type(range_entry) == RangeEntry and range_entry.category == "adaptive":
+                settings[text.get()] = (range_entry.from_, range_entry.to, range_entry.step, range_entry.category,
+                                        range_entry.adaptive_settings.as_dict())
+            elif type(range_entry) == RangeEntry:
                 settings[text.get()] = (range_entry.from_, range_entry.to, range_entry.step, range_entry.category)
             else:
                 settings[text.get()] = (0, 0, 0, "binary")
@@ -601,6 +691,7 @@ class SweepParameterFrame(CustomFrame):
                     default_to=data[1],
                     default_step=data[2],
                     default_category=data[3],
+                    default_adaptive=data[4] if len(data) > 4 else None,
                 )
 
             self._ranges.append((menu, entry, var))
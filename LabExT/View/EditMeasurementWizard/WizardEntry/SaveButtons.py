@@ -3,16 +3,15 @@ LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
 This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
 """
 
-import pandas as pd
-
 from tkinter import Button, Frame
 
 from LabExT.View.EditMeasurementWizard.WizardEntry.Base import WizardEntryController, WizardEntryView
 from LabExT.View.EditMeasurementWizard.WizardEntry.FinishedError import WizardFinishedError
+from LabExT.Experiments.AdaptiveSweep import AdaptiveSweep, refined_parameter
+from LabExT.Experiments.SweepGrid import SweepGrid
 from LabExT.Experiments.ToDo import ToDo, DictionaryWrapper
 from LabExT.Wafer.Device import Device
 from LabExT.Measurements.MeasAPI.Measurement import Measurement
-from LabExT.Measurements.MeasAPI.Measparam import MeasParamInt
 
 from LabExT.View.Controls.SweepParameterFrame import JSONRepresentation
 
@@ -22,56 +21,40 @@ def create_parameter_sweep_todos(
 ) -> None:
     """Creates `ToDo`s for all necessary configurations of swept parameters.
 
+    The measurement objects of the `ToDo`s are only created when they are executed, see `SweepGrid`. If a range is
+    refined adaptively, only the `ToDo`s of its coarse grid are created, see `AdaptiveSweep`.
+
     Args:
         experiment: The experiment to add the `ToDo`s to
         sweep_ranges: The results of the sweep parameter stage
         measurement: The measurement to perform
         device: The device the measurement should be performed on
     """
-    dataframes_per_parameter = [
-        pd.DataFrame(series, columns=[param_name]) for param_name, (series, _) in sweep_ranges.items()
-    ]
-
-    parameters = dataframes_per_parameter[0]
-    for dataframe in dataframes_per_parameter[1:]:
-        parameters = parameters.merge(dataframe, how="cross")
-
-    parameters.columns = pd.MultiIndex.from_tuples([("measurement settings", c) for c in parameters.columns])
+    grid = SweepGrid(experiment, measurement, {param_name: series for param_name, (series, _) in sweep_ranges.items()})
+    parameters = grid.sweep_parameters()
 
     # used to store summary dict
     dict_wrap = DictionaryWrapper()
 
-    for index, row in parameters.iterrows():
-        # create new object
-        meas_class_name: str = type(measurement).__name__
-        new_meas = experiment.create_measurement_object(meas_class_name)
-
-        new_meas.instruments = measurement.instruments.copy()
-        new_meas.selected_instruments = measurement.selected_instruments.copy()
-
-        new_meas.parameters = measurement.parameters.copy()
-        for (_, name), value in zip(row.index, row):
-            new_param = measurement.parameters[name].copy()
-            if type(new_param) == MeasParamInt:
-                new_param.value = int(value)
-            else:
-                new_param.value = value
-            new_meas.parameters[name] = new_param
-
-        parameters.loc[index, ("metadata", "id")] = str(new_meas.id.hex)
-        parameters.loc[index, ("metadata", "name")] = str(new_meas.name)
-
-        experiment.to_do_list.append(
-            ToDo(
-                device=device,
-                measurement=new_meas,
-                part_of_sweep=True,
-                sweep_parameters=parameters,
-                dictionary_wrapper=dict_wrap,
-            )
+    adaptive = refined_parameter(sweep_ranges)
+    if adaptive is not None:
+        parameter, settings = adaptive
+        sweep = AdaptiveSweep(grid, parameter, settings, device, parameters, dict_wrap)
+        experiment.to_do_list.extend(sweep.todos())
+        return
+
+    experiment.to_do_list.extend(
+        ToDo(
+            device=device,
+            measurement=None,
+            part_of_sweep=True,
+            sweep_parameters=parameters,
+            dictionary_wrapper=dict_wrap,
+            sweep_grid=grid,
+            sweep_index=index,
         )
-
-    parameters["metadata", "finished"] = False
+        for index in range(len(grid))
+    )
 
 
 #############
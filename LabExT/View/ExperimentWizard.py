@@ -84,13 +84,15 @@ class ExperimentWizard(Wizard):
         self.step_parameter_sweep.write_parameters()
         sweep_params = self.step_parameter_sweep.get_sweep_parameters()
 
-        for device in self.experiment.device_list:
-            for measurement, meas_sweep_params in sweep_params:
-                if meas_sweep_params:
-                    create_parameter_sweep_todos(self.experiment, meas_sweep_params, measurement, device)
-                
-                else:
-                    self.experiment.to_do_list.append(ToDo(device=device, measurement=measurement))
+        # the queue observers, e.g. the queue journal, are notified once for all new ToDos
+        with self.experiment.to_do_list.batch_changes():
+            for device in self.experiment.device_list:
+                for measurement, meas_sweep_params in sweep_params:
+                    if meas_sweep_params:
+                        create_parameter_sweep_todos(self.experiment, meas_sweep_params, measurement, device)
+
+                    else:
+                        self.experiment.to_do_list.append(ToDo(device=device, measurement=measurement))
 
         self.experiment.update()
         self.experiment.device_list.clear()
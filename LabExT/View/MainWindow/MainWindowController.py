@@ -12,6 +12,8 @@ import sys
 from tkinter import Tk, Toplevel, messagebox
 from tkinter.simpledialog import askinteger
 
+from LabExT.Experiments.QueueJournal import restore_todos
+from LabExT.Experiments.RouteOptimizer import optimize_todo_route
 from LabExT.Experiments.ToDo import ToDo
 from LabExT.Utils import get_configuration_file_path
 from LabExT.View.EditMeasurementWizard.EditMeasurementWizardController import EditMeasurementWizardController
@@ -318,8 +320,7 @@ class MainWindowController:
             # uncheck hence unplot the current selection:
             self.view.frame.measurement_table.hide_all_plots(only_these_hashes=cur_sel_hashes)
             # remove the datasets
-            for meas_dict in cur_sel:
-                self.experiment_manager.exp.remove_measurement_dataset(meas_dict)
+            self.experiment_manager.exp.remove_measurement_datasets(cur_sel)
             # inform user
             msg = f"Removed {len(cur_sel):d} measurement datasets."
             self.logger.info(msg)
@@ -341,8 +342,7 @@ class MainWindowController:
             # uncheck hence unplot the current selection:
             self.view.frame.measurement_table.hide_all_plots()
             # remove the datasets
-            for meas_dict in cur_sel:
-                self.experiment_manager.exp.remove_measurement_dataset(meas_dict)
+            self.experiment_manager.exp.remove_measurement_datasets(cur_sel)
             # inform user
             msg = f"Removed {len(cur_sel):d} measurement datasets."
             self.logger.info(msg)
@@ -426,13 +426,13 @@ class MainWindowController:
         if selected_todo_idx is not None and selected_todo_idx < len(self.experiment_manager.exp.to_do_list):
             # delete the to do from the to do list
             selected_todo = self.experiment_manager.exp.to_do_list.pop(selected_todo_idx)
-            dev_to_del, meas_to_del = selected_todo.device, selected_todo.measurement
+            dev_to_del = selected_todo.device
 
             # tell GUI to update the table contents
             self.update_tables()
             self.logger.info(
                 "Deleted ToDo with measurement id {:s} and device id {:s} at list index {:d}.".format(
-                    meas_to_del.get_name_with_id(), str(dev_to_del.id), selected_todo_idx
+                    selected_todo.get_measurement_name_with_id(), str(dev_to_del.id), selected_todo_idx
                 )
             )
         else:
@@ -515,6 +515,54 @@ class MainWindowController:
             self.update_tables()  # tell GUI to update the table contents
             self.logger.info("Deleted All ToDos.")
 
+    def todo_optimize_route(self):
+        """
+        Called on user click on "Optimize Route"
+        """
+        todo_list = self.experiment_manager.exp.to_do_list
+        if len(todo_list) < 2:
+            msg = "Nothing to optimize, the ToDo queue contains less than two ToDos."
+            self.logger.info(msg)
+            messagebox.showinfo("Optimize Route", msg)
+            return
+
+        result = optimize_todo_route(todo_list)
+        self.logger.info(
+            "Route optimization for {:d} ToDos on {:d} devices: estimated stage travel {:.0f}um -> {:.0f}um.".format(
+                len(todo_list), result.n_devices, result.original_travel, result.optimized_travel
+            )
+        )
+        if result.n_unplaced_todos > 0:
+            self.logger.warning(
+                "{:d} ToDos are on devices without chip coordinates and were moved to the end of the queue.".format(
+                    result.n_unplaced_todos
+                )
+            )
+
+        if result.travel_saved <= 0:
+            msg = "The ToDo queue is already in an optimal order, no stage travel can be saved."
+            self.logger.info(msg)
+            messagebox.showinfo("Optimize Route", msg)
+            return
+
+        msg = (
+            "Reordering the ToDo queue reduces the estimated stage travel from {:.0f}um to {:.0f}um, "
+            "saving {:.0f}um ({:.1f}%).\n\nDo you want to reorder the ToDo queue?".format(
+                result.original_travel, result.optimized_travel, result.travel_saved, result.travel_saved_percent
+            )
+        )
+        if not messagebox.askyesno("Optimize Route", msg):
+            return
+
+        try:
+            result.apply(todo_list)
+        except ValueError as e:
+            self.logger.warning(str(e))
+            messagebox.showwarning("Optimize Route", str(e) + " Please try again.")
+            return
+        self.update_tables()
+        self.logger.info("Reordered ToDo queue, saved {:.0f}um of estimated stage travel.".format(result.travel_saved))
+
     def offer_chip_reload_possibility(self):
         chip_path = self.model.chip_parameters["Chip path"].value
         # chip_path is only set if the user did the "load chip" functionality
@@ -538,6 +586,46 @@ class MainWindowController:
             return
         self.experiment_manager.register_chip(reloaded_chip)
 
+    def offer_queue_resume_possibility(self):
+        """
+        Offers to restore the unfinished ToDos of the last session from the queue journal.
+        Partial data files of interrupted ToDos are deleted in any case.
+        """
+        exp = self.experiment_manager.exp
+        try:
+            state = exp.queue_journal.load()
+        except OSError as exc:
+            self.logger.warning(f"Could not read the queue journal: {exc!r}")
+            return
+
+        removed_files = exp.queue_journal.remove_partial_files(state)
+        if removed_files:
+            self.logger.info(f"Removed partial data files of interrupted ToDos: {removed_files}")
+
+        pending = state.pending
+        if not pending:
+            exp.queue_journal.clear()
+            return
+
+        user_wants_resume = messagebox.askyesno(
+            title="Unfinished ToDo queue found!",
+            message=f"The ToDo queue of the last session was not finished. {len(state.finished):d} ToDos were "
+            f"finished, {len(pending):d} ToDos are left.\nDo you want to restore the unfinished ToDos?",
+        )
+        if not user_wants_resume:
+            exp.queue_journal.clear()
+            return
+
+        todos, failed_keys = restore_todos(exp, state)
+        exp.to_do_list.extend(todos)
+        exp.queue_journal.rewrite(exp.to_do_list)
+        self.logger.info(f"Restored {len(todos):d} ToDos from the queue journal.")
+        if failed_keys:
+            msg = f"{len(failed_keys):d} ToDos could not be restored, see the log for details."
+            self.logger.warning(msg)
+            messagebox.showwarning("ToDos not restored", msg)
+        self.update_tables()
+
     def offer_calibration_reload_possibility(self, chip):
         """
         Offers the possibility to restore a stored calibration.
@@ -607,6 +695,12 @@ class MainWindowController:
         # stop experiment
         self.model.experiment_handler.stop_experiment()
 
+        # keep the unfinished ToDos in the journal, such that they can be restored on the next start
+        self.experiment_manager.exp.update_queue_journal()
+
+        # delete the on-disk values of the finished measurements
+        self.experiment_manager.exp.close_values_store()
+
         # call the cleanup function of the documentation engine
         self.experiment_manager.docu.cleanup()
 
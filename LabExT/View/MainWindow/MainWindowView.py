@@ -56,6 +56,11 @@ class MainWindowContextMenu(Menu):
         self.add_cascade(label="Help", menu=self._help)
 
         self._file.add_command(label="Load Data", command=self._menu_listener.client_load_data)
+        self._file.add_command(label="Search Measurement Catalog",
+                               command=self._menu_listener.client_measurement_catalog)
+        self._file.add_command(label="Watch Directory...", command=self._menu_listener.client_watch_directory)
+        self._file.add_command(label="Stop Watching Directories",
+                               command=self._menu_listener.client_stop_watching_directories)
         self._file.add_command(label="Import Chip", command=self._menu_listener.client_import_chip)
         self._file.add_command(label="Export Data", command=self._menu_listener.client_export_data)
         self._file.add_command(label="Restart", command=self._menu_listener.client_restart)
@@ -103,6 +108,7 @@ class MainWindowContextMenu(Menu):
         )
 
         self._view.add_command(label="Open Extra Plots", command=self._menu_listener.client_extra_plots)
+        self._view.add_command(label="Throughput Statistics", command=self._menu_listener.client_throughput_panel)
         self._view.add_command(
             label="Start Live Instrument View (Ctrl+L)",
             command=self._menu_listener.client_live_view,
@@ -515,6 +521,10 @@ class MainWindowToDoFrame(CustomFrame):
         _delete_all_todo_meas = Button(self, text="Delete All", command=self.controller.todo_delete_all, width=10)
         _delete_all_todo_meas.grid(row=0, column=6, padx=5, pady=5, sticky="w")
 
+        _optimize_todo_route = Button(self, text="Optimize Route", command=self.controller.todo_optimize_route,
+                                      width=12)
+        _optimize_todo_route.grid(row=0, column=7, padx=5, pady=5, sticky="w")
+
 
 class MainWindowFrame(Frame):
     """
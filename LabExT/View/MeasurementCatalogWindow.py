@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import datetime
+import logging
+import time
+from threading import Thread
+from tkinter import Toplevel, Label, Button, Frame, Entry, Checkbutton, OptionMenu, StringVar, BooleanVar, \
+    filedialog, messagebox
+from typing import TYPE_CHECKING, Callable, List
+
+from LabExT.Experiments.BulkImport import BulkImporter
+from LabExT.Experiments.MeasurementCatalog import IndexResult
+from LabExT.View.Controls.CustomFrame import CustomFrame
+from LabExT.View.Controls.CustomTable import CustomTable
+
+if TYPE_CHECKING:
+    from tkinter import Tk
+    from LabExT.ExperimentManager import ExperimentManager
+else:
+    Tk = None
+    ExperimentManager = None
+
+# option of the filter menus which matches every value
+ANY = "(any)"
+
+
+class MeasurementCatalogWindow:
+    """
+    Searches the measurement catalog and imports the found measurements.
+    """
+
+    # interval in milliseconds in which the progress of indexing or importing is shown
+    POLL_INTERVAL = 200
+
+    # number of entries shown at most
+    MAX_RESULTS = 5000
+
+    COLUMNS = ('Chip', 'Device ID', 'Device Type', 'Measurement', 'Start', 'Error', 'File')
+
+    def __init__(self, parent: Tk, experiment_manager: ExperimentManager,
+                 on_import: Callable[[List[str]], None] = None):
+        """
+        Args:
+            parent: the parent window
+            experiment_manager: the experiment manager, whose experiment receives the imported measurements
+            on_import: called with the paths of the imported files after an import
+        """
+        self._root = parent
+        self._exp_manager = experiment_manager
+        self._on_import = on_import
+        self.logger = logging.getLogger()
+
+        self.window = None
+        self.results_table = None
+        self._filter_menus = {}
+        self._indexing_thread = None
+        self._index_progress = (0, 0)
+        self._index_result: IndexResult = None
+        self._importer: BulkImporter = None
+
+        self.chip = StringVar(self._root, value=ANY)
+        self.device_id = StringVar(self._root, value="")
+        self.device_type = StringVar(self._root, value=ANY)
+        self.measurement_name = StringVar(self._root, value=ANY)
+        self.last_days = StringVar(self._root, value="")
+        self.include_errors = BooleanVar(self._root, value=True)
+        self.status_text = StringVar(self._root, value="")
+
+        self.__setup__()
+        self.refresh_filter_options()
+        self.search()
+
+    @property
+    def catalog(self):
+        return self._exp_manager.exp.get_measurement_catalog()
+
+    def __setup__(self):
+        """Set up toplevel GUI"""
+        self.window = Toplevel(self._root)
+        self.window.title("Measurement Catalog")
+        self.window.geometry('%dx%d+%d+%d' % (950, 550, 300, 300))
+        self.window.rowconfigure(1, weight=1)
+        self.window.columnconfigure(0, weight=1)
+        self.window.focus_force()
+
+        filter_frame = CustomFrame(self.window)
+        filter_frame.title = " Filter "
+        filter_frame.grid(row=0, column=0, padx=5, pady=5, sticky='we')
+        filters = [("Chip:", self.chip, "chip"),
+                   ("Device type:", self.device_type, "device_type"),
+                   ("Measurement:", self.measurement_name, "measurement_name")]
+        for column, (label, variable, name) in enumerate(filters):
+            Label(filter_frame, text=label).grid(row=0, column=2 * column, padx=5, pady=5, sticky='e')
+            menu = OptionMenu(filter_frame, variable, ANY)
+            menu.grid(row=0, column=2 * column + 1, padx=5, pady=5, sticky='w')
+            self._filter_menus[name] = (menu, variable)
+        Label(filter_frame, text="Device ID:").grid(row=1, column=0, padx=5, pady=5, sticky='e')
+        Entry(filter_frame, textvariable=self.device_id, width=10).grid(row=1, column=1, padx=5, pady=5, sticky='w')
+        Label(filter_frame, text="Started in the last days:").grid(row=1, column=2, padx=5, pady=5, sticky='e')
+        Entry(filter_frame, textvariable=self.last_days, width=10).grid(row=1, column=3, padx=5, pady=5, sticky='w')
+        Checkbutton(filter_frame, text="Include failed measurements", variable=self.include_errors).grid(
+            row=1, column=4, padx=5, pady=5, sticky='w')
+        Button(filter_frame, text="Search", command=self.search, width=10).grid(row=1, column=5, padx=5, pady=5)
+
+        results_frame = CustomFrame(self.window)
+        results_frame.title = " Measurements "
+        results_frame.grid(row=1, column=0, padx=5, pady=5, sticky='nswe')
+        results_frame.columnconfigure(0, weight=1)
+        results_frame.rowconfigure(0, weight=1)
+        # custom table inserts itself into the parent frame
+        self.results_table = CustomTable(parent=results_frame, columns=self.COLUMNS, rows=[], col_width=120)
+
+        buttons_frame = Frame(self.window)
+        buttons_frame.grid(row=2, column=0, padx=5, pady=5, sticky='we')
+        buttons_frame.columnconfigure(3, weight=1)
+        Button(buttons_frame, text="Index Directory...", command=self.index_directory, width=15).grid(
+            row=0, column=0, padx=5, pady=5)
+        Button(buttons_frame, text="Import Selected", command=self.import_selected, width=15).grid(
+            row=0, column=1, padx=5, pady=5)
+        Button(buttons_frame, text="Close", command=self.window.destroy, width=15).grid(
+            row=0, column=2, padx=5, pady=5)
+        Label(buttons_frame, textvariable=self.status_text).grid(row=0, column=3, padx=5, pady=5, sticky='e')
+
+    def refresh_filter_options(self) -> None:
+        """Fills the filter menus with the values found in the catalog."""
+        for column, (menu, variable) in self._filter_menus.items():
+            options = menu["menu"]
+            options.delete(0, "end")
+            for value in [ANY] + self.catalog.distinct(column):
+                options.add_command(label=value, command=lambda v=value, var=variable: var.set(v))
+
+    def search(self) -> None:
+        """Shows the catalog entries matching the filter."""
+        try:
+            days = float(self.last_days.get()) if self.last_days.get().strip() else None
+        except ValueError:
+            messagebox.showerror("Invalid Filter", "The number of days must be a number.", parent=self.window)
+            return
+
+        start = time.perf_counter()
+        entries = self.catalog.query(
+            chip=None if self.chip.get() == ANY else self.chip.get(),
+            device_id=self.device_id.get().strip() or None,
+            device_type=None if self.device_type.get() == ANY else self.device_type.get(),
+            measurement_name=None if self.measurement_name.get() == ANY else self.measurement_name.get(),
+            since=datetime.datetime.now() - datetime.timedelta(days=days) if days is not None else None,
+            include_errors=self.include_errors.get(),
+            limit=self.MAX_RESULTS,
+        )
+        duration = time.perf_counter() - start
+
+        self.results_table.remove_all()
+        tree = self.results_table.get_tree()
+        for entry in entries:
+            tree.insert('', 'end', iid=entry.file_path, values=(
+                entry.chip, entry.device_id, entry.device_type, entry.measurement_name, entry.timestamp_start,
+                entry.error or "", entry.file_path))
+        self.status_text.set(f"{len(entries):d} measurements found in {1e3 * duration:.0f} ms")
+
+    def index_directory(self) -> None:
+        """Adds all data files of a directory to the catalog, in a background thread."""
+        if self._indexing_thread is not None:
+            return
+        directory = filedialog.askdirectory(parent=self.window, title="Select directory to index")
+        if not directory:
+            return
+
+        def progress(n_done, n_total):
+            self._index_progress = (n_done, n_total)
+
+        def run():
+            self._index_result = self.catalog.index_directory(directory, progress=progress)
+
+        self._index_progress = (0, 0)
+        self._indexing_thread = Thread(target=run, name="CatalogIndexer", daemon=True)
+        self._indexing_thread.start()
+        self._poll_indexing()
+
+    def _poll_indexing(self) -> None:
+        if self._indexing_thread.is_alive():
+            n_done, n_total = self._index_progress
+            self.status_text.set(f"Indexing... {n_done:d}/{n_total:d} files read")
+            self.window.after(self.POLL_INTERVAL, self._poll_indexing)
+            return
+
+        self._indexing_thread = None
+        result = self._index_result
+        self.refresh_filter_options()
+        self.search()
+        if result is None:
+            self.status_text.set("Indexing failed, see the log.")
+            return
+        self.status_text.set(f"Indexed {result.indexed:d} files in {result.duration:.1f} s, "
+                             f"{result.unchanged:d} unchanged, {len(result.failed):d} unreadable")
+        for file_path, error in result.failed.items():
+            self.logger.warning(f"Could not index {file_path}: {error}")
+
+    def import_selected(self) -> None:
+        """Imports the selected measurements into the finished measurements, in the background."""
+        file_paths = list(self.results_table.get_tree().selection())
+        if not file_paths or (self._importer is not None and not self._importer.finished):
+            return
+
+        self._importer = BulkImporter(self._exp_manager.exp, file_paths)
+        self._importer.start()
+        self._poll_import()
+
+    def _poll_import(self) -> None:
+        importer = self._importer
+        if not importer.load_parsed():
+            self.status_text.set(f"Importing... {importer.n_parsed:d}/{importer.result.n_files:d} files read")
+            self.window.after(self.POLL_INTERVAL, self._poll_import)
+            return
+
+        result = importer.result
+        self.status_text.set(f"Imported {len(result.loaded):d} measurements in {result.duration:.1f} s")
+        if result.failed:
+            for file_path, error in result.failed.items():
+                self.logger.error(f"Could not import file {file_path} due to: {error}")
+            messagebox.showerror("Load Data Error", f"Could not import {len(result.failed):d} of "
+                                                    f"{result.n_files:d} files, see the log for details.",
+                                 parent=self.window)
+        if self._on_import is not None:
+            self._on_import(result.loaded)
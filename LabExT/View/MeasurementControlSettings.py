@@ -7,11 +7,15 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 import json
 import logging
 import os.path
-from tkinter import Toplevel, Checkbutton, BooleanVar, Label, StringVar, Entry, Button
+from tkinter import Toplevel, Checkbutton, BooleanVar, Label, StringVar, Entry, Button, OptionMenu
 from typing import TYPE_CHECKING
 
 from tktooltip import ToolTip
 
+from LabExT.Experiments.ResultCompression import COMPRESSION_GZIP, COMPRESSION_NONE, COMPRESSION_ZSTD, \
+    available_compressions
+from LabExT.Exporter.LiveExport import LIVE_EXPORT_CSV, LIVE_EXPORT_HDF5, LIVE_EXPORT_PARQUET, \
+    available_live_export_formats
 from LabExT.Utils import get_configuration_file_path
 from LabExT.View.Controls.CustomFrame import CustomFrame
 
@@ -22,6 +26,30 @@ else:
     Tk = None
     ExperimentManager = None
 
+# policies for reading the instrument parameters stored with every measurement
+SNAPSHOT_ALWAYS = 'always'
+SNAPSHOT_BEFORE = 'before'
+SNAPSHOT_EVERY_N_DEVICES = 'every n devices'
+INSTRUMENT_SNAPSHOT_POLICIES = {
+    SNAPSHOT_ALWAYS: 'Read all before and after every measurement',
+    SNAPSHOT_BEFORE: 'Read all before, cached after every measurement',
+    SNAPSHOT_EVERY_N_DEVICES: 'Read all every N devices, cached otherwise',
+}
+
+# descriptions of the compressions of saved data files
+RESULT_COMPRESSIONS = {
+    COMPRESSION_NONE: 'No compression (.json)',
+    COMPRESSION_GZIP: 'gzip (.json.gz)',
+    COMPRESSION_ZSTD: 'zstd (.json.zst)',
+}
+
+# descriptions of the formats of the live export
+LIVE_EXPORT_FORMATS = {
+    LIVE_EXPORT_HDF5: 'HDF5 archive (live_export.h5)',
+    LIVE_EXPORT_PARQUET: 'Parquet dataset (measurements.parquet)',
+    LIVE_EXPORT_CSV: 'One CSV file per measurement',
+}
+
 
 class MeasurementControlSettings:
 
@@ -36,6 +64,21 @@ class MeasurementControlSettings:
         self.displayed_todo_limited: bool = False
         self.max_displayed_todo: int = 42
         self.json_indented: bool = True
+        self.pipelined_execution: bool = False
+        self.batch_by_instrument_settings: bool = False
+        self.journal_queue: bool = False
+        self.instrument_snapshot_policy: str = SNAPSHOT_ALWAYS
+        self.instrument_snapshot_interval: int = 10
+        self.lazy_values: bool = False
+        self.values_cache_mb: int = 256
+        self.journaled_autosave: bool = False
+        self.binary_values: bool = False
+        self.result_compression: str = COMPRESSION_NONE
+        self.compression_level: int = 0
+        self.measurement_catalog: bool = False
+        self.live_export: bool = False
+        self.live_export_format: str = LIVE_EXPORT_HDF5
+        self.live_export_directory: str = ''
 
         # read values from savefile if it exists
         self.update()
@@ -46,7 +89,22 @@ class MeasurementControlSettings:
             'max_finished_meas': self.max_finished_meas,
             'displayed_todo_limited': self.displayed_todo_limited,
             'max_displayed_todo': self.max_displayed_todo,
-            'json_indented': self.json_indented
+            'json_indented': self.json_indented,
+            'pipelined_execution': self.pipelined_execution,
+            'batch_by_instrument_settings': self.batch_by_instrument_settings,
+            'journal_queue': self.journal_queue,
+            'instrument_snapshot_policy': self.instrument_snapshot_policy,
+            'instrument_snapshot_interval': self.instrument_snapshot_interval,
+            'lazy_values': self.lazy_values,
+            'values_cache_mb': self.values_cache_mb,
+            'journaled_autosave': self.journaled_autosave,
+            'binary_values': self.binary_values,
+            'result_compression': self.result_compression,
+            'compression_level': self.compression_level,
+            'measurement_catalog': self.measurement_catalog,
+            'live_export': self.live_export,
+            'live_export_format': self.live_export_format,
+            'live_export_directory': self.live_export_directory
         }
 
     def save_to_file(self) -> None:
@@ -67,6 +125,23 @@ class MeasurementControlSettings:
         self.displayed_todo_limited = settings.get('displayed_todo_limited', self.displayed_todo_limited)
         self.max_displayed_todo = settings.get('max_displayed_todo', self.max_displayed_todo)
         self.json_indented = settings.get('json_indented', self.json_indented)
+        self.pipelined_execution = settings.get('pipelined_execution', self.pipelined_execution)
+        self.batch_by_instrument_settings = settings.get('batch_by_instrument_settings',
+                                                         self.batch_by_instrument_settings)
+        self.journal_queue = settings.get('journal_queue', self.journal_queue)
+        self.instrument_snapshot_policy = settings.get('instrument_snapshot_policy', self.instrument_snapshot_policy)
+        self.instrument_snapshot_interval = settings.get('instrument_snapshot_interval',
+                                                         self.instrument_snapshot_interval)
+        self.lazy_values = settings.get('lazy_values', self.lazy_values)
+        self.values_cache_mb = settings.get('values_cache_mb', self.values_cache_mb)
+        self.journaled_autosave = settings.get('journaled_autosave', self.journaled_autosave)
+        self.binary_values = settings.get('binary_values', self.binary_values)
+        self.result_compression = settings.get('result_compression', self.result_compression)
+        self.compression_level = settings.get('compression_level', self.compression_level)
+        self.measurement_catalog = settings.get('measurement_catalog', self.measurement_catalog)
+        self.live_export = settings.get('live_export', self.live_export)
+        self.live_export_format = settings.get('live_export_format', self.live_export_format)
+        self.live_export_directory = settings.get('live_export_directory', self.live_export_directory)
 
 
 class MeasurementControlSettingsView:
@@ -96,6 +171,46 @@ class MeasurementControlSettingsView:
 
         self.no_json_indentation = BooleanVar(self._root, value=not self._settings.json_indented)
 
+        self.pipelined_execution = BooleanVar(self._root, value=self._settings.pipelined_execution)
+
+        self.batch_by_instrument_settings = BooleanVar(self._root, value=self._settings.batch_by_instrument_settings)
+
+        self.journal_queue = BooleanVar(self._root, value=self._settings.journal_queue)
+
+        self.snapshot_policy = StringVar(self._root,
+                                         value=INSTRUMENT_SNAPSHOT_POLICIES[self._settings.instrument_snapshot_policy])
+        self.snapshot_policy.trace("w", self.snapshot_policy_changed)
+        self.snapshot_interval = StringVar(self._root, value=str(self._settings.instrument_snapshot_interval))
+        self.snapshot_interval_label = None
+        self.snapshot_interval_field = None
+
+        self.lazy_values = BooleanVar(self._root, value=self._settings.lazy_values)
+        self.lazy_values.trace("w", self.lazy_values_checkbox_changed)
+        self.values_cache_mb = StringVar(self._root, value=str(self._settings.values_cache_mb))
+        self.values_cache_label = None
+        self.values_cache_field = None
+
+        self.journaled_autosave = BooleanVar(self._root, value=self._settings.journaled_autosave)
+
+        self.binary_values = BooleanVar(self._root, value=self._settings.binary_values)
+
+        self.result_compression = StringVar(self._root,
+                                            value=RESULT_COMPRESSIONS[self._settings.result_compression])
+        self.result_compression.trace("w", self.result_compression_changed)
+        self.compression_level = StringVar(self._root, value=str(self._settings.compression_level))
+        self.compression_level_label = None
+        self.compression_level_field = None
+
+        self.measurement_catalog = BooleanVar(self._root, value=self._settings.measurement_catalog)
+
+        self.live_export = BooleanVar(self._root, value=self._settings.live_export)
+        self.live_export.trace("w", self.live_export_checkbox_changed)
+        self.live_export_format = StringVar(self._root, value=LIVE_EXPORT_FORMATS[self._settings.live_export_format])
+        self.live_export_directory = StringVar(self._root, value=self._settings.live_export_directory)
+        self.live_export_format_menu = None
+        self.live_export_directory_label = None
+        self.live_export_directory_field = None
+
         # draw GUI
         self.__setup__()
 
@@ -115,6 +230,45 @@ class MeasurementControlSettingsView:
             self.todo_limit_label.config(state="disabled")
             self.todo_limit_field.config(state="disabled")
 
+    def _selected_snapshot_policy(self) -> str:
+        return next(k for k, v in INSTRUMENT_SNAPSHOT_POLICIES.items() if v == self.snapshot_policy.get())
+
+    def snapshot_policy_changed(self, *args) -> None:
+        if self._selected_snapshot_policy() == SNAPSHOT_EVERY_N_DEVICES:
+            self.snapshot_interval_label.config(state="normal")
+            self.snapshot_interval_field.config(state="normal")
+        else:
+            self.snapshot_interval_label.config(state="disabled")
+            self.snapshot_interval_field.config(state="disabled")
+
+    def lazy_values_checkbox_changed(self, *args) -> None:
+        if self.lazy_values.get():
+            self.values_cache_label.config(state="normal")
+            self.values_cache_field.config(state="normal")
+        else:
+            self.values_cache_label.config(state="disabled")
+            self.values_cache_field.config(state="disabled")
+
+    def _selected_result_compression(self) -> str:
+        return next(k for k, v in RESULT_COMPRESSIONS.items() if v == self.result_compression.get())
+
+    def result_compression_changed(self, *args) -> None:
+        if self._selected_result_compression() != COMPRESSION_NONE:
+            self.compression_level_label.config(state="normal")
+            self.compression_level_field.config(state="normal")
+        else:
+            self.compression_level_label.config(state="disabled")
+            self.compression_level_field.config(state="disabled")
+
+    def _selected_live_export_format(self) -> str:
+        return next(k for k, v in LIVE_EXPORT_FORMATS.items() if v == self.live_export_format.get())
+
+    def live_export_checkbox_changed(self, *args) -> None:
+        state = "normal" if self.live_export.get() else "disabled"
+        self.live_export_format_menu.config(state=state)
+        self.live_export_directory_label.config(state=state)
+        self.live_export_directory_field.config(state=state)
+
     def _validate_entries(self) -> None:
         max_meas = int(self.measurement_limit.get())
         if max_meas <= 0:
@@ -122,6 +276,16 @@ class MeasurementControlSettingsView:
         max_todos = int(self.todo_limit.get())
         if max_todos <= 1:
             raise ValueError(f'The maximum number of ToDos displayed cannot be lower than 1. Got {max_todos}')
+        snapshot_interval = int(self.snapshot_interval.get())
+        if snapshot_interval < 1:
+            raise ValueError(f'The instrument parameters must be read at least every device. Got {snapshot_interval}')
+        values_cache_mb = int(self.values_cache_mb.get())
+        if values_cache_mb < 0:
+            raise ValueError(f'The size of the values cache cannot be negative. Got {values_cache_mb}')
+        compression_level = int(self.compression_level.get())
+        max_level = 9 if self._selected_result_compression() == COMPRESSION_GZIP else 22
+        if not 0 <= compression_level <= max_level:
+            raise ValueError(f'The compression level must be between 0 and {max_level}. Got {compression_level}')
 
     def save_and_close(self) -> None:
         self._validate_entries()
@@ -130,8 +294,25 @@ class MeasurementControlSettingsView:
         self._settings.displayed_todo_limited = self.todos_limited.get()
         self._settings.max_displayed_todo = int(self.todo_limit.get())
         self._settings.json_indented = not self.no_json_indentation.get()
+        self._settings.pipelined_execution = self.pipelined_execution.get()
+        self._settings.batch_by_instrument_settings = self.batch_by_instrument_settings.get()
+        self._settings.journal_queue = self.journal_queue.get()
+        self._settings.instrument_snapshot_policy = self._selected_snapshot_policy()
+        self._settings.instrument_snapshot_interval = int(self.snapshot_interval.get())
+        self._settings.lazy_values = self.lazy_values.get()
+        self._settings.values_cache_mb = int(self.values_cache_mb.get())
+        self._settings.journaled_autosave = self.journaled_autosave.get()
+        self._settings.binary_values = self.binary_values.get()
+        self._settings.result_compression = self._selected_result_compression()
+        self._settings.compression_level = int(self.compression_level.get())
+        self._settings.measurement_catalog = self.measurement_catalog.get()
+        self._settings.live_export = self.live_export.get()
+        self._settings.live_export_format = self._selected_live_export_format()
+        self._settings.live_export_directory = self.live_export_directory.get().strip()
 
         self._settings.save_to_file()
+        # starts or stops journaling the current queue
+        self.exp_manager.exp.update_queue_journal()
         self.exp_manager.main_window.update_tables()
         self.window.destroy()
 
@@ -139,10 +320,23 @@ class MeasurementControlSettingsView:
         """ Set up toplevel GUI """
         self.window = Toplevel(self._root)
         self.window.title("Measurement Control Settings")
-        self.window.geometry('%dx%d+%d+%d' % (500, 250, 300, 300))
+        self.window.geometry('%dx%d+%d+%d' % (500, 740, 300, 300))
         self.window.rowconfigure(3, weight=1)
         self.window.rowconfigure(4, weight=1)
         self.window.rowconfigure(5, weight=1)
+        self.window.rowconfigure(6, weight=1)
+        self.window.rowconfigure(7, weight=1)
+        self.window.rowconfigure(8, weight=1)
+        self.window.rowconfigure(9, weight=1)
+        self.window.rowconfigure(10, weight=1)
+        self.window.rowconfigure(11, weight=1)
+        self.window.rowconfigure(12, weight=1)
+        self.window.rowconfigure(13, weight=1)
+        self.window.rowconfigure(14, weight=1)
+        self.window.rowconfigure(15, weight=1)
+        self.window.rowconfigure(16, weight=1)
+        self.window.rowconfigure(17, weight=1)
+        self.window.rowconfigure(18, weight=1)
         self.window.columnconfigure(0, weight=1)
         self.window.focus_force()
 
@@ -223,6 +417,171 @@ class MeasurementControlSettingsView:
             delay=1.0
         )
 
+        pipelined_execution_button = Checkbutton(
+            settings_frame,
+            text="Pipelined ToDo execution",
+            variable=self.pipelined_execution
+        )
+        pipelined_execution_button.grid(row=5, column=0, padx=5, pady=5, sticky="w")
+        ToolTip(
+            pipelined_execution_button,
+            msg="Takes the final instrument snapshot of a finished ToDo and saves its data in the background. If "
+                "automatic stage movement is enabled, the stages already move to the next device meanwhile.\n"
+                "The saved files are identical to the ones saved in sequential execution.",
+            delay=1.0
+        )
+
+        batch_by_instrument_settings_button = Checkbutton(
+            settings_frame,
+            text="Batch ToDos by instrument settings",
+            variable=self.batch_by_instrument_settings
+        )
+        batch_by_instrument_settings_button.grid(row=6, column=0, padx=5, pady=5, sticky="w")
+        ToolTip(
+            batch_by_instrument_settings_button,
+            msg="Before running the ToDo queue, adjacent ToDos on the same device are reordered such that ToDos with "
+                "identical instrument settings are executed after each other. Saves instrument reconfigurations, "
+                "the number of instrument setting changes before and after is logged.",
+            delay=1.0
+        )
+
+        journal_queue_button = Checkbutton(
+            settings_frame,
+            text="Journal the ToDo queue to resume it after a crash",
+            variable=self.journal_queue
+        )
+        journal_queue_button.grid(row=7, column=0, padx=5, pady=5, sticky="w")
+        ToolTip(
+            journal_queue_button,
+            msg="Records the ToDo queue and the completion of every ToDo in a journal file in the LabExT settings "
+                "directory. If LabExT is closed or crashes before the queue is finished, LabExT offers to restore the "
+                "unfinished ToDos on the next start.",
+            delay=1.0
+        )
+
+        snapshot_policy_label = Label(settings_frame, text="Instrument parameters")
+        snapshot_policy_label.grid(row=8, column=0, padx=5, pady=5, sticky="w")
+        ToolTip(
+            snapshot_policy_label,
+            msg="The parameters of all instruments are stored with every measurement. Reading all of them takes "
+                "several queries per instrument. Instead, the values set by LabExT since the last full read can be "
+                "stored. Values changed at the instrument itself are only noticed at the next full read.",
+            delay=1.0
+        )
+        snapshot_policy_menu = OptionMenu(settings_frame, self.snapshot_policy, *INSTRUMENT_SNAPSHOT_POLICIES.values())
+        snapshot_policy_menu.grid(row=8, column=0, columnspan=2, padx=5, pady=5, sticky="e")
+
+        self.snapshot_interval_label = Label(settings_frame, text="Read all instrument parameters every N devices")
+        self.snapshot_interval_label.grid(row=9, column=0, padx=5, pady=5, sticky="e")
+        self.snapshot_interval_field = Entry(settings_frame, textvariable=self.snapshot_interval, width=5)
+        self.snapshot_interval_field.grid(row=9, column=1, padx=5, pady=5, sticky="w")
+        self.snapshot_policy_changed()
+
+        lazy_values_button = Checkbutton(
+            settings_frame,
+            text="Keep the values of finished measurements on disk",
+            variable=self.lazy_values
+        )
+        lazy_values_button.grid(row=10, column=0, padx=5, pady=5, sticky="w")
+        ToolTip(
+            lazy_values_button,
+            msg="Only the metadata of finished and imported measurements stays in memory. Their values are written "
+                "to a temporary file and read again when they are plotted or exported. The most recently read values "
+                "are kept in a cache of the given size.",
+            delay=1.0
+        )
+
+        self.values_cache_label = Label(settings_frame, text="Size of the values cache in MB")
+        self.values_cache_label.grid(row=11, column=0, padx=5, pady=5, sticky="e")
+        self.values_cache_field = Entry(settings_frame, textvariable=self.values_cache_mb, width=5)
+        self.values_cache_field.grid(row=11, column=1, padx=5, pady=5, sticky="w")
+        self.lazy_values_checkbox_changed()
+
+        journaled_autosave_button = Checkbutton(
+            settings_frame,
+            text="Autosave running measurements to a journal",
+            variable=self.journaled_autosave
+        )
+        journaled_autosave_button.grid(row=12, column=0, padx=5, pady=5, sticky="w")
+        ToolTip(
+            journaled_autosave_button,
+            msg="Instead of rewriting the whole data file of a running measurement, only new and changed values are "
+                "appended to a journal file next to it, once per second from a background thread. The data file is "
+                "written once the measurement finished. The write amplification of every measurement is logged.",
+            delay=1.0
+        )
+
+        binary_values_button = Checkbutton(
+            settings_frame,
+            text="Save numeric values as binary .npy files",
+            variable=self.binary_values
+        )
+        binary_values_button.grid(row=13, column=0, padx=5, pady=5, sticky="w")
+        ToolTip(
+            binary_values_button,
+            msg="Every numeric values vector of a measurement is saved to a .npy file in the folder "
+                "'<data file name>_values' next to the data file, which only references it. Such files are several "
+                "times smaller and are loaded without parsing, but can only be read by LabExT or numpy.",
+            delay=1.0
+        )
+
+        result_compression_label = Label(settings_frame, text="Data file compression")
+        result_compression_label.grid(row=14, column=0, padx=5, pady=5, sticky="w")
+        ToolTip(
+            result_compression_label,
+            msg="Compresses the data files of finished measurements while they are saved. Compressed files are "
+                "several times smaller and are imported and exported like uncompressed ones. zstd compresses faster "
+                "than gzip, but requires the zstandard package. The compression ratio and the time needed to save "
+                "every file are logged.",
+            delay=1.0
+        )
+        result_compression_menu = OptionMenu(settings_frame, self.result_compression,
+                                             *[RESULT_COMPRESSIONS[c] for c in available_compressions()])
+        result_compression_menu.grid(row=14, column=0, columnspan=2, padx=5, pady=5, sticky="e")
+
+        self.compression_level_label = Label(settings_frame, text="Compression level (0 for the default)")
+        self.compression_level_label.grid(row=15, column=0, padx=5, pady=5, sticky="e")
+        self.compression_level_field = Entry(settings_frame, textvariable=self.compression_level, width=5)
+        self.compression_level_field.grid(row=15, column=1, padx=5, pady=5, sticky="w")
+        self.result_compression_changed()
+
+        measurement_catalog_button = Checkbutton(
+            settings_frame,
+            text="Add saved measurements to the measurement catalog",
+            variable=self.measurement_catalog
+        )
+        measurement_catalog_button.grid(row=16, column=0, padx=5, pady=5, sticky="w")
+        ToolTip(
+            measurement_catalog_button,
+            msg="Adds the chip, device, measurement name, timestamps, settings, error state and value ranges of every "
+                "saved measurement to an SQLite database in the LabExT settings directory. Use 'File -> Search "
+                "Measurement Catalog' to find and import measurements without opening all data files.",
+            delay=1.0
+        )
+
+        live_export_button = Checkbutton(
+            settings_frame,
+            text="Export finished measurements live",
+            variable=self.live_export
+        )
+        live_export_button.grid(row=17, column=0, padx=5, pady=5, sticky="w")
+        ToolTip(
+            live_export_button,
+            msg="Appends every finished measurement to the selected export in a background thread while the ToDo "
+                "queue is running, such that the analysis can start before the queue is finished. If the export "
+                "falls behind, the queue waits for it. The Parquet dataset requires the pyarrow package.",
+            delay=1.0
+        )
+        self.live_export_format_menu = OptionMenu(settings_frame, self.live_export_format,
+                                                  *[LIVE_EXPORT_FORMATS[f] for f in available_live_export_formats()])
+        self.live_export_format_menu.grid(row=17, column=0, columnspan=2, padx=5, pady=5, sticky="e")
+
+        self.live_export_directory_label = Label(settings_frame, text="Export directory (empty for the output path)")
+        self.live_export_directory_label.grid(row=18, column=0, padx=5, pady=5, sticky="e")
+        self.live_export_directory_field = Entry(settings_frame, textvariable=self.live_export_directory, width=20)
+        self.live_export_directory_field.grid(row=18, column=1, padx=5, pady=5, sticky="w")
+        self.live_export_checkbox_changed()
+
         cancel_button = Button(self.window, text="Cancel", command=self.window.destroy)
         cancel_button.grid(row=2, column=0, padx=5, pady=5)
 
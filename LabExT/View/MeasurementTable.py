@@ -106,8 +106,7 @@ class MeasurementTable(CustomFrame):
             self._tree.column(col_name, width=int(self._total_col_width * col_width_pct))
 
         # subscribe to changes of the measurements list
-        self._measurements.item_added.append(self.regenerate)
-        self._measurements.item_removed.append(self.regenerate)
+        self._measurements.items_changed.append(self.regenerate)
         self._measurements.on_clear.append(self.regenerate)
 
         # run tooltip callback on mouse motion
@@ -128,8 +127,9 @@ class MeasurementTable(CustomFrame):
         Tells the tree-view to update its data from the measurements list.
         """
 
-        leftover_hashes = [k for k in self._hashes_of_meas.keys()]
+        leftover_hashes = set(self._hashes_of_meas.keys())
         new_hashes = []
+        device_records = set(self._tree.get_children())
 
         for meas in self._measurements:
 
@@ -138,7 +138,7 @@ class MeasurementTable(CustomFrame):
             if meas_hash in self._hashes_of_meas.keys():
                 # measurement already present in tree, simply update values
                 self._tree.item(meas_hash, values=self.get_meas_values(meas))
-                leftover_hashes.remove(meas_hash)
+                leftover_hashes.discard(meas_hash)
                 continue
             else:
                 # we will add the measurement to the table, save the hash to the list
@@ -148,8 +148,9 @@ class MeasurementTable(CustomFrame):
             dev_rec = str(meas["device"]["type"]) + \
                       " - ID " + str(meas["device"]["id"]) + \
                       " - chip " + str(meas["chip"]["name"])
-            if dev_rec not in self._tree.get_children():
+            if dev_rec not in device_records:
                 dev_rec = self._tree.insert(parent="", index="end", iid=dev_rec, text=dev_rec, values=())
+                device_records.add(dev_rec)
                 # expand device node to see newly added measurement lines
                 self._tree.item(dev_rec, open=True)
 
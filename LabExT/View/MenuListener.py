@@ -6,18 +6,20 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 import datetime
-import json
 import logging
 import sys
 import os
 import webbrowser
-from threading import Thread
 from tkinter import filedialog, messagebox, Toplevel, Label, Frame, font
 from typing import TYPE_CHECKING
 
+from LabExT.Experiments.BulkImport import BulkImporter
+from LabExT.Experiments.DirectoryWatcher import DirectoryWatcher
+from LabExT.Experiments.ResultCompression import RESULT_FILE_TYPES
 from LabExT.Utils import get_author_list, try_to_lift_window
 from LabExT.View.AddonSettingsDialog import AddonSettingsDialog
 from LabExT.View.Controls.DriverPathDialog import DriverPathDialog
+from LabExT.View.MeasurementCatalogWindow import MeasurementCatalogWindow
 from LabExT.View.MeasurementControlSettings import MeasurementControlSettingsView
 from LabExT.View.ExperimentWizard import ExperimentWizard
 from LabExT.Exporter.ExportWizard import ExportWizard
@@ -26,6 +28,7 @@ from LabExT.View.InstrumentConnectionDebugger import InstrumentConnectionDebugge
 from LabExT.View.LiveViewer.LiveViewerController import LiveViewerController
 from LabExT.View.ProgressBar.ProgressBar import ProgressBar
 from LabExT.View.SearchForPeakPlotsWindow import SearchForPeakPlotsWindow
+from LabExT.View.ThroughputPanel import ThroughputPanel
 from LabExT.View.Movement import (
     CalibrationWizard,
     MoverWizard,
@@ -45,6 +48,11 @@ else:
 class MListener:
     """Listens to the events triggered by clicks on the menu bar."""
 
+    # interval in milliseconds in which the files parsed by a running data import are added to the measurements
+    IMPORT_POLL_INTERVAL = 100
+    # interval in milliseconds in which new files in watched directories are added to the measurements
+    WATCH_POLL_INTERVAL = 1000
+
     def __init__(self, experiment_manager: ExperimentManager, root):
         """Constructor.
 
@@ -69,6 +77,8 @@ class MListener:
         self.stage_device_toplevel = None
         self.sfpp_toplevel = None
         self.extra_plots_toplevel = None
+        self.throughput_panel_toplevel = None
+        self.measurement_catalog_toplevel = None
         self.live_viewer_toplevel = None
         self.instrument_conn_debugger_toplevel = None
         self.addon_settings_dialog_toplevel = None
@@ -76,7 +86,8 @@ class MListener:
         self.measurement_control_settings_toplevel = None
         self.about_toplevel = None
         self.pgb = None
-        self.import_done = False
+        self.bulk_importer = None
+        self.directory_watcher = None
         self.stage_setup_toplevel = None
         self.mover_setup_toplevel = None
         self.calibration_setup_toplevel = None
@@ -103,7 +114,7 @@ class MListener:
 
         filepaths = [
             *filedialog.askopenfilenames(
-                title="Select file for import", filetypes=((".json data", "*.json"), ("all files", "*.*"))
+                title="Select file for import", filetypes=RESULT_FILE_TYPES
             )
         ]
 
@@ -112,33 +123,69 @@ class MListener:
             return
         self.logger.debug(f"Files to import: {filepaths}")
 
-        self.import_done = False
-        self.pgb = ProgressBar(self._root, text="Importing files ...")
+        if self.bulk_importer is not None and not self.bulk_importer.finished:
+            messagebox.showinfo(title="Load Data", message="Wait until the running data import finished.")
+            return
 
-        Thread(target=self.import_runner(filepaths=filepaths)).start()
-        while not self.import_done:
-            self.pgb.update_idletasks()
-            self.pgb.update()
+        self.pgb = ProgressBar(self._root, text="Importing files ...")
+        self.bulk_importer = BulkImporter(self._experiment_manager.exp, filepaths)
+        self.bulk_importer.start()
+        self._poll_import(self.bulk_importer)
+
+    def _poll_import(self, importer: BulkImporter) -> None:
+        """Adds the files parsed so far to the measurements, until the import of all files finished."""
+        if not importer.load_parsed():
+            self.pgb.text.set(f"Importing files ... {importer.n_parsed:d}/{importer.result.n_files:d}")
+            self._root.after(self.IMPORT_POLL_INTERVAL, self._poll_import, importer)
+            return
 
         self.pgb.destroy()
+        result = importer.result
+        if result.failed:
+            for file_name, error in result.failed.items():
+                self.logger.error(f"Could not import file {file_name} due to: {error}")
+            messagebox.showerror(
+                title="Load Data Error",
+                message=f"Could not import {len(result.failed):d} of {result.n_files:d} files, "
+                        f"see the log for details.")
+        self.logger.debug(f"Finished data import of files: {result.loaded}")
+
+    def client_watch_directory(self) -> None:
+        """Asks for a directory and imports all data files which are created in it from now on."""
+        directory = filedialog.askdirectory(title="Select directory to watch for new data files")
+        if not directory:
+            return
 
-    def import_runner(self, filepaths: list[str]) -> None:
-        """Load measurements and append to current experiment's measurement list"""
-        loaded_files = []
-        for file_name in filepaths:
-            try:
-                with open(file_name) as f:
-                    raw_data = json.load(f)
-                self._experiment_manager.exp.load_measurement_dataset(raw_data, file_name)
-                loaded_files.append(file_name)
-            except Exception as exc:
-                msg = f"Could not import file {file_name} due to: {repr(exc)}"
-                self.logger.error(msg)
-                messagebox.showerror(title="Load Data Error", message=msg)
-                continue
-
-        self.logger.info(f"Finished data import of files: {loaded_files}")
-        self.import_done = True
+        if self.directory_watcher is None:
+            self.directory_watcher = DirectoryWatcher(self._experiment_manager.exp)
+        self.directory_watcher.add_directory(directory)
+        if not self.directory_watcher.running:
+            self.directory_watcher.start()
+            self._poll_directory_watcher()
+
+    def client_stop_watching_directories(self) -> None:
+        """Stops importing new data files from the watched directories."""
+        if self.directory_watcher is None:
+            return
+        self.directory_watcher.stop()
+        self.directory_watcher.load_new()
+        self.logger.info(f"Stopped watching {', '.join(self.directory_watcher.directories)}.")
+        self.directory_watcher = None
+
+    def _poll_directory_watcher(self) -> None:
+        """Adds the new files found in the watched directories to the measurements, while they are watched."""
+        if self.directory_watcher is None or not self.directory_watcher.running:
+            return
+        self.directory_watcher.load_new()
+        self._root.after(self.WATCH_POLL_INTERVAL, self._poll_directory_watcher)
+
+    def client_measurement_catalog(self) -> None:
+        """Opens the search of the measurement catalog, to find and import saved measurements."""
+        if try_to_lift_window(self.measurement_catalog_toplevel):
+            return
+
+        catalog_window = MeasurementCatalogWindow(self._root, self._experiment_manager)
+        self.measurement_catalog_toplevel = catalog_window.window
 
     def client_import_chip(self):
 
@@ -269,6 +316,14 @@ class MListener:
         main_window.extra_plots = ExtraPlots(meas_table, main_window.view.frame)
         self.extra_plots_toplevel = main_window.extra_plots.cur_window
 
+    def client_throughput_panel(self):
+        """Opens the live panel of the measurement throughput and the time spent per phase."""
+        if try_to_lift_window(self.throughput_panel_toplevel):
+            return
+
+        throughput_panel = ThroughputPanel(self._root, self._experiment_manager)
+        self.throughput_panel_toplevel = throughput_panel.window
+
     def client_live_view(self):
         """Called when user wants to start live view. Creates a new instance of LiveViewer, which takes care of
         settings, instruments and plotting.
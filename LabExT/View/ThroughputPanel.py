@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import logging
+from tkinter import Toplevel, Label, Button, Frame, StringVar, filedialog, messagebox
+from typing import TYPE_CHECKING
+
+from LabExT.View.Controls.CustomFrame import CustomFrame
+from LabExT.View.Controls.CustomTable import CustomTable
+
+if TYPE_CHECKING:
+    from tkinter import Tk
+    from LabExT.ExperimentManager import ExperimentManager
+else:
+    Tk = None
+    ExperimentManager = None
+
+
+class ThroughputPanel:
+    """
+    Live view of the measurement throughput and of the time spent in each phase of the ToDo execution.
+    """
+
+    # refresh interval of the panel in milliseconds
+    REFRESH_INTERVAL = 1000
+
+    # the percentiles of the durations are only computed when exporting the statistics
+    COLUMNS = ('Phase', 'ToDos', 'mean [s]', 'total [s]', 'share [%]')
+
+    def __init__(self, parent: Tk, experiment_manager: ExperimentManager):
+        self._root = parent
+        self._exp_manager = experiment_manager
+        self.logger = logging.getLogger()
+
+        self.window = None
+        self.phase_table = None
+        self._after_id = None
+
+        self.todos_text = StringVar(self._root, value="")
+        self.todos_per_hour_text = StringVar(self._root, value="")
+        self.devices_per_hour_text = StringVar(self._root, value="")
+
+        self.__setup__()
+        self.refresh()
+
+    @property
+    def statistics(self):
+        return self._exp_manager.exp.throughput_statistics
+
+    def __setup__(self):
+        """Set up toplevel GUI"""
+        self.window = Toplevel(self._root)
+        self.window.title("Throughput Statistics")
+        self.window.geometry('%dx%d+%d+%d' % (750, 420, 300, 300))
+        self.window.rowconfigure(1, weight=1)
+        self.window.columnconfigure(0, weight=1)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.focus_force()
+
+        throughput_frame = CustomFrame(self.window)
+        throughput_frame.title = " Throughput "
+        throughput_frame.grid(row=0, column=0, padx=5, pady=5, sticky='nswe')
+        for column, (label, variable) in enumerate([("executed ToDos:", self.todos_text),
+                                                    ("ToDos per hour:", self.todos_per_hour_text),
+                                                    ("devices per hour:", self.devices_per_hour_text)]):
+            throughput_frame.columnconfigure(2 * column + 1, weight=1)
+            Label(throughput_frame, text=label).grid(row=0, column=2 * column, padx=5, pady=5, sticky='e')
+            Label(throughput_frame, textvariable=variable).grid(row=0, column=2 * column + 1, padx=5, pady=5,
+                                                                sticky='w')
+
+        phases_frame = CustomFrame(self.window)
+        phases_frame.title = " Time per Phase and ToDo "
+        phases_frame.grid(row=1, column=0, padx=5, pady=5, sticky='nswe')
+        phases_frame.columnconfigure(0, weight=1)
+        phases_frame.rowconfigure(0, weight=1)
+        # custom table inserts itself into the parent frame
+        self.phase_table = CustomTable(parent=phases_frame, columns=self.COLUMNS, rows=[], col_width=80,
+                                       selectmode='none', sortable=False)
+
+        buttons_frame = Frame(self.window)
+        buttons_frame.grid(row=2, column=0, padx=5, pady=5, sticky='we')
+        Button(buttons_frame, text="Export CSV", command=self.export_csv, width=15).grid(
+            row=0, column=0, padx=5, pady=5)
+        Button(buttons_frame, text="Export JSON", command=self.export_json, width=15).grid(
+            row=0, column=1, padx=5, pady=5)
+        Button(buttons_frame, text="Reset", command=self.reset, width=15).grid(
+            row=0, column=2, padx=5, pady=5)
+
+    def refresh(self) -> None:
+        """Updates the panel with the current statistics and schedules the next update."""
+        summary = self.statistics.summary()
+
+        self.todos_text.set(f"{summary['todos']:d} on {summary['devices']:d} devices")
+        self.todos_per_hour_text.set(f"{summary['todos per hour']:.1f}")
+        self.devices_per_hour_text.set(f"{summary['devices per hour']:.1f}")
+
+        total_time = sum(p["total"] for p in summary["phases"].values())
+        self.phase_table.remove_all()
+        for name, phase in summary["phases"].items():
+            share = 100.0 * phase["total"] / total_time if total_time > 0 else 0.0
+            self.phase_table.add_item((name, phase["count"], f"{phase['mean']:.3f}", f"{phase['total']:.1f}",
+                                       f"{share:.1f}"))
+
+        self._after_id = self.window.after(self.REFRESH_INTERVAL, self.refresh)
+
+    def export_csv(self) -> None:
+        file_path = filedialog.asksaveasfilename(parent=self.window, title="Export phase timing as CSV",
+                                                 defaultextension=".csv", filetypes=[("CSV file", "*.csv")])
+        if file_path:
+            self.statistics.export_csv(file_path)
+            self.logger.info(f"Exported phase timing of {len(self.statistics):d} ToDos to {file_path}.")
+
+    def export_json(self) -> None:
+        file_path = filedialog.asksaveasfilename(parent=self.window, title="Export phase timing as JSON",
+                                                 defaultextension=".json", filetypes=[("JSON file", "*.json")])
+        if file_path:
+            self.statistics.export_json(file_path)
+            self.logger.info(f"Exported phase timing of {len(self.statistics):d} ToDos to {file_path}.")
+
+    def reset(self) -> None:
+        if messagebox.askyesno("Reset Throughput Statistics",
+                               "Do you want to discard the timing of all executed ToDos?", parent=self.window):
+            self.statistics.reset()
+
+    def close(self) -> None:
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+        self.window.destroy()
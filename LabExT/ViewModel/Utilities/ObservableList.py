@@ -6,7 +6,8 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 from collections.abc import Iterator
-from typing import MutableSequence, Generic, TypeVar
+from contextlib import contextmanager
+from typing import Iterable, MutableSequence, Generic, TypeVar
 
 _T = TypeVar("_T")
 
@@ -20,6 +21,9 @@ class ObservableList(list, MutableSequence[_T], Generic[_T]):
         Callback list for add events.
     item_removed : list
         Callback list for remove events.
+    items_changed : list
+        Callback list for add and remove events, called with the list of added and the list of removed items. Within
+        a `batch_changes()` block, these callbacks are called only once for all changes.
     on_clear : list
         Callback list for clear events.
     """
@@ -37,8 +41,14 @@ class ObservableList(list, MutableSequence[_T], Generic[_T]):
         super(ObservableList, self).__init__(*args, **kwargs)
         self.item_added = list()
         self.item_removed = list()
+        self.items_changed = list()
         self.on_clear = list()
 
+        # nesting depth of batch_changes() blocks and the changes collected within
+        self._batch_depth = 0
+        self._batched_added = list()
+        self._batched_removed = list()
+
     def append(self, item):
         """Append item to the list and trigger notification.
 
@@ -48,10 +58,7 @@ class ObservableList(list, MutableSequence[_T], Generic[_T]):
             Item to be added to the list.
         """
         super(ObservableList, self).append(item)
-
-        # execute all subscribed callback methods
-        for callback in self.item_added:
-            callback(item)
+        self._notify(added=[item], removed=[])
 
     def remove(self, item):
         """Remove item from the list and trigger notification.
@@ -62,10 +69,73 @@ class ObservableList(list, MutableSequence[_T], Generic[_T]):
             Item to be removed from the list.
         """
         super(ObservableList, self).remove(item)
+        self._notify(added=[], removed=[item])
 
-        # execute all subscribed callback methods
-        for callback in self.item_removed:
-            callback(item)
+    def remove_items(self, items: Iterable[_T]):
+        """Remove several items at once and trigger notifications.
+
+        Unlike `remove`, the items are compared by identity, which makes removing many items linear in the length of
+        the list.
+
+        Parameters
+        ----------
+        items : iterable
+            Items to be removed from the list. Items not in the list are ignored.
+        """
+        ids_to_remove = {id(item) for item in items}
+        if not ids_to_remove:
+            return
+
+        if len(ids_to_remove) == 1:
+            # a single item, e.g. the oldest one, is usually found close to the beginning
+            removed = []
+            for idx, item in enumerate(self):
+                if id(item) in ids_to_remove:
+                    super(ObservableList, self).__delitem__(idx)
+                    removed.append(item)
+                    break
+        else:
+            removed = [item for item in self if id(item) in ids_to_remove]
+            kept = [item for item in self if id(item) not in ids_to_remove]
+            super(ObservableList, self).__setitem__(slice(None), kept)
+
+        if removed:
+            self._notify(added=[], removed=removed)
+
+    @contextmanager
+    def batch_changes(self):
+        """Context manager deferring all add and remove notifications until the end of the block.
+
+        The item_added and item_removed callbacks are then called once per item, the items_changed callbacks are called
+        once with all added and removed items.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                added, removed = self._batched_added, self._batched_removed
+                self._batched_added, self._batched_removed = list(), list()
+                self._notify(added, removed)
+
+    def _notify(self, added, removed):
+        """Execute all subscribed callback methods, or collect the changes if in a batch."""
+        if self._batch_depth > 0:
+            self._batched_added.extend(added)
+            self._batched_removed.extend(removed)
+            return
+        if not added and not removed:
+            return
+
+        for item in added:
+            for callback in self.item_added:
+                callback(item)
+        for item in removed:
+            for callback in self.item_removed:
+                callback(item)
+        for callback in self.items_changed:
+            callback(added, removed)
 
     def clear(self):
         """Remove all items from the list and trigger notification."""
@@ -77,3 +147,55 @@ class ObservableList(list, MutableSequence[_T], Generic[_T]):
 
     def __iter__(self) -> Iterator[_T]:
         return super().__iter__()
+
+
+class ObservableQueue(ObservableList[_T]):
+    """ObservableList which notifies about every change of its content.
+
+    Besides append, remove and remove_items, also insert, extend, pop, reverse, sort and item and slice assignment and
+    deletion trigger the item_added, item_removed and items_changed callbacks. Reordering items is reported as
+    removing and adding them again. Used for the ToDo queue, where observers need to know about every change, unlike
+    the list of finished measurements, which is extended silently.
+    """
+
+    def insert(self, index, item):
+        super(ObservableQueue, self).insert(index, item)
+        self._notify(added=[item], removed=[])
+
+    def extend(self, items):
+        items = list(items)
+        super(ObservableQueue, self).extend(items)
+        self._notify(added=items, removed=[])
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def pop(self, index=-1):
+        item = super(ObservableQueue, self).pop(index)
+        self._notify(added=[], removed=[item])
+        return item
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+            removed = self[index]
+            added = value
+        else:
+            removed = [self[index]]
+            added = [value]
+        super(ObservableQueue, self).__setitem__(index, value)
+        self._notify(added=added, removed=removed)
+
+    def __delitem__(self, index):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        super(ObservableQueue, self).__delitem__(index)
+        self._notify(added=[], removed=removed)
+
+    def reverse(self):
+        super(ObservableQueue, self).reverse()
+        self._notify(added=list(self), removed=list(self))
+
+    def sort(self, *args, **kwargs):
+        super(ObservableQueue, self).sort(*args, **kwargs)
+        self._notify(added=list(self), removed=list(self))
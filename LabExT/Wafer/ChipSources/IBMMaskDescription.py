@@ -6,6 +6,7 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 import json
+import logging
 from tkinter import TOP, X, Button, messagebox
 from typing import TYPE_CHECKING
 
@@ -78,43 +79,50 @@ class IBMMaskDescription(ChipSourceStep):
             return
 
         self.wizard.logger.info("Loading device information from JSON based description file.")
+        devices = self._decode_ibm_mask_description(raw_data, self.wizard.logger)
+
+        self.submit_chip_info(name=chip_name, path=file_path, devices=devices)
+
+    @staticmethod
+    def _decode_ibm_mask_description(raw_data: list, logger: logging.Logger) -> list:
+        """Creates the devices from the decoded content of an IBM mask description json file."""
         devices = []
         for device in raw_data:
             # pop parameters from device's dictionary
             try:
                 identifier = str(device.pop("ID"))
             except KeyError:
-                self.wizard.logger.debug("Could not find ID in current device, skipping...")
+                logger.debug("Could not find ID in current device, skipping...")
                 continue
             try:
                 inputs = device.pop("Inputs")
                 if len(inputs) > 1:
-                    self.wizard.logger.warning(
+                    logger.warning(
                         "Found multiple input coordinates on device with ID: "
                         + "{:s}, ignoring all but the first one.".format(str(identifier))
                     )
                 inputs = inputs[0]
             except KeyError:
-                self.wizard.logger.debug("Could not find any inputs, set to [0,0]")
+                logger.debug("Could not find any inputs, set to [0,0]")
                 inputs = [0.0, 0.0]
             try:
                 outputs = device.pop("Outputs")
                 if len(outputs) > 1:
-                    self.wizard.logger.warning(
+                    logger.warning(
                         "Found multiple output coordinates on device with ID: "
                         + "{:s}, ignoring all but the first one.".format(str(identifier))
                     )
                 outputs = outputs[0]
             except KeyError:
-                self.wizard.logger.debug("Could not find any outputs, set to [0,0]")
+                logger.debug("Could not find any outputs, set to [0,0]")
                 outputs = [0.0, 0.0]
             try:
                 _type = str(device.pop("Type"))
             except KeyError:
-                self.wizard.logger.debug("Could not find type, set to default")
+                logger.debug("Could not find type, set to default")
                 _type = "No type"
 
             dev = Device(id=identifier, in_position=inputs, out_position=outputs, type=_type, parameters=device)
             devices.append(dev)
 
-        self.submit_chip_info(name=chip_name, path=file_path, devices=devices)
+        return devices
@@ -5,9 +5,17 @@ LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
 This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
 
 Entry point of LabExT for setuptools.
+
+`python -m LabExT run ...` executes a ToDo queue without GUI, see LabExT/Headless.py.
 """
 
-from LabExT.Main import main
+import sys
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'run':
+        # dispatch before LabExT.Main is imported, the headless runner never creates a Tk window
+        from LabExT.Headless import main as headless_main
+        sys.exit(headless_main(sys.argv[2:]))
+
+    from LabExT.Main import main
     main()